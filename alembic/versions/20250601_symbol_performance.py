@@ -0,0 +1,41 @@
+"""create symbol_performance table
+
+Revision ID: 20250601_symbol_performance
+Revises: 5def40f0ac62
+Create Date: 2025-06-01 09:00:00 HST
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = '20250601_symbol_performance'
+down_revision = '5def40f0ac62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # tradeside already exists (trades.side) – reuse it
+    side = sa.Enum('BUY', 'SELL', name='tradeside').with_variant(
+        postgresql.ENUM('BUY', 'SELL', name='tradeside', create_type=False), 'postgresql'
+    )
+    op.create_table(
+        'symbol_performance',
+        sa.Column('id',           sa.Integer(), primary_key=True),
+        sa.Column('symbol',       sa.String(20), nullable=False),
+        sa.Column('side',         side, nullable=False),
+        sa.Column('bucket',       sa.Date(), nullable=False),
+        sa.Column('trades',       sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('wins',         sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('pnl_sum',      sa.Float(), nullable=False, server_default='0'),
+        sa.Column('win_pnl_sum',  sa.Float(), nullable=False, server_default='0'),
+        sa.Column('loss_pnl_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('updated_at',   sa.DateTime(), server_default=sa.text('now()')),
+        sa.UniqueConstraint('symbol', 'side', 'bucket', name='uix_symbol_side_bucket'),
+    )
+    # Backfilled by `python performance_stats.py --rebuild`, or on first use until the
+    # '__backfilled__' marker row written by the rebuild exists
+
+
+def downgrade() -> None:
+    op.drop_table('symbol_performance')
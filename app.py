@@ -4,7 +4,9 @@
 import logging
 import enum
 import json
+import multiprocessing
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Union
 
@@ -386,6 +388,36 @@ class Trade(db.Model):
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
 
+class SymbolPerformance(db.Model):
+    """Closed-trade aggregates per symbol, side and close day (see performance_stats.py)"""
+    __tablename__ = "symbol_performance"
+
+    id = db.Column(db.Integer, primary_key=True)
+    symbol = db.Column(db.String(20), nullable=False)
+    side = db.Column(db.Enum(TradeSide), nullable=False)
+    bucket = db.Column(db.Date, nullable=False)          # close day; 1970-01-01 = unknown
+    trades = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    pnl_sum = db.Column(db.Float, nullable=False, default=0.0)
+    win_pnl_sum = db.Column(db.Float, nullable=False, default=0.0)
+    loss_pnl_sum = db.Column(db.Float, nullable=False, default=0.0)
+    updated_at = db.Column(db.DateTime, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (db.UniqueConstraint('symbol', 'side', 'bucket', name='uix_symbol_side_bucket'),)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "side": self.side.value,
+            "bucket": self.bucket.isoformat(),
+            "trades": self.trades,
+            "wins": self.wins,
+            "losses": self.trades - self.wins,
+            "pnl_sum": self.pnl_sum,
+            "win_pnl_sum": self.win_pnl_sum,
+            "loss_pnl_sum": self.loss_pnl_sum,
+        }
+
 class Log(db.Model):
     """System logs"""
     __tablename__ = "logs"
@@ -1169,11 +1201,30 @@ def get_mt5_heartbeat():
     })
 
 # ---- Chart API Routes ----
+def _cached_chart_response(symbol, timeframe='H1', count=100, **annotations):
+    """Serve a chart from the content-addressed cache with ETag / Cache-Control"""
+    from chart_cache import chart_cache
+
+    resolved = chart_cache.resolve(symbol, timeframe, count, **annotations)
+    if resolved["key"] is None:
+        return jsonify({"error": "Failed to generate chart"}), 500
+
+    if request.if_none_match.contains(resolved["key"]):
+        response = make_response("", 304)
+    else:
+        chart_bytes = chart_cache.load(resolved)
+        if not chart_bytes:
+            return jsonify({"error": "Failed to generate chart"}), 500
+        response = make_response(chart_bytes)
+        response.headers.set('Content-Type', 'image/png')
+
+    response.set_etag(resolved["key"])
+    response.headers.set('Cache-Control', f"private, max-age={resolved['max_age']}")
+    return response
+
 @app.route('/api/charts/<symbol>', methods=['GET'])
 def get_chart(symbol):
     """Generate and return a technical chart for a symbol"""
-    from chart_utils import generate_chart_bytes
-
     # Get parameters from query string
     timeframe = request.args.get('timeframe', 'H1')
     count = request.args.get('count', 100, type=int)
@@ -1190,25 +1241,17 @@ def get_chart(symbol):
     if entry_time and entry_price:
         entry_point = (entry_time, entry_price)
 
-    # Generate chart as bytes
-    chart_bytes = generate_chart_bytes(
-        symbol=symbol,
-        timeframe=timeframe,
-        count=count,
+    # Served from the chart cache; rendered in the pool only on a miss
+    return _cached_chart_response(
+        symbol,
+        timeframe,
+        count,
         entry_point=entry_point,
         stop_loss=stop_loss,
         take_profit=take_profit,
         result=result
     )
 
-    if not chart_bytes:
-        return jsonify({"error": "Failed to generate chart"}), 500
-
-    # Create response with chart image
-    response = make_response(chart_bytes)
-    response.headers.set('Content-Type', 'image/png')
-    return response
-
 @app.route('/api/signals/<int:signal_id>/chart', methods=['GET'])
 def get_signal_chart(signal_id):
     """Get the chart for a specific signal"""
@@ -1224,41 +1267,24 @@ def get_signal_chart(signal_id):
         timeframe = context.get('timeframe', 'H1')  # Default to H1 if not found
         
         if image_path and os.path.exists(image_path):
-            # If we have the original chart image, return it
-            with open(image_path, 'rb') as f:
-                chart_bytes = f.read()
-            
-            # Create response with chart image
-            response = make_response(chart_bytes)
-            response.headers.set('Content-Type', 'image/png')
+            # The original chart image never changes – let the browser keep it
+            response = send_file(image_path, mimetype='image/png', conditional=True, etag=True)
+            response.headers.set('Cache-Control', 'private, max-age=86400')
             return response
         else:
             # If no original image or it doesn't exist, generate a new one
-            from chart_utils import generate_chart_bytes
-            
-            # Convert signal data for chart generation
-            symbol = signal.symbol
             entry_point = (signal.created_at.strftime('%Y-%m-%d %H:%M:%S'), signal.entry) if signal.entry else None
             
-            # Generate chart
-            chart_bytes = generate_chart_bytes(
-                symbol=symbol,
-                timeframe=timeframe,
-                count=100,
+            return _cached_chart_response(
+                signal.symbol,
+                timeframe,
+                100,
                 entry_point=entry_point,
                 stop_loss=signal.sl,
                 take_profit=signal.tp,
                 signal_action=signal.action.name if signal.action else None
             )
             
-            if not chart_bytes:
-                return jsonify({"error": "Failed to generate chart"}), 500
-                
-            # Create response with chart image
-            response = make_response(chart_bytes)
-            response.headers.set('Content-Type', 'image/png')
-            return response
-            
     except Exception as e:
         logger.error(f"Error getting chart for signal {signal_id}: {str(e)}")
         return jsonify({"error": f"Error getting chart: {str(e)}"}), 500
@@ -1266,7 +1292,7 @@ def get_signal_chart(signal_id):
 @app.route('/api/charts/download/<symbol>', methods=['GET'])
 def download_chart(symbol):
     """Generate and download a technical chart for a symbol"""
-    from chart_utils import generate_chart
+    from chart_render_service import render_service
 
     # Get parameters from query string
     timeframe = request.args.get('timeframe', 'H1')
@@ -1284,8 +1310,8 @@ def download_chart(symbol):
     if entry_time and entry_price:
         entry_point = (entry_time, entry_price)
 
-    # Generate and save chart
-    chart_path = generate_chart(
+    # Generate and save chart in the render pool
+    chart_path = render_service.render_path(
         symbol=symbol,
         timeframe=timeframe,
         count=count,
@@ -1360,58 +1386,66 @@ def manual_capture():
 def get_capture_status():
     """Get status of capture and analysis jobs"""
     try:
-        import redis
-        try:
-            redis_client = redis.Redis(
-                host=os.environ.get('REDIS_HOST', 'localhost'),
-                port=int(os.environ.get('REDIS_PORT', 6379)),
-                db=int(os.environ.get('REDIS_DB', 0)),
-                password=os.environ.get('REDIS_PASSWORD', None),
-                decode_responses=True,
-                socket_connect_timeout=1
-            )
+        from job_queue import VISION_QUEUE, RedisJobQueue, get_job_queue
+        from vision_budget import vision_budget
+        from capture_orchestrator import capture_orchestrator
 
-            vision_queue_length = redis_client.llen("vision_queue")
-            signal_queue_length = redis_client.llen("signal_queue")
-
-            return jsonify({
-                "vision_queue_length": vision_queue_length,
-                "signal_queue_length": signal_queue_length,
-                "redis_connected": True
-            })
-        except redis.exceptions.ConnectionError as e:
-            # Redis connection failed but system can still function
-            logger.warning(f"Redis connection failed: {str(e)}")
-            return jsonify({
-                "vision_queue_length": 0,
-                "signal_queue_length": 0,
-                "redis_connected": False,
-                "redis_message": f"Not connected: {str(e)}"
-            })
+        queue = get_job_queue()
+        stats = queue.stats(VISION_QUEUE)
+        return jsonify({
+            "vision_queue_length": stats["ready"] + stats["delayed"],
+            "vision_queue": stats,
+            "signal_queue_length": 0,
+            "queue_backend": "redis" if isinstance(queue, RedisJobQueue) else "sqlite",
+            "redis_connected": isinstance(queue, RedisJobQueue),
+            "vision_budget": vision_budget.stats(),
+            "capture_cycles": capture_orchestrator.stats(),
+        })
     except Exception as e:
         logger.error(f"Error getting capture status: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/metrics/scoring', methods=['GET'])
+def get_scoring_metrics():
+    """Per-stage signal-scoring latency histograms (JSON, or ?format=prometheus)"""
+    hours = request.args.get('hours', 24, type=float)
+    unparsable = 'hours' in request.args and request.args.get('hours', type=float) is None
+    if unparsable or not hours > 0:
+        return jsonify({"error": "hours must be a positive number"}), 400
+    try:
+        from scoring_metrics import scoring_metrics
+
+        since = time.time() - hours * 3600
+        if request.args.get('format') == 'prometheus':
+            return Response(scoring_metrics.prometheus(since), mimetype='text/plain; version=0.0.4')
+        return jsonify(scoring_metrics.stats(since))
+    except Exception as e:
+        logger.error(f"Error getting scoring metrics: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 from multiprocessing import Lock
 
 _once_lock = Lock()           # one lock per Unix process
 
 def _boot_once() -> None:
-    """Create tables and start the capture scheduler exactly once."""
+    """
+    Create tables exactly once.
+
+    Background jobs are not started here: the scheduler and Vision consumer
+    run in their own process (python scheduler_runner.py), so web workers
+    only serve requests and never host duplicate schedulers.
+    """
     if getattr(app, "_booted", False):
         return                 # already done in this process
+    if multiprocessing.parent_process() is not None:
+        return                 # chart render pool child re-importing __main__
 
     with _once_lock:          # double-checked locking
         if getattr(app, "_booted", False):
             return
 
-        # 1) make sure tables exist
         db.create_all()
-
-        # 2) launch the 15-min capture scheduler
-        from scheduler import start_scheduler
-        app.scheduler = start_scheduler()
-        logger.info("DB tables ready; capture scheduler started")
+        logger.info("DB tables ready")
 
         app._booted = True     # mark so workers skip this
 
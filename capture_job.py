@@ -4,12 +4,13 @@ import uuid
 import logging
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, Generator
+from typing import Dict, Any, List, Optional, Generator
 from pathlib import Path
 from config import ASSETS, CHARTS_DIR, DEFAULT_TIMEFRAME, mt5_to_oanda, oanda_to_mt5
 
 from oanda_api import OandaAPI, fetch_candles
 from app import app
+from job_queue import VISION_QUEUE, get_job_queue
 
 # Configure logging first
 logger = logging.getLogger(__name__)
@@ -99,18 +100,6 @@ oanda_api = OandaAPI(
     account_id=os.environ.get('OANDA_ACCOUNT_ID')
 )
 
-# Initialize DirectVisionPipeline if available
-try:
-    from vision_worker import DirectVisionPipeline
-    # Don't instantiate here to avoid circular imports
-    # We'll create instances when needed in the run() function
-    DIRECT_VISION_AVAILABLE = True
-    logger.info("DirectVisionPipeline is available for use")
-except ImportError:
-    DIRECT_VISION_AVAILABLE = False
-    logger.warning("DirectVisionPipeline not available, vision functionality limited")
-
-
 
 def get_quote(symbol: str) -> Dict[str, Any]:
     """Fetch the current quote for a symbol from OANDA"""
@@ -153,6 +142,10 @@ def take_screenshot(
     and return the path *relative to* the `static/` folder (so Vision can
     load it).
 
+    The chart is rendered in memory and published to chart_handoff, so a
+    Vision consumer in this process reads the bytes straight from memory;
+    the PNG is written to static/charts in the background.
+
     Args:
         symbol: Trading instrument, e.g. "XAU_USD".
         timeframe: "M15", "H1", "D1", … (default "H1").
@@ -163,35 +156,20 @@ def take_screenshot(
                      Empty string if chart generation fails.
     """
     try:
-        # Generate the chart with actual market data
-        from chart_utils import generate_chart
-
-        # Convert OANDA-style "XAU_USD" → "XAUUSD" for dir structure
-        mt5_symbol = symbol.replace("_", "")
-
-        # Try the real chart generator first
-        chart_path = generate_chart(symbol, timeframe, count)
-
-        if chart_path and os.path.exists(chart_path):
-            # chart_path looks like: static/charts/XAUUSD/XAUUSD_H1_20250507_093002.png
-            vision_path = chart_path.replace("static/", "")
-            logger.info(
-                f"Generated {timeframe} chart for {symbol} at {chart_path} "
-                f"(Vision path: {vision_path})"
-            )
-        else:
-            # Fallback stub: create an empty file path so pipeline doesn’t crash
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            charts_dir = f"static/charts/{mt5_symbol}"
-            os.makedirs(charts_dir, exist_ok=True)
-
-            filename = f"{mt5_symbol}_{timeframe}_{timestamp}.png"
-            vision_path = f"charts/{mt5_symbol}/{filename}"
-            logger.error(
-                f"Chart generation failed for {symbol}, "
-                f"using fallback path {vision_path}"
-            )
-
+        # Render the chart with actual market data in the render pool
+        from chart_render_service import render_service
+
+        artifact = render_service.render_artifact(symbol, timeframe, count)
+        if artifact is None:
+            logger.error(f"Chart generation failed for {symbol} ({timeframe})")
+            return ""
+
+        # artifact.path looks like: static/charts/XAUUSD/XAUUSD_H1_20250507_093002.png
+        vision_path = artifact.vision_path
+        logger.info(
+            f"Generated {timeframe} chart for {symbol} in memory "
+            f"({len(artifact.data) / 1024:.1f} KB, Vision path: {vision_path})"
+        )
         return vision_path
 
     except Exception as e:
@@ -287,50 +265,17 @@ def run(
             "features": features,
         }
 
-        # 5. Push to Redis queue if available
-        if redis_client:
-            try:
-                redis_client.rpush("vision_queue", json.dumps(payload))
-                logger.info(
-                    f"Capture job completed for {symbol} ({timeframe}), pushed to vision_queue"
-                )
-            except Exception as e:
-                logger.warning(f"Could not push to Redis queue: {e}")
-        else:
-            # Direct vision processing as a workaround for environments without Redis
-            try:
-                # Import here to avoid circular imports
-                from vision_worker import DirectVisionPipeline
-
-                # Extract just the image path for the pipeline
-                mt5_symbol = symbol.replace("_", "")
-                img_path = f"static/{s3_path}"
-
-                # Check if the file exists
-                if os.path.exists(img_path):
-                    logger.info(f"Processing chart directly: {img_path}")
-                    with app.app_context():
-                        pipeline = DirectVisionPipeline()
-                        success = pipeline.process_chart(symbol, img_path)
-                        if success:
-                            logger.info(
-                                f"Successfully processed chart for {symbol} ({timeframe}) without Redis"
-                            )
-                        else:
-                            logger.error(
-                                f"Failed to process chart for {symbol} ({timeframe}) without Redis"
-                            )
-                else:
-                    logger.error(f"Chart file not found at {img_path}")
-            except Exception as e:
-                logger.error(f"Error in direct vision processing: {str(e)}")
-                import traceback
-
-                logger.error(traceback.format_exc())
-
+        # 5. Hand the chart to the Vision worker – never wait on the model here
+        if not s3_path:
+            logger.error(f"No chart for {symbol} ({timeframe}); Vision job not queued")
+            return payload
+        try:
+            get_job_queue(redis_client).enqueue(VISION_QUEUE, payload)
             logger.info(
-                f"Capture job completed for {symbol} ({timeframe}), Redis not available - attempted direct vision processing"
+                f"Capture job completed for {symbol} ({timeframe}), queued on {VISION_QUEUE}"
             )
+        except Exception as e:
+            logger.error(f"Could not enqueue Vision job for {symbol} ({timeframe}): {e}")
 
         return payload
     except Exception as e:
@@ -344,6 +289,67 @@ def run(
         }
 
 
+def run_charts(
+    symbol: str,
+    timeframes: List[str],
+    timestamp: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Capture several timeframes of a symbol as ONE Vision job.
+
+    The payload carries "charts": {timeframe: image_s3}, which the Vision
+    worker analyses in a single multi-chart request.  With one timeframe
+    this is exactly run().
+    """
+    if len(timeframes) == 1:
+        return run(symbol, timestamp, timeframes[0])
+    if timestamp is None:
+        timestamp = datetime.now()
+
+    iso_timestamp = timestamp.isoformat()
+    job_id = str(uuid.uuid4())
+    label = "+".join(timeframes)
+
+    try:
+        quote = get_quote(symbol)
+        charts = {}
+        for timeframe in timeframes:
+            path = take_screenshot(symbol, timeframe)
+            if path:
+                charts[timeframe] = path
+        features = calculate_features(symbol, quote)
+
+        payload = {
+            "id": job_id,
+            "ts": iso_timestamp,
+            "symbol": symbol,
+            "timeframe": timeframes[0],
+            "charts": charts,
+            "quote": quote,
+            "features": features,
+        }
+
+        if not charts:
+            logger.error(f"No chart for {symbol} ({label}); Vision job not queued")
+            return payload
+        try:
+            get_job_queue(redis_client).enqueue(VISION_QUEUE, payload)
+            logger.info(f"Capture job completed for {symbol} ({label}), queued on {VISION_QUEUE}")
+        except Exception as e:
+            logger.error(f"Could not enqueue Vision job for {symbol} ({label}): {e}")
+
+        return payload
+    except Exception as e:
+        logger.error(f"Error running capture job for {symbol}: {str(e)}")
+        return {
+            "id": job_id,
+            "ts": iso_timestamp,
+            "symbol": symbol,
+            "timeframe": timeframes[0],
+            "error": str(e),
+        }
+
+
 if __name__ == "__main__":
     # Test run
     logging.basicConfig(level=logging.INFO)
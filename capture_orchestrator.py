@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Bar-close capture orchestrator
+
+The scheduler used to fire an M15 capture and an H1 capture on separate
+cron entries.  At the top of every hour both ran at once, each symbol was
+captured twice, and a slow cycle could overlap the next one.  Instead, one
+job now fires CAPTURE_SETTLE_SECONDS after every close of the shortest
+capture timeframe, works out which timeframes closed at that instant
+(M15 every quarter, M15 + H1 on the hour, ...) and captures each symbol
+once as a single multi-chart Vision job.
+
+Overlap protection:
+    • the APScheduler job runs with max_instances=1 and coalesce=True, so
+      a late trigger never starts a second cycle and a backlog of missed
+      triggers collapses into one run
+    • run_cycle() itself refuses to start while another cycle is running
+
+Every cycle (and every refused or skipped one) is recorded with its bar
+close, start lag (trigger time minus bar close; lag above the settle
+delay is scheduler jitter) and duration in a small SQLite table, so the
+web process can report it.
+
+    python capture_orchestrator.py      # recent cycles + lag/duration summary
+
+Environment:
+    CAPTURE_TIMEFRAMES        timeframes captured at their bar close (default M15,H1)
+    CAPTURE_SETTLE_SECONDS    wait after the close before capturing (default 10)
+    CAPTURE_CYCLES_DB         SQLite path (default data/capture_cycles.sqlite)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import TIMEFRAME_SECONDS
+from sqlite_store import connect, percentile
+
+logger = logging.getLogger(__name__)
+
+CAPTURE_JOB_ID = "capture_bar_close"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS capture_cycles (
+    id          INTEGER PRIMARY KEY,
+    bar_close   REAL    NOT NULL,
+    timeframes  TEXT    NOT NULL,
+    status      TEXT    NOT NULL,      -- ok | errors | overlap | skipped_max_instances | missed
+    started_at  REAL    NOT NULL,
+    start_lag   REAL    NOT NULL,
+    duration    REAL    NOT NULL DEFAULT 0,
+    symbols     INTEGER NOT NULL DEFAULT 0,
+    errors      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_capture_cycles_bar ON capture_cycles (bar_close);
+"""
+
+
+def _timeframes_from_env() -> List[str]:
+    names = [tf.strip() for tf in os.environ.get("CAPTURE_TIMEFRAMES", "M15,H1").split(",") if tf.strip()]
+    return [tf for tf in names if tf in TIMEFRAME_SECONDS]
+
+
+def bar_close(now: datetime, timeframe: str) -> datetime:
+    """Close time of the most recent *timeframe* bar at or before *now* (UTC)"""
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    epoch = now.astimezone(timezone.utc).timestamp()
+    return datetime.fromtimestamp(epoch - epoch % seconds, tz=timezone.utc)
+
+
+def due_timeframes(close: datetime, timeframes: List[str]) -> List[str]:
+    """The *timeframes* whose bar closes exactly at *close*, shortest first"""
+    epoch = int(close.astimezone(timezone.utc).timestamp())
+    return sorted((tf for tf in timeframes if epoch % TIMEFRAME_SECONDS[tf] == 0), key=TIMEFRAME_SECONDS.get)
+
+
+class CaptureOrchestrator:
+    """Runs one merged capture per bar close and records its timing"""
+
+    def __init__(self, timeframes: Optional[List[str]] = None, settle_seconds: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        self.timeframes = timeframes or _timeframes_from_env() or ["M15"]
+        self.settle_seconds = float(os.environ.get("CAPTURE_SETTLE_SECONDS", 10)) if settle_seconds is None else settle_seconds
+        self.db_path = db_path or os.environ.get("CAPTURE_CYCLES_DB", os.path.join("data", "capture_cycles.sqlite"))
+        self._running = threading.Lock()
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def base_timeframe(self) -> str:
+        return min(self.timeframes, key=TIMEFRAME_SECONDS.get)
+
+    def cron_fields(self) -> Dict[str, Any]:
+        """CronTrigger fields firing settle_seconds after every base-timeframe close"""
+        seconds = TIMEFRAME_SECONDS[self.base_timeframe]
+        fields: Dict[str, Any] = {"second": int(self.settle_seconds) % 60}
+        if seconds < 3600:
+            fields["minute"] = f"*/{seconds // 60}"
+        elif seconds < 86400:
+            fields.update(minute=0, hour=f"*/{seconds // 3600}")
+        else:
+            fields.update(minute=0, hour=0)
+        return fields
+
+    # ──────────────────────────────── recording ─────────────────────────────────
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def _record(self, close: datetime, timeframes: List[str], status: str, started_at: float,
+                duration: float = 0.0, symbols: int = 0, errors: int = 0) -> Dict[str, Any]:
+        cycle = {
+            "bar_close": close.isoformat(),
+            "timeframes": timeframes,
+            "status": status,
+            "start_lag": round(started_at - close.timestamp(), 3),
+            "duration": round(duration, 3),
+            "symbols": symbols,
+            "errors": errors,
+        }
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        "INSERT INTO capture_cycles (bar_close, timeframes, status, started_at, start_lag, "
+                        "duration, symbols, errors) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (close.timestamp(), ",".join(timeframes), status, started_at,
+                         cycle["start_lag"], cycle["duration"], symbols, errors),
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Could not record capture cycle {cycle}: {e}")
+        return cycle
+
+    # ──────────────────────────────── running ───────────────────────────────────
+    def run_cycle(self, now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        Capture every symbol for the timeframes that closed at the latest
+        base-timeframe bar close.  Returns the cycle record, or None when
+        another cycle is still running (the refusal is recorded too).
+        """
+        started_at = time.time() if now is None else now.timestamp()
+        now = now or datetime.now(timezone.utc)
+        close = bar_close(now, self.base_timeframe)
+        timeframes = due_timeframes(close, self.timeframes)
+
+        if not self._running.acquire(blocking=False):
+            logger.warning("Capture cycle for %s refused: previous cycle still running", close.isoformat())
+            self._record(close, timeframes, "overlap", started_at)
+            return None
+        try:
+            return self._capture(close, timeframes, started_at)
+        finally:
+            self._running.release()
+
+    def _capture(self, close: datetime, timeframes: List[str], started_at: float) -> Dict[str, Any]:
+        import capture_job
+        from config import ASSETS
+        from vision_budget import vision_budget
+
+        logger.info("Capture cycle for bar close %s: %s", close.isoformat(), "+".join(timeframes))
+        start = time.monotonic()
+        symbols = vision_budget.plan(ASSETS)
+        errors = 0
+        for symbol in symbols:
+            try:
+                result = capture_job.run_charts(symbol, timeframes)
+                errors += int("error" in result)
+            except Exception as exc:
+                errors += 1
+                logger.error("Error capturing %s (%s): %s", symbol, "+".join(timeframes), exc)
+        duration = time.monotonic() - start
+
+        cycle = self._record(close, timeframes, "errors" if errors else "ok", started_at,
+                             duration, len(symbols), errors)
+        interval = TIMEFRAME_SECONDS[self.base_timeframe]
+        log = logger.warning if duration > 0.8 * interval else logger.info
+        log("Capture cycle %s done: lag %.1fs, %.1fs for %d symbols (%d errors)",
+            close.isoformat(), cycle["start_lag"], duration, len(symbols), errors)
+        return cycle
+
+    def on_scheduler_event(self, event) -> None:
+        """APScheduler listener: record triggers dropped by max_instances or misfire"""
+        from apscheduler.events import EVENT_JOB_MAX_INSTANCES
+
+        if getattr(event, "job_id", None) != CAPTURE_JOB_ID:
+            return
+        status = "skipped_max_instances" if event.code == EVENT_JOB_MAX_INSTANCES else "missed"
+        scheduled = getattr(event, "scheduled_run_times", None) or [getattr(event, "scheduled_run_time", None)]
+        for run_time in filter(None, scheduled):
+            close = bar_close(run_time, self.base_timeframe)
+            logger.warning("Capture trigger for %s %s", close.isoformat(), status)
+            self._record(close, due_timeframes(close, self.timeframes), status, time.time())
+
+    # ──────────────────────────────── reporting ─────────────────────────────────
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT * FROM capture_cycles ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {**dict(row), "bar_close": datetime.fromtimestamp(row["bar_close"], tz=timezone.utc).isoformat()}
+            for row in rows
+        ]
+
+    def stats(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """Counts per status and start-lag / duration percentiles of completed cycles"""
+        since = time.time() - 86400 if since is None else since
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT status, start_lag, duration FROM capture_cycles WHERE started_at >= ?", (since,)
+            ).fetchall()
+        done = [r for r in rows if r["status"] in ("ok", "errors")]
+        lags = [r["start_lag"] for r in done]
+        durations = [r["duration"] for r in done]
+        by_status: Dict[str, int] = {}
+        for r in rows:
+            by_status[r["status"]] = by_status.get(r["status"], 0) + 1
+        return {
+            "timeframes": self.timeframes,
+            "settle_seconds": self.settle_seconds,
+            "by_status": by_status,
+            "start_lag_p50": percentile(lags, 0.5),
+            "start_lag_p95": percentile(lags, 0.95),
+            "jitter_max": round(max(lags) - self.settle_seconds, 3) if lags else None,
+            "duration_p50": percentile(durations, 0.5),
+            "duration_p95": percentile(durations, 0.95),
+            "duration_max": round(max(durations), 3) if durations else None,
+        }
+
+
+# Global instance used by the scheduler
+capture_orchestrator = CaptureOrchestrator()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps({"stats": capture_orchestrator.stats(), "recent": capture_orchestrator.recent()}, indent=2))
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Content-addressed chart cache
+
+A chart only changes when a new bar closes or its annotations change, so
+the rendered PNG is cached under a hash of
+
+    (symbol, timeframe, count, last bar time, annotations, style version)
+
+The hash doubles as the HTTP ETag.  Entries live in an in-memory LRU that
+spills evicted PNGs to disk (CHART_CACHE_DIR).
+
+The last closed bar per (symbol, timeframe) is remembered together with the
+time the next bar is due, so OANDA is only asked again once that bar should
+have closed – repeat requests in between never leave the process.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from chart_generator_basic import CHART_STYLE_VERSION
+from config import TIMEFRAME_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# How long to wait before asking OANDA again when an expected bar hasn't
+# appeared yet (weekends, provider lag)
+RECHECK_SECONDS = 60
+
+
+def chart_key(symbol: str, timeframe: str, count: int, last_bar_time: Any,
+              annotations: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of everything that determines a chart's pixels"""
+    payload = json.dumps(
+        {
+            "symbol": symbol.replace("_", "").upper(),
+            "timeframe": timeframe,
+            "count": int(count),
+            "last_bar": str(last_bar_time),
+            "annotations": {k: v for k, v in (annotations or {}).items() if v is not None},
+            "style": CHART_STYLE_VERSION,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ChartCache:
+    """In-memory LRU of PNG bytes with disk spill, plus last-bar tracking"""
+
+    def __init__(self, max_memory_bytes: Optional[int] = None, disk_dir: Optional[str] = None,
+                 max_disk_files: Optional[int] = None):
+        self.max_memory_bytes = max_memory_bytes or int(os.environ.get("CHART_CACHE_MEMORY_MB", 64)) * 1024 * 1024
+        self.disk_dir = disk_dir or os.environ.get("CHART_CACHE_DIR", os.path.join("data", "chart_cache"))
+        self.max_disk_files = max_disk_files or int(os.environ.get("CHART_CACHE_DISK_FILES", 2000))
+
+        self._mem: "OrderedDict[str, bytes]" = OrderedDict()
+        self._mem_bytes = 0
+        self._bars: Dict[Tuple[str, str], Tuple[datetime, float]] = {}   # → (last bar, next check ts)
+        self._lock = threading.Lock()
+        self._spills = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ───────────────────────────── last-bar tracking ─────────────────────────────
+    def note_last_bar(self, symbol: str, timeframe: str, bar_time: datetime,
+                      now: Optional[float] = None) -> None:
+        """Remember the newest closed bar and when the following one is due"""
+        now = time.time() if now is None else now
+        tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 3600)
+        if bar_time.tzinfo is None:
+            bar_time = bar_time.replace(tzinfo=timezone.utc)
+        # candle time is the bar open, so the next bar closes two lengths later
+        next_due = bar_time.timestamp() + 2 * tf_seconds
+        if next_due <= now:
+            next_due = now + RECHECK_SECONDS
+        with self._lock:
+            self._bars[(symbol, timeframe)] = (bar_time, next_due)
+
+    def known_last_bar(self, symbol: str, timeframe: str,
+                       now: Optional[float] = None) -> Tuple[Optional[datetime], int]:
+        """Return (last bar, seconds until it may change) or (None, 0) if stale"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._bars.get((symbol, timeframe))
+        if not entry or entry[1] <= now:
+            return None, 0
+        return entry[0], int(entry[1] - now)
+
+    # ──────────────────────────────── byte store ────────────────────────────────
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.png")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._mem.get(key)
+            if data is not None:
+                self._mem.move_to_end(key)
+                self.hits += 1
+                return data
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.disk_hits += 1
+        self.put(key, data, spill=False)
+        return data
+
+    def put(self, key: str, data: bytes, spill: bool = True) -> None:
+        if not data:
+            return
+        evicted: List[Tuple[str, bytes]] = []
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None:
+                self._mem_bytes -= len(old)
+            self._mem[key] = data
+            self._mem_bytes += len(data)
+            while self._mem_bytes > self.max_memory_bytes and len(self._mem) > 1:
+                k, v = self._mem.popitem(last=False)
+                self._mem_bytes -= len(v)
+                evicted.append((k, v))
+        if spill:
+            for k, v in evicted:
+                self._spill(k, v)
+
+    def _spill(self, key: str, data: bytes) -> None:
+        path = self._disk_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Chart cache spill failed for {key}: {e}")
+            return
+
+        self._spills += 1
+        if self._spills % 100 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self) -> None:
+        try:
+            files = [e for e in os.scandir(self.disk_dir) if e.name.endswith(".png")]
+        except OSError:
+            return
+        excess = len(files) - self.max_disk_files
+        if excess <= 0:
+            return
+        files.sort(key=lambda e: e.stat().st_mtime)
+        for entry in files[:excess]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._mem),
+                "memory_bytes": self._mem_bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+            }
+
+    # ─────────────────────────────── route helpers ───────────────────────────────
+    def resolve(self, symbol: str, timeframe: str = "H1", count: int = 100,
+                **annotations) -> Dict[str, Any]:
+        """
+        Work out the cache key for a chart request.
+
+        Only hits OANDA when the last closed bar may have changed; the fetched
+        candles are returned so a subsequent render doesn't fetch them again.
+
+        Returns:
+            {"key", "candles", "max_age", ...request args} – key is None if no data
+        """
+        from chart_utils import fetch_candles
+
+        request = {"symbol": symbol, "timeframe": timeframe, "count": count,
+                   "annotations": annotations, "candles": None}
+
+        last_bar, max_age = self.known_last_bar(symbol, timeframe)
+        if last_bar is None:
+            candles = fetch_candles(symbol, timeframe, count)
+            last_bar = (candles[-1].get("time") or candles[-1].get("timestamp")) if candles else None
+            if last_bar is None:        # no data, or an OANDA error payload ([{"error": ...}])
+                return {**request, "key": None, "max_age": 0}
+            self.note_last_bar(symbol, timeframe, last_bar)
+            _, max_age = self.known_last_bar(symbol, timeframe)
+            request["candles"] = candles
+
+        request["key"] = chart_key(symbol, timeframe, count, last_bar, annotations)
+        request["max_age"] = max_age
+        return request
+
+    def load(self, resolved: Dict[str, Any]) -> bytes:
+        """Return cached PNG bytes for a resolved request, rendering on a miss"""
+        key = resolved["key"]
+        if key is None:
+            return b""
+
+        data = self.get(key)
+        if data is not None:
+            return data
+
+        from chart_render_service import render_service
+        data = render_service.render_bytes(
+            resolved["symbol"],
+            resolved["timeframe"],
+            resolved["count"],
+            candles=resolved["candles"],
+            **resolved["annotations"],
+        )
+        self.put(key, data)
+        return data
+
+
+# Global instance used by the chart routes
+chart_cache = ChartCache()
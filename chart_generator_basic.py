@@ -15,17 +15,163 @@ from matplotlib.dates import ConciseDateFormatter        # ⬅ new
 from matplotlib.gridspec import GridSpec                  # ⬅ new
 import mplfinance as mpf
 from PIL import Image
+import threading
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PolyCollection
+from matplotlib.colors import to_rgba
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Panel layout shared by every chart: price, volume, RSI, MACD, ATR
+PANEL_HEIGHT_RATIOS = [8, 1, 1.5, 1.5, 1]
+
+# Bump whenever the rendered output changes so cached charts (chart_cache.py) are invalidated
+CHART_STYLE_VERSION = 3
+
+# Panel names in template order, used for Vision panel cropping
+PANEL_NAMES = ["price", "volume", "rsi", "macd", "atr"]
+
+VISION_MIME_TYPES = {"png": "image/png", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+def encode_vision_image(image: Image.Image, profile: Dict[str, Any]) -> Tuple[bytes, Dict[str, Any]]:
+    """Downscale and re-encode a chart image for the Vision API
+
+    ``profile`` keys (see config.VISION_IMAGE_PROFILE): format (png | webp | jpeg),
+    width in px (0 keeps the source width), colors for the PNG palette and
+    quality for WebP / JPEG.
+
+    Returns (bytes, meta) where meta holds mime, width, height and bytes.
+    """
+    fmt = profile.get("format", "png").lower()
+    if fmt == "jpg":
+        fmt = "jpeg"
+    if fmt not in VISION_MIME_TYPES:
+        raise ValueError(f"Unsupported Vision image format: {fmt}")
+
+    image = image.convert("RGB")
+    width = int(profile.get("width") or 0)
+    if width and image.width > width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+
+    buf = io.BytesIO()
+    if fmt == "png":
+        # Charts use a handful of flat colours, so a small palette is near-lossless
+        image.quantize(colors=int(profile.get("colors", 64)), method=Image.Quantize.MEDIANCUT) \
+             .save(buf, format="PNG", optimize=True)
+    elif fmt == "webp":
+        image.save(buf, format="WEBP", quality=int(profile.get("quality", 80)), method=4)
+    else:
+        image.save(buf, format="JPEG", quality=int(profile.get("quality", 80)), optimize=True)
+
+    data = buf.getvalue()
+    return data, {
+        "mime": VISION_MIME_TYPES[fmt],
+        "width": image.width,
+        "height": image.height,
+        "bytes": len(data),
+    }
+
+
+class ChartTemplate:
+    """Pre-styled 5-panel figure that is built once and re-used for every render
+
+    The figure, axes, spines, grid, panel labels and the static reference lines
+    (RSI 30/70, MACD zero line) are created a single time.  Each render only adds
+    the data artists, which are tracked and removed again by ``reset()``.
+
+    A template is not thread-safe on its own – hold ``lock`` for the whole
+    render + save cycle.
+    """
+
+    def __init__(self, fig_width: float, fig_height: float, colors: Dict[str, str]):
+        self.colors = colors
+        self.lock = threading.Lock()
+        self._artists: List[Any] = []
+
+        # Plain Figure + Agg canvas: no pyplot state, so the figure survives
+        # plt.close() calls elsewhere and is never shown interactively
+        self.fig = Figure(figsize=(fig_width, fig_height))
+        FigureCanvasAgg(self.fig)
+        gs = self.fig.add_gridspec(5, 1, height_ratios=PANEL_HEIGHT_RATIOS)
+        self.axes = [self.fig.add_subplot(gs[i, 0]) for i in range(5)]
+        self.fig.subplots_adjust(hspace=0.07)
+
+        self.fig.patch.set_facecolor(colors['bg'])
+        for ax in self.axes:
+            ax.tick_params(axis='x', labelsize=8, pad=2, rotation=0)
+            ax.set_facecolor(colors['bg'])
+            ax.tick_params(colors=colors['text'])
+            for side in ('bottom', 'top', 'left', 'right'):
+                ax.spines[side].set_color(colors['text'])
+            ax.grid(color=colors['grid'], linestyle='--')
+
+        self.suptitle = self.fig.suptitle("", color=colors['text'], fontsize=14)
+
+        price_ax, vol_ax, rsi_ax, macd_ax, atr_ax = self.axes
+        price_ax.set_ylabel('Price', color=colors['text'])
+        vol_ax.set_ylabel('Volume', color=colors['text'], fontsize=10)
+        rsi_ax.axhline(y=30, color=colors['rsi_os'], linestyle='--')
+        rsi_ax.axhline(y=70, color=colors['rsi_ob'], linestyle='--')
+        rsi_ax.set_ylim(0, 100)
+        rsi_ax.set_ylabel('RSI (14)', color=colors['text'], fontsize=10)
+        self.macd_zero = macd_ax.axhline(y=0, color=colors['grid'], linestyle='-')
+        macd_ax.set_ylabel('MACD (12,26,9)', color=colors['text'], fontsize=10)
+        atr_ax.set_ylabel('ATR (14)', color=colors['text'], fontsize=10)
+
+    def track(self, artist):
+        """Register a per-render artist so ``reset()`` can remove it"""
+        self._artists.append(artist)
+        return artist
+
+    def reset(self) -> None:
+        """Drop all data artists from the previous render and re-arm autoscaling"""
+        for artist in self._artists:
+            try:
+                artist.remove()
+            except (ValueError, NotImplementedError):
+                pass
+        self._artists.clear()
+
+        for i, ax in enumerate(self.axes):
+            if ax.legend_ is not None:
+                ax.legend_.remove()
+            # Next data artist replaces (instead of extends) the data limits
+            ax.ignore_existing_data_limits = True
+            if i != 2:                      # RSI panel keeps its fixed 0-100 range
+                ax.set_autoscaley_on(True)
+
+
+# One template per figure geometry + palette, shared by all ChartGenerator instances
+_TEMPLATES: Dict[Tuple, ChartTemplate] = {}
+_TEMPLATES_LOCK = threading.Lock()
+
+
+def get_chart_template(fig_width: float, fig_height: float, colors: Dict[str, str]) -> ChartTemplate:
+    """Return the process-wide template for this geometry, building it on first use"""
+    key = (fig_width, fig_height, tuple(sorted(colors.items())))
+    with _TEMPLATES_LOCK:
+        template = _TEMPLATES.get(key)
+        if template is None:
+            template = ChartTemplate(fig_width, fig_height, colors)
+            _TEMPLATES[key] = template
+            logger.info(f"Built chart template {fig_width}x{fig_height}in")
+        return template
+
+
 class ChartGenerator:
     """Class for generating technical analysis charts with indicators using mplfinance"""
     
-    def __init__(self, signal_action=None):
+    def __init__(self, signal_action=None, use_template: bool = True):
         # Configure matplotlib for non-interactive backend
         plt.switch_backend('agg')
+
+        # Render into the shared pre-styled figure instead of building a new one
+        self.use_template = use_template
         
         # Default chart size - high resolution for clear ChatGPT Vision analysis
         # Updated to 1080p (19.2 x 10.8) for better legibility
@@ -215,6 +361,11 @@ class ChartGenerator:
             
             # Prepare the data for plotting
             df = self._prepare_data(candles)
+
+            if self.use_template:
+                return self._create_chart_from_template(
+                    df, symbol, timeframe, entry_point, stop_loss, take_profit, result
+                )
             
             # Calculate latest ATR value for title
             latest_atr = df['atr'].iloc[-1] if not df['atr'].empty else 0
@@ -480,34 +631,11 @@ class ChartGenerator:
                 axes[0].scatter(entry_idx, entry_price, marker=marker_type, s=200, 
                              color=marker_color, zorder=5, linewidth=2, edgecolor='white')
                     
-            # Create symbol folder if it doesn't exist
-            # Clean up symbol name for directory (remove underscores)
-            clean_symbol = symbol.replace('_', '')
-            symbol_dir = os.path.join(self.output_dir, clean_symbol)
-            os.makedirs(symbol_dir, exist_ok=True)
-            
-            logger.info(f"Chart will be saved in directory: {os.path.abspath(symbol_dir)}")
-            
-            # Generate timestamp for filename with current date
             current_datetime = datetime.now()
-            now = current_datetime.strftime("%Y%m%d_%H%M%S")
-            result_str = f"_{result.lower()}" if result else ""
-            # Format: SYMBOL_TIMEFRAME_TIMESTAMP_RESULT.png
-            filename = f"{clean_symbol}_{timeframe}_{now}{result_str}.png"
-            filepath = os.path.join(symbol_dir, filename)
-            
-            logger.info(f"Chart will be saved as: {filename}")
+            filepath = self._output_path(symbol, timeframe, result, current_datetime)
             
             # Update the chart title to include symbol, timeframe, result and current date
-            display_symbol = symbol.replace("_", "/")
-            title_text = f"{display_symbol} ({timeframe})"
-            if result:
-                title_text += f" - {result.upper()}"
-            title_text += f" - {current_datetime.strftime('%Y-%m-%d')}"
-            # Add ATR value
-            latest_atr = df['atr'].iloc[-1] if not df['atr'].empty else 0
-            title_text += f" - ATR(14): {latest_atr:.5f}"
-            
+            title_text = self._title_text(df, symbol, timeframe, result, current_datetime)
             fig.suptitle(title_text, color=self.colors['text'], fontsize=14)
             
             # Save the chart to file
@@ -515,12 +643,328 @@ class ChartGenerator:
             plt.close(fig)  # Close the figure to free memory
             
             logger.info(f"Chart saved to {filepath}")
+            self._index_chart(filepath, symbol, timeframe)
             return filepath
         
         except Exception as e:
             logger.error(f"Error creating chart: {str(e)}")
             return ""
     
+    def _output_path(self, symbol: str, timeframe: str, result: Optional[str],
+                     current_datetime: datetime) -> str:
+        """Build static/charts/SYMBOL/SYMBOL_TIMEFRAME_TIMESTAMP_RESULT.png, creating the folder"""
+        # Clean up symbol name for directory (remove underscores)
+        clean_symbol = symbol.replace('_', '')
+        symbol_dir = os.path.join(self.output_dir, clean_symbol)
+        os.makedirs(symbol_dir, exist_ok=True)
+        
+        logger.info(f"Chart will be saved in directory: {os.path.abspath(symbol_dir)}")
+        
+        now = current_datetime.strftime("%Y%m%d_%H%M%S")
+        result_str = f"_{result.lower()}" if result else ""
+        filename = f"{clean_symbol}_{timeframe}_{now}{result_str}.png"
+        
+        logger.info(f"Chart will be saved as: {filename}")
+        return os.path.join(symbol_dir, filename)
+    
+    def _title_text(self, df: pd.DataFrame, symbol: str, timeframe: str,
+                    result: Optional[str], current_datetime: datetime) -> str:
+        """Chart title: symbol, timeframe, result, current date and latest ATR"""
+        display_symbol = symbol.replace("_", "/")
+        title_text = f"{display_symbol} ({timeframe})"
+        if result:
+            title_text += f" - {result.upper()}"
+        title_text += f" - {current_datetime.strftime('%Y-%m-%d')}"
+        latest_atr = df['atr'].iloc[-1] if not df['atr'].empty else 0
+        title_text += f" - ATR(14): {latest_atr:.5f}"
+        return title_text
+    
+    def _entry_marker(self, df: pd.DataFrame, entry_time) -> Tuple[int, str, str]:
+        """Resolve (candle index, marker, colour) for the entry arrow
+        
+        Immediate signals (BUY_NOW/SELL_NOW) sit on the last candle; anticipated
+        ones are placed at their own time when it is on the chart.
+        """
+        action = self.current_signal_action or ""
+        chart_right_edge = len(df) - 1
+        
+        if 'NOW' in action or entry_time not in df.index:
+            entry_idx = chart_right_edge
+        else:
+            entry_idx = df.index.get_loc(entry_time)
+        
+        if 'SHORT' in action or 'SELL' in action:
+            return entry_idx, 'v', self.colors['sell_entry']
+        return entry_idx, '^', self.colors['buy_entry']
+    
+    def _create_chart_from_template(self, df: pd.DataFrame, symbol: str, timeframe: str,
+                                    entry_point: Optional[Tuple[datetime, float]] = None,
+                                    stop_loss: Optional[float] = None,
+                                    take_profit: Optional[float] = None,
+                                    result: Optional[str] = None) -> str:
+        """Render *df* into the shared ChartTemplate and save it as PNG
+        
+        Same panels, colours and annotations as the classic path, but the figure
+        and its styling are re-used and each series is a single collection
+        instead of one patch per candle / bar.
+        """
+        template = get_chart_template(self.fig_width, self.fig_height, self.colors)
+        current_datetime = datetime.now()
+        filepath = self._output_path(symbol, timeframe, result, current_datetime)
+        
+        with template.lock:
+            self._draw_template(template, df, symbol, timeframe, entry_point,
+                                stop_loss, take_profit, result, current_datetime)
+            template.fig.savefig(filepath, dpi=self.dpi, bbox_inches='tight',
+                                 facecolor=self.colors['bg'], edgecolor='none')
+        
+        logger.info(f"Chart saved to {filepath}")
+        self._index_chart(filepath, symbol, timeframe)
+        return filepath
+    
+    def _index_chart(self, filepath: str, symbol: str, timeframe: str) -> None:
+        """Record a saved chart in the artifact index (never fails the render)"""
+        try:
+            from chart_store import chart_store
+            chart_store.record(filepath, symbol, timeframe)
+        except Exception as e:
+            logger.warning(f"Could not index chart {filepath}: {e}")
+    
+    def _draw_template(self, template: ChartTemplate, df: pd.DataFrame, symbol: str, timeframe: str,
+                       entry_point: Optional[Tuple[datetime, float]],
+                       stop_loss: Optional[float], take_profit: Optional[float],
+                       result: Optional[str], current_datetime: datetime) -> None:
+        """Swap the data artists of *template* for *df* – caller holds ``template.lock``"""
+        colors = self.colors
+        n = len(df)
+        x = np.arange(n)
+        opens = df['Open'].to_numpy(dtype=float)
+        closes = df['Close'].to_numpy(dtype=float)
+        up = closes > opens
+        bbox_label = dict(boxstyle="round,pad=0.2", fc="white", ec="#111111")
+        
+        template.reset()
+        track = template.track
+        price_ax, vol_ax, rsi_ax, macd_ax, atr_ax = template.axes
+        
+        # ---------- price panel ----------
+        candle_colors = np.where(up, colors['candle_up'], colors['candle_down'])
+        wicks = np.stack([
+            np.column_stack([x, df['Low'].to_numpy(dtype=float)]),
+            np.column_stack([x, df['High'].to_numpy(dtype=float)]),
+        ], axis=1)
+        wick_lc = LineCollection(wicks, colors=candle_colors, linewidths=1.5)
+        track(price_ax.add_collection(wick_lc, autolim=True))
+        
+        width = 0.8
+        body_low = np.minimum(opens, closes)
+        body_high = np.maximum(opens, closes)
+        bodies = [
+            [(i - width / 2, lo), (i - width / 2, hi), (i + width / 2, hi), (i + width / 2, lo)]
+            for i, lo, hi in zip(x, body_low, body_high)
+        ]
+        track(price_ax.add_collection(
+            PolyCollection(bodies, facecolors=candle_colors, edgecolors=candle_colors,
+                           linewidths=0), autolim=True))
+        
+        ema20_line, = price_ax.plot(x, df['ema20'], color=colors['ema20'], linewidth=2.0)
+        ema50_line, = price_ax.plot(x, df['ema50'], color=colors['ema50'], linewidth=2.0)
+        track(ema20_line)
+        track(ema50_line)
+        
+        last_close = df['Close'].iloc[-1]
+        handles = [ema20_line, ema50_line]
+        labels = [f"EMA 20  {df['ema20'].iloc[-1]:.2f}", f"EMA 50  {df['ema50'].iloc[-1]:.2f}"]
+        if stop_loss is not None:
+            handles.append(track(price_ax.axhline(y=stop_loss, color=colors['sl'],
+                                                  linestyle='--', linewidth=1.5)))
+            labels.append("Stop Loss")
+        if take_profit is not None:
+            handles.append(track(price_ax.axhline(y=take_profit, color=colors['tp'],
+                                                  linestyle='--', linewidth=1.5)))
+            labels.append("Take Profit")
+        price_ax.legend(handles, labels, loc="upper left", fontsize=9)
+        
+        track(price_ax.annotate(
+            f"Close {last_close:.2f}",
+            xy=(n - 1, last_close), xytext=(15, 0), textcoords="offset points",
+            ha="left", va="center", fontsize=10, weight="bold", bbox=bbox_label,
+        ))
+        
+        # ---------- volume panel ----------
+        volume = df['Volume'].to_numpy(dtype=float)
+        vol_colors = [to_rgba(c, 0.8) for c in candle_colors]
+        if n:
+            vol_colors[0] = to_rgba('gray', 0.5)
+        valid = ~np.isnan(volume)
+        track(vol_ax.add_collection(PolyCollection(
+            [[(i - width / 2, 0), (i - width / 2, v), (i + width / 2, v), (i + width / 2, 0)]
+             for i, v in zip(x[valid], volume[valid])],
+            facecolors=[c for c, ok in zip(vol_colors, valid) if ok], linewidths=0,
+        ), autolim=True))
+        
+        # ---------- RSI panel ----------
+        rsi_val = df['rsi'].iloc[-1]
+        track(rsi_ax.plot(x, df['rsi'], color=colors['rsi'], linewidth=1.5)[0])
+        track(rsi_ax.annotate(
+            f"RSI: {rsi_val:.1f}",
+            xy=(n - 1, rsi_val), xytext=(15, 0), textcoords="offset points",
+            ha="left", va="center", fontsize=10, weight="bold", bbox=bbox_label,
+        ))
+        
+        # ---------- MACD panel ----------
+        macd_line, = macd_ax.plot(x, df['macd'], color=colors['macd'], linewidth=1.5)
+        signal_line, = macd_ax.plot(x, df['macd_signal'], color=colors['macd_signal'], linewidth=1.5)
+        track(macd_line)
+        track(signal_line)
+        hist = df['macd_hist'].fillna(0).to_numpy(dtype=float)
+        hist_colors = np.where(hist >= 0, colors['macd_hist_up'], colors['macd_hist_down'])
+        track(macd_ax.add_collection(PolyCollection(
+            [[(i - width / 2, 0), (i - width / 2, h), (i + width / 2, h), (i + width / 2, 0)]
+             for i, h in zip(x, hist)],
+            facecolors=[to_rgba(c, 0.5) for c in hist_colors], linewidths=0,
+        ), autolim=True))
+        macd_ax.legend(
+            [macd_line, signal_line, template.macd_zero],
+            [f"MACD: {df['macd'].iloc[-1]:.4f}", f"Signal: {df['macd_signal'].iloc[-1]:.4f}",
+             f"Hist: {df['macd_hist'].iloc[-1]:.4f}"],
+            loc='upper left', fontsize=10,
+        )
+        
+        # ---------- ATR panel ----------
+        atr_val = df['atr'].iloc[-1]
+        track(atr_ax.plot(x, df['atr'], color=colors['atr'], linewidth=1.5)[0])
+        track(atr_ax.annotate(
+            f"ATR: {atr_val:.5f}",
+            xy=(n - 1, atr_val), xytext=(15, 0), textcoords="offset points",
+            ha="left", va="center", fontsize=10, weight="bold", bbox=bbox_label,
+        ))
+        
+        # ---------- shared x-axis ----------
+        x_positions = np.linspace(0, n - 1, min(10, n))
+        x_labels = [df.index[int(pos)].strftime('%Y-%m-%d %H:%M') for pos in x_positions]
+        chart_padding = int(n * 0.15)  # Add 15% padding to the right
+        for ax in template.axes:
+            ax.set_xticks(x_positions)
+            ax.set_xticklabels(x_labels, rotation=45)
+            ax.set_xlim(0, n + chart_padding)
+            ax.autoscale_view(scalex=False)
+        
+        # Widen the price range so SL / TP lines sit inside the panel
+        if stop_loss is not None or take_profit is not None:
+            ymin, ymax = price_ax.get_ylim()
+            price_range = ymax - ymin
+            for level in (stop_loss, take_profit):
+                if level is not None:
+                    ymin = min(ymin, level - price_range * 0.1)
+                    ymax = max(ymax, level + price_range * 0.1)
+            price_ax.set_ylim(ymin, ymax)
+        
+        # Title first: tight_layout has to reserve room for it
+        template.suptitle.set_text(self._title_text(df, symbol, timeframe, result, current_datetime))
+        template.fig.tight_layout()
+        
+        if entry_point is not None:
+            entry_idx, marker_type, marker_color = self._entry_marker(df, entry_point[0])
+            track(price_ax.scatter(entry_idx, entry_point[1], marker=marker_type, s=200,
+                                   color=marker_color, zorder=5, linewidth=2, edgecolor='white'))
+    
+    def create_vision_image(self, candles: List[Dict], symbol: str, timeframe: str,
+                            entry_point: Optional[Tuple[datetime, float]] = None,
+                            stop_loss: Optional[float] = None,
+                            take_profit: Optional[float] = None,
+                            result: Optional[str] = None,
+                            profile: Optional[Dict[str, Any]] = None) -> Tuple[bytes, Dict[str, Any]]:
+        """Render a compact chart image for the Vision API without touching disk
+        
+        The chart is drawn into the shared template, rasterised once, cropped to
+        the vertical span covering ``profile["panels"]`` and re-encoded with
+        ``encode_vision_image``.  Returns (b"", {}) on failure.
+        """
+        from config import VISION_IMAGE_PROFILE
+        profile = {**VISION_IMAGE_PROFILE, **(profile or {})}
+        panels = [p for p in profile.get("panels") or PANEL_NAMES if p in PANEL_NAMES]
+        
+        try:
+            df = self._prepare_data(candles)
+            template = get_chart_template(self.fig_width, self.fig_height, self.colors)
+            
+            with template.lock:
+                self._draw_template(template, df, symbol, timeframe, entry_point,
+                                    stop_loss, take_profit, result, datetime.now())
+                canvas = template.fig.canvas
+                canvas.draw()
+                image = Image.fromarray(np.asarray(canvas.buffer_rgba()).copy())
+                
+                top, bottom = 0, image.height
+                if len(panels) < len(PANEL_NAMES):
+                    # Display coords are bottom-up; keep labels/ticks of the chosen panels
+                    renderer = canvas.get_renderer()
+                    boxes = [template.axes[PANEL_NAMES.index(p)].get_tightbbox(renderer) for p in panels]
+                    if "price" in panels:
+                        boxes.append(template.suptitle.get_window_extent(renderer))
+                    top = max(0, int(image.height - max(b.y1 for b in boxes)) - 4)
+                    bottom = min(image.height, int(image.height - min(b.y0 for b in boxes)) + 4)
+            
+            image = image.crop((0, top, image.width, bottom))
+            data, meta = encode_vision_image(image, profile)
+            meta["panels"] = panels
+            logger.info(
+                f"Vision image for {symbol} {timeframe}: {meta['width']}x{meta['height']} "
+                f"{meta['mime']} {meta['bytes'] / 1024:.1f} KB"
+            )
+            return data, meta
+        
+        except Exception as e:
+            logger.error(f"Error creating Vision image: {str(e)}")
+            return b"", {}
+    
+    def create_chart_artifact(self, candles: List[Dict], symbol: str, timeframe: str,
+                              entry_point: Optional[Tuple[datetime, float]] = None,
+                              stop_loss: Optional[float] = None,
+                              take_profit: Optional[float] = None,
+                              result: Optional[str] = None):
+        """Render the full chart to PNG bytes without writing it
+
+        Returns a chart_handoff.ChartArtifact whose ``path`` is where the chart
+        will be stored once persisted (see chart_handoff.persist_async), or
+        None on failure.  The classic (non-template) path still renders via
+        create_chart, so its artifact comes back already persisted.
+        """
+        from chart_handoff import ChartArtifact
+
+        try:
+            df = self._prepare_data(candles)
+            current_datetime = datetime.now()
+            last_bar = df.index[-1].isoformat() if len(df) else None
+
+            if not self.use_template:
+                filepath = self.create_chart(candles, symbol, timeframe, entry_point,
+                                             stop_loss, take_profit, result)
+                if not filepath:
+                    return None
+                with open(filepath, 'rb') as f:
+                    data = f.read()
+                return ChartArtifact(symbol, timeframe, filepath, data, current_datetime.timestamp(),
+                                     len(df), last_bar, persisted=True)
+
+            template = get_chart_template(self.fig_width, self.fig_height, self.colors)
+            filepath = self._output_path(symbol, timeframe, result, current_datetime)
+            buffer = io.BytesIO()
+            with template.lock:
+                self._draw_template(template, df, symbol, timeframe, entry_point,
+                                    stop_loss, take_profit, result, current_datetime)
+                template.fig.savefig(buffer, format='png', dpi=self.dpi, bbox_inches='tight',
+                                     facecolor=self.colors['bg'], edgecolor='none')
+
+            logger.info(f"Chart rendered in memory for {filepath} ({buffer.tell() / 1024:.1f} KB)")
+            return ChartArtifact(symbol, timeframe, filepath, buffer.getvalue(),
+                                 current_datetime.timestamp(), len(df), last_bar)
+
+        except Exception as e:
+            logger.error(f"Error creating chart artifact: {str(e)}")
+            return None
+
     def create_chart_bytes(self, candles: List[Dict], symbol: str, timeframe: str,
                          entry_point: Optional[Tuple[datetime, float]] = None,
                          stop_loss: Optional[float] = None,
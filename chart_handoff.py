@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+In-process chart handoff
+
+The capture job used to render a chart to static/charts, hand a path string
+to the Vision worker, and the worker then probed several static/ variants of
+that path, read the file back and – on a miss – silently rendered a fresh
+chart.  Charts now travel in memory instead:
+
+    • the renderer returns a ChartArtifact (PNG bytes + metadata, including
+      the path the chart *will* be stored under)
+    • chart_handoff keeps the newest artifacts keyed by that path, so Vision
+      in the same process reads the bytes without touching disk
+    • writing the PNG and indexing it in chart_store happen on a background
+      writer thread, off the critical path
+
+Consumers in another process (a separate vision worker) still find the file
+on disk once the writer has flushed it.
+
+    from chart_handoff import chart_handoff
+
+    artifact = render_service.render_artifact("EUR_USD", "H1")
+    data = chart_handoff.get(artifact.path)        # bytes, no disk read
+
+Environment:
+    CHART_HANDOFF_SIZE      artifacts kept in memory (default 64)
+    CHART_HANDOFF_TTL       seconds an artifact stays readable (default 1800)
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChartArtifact:
+    """A rendered chart: PNG bytes plus what is needed to persist and index it"""
+    symbol: str
+    timeframe: str
+    path: str                          # static/charts/<SYM>/<SYM>_<TF>_<TS>.png
+    data: bytes
+    created_at: float = field(default_factory=time.time)
+    candles: int = 0
+    last_bar: Optional[str] = None     # ISO timestamp of the newest candle
+    persisted: bool = False
+    signal_id: Optional[int] = None    # set when a Signal was stored before the write landed
+
+    @property
+    def vision_path(self) -> str:
+        """Path relative to static/, as carried in capture payloads"""
+        return self.path.replace("static/", "", 1)
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbol,
+            "timeframe": self.timeframe,
+            "path": self.path,
+            "created_at": self.created_at,
+            "candles": self.candles,
+            "last_bar": self.last_bar,
+            "bytes": len(self.data),
+            "persisted": self.persisted,
+        }
+
+
+def _key(path: str) -> str:
+    """Normalise "charts/X/..", "static/charts/X/.." and "./static/.." to one key"""
+    path = os.path.normpath(path)
+    return path if path.startswith("static" + os.sep) else os.path.join("static", path)
+
+
+class ChartHandoff:
+    """Bounded, TTL-limited map of chart path → artifact, plus the async writer"""
+
+    def __init__(self, max_items: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_items = int(os.environ.get("CHART_HANDOFF_SIZE", 64)) if max_items is None else max_items
+        self.ttl = float(os.environ.get("CHART_HANDOFF_TTL", 1800)) if ttl is None else ttl
+        self._items: "OrderedDict[str, ChartArtifact]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.write_errors = 0
+
+    # ─────────────────────────────── in-memory map ──────────────────────────────
+    def put(self, artifact: ChartArtifact) -> None:
+        with self._lock:
+            key = _key(artifact.path)
+            self._items[key] = artifact
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+    def artifact(self, path: str) -> Optional[ChartArtifact]:
+        """The live artifact for *path* (any static/ variant), or None"""
+        if not path:
+            return None
+        with self._lock:
+            artifact = self._items.get(_key(path))
+            if artifact is not None and time.time() - artifact.created_at > self.ttl:
+                del self._items[_key(path)]
+                artifact = None
+            if artifact is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return artifact
+
+    def get(self, path: str) -> Optional[bytes]:
+        """PNG bytes for *path*, or None when the chart is not held in memory"""
+        artifact = self.artifact(path)
+        return artifact.data if artifact is not None else None
+
+    def available(self, path: str) -> bool:
+        """True when the chart can be read – from memory or from disk"""
+        if not path:
+            return False
+        with self._lock:
+            if _key(path) in self._items:
+                return True
+        return os.path.isfile(path) or os.path.isfile(_key(path))
+
+    # ─────────────────────────────── persistence ────────────────────────────────
+    def _get_writer(self) -> ThreadPoolExecutor:
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    # one thread keeps writes ordered, so "latest" in chart_store stays monotonic
+                    self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chart-writer")
+        return self._writer
+
+    def persist_async(self, artifact: ChartArtifact) -> Future:
+        """Queue the PNG write + index; returns a Future resolving to the path"""
+        return self._get_writer().submit(self._persist, artifact)
+
+    def _persist(self, artifact: ChartArtifact) -> str:
+        try:
+            os.makedirs(os.path.dirname(artifact.path) or ".", exist_ok=True)
+            tmp = f"{artifact.path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(artifact.data)
+            os.replace(tmp, artifact.path)          # readers never see a half-written PNG
+            artifact.persisted = True
+            self.writes += 1
+        except OSError as e:
+            self.write_errors += 1
+            logger.error(f"Could not persist chart {artifact.path}: {e}")
+            raise
+
+        try:
+            from chart_store import chart_store
+            chart_store.record(artifact.path, artifact.symbol, artifact.timeframe,
+                               created_at=artifact.created_at)
+            if artifact.signal_id is not None:
+                chart_store.attach_signal(artifact.path, artifact.signal_id)
+        except Exception as e:
+            logger.warning(f"Could not index chart {artifact.path}: {e}")
+        return artifact.path
+
+    def attach_signal(self, path: str, signal_id: int) -> None:
+        """Link a chart to its Signal, even if the chart is still being written
+
+        The id is noted on the artifact first, so whichever of this call and
+        the background write runs second creates the link in chart_store.
+        """
+        with self._lock:
+            artifact = self._items.get(_key(path))
+            if artifact is not None:
+                artifact.signal_id = signal_id
+        from chart_store import chart_store
+        chart_store.attach_signal(path, signal_id)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued write has finished"""
+        if self._writer is not None:
+            self._writer.submit(lambda: None).result(timeout=timeout)
+
+    def publish(self, artifact: ChartArtifact, persist: bool = True) -> ChartArtifact:
+        """Make *artifact* readable in memory and (optionally) persist it in the background"""
+        self.put(artifact)
+        if persist and not artifact.persisted:
+            self.persist_async(artifact)
+        return artifact
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            held = len(self._items)
+            held_bytes = sum(len(a.data) for a in self._items.values())
+        return {
+            "held": held,
+            "held_bytes": held_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "write_errors": self.write_errors,
+        }
+
+
+# Global instance shared by the renderer, capture_job and vision_worker
+chart_handoff = ChartHandoff()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Chart render service
+
+matplotlib holds the GIL for the whole draw + PNG encode, so rendering a
+chart inside a gunicorn worker blocks every other request on that worker.
+This module keeps a small pool of long-lived render processes that import
+the plotting stack (matplotlib, mplfinance, pandas, chart_utils) once when
+they start.  Callers submit a render job and get back PNG bytes, the path
+of the saved file, or an in-memory ChartArtifact whose disk write happens
+in the background (see chart_handoff.py).
+
+    from chart_render_service import render_service
+
+    png      = render_service.render_bytes("EUR_USD", "H1", count=100)
+    path     = render_service.render_path("XAU_USD", "M15")
+    artifact = render_service.render_artifact("EUR_USD", "H1")
+
+Environment:
+    CHART_RENDER_WORKERS        pool size (default 2, 0 = render in-process)
+    CHART_RENDER_TIMEOUT        seconds to wait for one render (default 60)
+    CHART_RENDER_START_METHOD   multiprocessing start method (default forkserver)
+"""
+
+import os
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Modules every render process imports once at start-up
+_WARM_MODULES = ["matplotlib", "matplotlib.pyplot", "pandas", "mplfinance", "chart_utils"]
+
+
+# ──────────────────────────────────────────────────────────────
+#  Functions executed inside the render processes
+# ──────────────────────────────────────────────────────────────
+def _warm_worker() -> None:
+    """Pool initializer: pay the plotting-stack import cost once per process"""
+    import importlib
+    import matplotlib
+    matplotlib.use("Agg")
+
+    for name in _WARM_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError as e:
+            logger.warning(f"Render worker could not preload {name}: {e}")
+
+
+def _render_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Render one chart and return {"path", "bytes", "candles"}
+
+    With job["in_memory"] the PNG is not written here; the result also carries
+    the ChartArtifact under "artifact" for the caller to publish and persist.
+    """
+    from chart_utils import fetch_candles
+    from chart_generator_basic import ChartGenerator
+
+    candles = job.get("candles") or fetch_candles(job["symbol"], job["timeframe"], job["count"])
+    if not candles:
+        return {"path": "", "bytes": b"", "candles": 0}
+
+    chart_gen = ChartGenerator(signal_action=job.get("signal_action"))
+    if job.get("in_memory"):
+        artifact = chart_gen.create_chart_artifact(
+            candles=candles,
+            symbol=job["symbol"],
+            timeframe=job["timeframe"],
+            entry_point=job.get("entry_point"),
+            stop_loss=job.get("stop_loss"),
+            take_profit=job.get("take_profit"),
+            result=job.get("result"),
+        )
+        if artifact is None:
+            return {"path": "", "bytes": b"", "candles": 0}
+        return {"path": artifact.path, "bytes": artifact.data, "candles": len(candles), "artifact": artifact}
+
+    path = chart_gen.create_chart(
+        candles=candles,
+        symbol=job["symbol"],
+        timeframe=job["timeframe"],
+        entry_point=job.get("entry_point"),
+        stop_loss=job.get("stop_loss"),
+        take_profit=job.get("take_profit"),
+        result=job.get("result"),
+    )
+
+    data = b""
+    if path and job.get("as_bytes"):
+        with open(path, "rb") as f:
+            data = f.read()
+
+    return {"path": path or "", "bytes": data, "candles": len(candles)}
+
+
+# ──────────────────────────────────────────────────────────────
+#  Service used by the web routes and the capture job
+# ──────────────────────────────────────────────────────────────
+class ChartRenderService:
+    """Submits chart renders to a lazily-started process pool"""
+
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None,
+                 start_method: Optional[str] = None):
+        self.workers = int(os.environ.get("CHART_RENDER_WORKERS", 2)) if workers is None else workers
+        self.timeout = float(os.environ.get("CHART_RENDER_TIMEOUT", 60)) if timeout is None else timeout
+        self.start_method = start_method or os.environ.get("CHART_RENDER_START_METHOD", "forkserver")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    # -------------------------------------------------------- pool handling
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    method = self.start_method
+                    if method not in multiprocessing.get_all_start_methods():
+                        method = "spawn"
+                    ctx = multiprocessing.get_context(method)
+                    if method == "forkserver":
+                        # children are forked from a server that already has the stack loaded
+                        ctx.set_forkserver_preload(_WARM_MODULES)
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=ctx,
+                        initializer=_warm_worker,
+                    )
+                    logger.info(f"Chart render pool started ({self.workers} workers, {method})")
+        return self._pool
+
+    def _reset_pool(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        """Stop the render processes (they are restarted on the next submit)"""
+        self._reset_pool()
+
+    # -------------------------------------------------------------- public
+    def submit(self, job: Dict[str, Any]) -> Future:
+        """Queue a render job; returns a Future resolving to the result dict"""
+        if self.workers <= 0:
+            fut: Future = Future()
+            try:
+                fut.set_result(_render_job(job))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+        return self._get_pool().submit(_render_job, job)
+
+    def render(
+        self,
+        symbol: str,
+        timeframe: str = "H1",
+        count: int = 100,
+        entry_point: Optional[Tuple[Any, float]] = None,
+        stop_loss: Optional[float] = None,
+        take_profit: Optional[float] = None,
+        result: Optional[str] = None,
+        signal_action: Optional[str] = None,
+        candles: Optional[List[Dict]] = None,
+        as_bytes: bool = False,
+        in_memory: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Render a chart in the pool and wait for it.
+
+        If *candles* is omitted the render process fetches them itself, so the
+        OANDA round-trip doesn't block the caller's process either.
+
+        Returns:
+            {"path": str, "bytes": bytes, "candles": int} – empty path/bytes on failure
+        """
+        job = {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "count": count,
+            "entry_point": entry_point,
+            "stop_loss": stop_loss,
+            "take_profit": take_profit,
+            "result": result,
+            "signal_action": signal_action,
+            "candles": candles,
+            "as_bytes": as_bytes,
+            "in_memory": in_memory,
+        }
+        start = datetime.now()
+        try:
+            out = self.submit(job).result(timeout=self.timeout)
+        except TimeoutError:
+            logger.error(f"Chart render for {symbol} {timeframe} timed out after {self.timeout}s")
+            return {"path": "", "bytes": b"", "candles": 0}
+        except BrokenProcessPool:
+            # a render process died (OOM, segfault) – restart the pool and render here once
+            logger.error(f"Chart render pool broken while rendering {symbol}; restarting it")
+            self._reset_pool()
+            out = _render_job(job)
+        except Exception as e:
+            logger.error(f"Chart render for {symbol} {timeframe} failed: {e}")
+            return {"path": "", "bytes": b"", "candles": 0}
+
+        logger.info(
+            "Rendered %s %s chart in %.2fs (%d candles)",
+            symbol, timeframe, (datetime.now() - start).total_seconds(), out["candles"],
+        )
+        return out
+
+    def render_bytes(self, symbol: str, timeframe: str = "H1", count: int = 100, **kwargs) -> bytes:
+        """Same as *render* but returns only the PNG bytes"""
+        return self.render(symbol, timeframe, count, as_bytes=True, **kwargs)["bytes"]
+
+    def render_path(self, symbol: str, timeframe: str = "H1", count: int = 100, **kwargs) -> str:
+        """Same as *render* but returns only the saved file path"""
+        return self.render(symbol, timeframe, count, **kwargs)["path"]
+
+    def render_artifact(self, symbol: str, timeframe: str = "H1", count: int = 100,
+                        persist: bool = True, **kwargs):
+        """
+        Render a chart in memory and publish it to chart_handoff.
+
+        The PNG bytes are readable through chart_handoff immediately; writing
+        the file and indexing it in chart_store is queued on the background
+        writer unless *persist* is False.  Returns the ChartArtifact, or None
+        when the render failed.
+        """
+        from chart_handoff import chart_handoff
+
+        artifact = self.render(symbol, timeframe, count, in_memory=True, **kwargs).get("artifact")
+        if artifact is None:
+            return None
+        return chart_handoff.publish(artifact, persist=persist)
+
+
+# Global instance used by the routes and capture_job
+render_service = ChartRenderService()
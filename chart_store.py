@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Chart artifact store
+
+Every chart PNG written under static/charts/<SYMBOL>/ is recorded in a small
+SQLite index (symbol, timeframe, timestamp, path, signal id).  The index
+answers "latest chart for a symbol" with a primary-key lookup instead of a
+glob + getmtime sort over the directory, and drives retention:
+
+    • charts older than CHART_RETENTION_DAYS are removed
+    • only the newest CHART_RETENTION_PER_SERIES per symbol/timeframe are kept
+    • charts older than CHART_ARCHIVE_AFTER_DAYS (0 = off) are moved into
+      per-day zip archives  static/charts/_archive/<SYMBOL>/<YYYY-MM-DD>.zip
+
+Charts linked to a signal are archived rather than deleted, so
+/api/signals/<id>/chart evidence is never silently lost.
+"""
+
+import os
+import re
+import time
+import sqlite3
+import logging
+import zipfile
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from config import CHARTS_DIR
+from sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+# "XAUUSD_H1_20250507_093002.png" / "..._win.png"
+_FILENAME_RE = re.compile(r"^(?P<symbol>[A-Z0-9]+)_(?P<tf>[A-Z0-9]+)_(?P<ts>\d{8}_\d{6})")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS charts (
+    id          INTEGER PRIMARY KEY,
+    symbol      TEXT    NOT NULL,
+    timeframe   TEXT    NOT NULL,
+    created_at  REAL    NOT NULL,
+    path        TEXT    NOT NULL UNIQUE,
+    signal_id   INTEGER,
+    archive     TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_charts_series ON charts (symbol, timeframe, created_at);
+CREATE INDEX IF NOT EXISTS ix_charts_created ON charts (created_at);
+
+-- one row per (symbol, timeframe) plus (symbol, '*') for "any timeframe"
+CREATE TABLE IF NOT EXISTS latest (
+    symbol      TEXT NOT NULL,
+    timeframe   TEXT NOT NULL,
+    chart_id    INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    PRIMARY KEY (symbol, timeframe)
+);
+"""
+
+
+def _symbol_key(symbol: str) -> str:
+    """Directory-style symbol: "XAU_USD" → "XAUUSD" """
+    return symbol.replace("_", "").upper()
+
+
+class ChartStore:
+    """SQLite-backed index of chart files with retention and archiving"""
+
+    def __init__(self, db_path: Optional[str] = None, charts_dir: str = CHARTS_DIR):
+        self.db_path = db_path or os.environ.get("CHART_INDEX_DB", os.path.join("data", "chart_index.sqlite"))
+        self.charts_dir = charts_dir
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            fresh = not os.path.exists(self.db_path)
+            self._conn = connect(self.db_path, _SCHEMA)
+            if fresh:
+                # first run: pick up the charts that were written before the index existed
+                self.backfill()
+        return self._conn
+
+    # ───────────────────────────────── indexing ─────────────────────────────────
+    def record(self, path: str, symbol: str, timeframe: str,
+               created_at: Optional[float] = None, signal_id: Optional[int] = None) -> Optional[int]:
+        """Add a chart file to the index and make it the latest for its series"""
+        created_at = time.time() if created_at is None else created_at
+        symbol = _symbol_key(symbol)
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        "INSERT INTO charts (symbol, timeframe, created_at, path, signal_id) "
+                        "VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(path) DO UPDATE SET created_at = excluded.created_at",
+                        (symbol, timeframe, created_at, path, signal_id),
+                    )
+                    chart_id = db.execute("SELECT id FROM charts WHERE path = ?", (path,)).fetchone()["id"]
+                    for tf in (timeframe, "*"):
+                        db.execute(
+                            "INSERT INTO latest (symbol, timeframe, chart_id, created_at) VALUES (?, ?, ?, ?) "
+                            "ON CONFLICT(symbol, timeframe) DO UPDATE SET "
+                            "chart_id = excluded.chart_id, created_at = excluded.created_at "
+                            "WHERE excluded.created_at >= latest.created_at",
+                            (symbol, tf, chart_id, created_at),
+                        )
+            return chart_id
+        except sqlite3.Error as e:
+            logger.error(f"Could not index chart {path}: {e}")
+            return None
+
+    def attach_signal(self, path: str, signal_id: int) -> None:
+        """Link an indexed chart to the Signal that was created from it"""
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute("UPDATE charts SET signal_id = ? WHERE path = ?", (signal_id, path))
+        except sqlite3.Error as e:
+            logger.error(f"Could not link chart {path} to signal {signal_id}: {e}")
+
+    def latest(self, symbol: str, timeframe: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Newest chart for *symbol* (optionally one timeframe), or None"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT c.* FROM latest l JOIN charts c ON c.id = l.chart_id "
+                "WHERE l.symbol = ? AND l.timeframe = ?",
+                (_symbol_key(symbol), timeframe or "*"),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def latest_path(self, symbol: str, timeframe: Optional[str] = None) -> Optional[str]:
+        """Path of the newest on-disk chart for *symbol*, or None"""
+        row = self.latest(symbol, timeframe)
+        if row and not row["archive"] and os.path.exists(row["path"]):
+            return row["path"]
+        return None
+
+    def list(self, symbol: str, timeframe: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest-first charts for a symbol"""
+        sql = "SELECT * FROM charts WHERE symbol = ?"
+        args: List[Any] = [_symbol_key(symbol)]
+        if timeframe:
+            sql += " AND timeframe = ?"
+            args.append(timeframe)
+        sql += " ORDER BY created_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [dict(r) for r in self._db().execute(sql, args).fetchall()]
+
+    def backfill(self) -> int:
+        """Index chart files already on disk (one-off migration); returns rows added"""
+        added = 0
+        if not os.path.isdir(self.charts_dir):
+            return 0
+        for entry in os.scandir(self.charts_dir):
+            if not entry.is_dir() or entry.name.startswith("_"):
+                continue
+            for f in os.scandir(entry.path):
+                m = _FILENAME_RE.match(f.name)
+                if not f.name.endswith(".png") or not m:
+                    continue
+                ts = datetime.strptime(m.group("ts"), "%Y%m%d_%H%M%S").timestamp()
+                if self.record(f.path, m.group("symbol"), m.group("tf"), created_at=ts):
+                    added += 1
+        logger.info(f"Chart index backfill: {added} charts indexed")
+        return added
+
+    # ───────────────────────────────── retention ────────────────────────────────
+    def apply_retention(self, max_age_days: Optional[float] = None,
+                        keep_per_series: Optional[int] = None,
+                        archive_after_days: Optional[float] = None,
+                        now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Enforce the retention policy.
+
+        Returns counts: {"deleted": n, "archived": n}
+        """
+        max_age_days = float(os.environ.get("CHART_RETENTION_DAYS", 30)) if max_age_days is None else max_age_days
+        keep_per_series = int(os.environ.get("CHART_RETENTION_PER_SERIES", 500)) if keep_per_series is None else keep_per_series
+        archive_after_days = float(os.environ.get("CHART_ARCHIVE_AFTER_DAYS", 0)) if archive_after_days is None else archive_after_days
+        now = time.time() if now is None else now
+        stats = {"deleted": 0, "archived": 0}
+
+        with self._lock:
+            db = self._db()
+            expired = {r["id"]: dict(r) for r in db.execute(
+                "SELECT * FROM charts WHERE archive IS NULL AND created_at < ?",
+                (now - max_age_days * 86400,),
+            )} if max_age_days else {}
+
+            if keep_per_series:
+                for r in db.execute(
+                    "SELECT * FROM ("
+                    "  SELECT *, ROW_NUMBER() OVER (PARTITION BY symbol, timeframe "
+                    "                               ORDER BY created_at DESC) AS rn "
+                    "  FROM charts WHERE archive IS NULL"
+                    ") WHERE rn > ?",
+                    (keep_per_series,),
+                ):
+                    expired[r["id"]] = dict(r)
+
+            to_archive = [] if not archive_after_days else [
+                dict(r) for r in db.execute(
+                    "SELECT * FROM charts WHERE archive IS NULL AND created_at < ?",
+                    (now - archive_after_days * 86400,),
+                ) if r["id"] not in expired
+            ]
+            # Signal evidence is archived instead of deleted
+            to_archive += [r for r in expired.values() if r["signal_id"] is not None]
+            to_delete = [r for r in expired.values() if r["signal_id"] is None]
+
+            with db:
+                for row in to_delete:
+                    self._remove_file(row["path"])
+                    db.execute("DELETE FROM charts WHERE id = ?", (row["id"],))
+                    stats["deleted"] += 1
+
+                for row in to_archive:
+                    archive = self._archive_file(row)
+                    if archive:
+                        db.execute("UPDATE charts SET archive = ? WHERE id = ?", (archive, row["id"]))
+                        stats["archived"] += 1
+
+                # re-point "latest" rows whose chart just went away
+                db.execute(
+                    "DELETE FROM latest WHERE chart_id NOT IN (SELECT id FROM charts WHERE archive IS NULL)"
+                )
+                db.execute(
+                    "INSERT OR IGNORE INTO latest (symbol, timeframe, chart_id, created_at) "
+                    "SELECT symbol, timeframe, id, MAX(created_at) FROM charts "
+                    "WHERE archive IS NULL GROUP BY symbol, timeframe "
+                    "UNION ALL "
+                    "SELECT symbol, '*', id, MAX(created_at) FROM charts "
+                    "WHERE archive IS NULL GROUP BY symbol"
+                )
+
+        logger.info(f"Chart retention: {stats['deleted']} deleted, {stats['archived']} archived")
+        return stats
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not delete chart {path}: {e}")
+
+    def _archive_file(self, row: Dict[str, Any]) -> Optional[str]:
+        """Move a chart into its per-day zip; returns the archive path"""
+        if not os.path.exists(row["path"]):
+            return None
+        day = datetime.fromtimestamp(row["created_at"], tz=timezone.utc).strftime("%Y-%m-%d")
+        archive_dir = os.path.join(self.charts_dir, "_archive", row["symbol"])
+        os.makedirs(archive_dir, exist_ok=True)
+        archive = os.path.join(archive_dir, f"{day}.zip")
+        try:
+            with zipfile.ZipFile(archive, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+                zf.write(row["path"], arcname=os.path.basename(row["path"]))
+        except (OSError, zipfile.BadZipFile) as e:
+            logger.warning(f"Could not archive chart {row['path']}: {e}")
+            return None
+        self._remove_file(row["path"])
+        return archive
+
+
+# Global instance used by the chart generator, vision worker and scheduler
+chart_store = ChartStore()
+
+
+def run_retention() -> None:
+    """Scheduler job wrapper"""
+    chart_store.apply_retention()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Chart artifact store maintenance")
+    parser.add_argument("--backfill", action="store_true", help="index charts already on disk")
+    parser.add_argument("--retention", action="store_true", help="apply the retention policy now")
+    args = parser.parse_args()
+
+    if args.backfill:
+        chart_store.backfill()
+    if args.retention:
+        print(chart_store.apply_retention())
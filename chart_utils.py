@@ -211,7 +211,11 @@ def get_atr(symbol: str, timeframe: str = "M15", lookback: int = 14) -> float |
     df: pd.DataFrame | None = fetch_candles(symbol, timeframe, count=lookback + 1)
     if df is None or len(df) < lookback + 1:
         return None
+    return atr_pips(df, symbol, lookback)
 
+
+def atr_pips(df: pd.DataFrame, symbol: str, lookback: int = 14) -> float:
+    """ATR-{lookback} in pips of the last rows of *df* (needs lookback + 1 rows)"""
     high  = df["high"].to_numpy()
     low   = df["low"].to_numpy()
     close = df["close"].to_numpy()
@@ -225,8 +229,8 @@ def get_atr(symbol: str, timeframe: str = "M15", lookback: int = 14) -> float |
 
     # Price-units ATR → pips
     factor = price_to_pip_factor(symbol)
-    atr_pips = (tr[-lookback:].mean()) * factor
-    return float(atr_pips)
+    atr = (tr[-lookback:].mean()) * factor
+    return float(atr)
 
 def price_to_pip_factor(symbol: str) -> int:
     """
@@ -33,6 +33,12 @@ TIMEFRAMES = [
 # Default timeframe for analysis
 DEFAULT_TIMEFRAME = "H1"
 
+# Bar length per OANDA granularity (seconds)
+TIMEFRAME_SECONDS = {
+    "M1": 60, "M5": 300, "M15": 900, "M30": 1800,
+    "H1": 3600, "H4": 14400, "D": 86400, "D1": 86400,
+}
+
 # OpenAI Vision API configuration
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 
@@ -40,6 +46,17 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 VISION_API_URL = "https://api.openai.com/v1/chat/completions"
 VISION_MODEL = "gpt-4-vision-preview"
 
+# Compact chart encoding for Vision requests (see chart_generator_basic.encode_vision_image)
+#   format: "png" (palette-quantized), "webp", "jpeg" or "original" (send the file as-is)
+#   panels: subset of price/volume/rsi/macd/atr to keep when the chart is rendered for Vision
+VISION_IMAGE_PROFILE = {
+    "format": os.environ.get("VISION_IMAGE_FORMAT", "png"),
+    "width": int(os.environ.get("VISION_IMAGE_WIDTH", 1280)),
+    "colors": int(os.environ.get("VISION_IMAGE_COLORS", 64)),
+    "quality": int(os.environ.get("VISION_IMAGE_QUALITY", 80)),
+    "panels": [p for p in os.environ.get("VISION_IMAGE_PANELS", "price,volume,rsi,macd,atr").split(",") if p],
+}
+
 # OANDA API configuration
 OANDA_API_KEY = os.environ.get("OANDA_API_KEY", "")
 OANDA_ACCOUNT_ID = os.environ.get("OANDA_ACCOUNT_ID", "")
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Rolling return-correlation matrix across ASSETS
+
+SignalScorer.pair_correlations is a hand-written table and any pair missing
+from it counted as 0.5.  This service measures the correlation instead:
+log returns of the last CORRELATION_WINDOW closed bars of every asset
+(aligned on bar time), taken from the indicator frames the scorer loads
+(signal_scorer.load_technical_frame).  An asset whose frame is cached is
+served from memory; otherwise the refresh fetches its candles from OANDA
+– at most one fetch per asset per bar close (or per RETRY_SECONDS while
+the bar is not out yet), and the frame is then shared with the scorer.
+
+The matrix is maintained incrementally: the service keeps the running sum
+and the sum of outer products of the return vectors in the window, so each
+new bar is one rank-1 update (and one removal) of a K×K array; it is
+recomputed exactly every `window` bars to shed float drift.
+
+Refreshes never run on the lookup path: maybe_refresh() pulls the new
+bar(s) once a bar has closed and is driven off the hot path – by the
+"correlation_refresh" scheduler job, or by run_refresher() on a thread
+of a standalone Vision worker.  Lookups only read the published
+(index, matrix) snapshot: O(1) dict index + array access, and row()
+returns a whole row for vectorised use.
+
+Pairs without enough common history (or when candles are unavailable)
+return NaN / None so callers can fall back to their static priors.
+
+    python correlation_service.py        # current matrix as JSON
+
+Environment:
+    CORRELATION_TIMEFRAME   bar size of the returns (default H1)
+    CORRELATION_WINDOW      returns in the rolling window (default 96)
+    CORRELATION_MIN_BARS    fewest returns before the matrix is used (default 30)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config import TIMEFRAME_SECONDS
+
+logger = logging.getLogger(__name__)
+
+RETRY_SECONDS = 60      # bar not published yet / fetch failed → try again soon
+
+
+def _key(symbol: str) -> str:
+    return symbol.replace("_", "").upper()
+
+
+def _default_frame_loader(symbol: str, timeframe: str):
+    from signal_scoring import signal_scorer
+    return signal_scorer.load_technical_frame(symbol, timeframe)
+
+
+class CorrelationService:
+    """Incrementally updated rolling correlation of asset returns"""
+
+    def __init__(self, symbols: Optional[Sequence[str]] = None, timeframe: Optional[str] = None,
+                 window: Optional[int] = None, min_bars: Optional[int] = None,
+                 frame_loader: Optional[Callable] = None):
+        if symbols is None:
+            from config import ASSETS
+            symbols = ASSETS
+        self.assets = list(symbols)
+        self.timeframe = timeframe or os.environ.get("CORRELATION_TIMEFRAME", "H1")
+        self.window = int(os.environ.get("CORRELATION_WINDOW", 96)) if window is None else window
+        self.min_bars = int(os.environ.get("CORRELATION_MIN_BARS", 30)) if min_bars is None else min_bars
+        self.frame_loader = frame_loader or _default_frame_loader
+        self._lock = threading.RLock()
+        self._next_refresh = 0.0
+        self._snapshot: tuple = ({}, None)          # (index, matrix) swapped together for readers
+        self._reset([])
+
+    def _reset(self, symbols: List[str]) -> None:
+        self._symbols = symbols
+        self._index = {s: i for i, s in enumerate(symbols)}
+        k = len(symbols)
+        self._times: Deque[pd.Timestamp] = deque()
+        self._rows: Deque[np.ndarray] = deque()
+        self._sum = np.zeros(k)
+        self._outer = np.zeros((k, k))
+        self._since_exact = 0
+        self._matrix: Optional[np.ndarray] = None
+
+    # ──────────────────────────────── refresh ───────────────────────────────────
+    def _returns(self) -> pd.DataFrame:
+        """Aligned log returns of every asset with candle data (columns = DB symbols)"""
+        closes = {}
+        for asset in self.assets:
+            try:
+                df, _ = self.frame_loader(asset, self.timeframe)
+            except Exception as e:
+                logger.warning(f"Correlation: no candles for {asset}: {e}")
+                df = None
+            if df is not None and len(df) > 1:
+                closes[_key(asset)] = df["close"].astype(float)
+        if len(closes) < 2:
+            return pd.DataFrame()
+        aligned = pd.concat(closes, axis=1, join="inner").sort_index()
+        return np.log(aligned).diff().dropna()
+
+    def refresh(self) -> int:
+        """Pull bars newer than the window's last one; returns returns added"""
+        with self._lock:
+            returns = self._returns()
+            if returns.empty:
+                self._next_refresh = time.time() + RETRY_SECONDS
+                return 0
+
+            symbols = list(returns.columns)
+            last = self._times[-1] if self._times else None
+            if symbols != self._symbols or last is None or last not in returns.index:
+                # first load, asset set changed, or a gap longer than the frame → rebuild
+                self._reset(symbols)
+                new = returns.tail(self.window)
+            else:
+                new = returns[returns.index > last]
+
+            for ts, row in zip(new.index, new.to_numpy()):
+                self._push(ts, row)
+            if len(new):
+                if self._since_exact >= self.window:
+                    self._recompute_sums()
+                self._matrix = self._correlation()
+            self._snapshot = (self._index, self._matrix)
+            self._schedule(got_bar=len(new) > 0)
+            return len(new)
+
+    def _push(self, ts, row: np.ndarray) -> None:
+        self._times.append(ts)
+        self._rows.append(row)
+        self._sum += row
+        self._outer += np.outer(row, row)
+        if len(self._rows) > self.window:
+            self._times.popleft()
+            old = self._rows.popleft()
+            self._sum -= old
+            self._outer -= np.outer(old, old)
+        self._since_exact += 1
+
+    def _recompute_sums(self) -> None:
+        data = np.vstack(self._rows)
+        self._sum = data.sum(axis=0)
+        self._outer = data.T @ data
+        self._since_exact = 0
+
+    def _correlation(self) -> Optional[np.ndarray]:
+        n = len(self._rows)
+        if n < max(self.min_bars, 2):
+            return None
+        mean = self._sum / n
+        cov = (self._outer - n * np.outer(mean, mean)) / (n - 1)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[~np.isfinite(corr)] = np.nan          # flat series: correlation undefined
+        np.fill_diagonal(corr, 1.0)
+        return np.clip(corr, -1.0, 1.0)
+
+    def _schedule(self, got_bar: bool) -> None:
+        """Next refresh at the next bar close (or soon, if this bar wasn't out yet)"""
+        now = time.time()
+        if not got_bar:
+            self._next_refresh = now + RETRY_SECONDS
+            return
+        seconds = TIMEFRAME_SECONDS.get(self.timeframe, 3600)
+        self._next_refresh = now - now % seconds + seconds
+
+    def maybe_refresh(self) -> int:
+        """refresh() when a bar has closed since the last one (or a retry is due); returns returns added"""
+        if time.time() < self._next_refresh:
+            return 0
+        with self._lock:
+            if time.time() < self._next_refresh:     # another thread just refreshed
+                return 0
+            try:
+                return self.refresh()
+            except Exception as e:
+                logger.error(f"Correlation refresh failed: {e}")
+                self._next_refresh = time.time() + RETRY_SECONDS
+                return 0
+
+    def run_refresher(self, stop: Optional[threading.Event] = None) -> None:
+        """Call maybe_refresh() every RETRY_SECONDS until *stop* is set (thread target)"""
+        stop = stop or threading.Event()
+        while True:
+            self.maybe_refresh()
+            if stop.wait(RETRY_SECONDS):
+                return
+
+    # ──────────────────────────────── lookups ───────────────────────────────────
+    def correlation(self, a: str, b: str) -> Optional[float]:
+        """Rolling correlation of two symbols, None when not measured"""
+        index, matrix = self._snapshot
+        i, j = index.get(_key(a)), index.get(_key(b))
+        if matrix is None or i is None or j is None or np.isnan(matrix[i, j]):
+            return None
+        return float(matrix[i, j])
+
+    def row(self, symbol: str, others: Sequence[str]) -> np.ndarray:
+        """Correlations of *symbol* with each of *others* (NaN where not measured)"""
+        index, matrix = self._snapshot
+        out = np.full(len(others), np.nan)
+        i = index.get(_key(symbol))
+        if matrix is None or i is None or not len(others):
+            return out
+        cols = np.array([index.get(_key(o), -1) for o in others])
+        known = cols >= 0
+        out[known] = matrix[i, cols[known]]
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        index, matrix = self._snapshot
+        return {
+            "timeframe": self.timeframe,
+            "window": self.window,
+            "bars": len(self._rows),
+            "last_bar": self._times[-1].isoformat() if self._times else None,
+            "ready": matrix is not None,
+            "symbols": list(index),
+            "matrix": None if matrix is None else [
+                [None if np.isnan(v) else round(float(v), 3) for v in r] for r in matrix
+            ],
+        }
+
+
+# Global instance used by the signal scorer
+correlation_service = CorrelationService()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    correlation_service.refresh()
+    print(json.dumps(correlation_service.stats(), indent=2))
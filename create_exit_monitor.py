@@ -39,8 +39,9 @@ def monitor_trades_and_apply_exit_system():
         
         # Create position manager
         pm = PositionManager()
+        quotes = {}
         
-        # Process trades by symbol
+        # Collect a quote and the positions for each symbol
         for symbol, trades in trades_by_symbol.items():
             # Get latest market data for each symbol
             try:
@@ -62,6 +63,7 @@ def monitor_trades_and_apply_exit_system():
                 high = latest_candle['high']
                 low = latest_candle['low']
                 atr = high - low  # Simple approximation
+                quotes[symbol] = (price, high, low, atr)
                 
                 logger.info(f"Processing {len(trades)} trades for {symbol} at price {price}")
                 
@@ -92,24 +94,28 @@ def monitor_trades_and_apply_exit_system():
                     except Exception as e:
                         logger.error(f"Error creating position for trade {trade.id}: {e}")
                 
-                # Run the update which will evaluate exit conditions
-                logger.info(f"Running exit evaluation for {len(pm.positions)} positions in {symbol}")
-                pm.update_prices(price=price, high=high, low=low, atr=atr)
-                
-                # See if any trades were removed (exits triggered)
-                exit_count = 0
-                for trade in trades:
-                    # Check if this trade's ticket is still in positions
-                    if trade.ticket and not any(p.ticket == int(trade.ticket) for p in pm.positions):
-                        exit_count += 1
-                
-                if exit_count > 0:
-                    logger.info(f"ExitNet triggered {exit_count} exits for {symbol}")
-                else:
-                    logger.info(f"No exit signals triggered for {symbol}")
-                
             except Exception as e:
                 logger.error(f"Error processing {symbol}: {e}")
+        
+        # Run the update which will evaluate exit conditions – one ExitNet
+        # batch for every position, each at its own symbol's price
+        logger.info(f"Running exit evaluation for {len(pm.positions)} positions in {len(quotes)} symbols")
+        try:
+            pm.update_quotes(quotes)
+        except Exception as e:
+            logger.error(f"Error running exit evaluation: {e}")
+            return
+        
+        # See if any trades were removed (exits triggered)
+        remaining = {p.ticket for p in pm.positions}
+        for symbol, trades in trades_by_symbol.items():
+            if symbol not in quotes:
+                continue
+            exit_count = sum(1 for trade in trades if trade.ticket and int(trade.ticket) not in remaining)
+            if exit_count > 0:
+                logger.info(f"ExitNet triggered {exit_count} exits for {symbol}")
+            else:
+                logger.info(f"No exit signals triggered for {symbol}")
     
     logger.info("Trade monitoring completed")
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+In-memory exposure book
+
+The correlation guard (signal_scoring.evaluate_correlation) and the EA
+risk guard (mt5_ea_api._risk_guard) each queried the trades table for open
+positions on every signal and counted each position as one unit.  The book
+holds the open positions in memory instead – fed by the same events that
+write them (trade_report, update_trades, update_closed_trades, trade_sync)
+– and keeps, per position change:
+
+    • net lots per symbol     (BUY +lot, SELL −lot; hedges cancel)
+    • open position count per symbol
+    • net lots per currency leg: long 1 lot EURUSD = +1 EUR, −1 USD, so
+      long EURUSD + long USDJPY nets USD out to long EUR / short JPY
+
+Lookups are dict reads (microseconds, no DB).  Processes that don't receive
+the MT5 events (scheduler, Vision workers) reload from the trades table
+every EXPOSURE_RESYNC_SECONDS; the web process reloads on the same
+schedule to heal any missed event.  The book is per process, so hard
+limits that must not be exceeded across gunicorn workers (the risk
+guard's per-symbol trade cap) still count in the DB.  Legs are in lots of the base currency
+(no FX conversion).
+
+    python exposure_book.py      # current book as JSON
+
+Environment:
+    EXPOSURE_RESYNC_SECONDS   reload from the DB at most this stale (default 60)
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _key(symbol: str) -> str:
+    return (symbol or "").replace("_", "").upper()
+
+
+def currency_legs(symbol: str) -> Optional[Tuple[str, str]]:
+    """('EUR', 'USD') for EURUSD / EUR_USD / EURUSD.a; None when not a 6-letter pair"""
+    letters = "".join(ch for ch in _key(symbol)[:6] if ch.isalpha())
+    if len(letters) != 6:
+        return None
+    return letters[:3], letters[3:]
+
+
+class ExposureBook:
+    """Open positions, net per symbol and per currency leg"""
+
+    def __init__(self, resync_seconds: Optional[float] = None):
+        self.resync_seconds = (float(os.environ.get("EXPOSURE_RESYNC_SECONDS", 60))
+                               if resync_seconds is None else resync_seconds)
+        self._lock = threading.RLock()
+        self._positions: Dict[str, Tuple[str, float]] = {}     # key → (symbol, signed lots)
+        self._symbol_net: Dict[str, float] = {}
+        self._symbol_count: Dict[str, int] = {}
+        self._currency_net: Dict[str, float] = {}
+        self._account: Dict[str, float] = {}
+        self._loaded_at = 0.0
+        self.events = 0
+
+    # ──────────────────────────────── updates ───────────────────────────────────
+    @staticmethod
+    def _position_key(trade) -> Optional[str]:
+        if getattr(trade, "ticket", None):
+            return f"t:{trade.ticket}"
+        if getattr(trade, "id", None):
+            return f"id:{trade.id}"
+        return None
+
+    def _add(self, symbol: str, signed_lots: float, count: int) -> None:
+        self._symbol_net[symbol] = self._symbol_net.get(symbol, 0.0) + signed_lots
+        self._symbol_count[symbol] = self._symbol_count.get(symbol, 0) + count
+        if self._symbol_count[symbol] <= 0:
+            self._symbol_net.pop(symbol, None)
+            self._symbol_count.pop(symbol, None)
+        legs = currency_legs(symbol)
+        if legs:
+            base, quote = legs
+            self._currency_net[base] = self._currency_net.get(base, 0.0) + signed_lots
+            self._currency_net[quote] = self._currency_net.get(quote, 0.0) - signed_lots
+
+    def apply(self, trade) -> None:
+        """Record *trade*'s current state (open → upsert, anything else → remove)"""
+        from app import TradeSide, TradeStatus
+
+        key = self._position_key(trade)
+        if key is None:
+            return
+        with self._lock:
+            previous = self._positions.pop(key, None)
+            if previous:
+                self._add(previous[0], -previous[1], -1)
+            if trade.status == TradeStatus.OPEN and trade.symbol:
+                sign = 1.0 if trade.side == TradeSide.BUY else -1.0
+                position = (_key(trade.symbol), sign * float(trade.lot or 0.0))
+                self._positions[key] = position
+                self._add(position[0], position[1], 1)
+            self.events += 1
+
+    def apply_many(self, trades: Iterable) -> None:
+        for trade in trades:
+            self.apply(trade)
+
+    def update_account(self, balance: Optional[float] = None, free_margin: Optional[float] = None) -> None:
+        with self._lock:
+            if balance is not None:
+                self._account["balance"] = float(balance)
+            if free_margin is not None:
+                self._account["free_margin"] = float(free_margin)
+
+    def load(self) -> None:
+        """Rebuild from the trades table (and account values from Settings)"""
+        from app import app, Settings, Trade, TradeStatus
+
+        with app.app_context():
+            trades = Trade.query.filter(Trade.status == TradeStatus.OPEN).all()
+            account = {
+                "balance": Settings.get_value("mt5_account", "balance", 0.0) or 0.0,
+                "free_margin": Settings.get_value("mt5_account", "free_margin", 0.0) or 0.0,
+            }
+            with self._lock:
+                self._positions.clear()
+                self._symbol_net.clear()
+                self._symbol_count.clear()
+                self._currency_net.clear()
+                self._account = account
+                for trade in trades:
+                    self.apply(trade)
+                self._loaded_at = time.time()
+
+    def _fresh(self) -> None:
+        if time.time() - self._loaded_at < self.resync_seconds:
+            return
+        with self._lock:
+            if time.time() - self._loaded_at < self.resync_seconds:
+                return
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Exposure book reload failed: {e}")
+                self._loaded_at = time.time()          # keep serving; retry next period
+
+    # ──────────────────────────────── lookups ───────────────────────────────────
+    def open_count(self, symbol: str) -> int:
+        self._fresh()
+        return self._symbol_count.get(_key(symbol), 0)
+
+    def symbol_net(self, symbol: str) -> float:
+        self._fresh()
+        return self._symbol_net.get(_key(symbol), 0.0)
+
+    def net_positions(self) -> Dict[str, float]:
+        """{symbol: net signed lots} of symbols with open positions"""
+        self._fresh()
+        with self._lock:
+            return dict(self._symbol_net)
+
+    def position_count(self) -> int:
+        self._fresh()
+        return len(self._positions)
+
+    def gross_lots(self) -> Dict[str, float]:
+        """{symbol: open lots regardless of side}"""
+        self._fresh()
+        with self._lock:
+            gross: Dict[str, float] = {}
+            for symbol, lots in self._positions.values():
+                gross[symbol] = gross.get(symbol, 0.0) + abs(lots)
+            return gross
+
+    def currency_exposure(self, extra: Optional[Tuple[str, float]] = None) -> Dict[str, float]:
+        """Net lots per currency leg, optionally with a hypothetical (symbol, signed lots) added"""
+        self._fresh()
+        with self._lock:
+            exposure = dict(self._currency_net)
+        if extra:
+            legs = currency_legs(extra[0])
+            if legs:
+                exposure[legs[0]] = exposure.get(legs[0], 0.0) + extra[1]
+                exposure[legs[1]] = exposure.get(legs[1], 0.0) - extra[1]
+        return exposure
+
+    def account(self) -> Dict[str, float]:
+        self._fresh()
+        return dict(self._account)
+
+    def stats(self) -> Dict[str, Any]:
+        self._fresh()
+        with self._lock:
+            return {
+                "positions": len(self._positions),
+                "symbols": {s: {"net_lots": round(n, 4), "count": self._symbol_count.get(s, 0)}
+                            for s, n in sorted(self._symbol_net.items())},
+                "currencies": {c: round(n, 4) for c, n in sorted(self._currency_net.items()) if abs(n) > 1e-9},
+                "account": dict(self._account),
+                "events": self.events,
+                "loaded_at": self._loaded_at,
+            }
+
+
+# Global instance
+exposure_book = ExposureBook()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(exposure_book.stats(), indent=2))
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Durable job queue for the capture → Vision → scoring pipeline
+
+Capture jobs only enqueue a payload; a Vision worker reserves it, processes
+it and acknowledges it.  A reserved job is invisible to other workers for a
+visibility timeout.  If the worker crashes or hangs, the lease expires and
+the job is handed out again.
+
+    job = queue.reserve("vision_queue")
+    try:
+        handle(job.payload)
+        queue.ack(job)
+    except PermanentJobError as e:
+        queue.fail(job, str(e), retry=False)      # straight to dead-letter
+    except Exception as e:
+        queue.fail(job, str(e))                   # retried with backoff
+
+Failed jobs are retried with exponential backoff.  After JOB_MAX_ATTEMPTS
+deliveries they are moved to the dead-letter state, where they can be
+inspected and re-queued.
+
+Backends:
+    SQLiteJobQueue  default; a WAL database at JOB_QUEUE_DB, safe across
+                    processes (reservations use BEGIN IMMEDIATE)
+    RedisJobQueue   optional; used when JOB_QUEUE_BACKEND=redis, or with
+                    "auto" (the default) whenever Redis is reachable
+
+Environment:
+    JOB_QUEUE_BACKEND        auto | sqlite | redis          (default auto)
+    JOB_QUEUE_DB             SQLite path     (default data/job_queue.sqlite)
+    JOB_VISIBILITY_TIMEOUT   lease seconds                    (default 300)
+    JOB_MAX_ATTEMPTS         deliveries before dead-letter      (default 5)
+    JOB_RETRY_BACKOFF        first retry delay, doubles per try (default 30)
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+VISION_QUEUE = "vision_queue"
+MAX_RETRY_DELAY = 900  # seconds
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id            TEXT    PRIMARY KEY,
+    queue         TEXT    NOT NULL,
+    payload       TEXT    NOT NULL,
+    status        TEXT    NOT NULL DEFAULT 'ready',   -- ready | leased | dead
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    max_attempts  INTEGER NOT NULL,
+    available_at  REAL    NOT NULL,
+    lease_until   REAL,
+    lease_token   TEXT,
+    last_error    TEXT,
+    created_at    REAL    NOT NULL,
+    updated_at    REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_jobs_ready ON jobs (queue, status, available_at);
+CREATE INDEX IF NOT EXISTS ix_jobs_lease ON jobs (queue, status, lease_until);
+"""
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler when retrying cannot help (e.g. the chart file is gone)"""
+
+
+@dataclass
+class Job:
+    id: str
+    queue: str
+    payload: Dict[str, Any]
+    attempts: int
+    receipt: str                # lease token (SQLite) / raw message (Redis)
+
+
+def _retry_delay(attempts: int, base: float) -> float:
+    return min(MAX_RETRY_DELAY, base * 2 ** max(0, attempts - 1))
+
+
+class SQLiteJobQueue:
+    """SQLite-backed queue with leases, retries and dead-lettering"""
+
+    def __init__(self, db_path: Optional[str] = None, visibility_timeout: Optional[float] = None,
+                 max_attempts: Optional[int] = None, retry_backoff: Optional[float] = None):
+        self.db_path = db_path or os.environ.get("JOB_QUEUE_DB", os.path.join("data", "job_queue.sqlite"))
+        self.visibility_timeout = float(os.environ.get("JOB_VISIBILITY_TIMEOUT", 300)) if visibility_timeout is None else visibility_timeout
+        self.max_attempts = int(os.environ.get("JOB_MAX_ATTEMPTS", 5)) if max_attempts is None else max_attempts
+        self.retry_backoff = float(os.environ.get("JOB_RETRY_BACKOFF", 30)) if retry_backoff is None else retry_backoff
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # autocommit mode – transactions are opened explicitly below
+            self._conn = connect(self.db_path, _SCHEMA, isolation_level=None)
+        return self._conn
+
+    def enqueue(self, queue: str, payload: Dict[str, Any], delay: float = 0.0,
+                job_id: Optional[str] = None) -> str:
+        """Add a job; re-enqueueing an existing id is a no-op"""
+        job_id = job_id or str(payload.get("id") or uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._db().execute(
+                "INSERT OR IGNORE INTO jobs (id, queue, payload, max_attempts, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, queue, json.dumps(payload), self.max_attempts, now + delay, now, now),
+            )
+        return job_id
+
+    def reserve(self, queue: str, visibility_timeout: Optional[float] = None) -> Optional[Job]:
+        """Lease the oldest due job (or one whose lease expired); None if the queue is idle"""
+        now = time.time()
+        lease = self.visibility_timeout if visibility_timeout is None else visibility_timeout
+        token = uuid.uuid4().hex
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                # a lease that ran out on the final attempt means the worker died every time
+                dead = db.execute(
+                    "UPDATE jobs SET status = 'dead', lease_token = NULL, updated_at = ?, "
+                    "last_error = COALESCE(last_error, 'visibility timeout expired') "
+                    "WHERE queue = ? AND status = 'leased' AND lease_until < ? AND attempts >= max_attempts",
+                    (now, queue, now),
+                ).rowcount
+                row = db.execute(
+                    "SELECT * FROM jobs WHERE queue = ? AND ("
+                    "  (status = 'ready' AND available_at <= ?) OR "
+                    "  (status = 'leased' AND lease_until < ?)"
+                    ") ORDER BY available_at LIMIT 1",
+                    (queue, now, now),
+                ).fetchone()
+                if row is not None:
+                    if row["status"] == "leased":
+                        logger.warning(f"Job {row['id']} lease expired – redelivering")
+                    db.execute(
+                        "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_until = ?, "
+                        "lease_token = ?, updated_at = ? WHERE id = ?",
+                        (now + lease, token, now, row["id"]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if dead:
+            logger.error(f"{dead} job(s) on {queue} dead-lettered after repeated lease expiry")
+        if row is None:
+            return None
+        return Job(id=row["id"], queue=queue, payload=json.loads(row["payload"]),
+                   attempts=row["attempts"] + 1, receipt=token)
+
+    def ack(self, job: Job) -> bool:
+        """Job finished – remove it.  False if the lease was lost to another worker"""
+        with self._lock:
+            cur = self._db().execute("DELETE FROM jobs WHERE id = ? AND lease_token = ?", (job.id, job.receipt))
+        if not cur.rowcount:
+            logger.warning(f"Ack for job {job.id} ignored – lease no longer held")
+        return bool(cur.rowcount)
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> str:
+        """Release a failed job for a later retry, or dead-letter it; returns the new status"""
+        now = time.time()
+        with self._lock:
+            db = self._db()
+            row = db.execute("SELECT attempts, max_attempts FROM jobs WHERE id = ? AND lease_token = ?",
+                             (job.id, job.receipt)).fetchone()
+            if row is None:
+                logger.warning(f"Fail for job {job.id} ignored – lease no longer held")
+                return "lost"
+            if retry and row["attempts"] < row["max_attempts"]:
+                status, available = "ready", now + _retry_delay(row["attempts"], self.retry_backoff)
+            else:
+                status, available = "dead", now
+            db.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_until = NULL, lease_token = NULL, "
+                "last_error = ?, updated_at = ? WHERE id = ?",
+                (status, available, error[:2000], now, job.id),
+            )
+        log = logger.error if status == "dead" else logger.warning
+        log(f"Job {job.id} failed on attempt {row['attempts']} ({error}) → {status}")
+        return status
+
+    def extend(self, job: Job, seconds: Optional[float] = None) -> bool:
+        """Push the lease out for a long-running job"""
+        seconds = self.visibility_timeout if seconds is None else seconds
+        with self._lock:
+            cur = self._db().execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND lease_token = ?",
+                (time.time() + seconds, time.time(), job.id, job.receipt),
+            )
+        return bool(cur.rowcount)
+
+    def dead_letters(self, queue: str, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT id, payload, attempts, last_error, updated_at FROM jobs "
+                "WHERE queue = ? AND status = 'dead' ORDER BY updated_at DESC LIMIT ?",
+                (queue, limit),
+            ).fetchall()
+        return [dict(r, payload=json.loads(r["payload"])) for r in rows]
+
+    def requeue_dead(self, queue: str, job_id: Optional[str] = None) -> int:
+        """Give dead-lettered jobs (one, or all on *queue*) a fresh set of attempts"""
+        sql = ("UPDATE jobs SET status = 'ready', attempts = 0, available_at = ?, updated_at = ? "
+               "WHERE queue = ? AND status = 'dead'")
+        args: List[Any] = [time.time(), time.time(), queue]
+        if job_id:
+            sql += " AND id = ?"
+            args.append(job_id)
+        with self._lock:
+            return self._db().execute(sql, args).rowcount
+
+    def stats(self, queue: str) -> Dict[str, int]:
+        now = time.time()
+        with self._lock:
+            row = self._db().execute(
+                "SELECT "
+                "  SUM(status = 'ready' AND available_at <= ?) AS ready, "
+                "  SUM(status = 'ready' AND available_at > ?)  AS delayed, "
+                "  SUM(status = 'leased') AS leased, "
+                "  SUM(status = 'dead')   AS dead "
+                "FROM jobs WHERE queue = ?",
+                (now, now, queue),
+            ).fetchone()
+        return {k: int(row[k] or 0) for k in ("ready", "delayed", "leased", "dead")}
+
+
+class RedisJobQueue:
+    """
+    Same contract on Redis lists.
+
+    <queue> holds JSON payloads (the format capture_job has always pushed);
+    reserved messages move to <queue>:processing with a lease in the
+    <queue>:leases sorted set, retries wait in <queue>:delayed and
+    dead-letters go to <queue>:dead.
+    """
+
+    def __init__(self, client, visibility_timeout: Optional[float] = None,
+                 max_attempts: Optional[int] = None, retry_backoff: Optional[float] = None):
+        self.client = client
+        self.visibility_timeout = float(os.environ.get("JOB_VISIBILITY_TIMEOUT", 300)) if visibility_timeout is None else visibility_timeout
+        self.max_attempts = int(os.environ.get("JOB_MAX_ATTEMPTS", 5)) if max_attempts is None else max_attempts
+        self.retry_backoff = float(os.environ.get("JOB_RETRY_BACKOFF", 30)) if retry_backoff is None else retry_backoff
+
+    def enqueue(self, queue: str, payload: Dict[str, Any], delay: float = 0.0,
+                job_id: Optional[str] = None) -> str:
+        if job_id or "id" not in payload:
+            payload = dict(payload, id=job_id or str(uuid.uuid4()))
+        message = json.dumps(payload)
+        if delay > 0:
+            self.client.zadd(f"{queue}:delayed", {message: time.time() + delay})
+        else:
+            self.client.rpush(queue, message)
+        return str(payload["id"])
+
+    def _promote(self, queue: str, now: float) -> None:
+        """Move due retries back onto the queue and recover expired leases"""
+        for message in self.client.zrangebyscore(f"{queue}:delayed", "-inf", now):
+            if self.client.zrem(f"{queue}:delayed", message):
+                self.client.rpush(queue, message)
+
+        for message in self.client.zrangebyscore(f"{queue}:leases", "-inf", now):
+            if not self.client.zrem(f"{queue}:leases", message):
+                continue                                # another worker got there first
+            self.client.lrem(f"{queue}:processing", 1, message)
+            job_id = str(json.loads(message).get("id"))
+            attempts = int(self.client.hget(f"{queue}:attempts", job_id) or 0)
+            if attempts >= self.max_attempts:
+                self._dead_letter(queue, job_id, message, attempts, "visibility timeout expired")
+            else:
+                logger.warning(f"Job {job_id} lease expired – redelivering")
+                self.client.rpush(queue, message)
+
+    def reserve(self, queue: str, visibility_timeout: Optional[float] = None) -> Optional[Job]:
+        now = time.time()
+        self._promote(queue, now)
+        message = self.client.lmove(queue, f"{queue}:processing", "LEFT", "RIGHT")
+        if message is None:
+            return None
+        lease = self.visibility_timeout if visibility_timeout is None else visibility_timeout
+        self.client.zadd(f"{queue}:leases", {message: now + lease})
+        payload = json.loads(message)
+        job_id = str(payload.get("id"))
+        attempts = int(self.client.hincrby(f"{queue}:attempts", job_id, 1))
+        return Job(id=job_id, queue=queue, payload=payload, attempts=attempts, receipt=message)
+
+    def _release(self, job: Job) -> bool:
+        held = bool(self.client.zrem(f"{job.queue}:leases", job.receipt))
+        self.client.lrem(f"{job.queue}:processing", 1, job.receipt)
+        return held
+
+    def _dead_letter(self, queue: str, job_id: str, message: str, attempts: int, error: str) -> None:
+        self.client.rpush(f"{queue}:dead", json.dumps({
+            "id": job_id, "payload": json.loads(message), "attempts": attempts,
+            "last_error": error[:2000], "updated_at": time.time(),
+        }))
+        self.client.hdel(f"{queue}:attempts", job_id)
+
+    def ack(self, job: Job) -> bool:
+        held = self._release(job)
+        self.client.hdel(f"{job.queue}:attempts", job.id)
+        if not held:
+            logger.warning(f"Ack for job {job.id} after its lease expired")
+        return held
+
+    def fail(self, job: Job, error: str, retry: bool = True) -> str:
+        if not self._release(job):
+            logger.warning(f"Fail for job {job.id} ignored – lease no longer held")
+            return "lost"
+        if retry and job.attempts < self.max_attempts:
+            self.client.zadd(f"{job.queue}:delayed",
+                             {job.receipt: time.time() + _retry_delay(job.attempts, self.retry_backoff)})
+            status = "ready"
+        else:
+            self._dead_letter(job.queue, job.id, job.receipt, job.attempts, error)
+            status = "dead"
+        log = logger.error if status == "dead" else logger.warning
+        log(f"Job {job.id} failed on attempt {job.attempts} ({error}) → {status}")
+        return status
+
+    def extend(self, job: Job, seconds: Optional[float] = None) -> bool:
+        seconds = self.visibility_timeout if seconds is None else seconds
+        return bool(self.client.zadd(f"{job.queue}:leases", {job.receipt: time.time() + seconds}, xx=True, ch=True))
+
+    def dead_letters(self, queue: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return [json.loads(m) for m in self.client.lrange(f"{queue}:dead", -limit, -1)][::-1]
+
+    def requeue_dead(self, queue: str, job_id: Optional[str] = None) -> int:
+        moved = 0
+        for raw in self.client.lrange(f"{queue}:dead", 0, -1):
+            entry = json.loads(raw)
+            if job_id and str(entry["id"]) != job_id:
+                continue
+            if self.client.lrem(f"{queue}:dead", 1, raw):
+                self.client.rpush(queue, json.dumps(entry["payload"]))
+                moved += 1
+        return moved
+
+    def stats(self, queue: str) -> Dict[str, int]:
+        return {
+            "ready": int(self.client.llen(queue)),
+            "delayed": int(self.client.zcard(f"{queue}:delayed")),
+            "leased": int(self.client.llen(f"{queue}:processing")),
+            "dead": int(self.client.llen(f"{queue}:dead")),
+        }
+
+
+# Default local queue shared by the capture jobs and the Vision worker
+job_queue = SQLiteJobQueue()
+
+_redis_probe: Dict[str, Any] = {}
+
+
+def connect_redis():
+    """Redis client if a server answers (probed once per process), else None"""
+    if "client" not in _redis_probe:
+        client = None
+        try:
+            import redis
+            client = redis.Redis(
+                host=os.environ.get('REDIS_HOST', 'localhost'),
+                port=int(os.environ.get('REDIS_PORT', 6379)),
+                db=int(os.environ.get('REDIS_DB', 0)),
+                password=os.environ.get('REDIS_PASSWORD', None),
+                decode_responses=True,
+                socket_connect_timeout=1,
+            )
+            client.ping()
+        except Exception as e:
+            logger.info(f"Redis not reachable ({e}); using the SQLite job queue")
+            client = None
+        _redis_probe["client"] = client
+    return _redis_probe["client"]
+
+
+def get_job_queue(redis_client=None):
+    """
+    Queue backend selected by JOB_QUEUE_BACKEND.
+
+    *redis_client* is an already connected client (e.g. capture_job's);
+    without one, "auto" and "redis" probe the server once.
+    """
+    backend = os.environ.get("JOB_QUEUE_BACKEND", "auto").lower()
+    if backend == "sqlite":
+        return job_queue
+    client = redis_client if redis_client is not None else connect_redis()
+    if client is not None:
+        return RedisJobQueue(client)
+    if backend == "redis":
+        logger.warning("JOB_QUEUE_BACKEND=redis but Redis is unreachable; using the SQLite job queue")
+    return job_queue
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Inspect the job queue")
+    parser.add_argument("--queue", default=VISION_QUEUE)
+    parser.add_argument("--dead", action="store_true", help="list dead-lettered jobs")
+    parser.add_argument("--requeue", nargs="?", const="*", metavar="JOB_ID",
+                        help="re-queue one (or every) dead-lettered job")
+    args = parser.parse_args()
+
+    q = get_job_queue()
+    if args.requeue:
+        print(f"re-queued {q.requeue_dead(args.queue, None if args.requeue == '*' else args.requeue)} job(s)")
+    if args.dead:
+        for entry in q.dead_letters(args.queue):
+            print(json.dumps(entry, default=str))
+    print(json.dumps(q.stats(args.queue)))
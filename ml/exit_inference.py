@@ -1,38 +1,39 @@
-
 """
-exit_inference.py – Load ExitNet and return p_hold for open trades
+exit_inference.py – ExitNet p_hold for open trades
+
+Models ({SYMBOL}_{TF}_exit.pkl) are loaded once by the registry in
+ml/inference_service.py; predict_exit_probs() scores every open position
+with one model call per symbol.
 """
 
-import os
-import joblib
 import logging
-import pandas as pd
-from typing import Dict
+from typing import Any, Dict, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from ml.inference_service import MODELS_DIR, inference_service  # noqa: F401
 
 logger = logging.getLogger(__name__)
-MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
-_EXIT_CACHE = {}
+
 
 def _load_exit(symbol: str, tf: str):
-    key = f"{symbol}_{tf}_exit"
-    if key in _EXIT_CACHE:
-        return _EXIT_CACHE[key]
-
-    fname = f"{symbol}_{tf}_exit.pkl"
-    fpath = os.path.join(MODELS_DIR, fname)
-    if not os.path.exists(fpath):
-        logger.warning("Missing ExitNet model: %s", fpath)
+    entry = inference_service.registry.get("exit", f"{symbol}_{tf}")
+    if entry is None:
+        logger.warning("Missing ExitNet model: %s_%s", symbol, tf)
         return None
-    model = joblib.load(fpath)
-    _EXIT_CACHE[key] = model
-    return model
+    return entry.model
+
 
 def predict_exit_prob(symbol: str, tf: str, features: Dict) -> float:
     """
     Return probability the trade is still good (should HOLD)
     """
-    model = _load_exit(symbol, tf)
-    if not model:
-        return 0.5  # fallback: uncertain
-    df = pd.DataFrame([features])[model.feature_names_in_]
-    return float(model.predict_proba(df)[0][1])  # class 1 = hold
+    return float(predict_exit_probs([(symbol, tf, features)])[0])
+
+
+def predict_exit_probs(requests: Sequence[Tuple[str, str, Mapping[str, Any]]]) -> np.ndarray:
+    """
+    p_hold for many (symbol, tf, features) requests, one call per model;
+    0.5 (uncertain) where a symbol has no model
+    """
+    return inference_service.predict_rows("exit", requests)
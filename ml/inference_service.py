@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+GENESIS – batched ML inference service
+
+predict_one, predict_rr and predict_exit_prob each read their pickle on
+first use, wrapped a single row in a fresh pd.DataFrame, reordered it by
+feature_names_in_ and called the model for that one row – and the exit
+monitor did so once per open position.
+
+The registry here loads every model under ml/models once (at scheduler
+start-up, or on first use) and resolves each model's column order up
+front.  Callers hand over NumPy batches already in that order, or a list
+of (symbol, timeframe, features) requests which are grouped so that each
+model is called once for all of its rows:
+
+    from ml.inference_service import inference_service
+
+    cols  = inference_service.columns("prob", timeframe="H1")
+    probs = inference_service.predict("prob", X, timeframe="H1")          # X: (n, len(cols))
+    holds = inference_service.predict_rows("exit", [("EURUSD", "H1", feats), ...])
+
+Model kinds and files:
+    prob   {TF}.pkl                  P(trade succeeds)        fallback 0.50
+    rr     {SYMBOL}_{TF}_rr.pkl      predicted RR (≥ 1.0)     fallback 1.50
+    exit   {SYMBOL}_{TF}_exit.pkl    P(hold)                  fallback 0.50
+
+Features missing from a request row are passed as NaN (XGBoost's missing
+value) rather than failing the whole batch.
+
+Compiled boosters
+-----------------
+The trainers also export each model's native XGBoost booster next to the
+pickle ({name}.ubj, or {name}.json).  When that file is present the entry
+predicts with Booster.inplace_predict on the raw array, skipping the
+sklearn wrapper's validation and DMatrix construction – roughly half the
+single-row latency (tests/benchmark_model_inference.py).  The pickle is
+still loaded for callers that want the estimator itself.
+
+    python -m ml.inference_service           # registry stats as JSON
+    python -m ml.inference_service export    # write boosters for existing pickles
+
+Hot reload
+----------
+Models are read from the live version of the model store
+(ml/model_store.py).  The registry re-reads the store's manifest at most
+every ML_MANIFEST_CHECK_SECONDS and, when a retrain (or a rollback) has
+changed the live version, loads the new set in the background of that
+call and swaps it in whole; requests already holding an entry finish on
+the old model.
+
+Environment:
+    ML_INFERENCE_THREADS        booster threads per predict call (default 1 – batches are small)
+    ML_MANIFEST_CHECK_SECONDS   how often to look for a new model version (default 30)
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import logging
+import time
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import joblib
+import numpy as np
+import xgboost as xgb
+
+from ml.model_store import ModelStore
+
+logger = logging.getLogger(__name__)
+
+THIS_DIR = os.path.dirname(__file__)
+MODELS_DIR = os.path.join(THIS_DIR, "models")
+
+BOOSTER_EXTS = (".ubj", ".json")
+FALLBACK = {"prob": 0.5, "rr": 1.5, "exit": 0.5}
+
+# Column order of models pickled without feature names (see train_rr / train_exit)
+DEFAULT_COLUMNS = {
+    "rr": ("atr", "vwap", "range", "session_hour"),
+    "exit": ("bars_open", "atr", "range", "session_hour", "entry_rr_hat", "unrealised_rr"),
+}
+
+_FILE_PATTERNS = [
+    ("rr", re.compile(r"^(?P<key>[A-Z0-9]+_[A-Z0-9]+)_rr\.pkl$")),
+    ("exit", re.compile(r"^(?P<key>[A-Z0-9]+_[A-Z0-9]+)_exit\.pkl$")),
+    ("prob", re.compile(r"^(?P<key>[A-Z][A-Z0-9]*)\.pkl$")),
+]
+
+
+def model_key(kind: str, symbol: Optional[str] = None, timeframe: str = "H1") -> str:
+    """Registry key: the timeframe for prob models, SYMBOL_TF for rr / exit"""
+    if kind == "prob":
+        return timeframe
+    return f"{(symbol or '').replace('_', '').upper()}_{timeframe}"
+
+
+def model_kind(filename: str) -> Optional[str]:
+    """"prob", "rr" or "exit" for a model pickle name, None for anything else"""
+    for kind, pattern in _FILE_PATTERNS:
+        if pattern.match(filename):
+            return kind
+    return None
+
+
+def booster_path(pkl_path: str) -> Optional[str]:
+    """The compiled booster exported next to *pkl_path*, if any"""
+    stem = os.path.splitext(pkl_path)[0]
+    for ext in BOOSTER_EXTS:
+        if os.path.exists(stem + ext):
+            return stem + ext
+    return None
+
+
+def export_booster(model: Any, pkl_path, kind: Optional[str] = None, fmt: str = "ubj") -> str:
+    """
+    Save *model*'s native booster next to *pkl_path* ({stem}.ubj / .json).
+    Feature names missing from the booster are filled in from the model
+    (or the kind's default column order) so the file is self-describing.
+    """
+    booster = model.get_booster()
+    if booster.feature_names is None:
+        columns = _model_columns(kind or "", model)
+        if len(columns) == booster.num_features():
+            booster.feature_names = list(columns)
+    path = f"{os.path.splitext(str(pkl_path))[0]}.{fmt}"
+    booster.save_model(path)
+    return path
+
+
+def _model_columns(kind: str, model: Any) -> Tuple[str, ...]:
+    names = getattr(model, "feature_names_in_", None)       # raises on xgboost wrappers without names
+    if names is None:
+        try:
+            names = model.get_booster().feature_names
+        except Exception:                                   # pylint: disable=broad-except
+            names = None
+    if names is None:
+        names = DEFAULT_COLUMNS.get(kind, ())
+    return tuple(str(n) for n in names)
+
+
+@dataclass
+class ModelEntry:
+    """One loaded model and its precomputed column order"""
+    kind: str
+    key: str
+    path: str
+    model: Any
+    columns: Tuple[str, ...]
+    booster: Optional[Any] = None           # compiled xgb.Booster, when exported
+    index: Dict[str, int] = field(init=False)
+
+    def __post_init__(self):
+        self.index = {name: i for i, name in enumerate(self.columns)}
+
+    def matrix(self, rows: Sequence[Mapping[str, Any]]) -> np.ndarray:
+        """(n, len(columns)) float32 matrix of *rows* in this model's column order"""
+        X = np.full((len(rows), len(self.columns)), np.nan, dtype=np.float32)
+        for i, row in enumerate(rows):
+            for name, value in row.items():
+                j = self.index.get(name)
+                if j is not None and value is not None:
+                    X[i, j] = value
+        return X
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Probability of class 1 (prob / exit) or the regression output (rr), one call"""
+        if self.booster is not None:
+            return np.asarray(self.booster.inplace_predict(X), dtype=float)
+        if self.kind == "rr":
+            return np.asarray(self.model.predict(X), dtype=float)
+        return np.asarray(self.model.predict_proba(X), dtype=float)[:, 1]
+
+
+# ──────────────────────────────────────────────────────────────
+#  Registry
+# ──────────────────────────────────────────────────────────────
+class ModelRegistry:
+    """Every model of the store's live version, loaded once per version"""
+
+    def __init__(self, models_dir: str = MODELS_DIR, threads: Optional[int] = None,
+                 check_seconds: Optional[float] = None):
+        self.models_dir = models_dir
+        self.store = ModelStore(models_dir)
+        self.threads = int(os.environ.get("ML_INFERENCE_THREADS", 1)) if threads is None else threads
+        self.check_seconds = (float(os.environ.get("ML_MANIFEST_CHECK_SECONDS", 30))
+                              if check_seconds is None else check_seconds)
+        self.version: Optional[str] = None      # None = flat directory, no manifest yet
+        self.directory = models_dir
+        self._lock = threading.Lock()
+        self._reloading = threading.Lock()
+        self._checked = 0.0
+        self._entries: Optional[Dict[Tuple[str, str], ModelEntry]] = None
+
+    def load_all(self) -> int:
+        """(Re)load every model file of the live version; returns the number loaded"""
+        directory, version = self.store.current()
+        entries: Dict[Tuple[str, str], ModelEntry] = {}
+        names = sorted(os.listdir(directory)) if os.path.isdir(directory) else []
+        for name in names:
+            for kind, pattern in _FILE_PATTERNS:
+                match = pattern.match(name)
+                if not match:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    model = joblib.load(path)
+                    entries[(kind, match["key"])] = ModelEntry(kind, match["key"], path, model,
+                                                               _model_columns(kind, model),
+                                                               self._load_booster(path))
+                except Exception as exc:                # pylint: disable=broad-except
+                    logger.error("Failed to load ML model %s: %s", path, exc)
+                break
+        with self._lock:
+            self._entries = entries
+            self.version, self.directory = version, directory
+            self._checked = time.monotonic()
+        logger.info("Model registry loaded %d models from %s (version %s)",
+                    len(entries), directory, version or "unversioned")
+        return len(entries)
+
+    def _maybe_reload(self) -> None:
+        """Swap in a newly published (or rolled back) version, checking every check_seconds"""
+        if time.monotonic() - self._checked < self.check_seconds:
+            return
+        self._checked = time.monotonic()
+        try:
+            live = (self.store.manifest() or {}).get("version")
+        except (OSError, ValueError) as exc:
+            logger.error("Could not read the model manifest: %s", exc)
+            return
+        if live == self.version or not self._reloading.acquire(blocking=False):
+            return                              # unchanged, or another thread is loading it
+        try:
+            logger.info("Model version changed %s → %s; reloading", self.version, live)
+            self.load_all()
+        except Exception as exc:                # pylint: disable=broad-except
+            logger.error("Model reload failed, keeping version %s: %s", self.version, exc)
+        finally:
+            self._reloading.release()
+
+    def _load_booster(self, pkl_path: str) -> Optional[Any]:
+        path = booster_path(pkl_path)
+        if path is None:
+            return None
+        try:
+            booster = xgb.Booster(model_file=path)
+            booster.set_param({"nthread": self.threads})
+            return booster
+        except Exception as exc:                        # pylint: disable=broad-except
+            logger.error("Failed to load booster %s – using the pickle: %s", path, exc)
+            return None
+
+    def _all(self) -> Dict[Tuple[str, str], ModelEntry]:
+        if self._entries is None:
+            self.load_all()
+        else:
+            self._maybe_reload()
+        return self._entries
+
+    def get(self, kind: str, key: str) -> Optional[ModelEntry]:
+        return self._all().get((kind, key))
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._all()
+        kinds: Dict[str, List[str]] = {}
+        for (kind, key) in sorted(entries):
+            kinds.setdefault(kind, []).append(key)
+        compiled = sum(1 for entry in entries.values() if entry.booster is not None)
+        return {"models_dir": self.models_dir, "version": self.version, "models": len(entries),
+                "compiled": compiled, "kinds": kinds}
+
+    def export_boosters(self) -> List[str]:
+        """
+        Write a compiled booster for every loaded pickle that lacks one –
+        in place for the flat directory, as a new version once versioned
+        """
+        missing = [entry for entry in self._all().values() if booster_path(entry.path) is None]
+        if not missing:
+            return []
+        if self.version is None:
+            for entry in missing:
+                export_booster(entry.model, entry.path, entry.kind)
+        else:
+            published = self.store.manifest()["models"]
+            names = [os.path.basename(entry.path) for entry in missing]
+            self.store.publish({name: entry.model for name, entry in zip(names, missing)},
+                               {name: published.get(name, {}).get("metrics", {}) for name in names},
+                               note="export boosters")
+        self.load_all()
+        return [booster_path(self.get(entry.kind, entry.key).path) for entry in missing]
+
+
+# ──────────────────────────────────────────────────────────────
+#  Service
+# ──────────────────────────────────────────────────────────────
+class InferenceService:
+    """Batched predictions over the registry's models"""
+
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        self.registry = registry or ModelRegistry()
+
+    def warm(self) -> int:
+        """Load every model now (scheduler start-up) instead of on the first request"""
+        return self.registry.load_all()
+
+    def columns(self, kind: str, symbol: Optional[str] = None, timeframe: str = "H1") -> Tuple[str, ...]:
+        """Column order a batch for this model must use (() when there is no model)"""
+        entry = self.registry.get(kind, model_key(kind, symbol, timeframe))
+        return entry.columns if entry else ()
+
+    def predict(self, kind: str, X: np.ndarray, symbol: Optional[str] = None,
+                timeframe: str = "H1") -> np.ndarray:
+        """Predictions for a (n, columns) batch, one model call; fallback values when unavailable"""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        entry = self.registry.get(kind, model_key(kind, symbol, timeframe))
+        if entry is None:
+            return np.full(len(X), FALLBACK[kind])
+        try:
+            out = entry.predict(X)
+        except Exception as exc:                        # pylint: disable=broad-except
+            logger.error("%s model %s failed on %d rows: %s", kind, entry.key, len(X), exc)
+            return np.full(len(X), FALLBACK[kind])
+        return np.maximum(out, 1.0) if kind == "rr" else out
+
+    def predict_rows(self, kind: str,
+                     requests: Sequence[Tuple[Optional[str], str, Mapping[str, Any]]]) -> np.ndarray:
+        """
+        Predictions for (symbol, timeframe, features) requests, in order.
+        Rows are grouped per model, so each model is called once.
+        """
+        out = np.full(len(requests), FALLBACK[kind])
+        groups: Dict[str, List[int]] = {}
+        for i, (symbol, timeframe, _) in enumerate(requests):
+            groups.setdefault(model_key(kind, symbol, timeframe), []).append(i)
+
+        for key, positions in groups.items():
+            entry = self.registry.get(kind, key)
+            if entry is None:
+                logger.warning("No %s model %s – using %.2f", kind, key, FALLBACK[kind])
+                continue
+            X = entry.matrix([requests[i][2] for i in positions])
+            symbol, timeframe, _ = requests[positions[0]]
+            out[positions] = self.predict(kind, X, symbol, timeframe)
+        return out
+
+
+# Global instance
+inference_service = InferenceService()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:2] == ["export"]:
+        print(json.dumps(inference_service.registry.export_boosters(), indent=2))
+    else:
+        print(json.dumps(inference_service.registry.stats(), indent=2))
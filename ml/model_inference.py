@@ -11,24 +11,20 @@ caller can continue without raising.
 Public API
 ----------
 predict_one(symbol: str, timeframe: str, features: dict) -> float
+predict_many(timeframe: str, rows) -> np.ndarray
 """
 
 from __future__ import annotations
 
-import os
 import logging
-from functools import lru_cache
 from typing import Dict
 
-import joblib
 import numpy as np
 import pandas as pd
 
-logger = logging.getLogger(__name__)
+from ml.inference_service import MODELS_DIR, THIS_DIR, inference_service  # noqa: F401
 
-# ――― Directory that holds the *.pkl models ―――
-THIS_DIR = os.path.dirname(__file__)
-MODELS_DIR = os.path.join(THIS_DIR, "models")          # e.g. ml/models/GBPJPY_H1.pkl
+logger = logging.getLogger(__name__)
 
 
 class DummyModel:
@@ -42,58 +38,54 @@ class DummyModel:
 
 
 # ──────────────────────────────────────────────────────────────
-#  Internal cache so each model is read from disk just once
+#  Models are loaded once by the registry (ml/inference_service.py)
 # ──────────────────────────────────────────────────────────────
-@lru_cache(maxsize=64)
 def _load(timeframe: str):
     """
-    Load (and cache) an ML model for the given timeframe.
+    The ML model for the given timeframe.
 
     On any failure (file missing, pickle error, version mismatch…)
     we return a DummyModel instance so callers never need their
     own try/except.
     """
-    fname = f"{timeframe}.pkl"          # keep original naming convention
-    path = os.path.join(MODELS_DIR, fname)
-
-    if not os.path.exists(path):
-        logger.warning("ML model file not found: %s – using DummyModel", path)
-        return DummyModel()
-
-    try:
-        return joblib.load(path)
-    except Exception as exc:            # pylint: disable=broad-except
-        logger.error("Failed to load ML model %s: %s – using DummyModel", path, exc)
+    entry = inference_service.registry.get("prob", timeframe)
+    if entry is None:
+        logger.warning("ML model for %s not available – using DummyModel", timeframe)
         return DummyModel()
+    return entry.model
 
 
 # ──────────────────────────────────────────────────────────────
 #  Public helper used by signal_scoring.evaluate_technical_conditions
 # ──────────────────────────────────────────────────────────────
+def _features(features) -> Dict[str, float]:
+    """Map indicator-frame names onto the model's feature names"""
+    if isinstance(features, pd.Series):          # accept Series or dict
+        features = features.to_dict()
+
+    if "signal" in features and "macd_sig" not in features:
+        features = features.copy()               # shallow clone
+        features["macd_sig"]  = features.pop("signal")
+        features["macd_hist"] = features.pop("histogram") if "histogram" in features else 0.0
+        if "volume" not in features:
+            features["volume"] = 0.0
+    return features
+
+
 def predict_one(symbol: str, timeframe: str, features: Dict[str, float]) -> float:
     """
     Return the probability (0 … 1) that the proposed trade succeeds.
     """
     try:
-        # ── compatibility shim ───────────────────────────
-        if isinstance(features, pd.Series):          # accept Series or dict
-           features = features.to_dict()
-
-        if "signal" in features and "macd_sig" not in features:
-            features = features.copy()               # shallow clone
-            features["macd_sig"]  = features.pop("signal")
-            features["macd_hist"] = features.pop("histogram") if "histogram" in features else 0.0
-            if "volume" not in features:
-                features["volume"] = 0.0
-        # ─────────────────────────────────────────────────
-
-        model = _load(timeframe)
-        X = pd.DataFrame([features])[model.feature_names_in_]
-        proba = model.predict_proba(X)[0][1]
-        return float(proba)
+        return float(inference_service.predict_rows("prob", [(symbol, timeframe, _features(features))])[0])
     except Exception as exc:  # pylint: disable=broad-except
         logger.error(
             "predict_one failed for %s %s – %s. Returning 0.50.",
             symbol, timeframe, exc
         )
         return 0.5
+
+
+def predict_many(timeframe: str, rows) -> np.ndarray:
+    """predict_one() for many feature rows (dicts / Series) in one model call"""
+    return inference_service.predict_rows("prob", [(None, timeframe, _features(r)) for r in rows])
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+GENESIS – versioned model store
+
+The trainers used to joblib.dump straight over ml/models/*.pkl while the
+web / scheduler processes held their old models forever, or read a
+half-written pickle if they loaded during the write.  Models are now
+published as immutable versions:
+
+    ml/models/
+        manifest.json                 → the live version (atomically replaced)
+        versions/
+            20261018T210000.482113-3f2a/   one complete model set
+                manifest.json
+                H1.pkl  H1.ubj  EURUSD_H1_rr.pkl  EURUSD_H1_rr.ubj  …
+
+publish() writes the new or retrained models into a temp directory,
+hard-links every other model from the live version (so a run that
+retrains only the H1 RR models still produces a full set), renames the
+directory into place and then os.replace()s the root manifest.  A reader
+therefore always sees either the old or the new version, never a mix.
+The model registry (ml/inference_service.py) polls the manifest and
+swaps the new set in without a restart.
+
+Each manifest entry carries the model's kind, sha256, the version it was
+published in and the trainer's metrics.  rollback() points the root
+manifest back at the previous version (repeatable – each version records
+its predecessor).
+
+Until the first publish there is no manifest and the flat ml/models
+directory is served as before; the first publish snapshots it.
+
+    python -m ml.model_store                # versions as JSON
+    python -m ml.model_store publish        # snapshot the flat directory as a version
+    python -m ml.model_store rollback
+
+Environment:
+    ML_MODEL_KEEP_VERSIONS   versions kept on disk (default 5; the live one and its predecessor always)
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+import joblib
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:                # Windows – publishers are not serialised
+    fcntl = None
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "models")
+MANIFEST = "manifest.json"
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    """Write *data* to a temp file beside *path*, then rename it over *path*"""
+    fd, tmp = tempfile.mkstemp(prefix=".manifest-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)           # versions are immutable, sharing the inode is safe
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ModelStore:
+    """Publishes, lists and rolls back model versions under *root*"""
+
+    def __init__(self, root: str = MODELS_DIR, keep: Optional[int] = None):
+        self.root = root
+        self.keep = int(os.environ.get("ML_MODEL_KEEP_VERSIONS", 5)) if keep is None else keep
+        self.versions_dir = os.path.join(root, "versions")
+        self.manifest_path = os.path.join(root, MANIFEST)
+
+    # ──────────────────────────────────────────────────────────
+    #  Reading
+    # ──────────────────────────────────────────────────────────
+    def manifest(self) -> Optional[Dict[str, Any]]:
+        """The live manifest, or None before the first publish"""
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def current(self) -> Tuple[str, Optional[str]]:
+        """(directory to load models from, live version or None for the flat directory)"""
+        manifest = self.manifest()
+        if manifest is None:
+            return self.root, None
+        return os.path.join(self.versions_dir, manifest["version"]), manifest["version"]
+
+    def version_manifest(self, version: str) -> Dict[str, Any]:
+        with open(os.path.join(self.versions_dir, version, MANIFEST)) as f:
+            return json.load(f)
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Published versions on disk, newest first"""
+        live = (self.manifest() or {}).get("version")
+        out = []
+        names = sorted(os.listdir(self.versions_dir), reverse=True) if os.path.isdir(self.versions_dir) else []
+        for name in names:
+            if name.startswith("."):
+                continue
+            try:
+                manifest = self.version_manifest(name)
+            except (OSError, ValueError):
+                continue
+            out.append({
+                "version": name,
+                "live": name == live,
+                "created_at": manifest.get("created_at"),
+                "previous": manifest.get("previous"),
+                "note": manifest.get("note"),
+                "published": sorted(f for f, m in manifest["models"].items() if m.get("version") == name),
+                "models": len(manifest["models"]),
+            })
+        return out
+
+    # ──────────────────────────────────────────────────────────
+    #  Writing
+    # ──────────────────────────────────────────────────────────
+    @contextmanager
+    def _publish_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, ".publish.lock"), "a+") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    def publish(self, models: Optional[Dict[str, Any]] = None,
+                metrics: Optional[Dict[str, Dict[str, Any]]] = None, note: str = "") -> str:
+        """
+        Publish a new version: *models* maps file names ("EURUSD_H1_rr.pkl")
+        to fitted estimators, *metrics* file names to the trainer's metrics.
+        Every other model of the live version is carried over.  Returns the
+        new version id.
+        """
+        from ml.inference_service import booster_path, export_booster, model_kind
+
+        models = models or {}
+        metrics = metrics or {}
+        with self._publish_lock():
+            base_dir, base_version = self.current()
+            base = self.manifest() or {"models": {}}
+            now = time.time()           # ids sort in publish order
+            stamp = f"{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}.{int(now % 1 * 1e6):06d}"
+            version = f"{stamp}-{uuid.uuid4().hex[:4]}"
+            os.makedirs(self.versions_dir, exist_ok=True)
+            tmp = tempfile.mkdtemp(prefix=f".{version}-", dir=self.versions_dir)
+            try:
+                entries: Dict[str, Dict[str, Any]] = {}
+                for name, model in models.items():
+                    path = os.path.join(tmp, name)
+                    joblib.dump(model, path)
+                    kind = model_kind(name)
+                    files = [name]
+                    try:
+                        files.append(os.path.basename(export_booster(model, path, kind)))
+                    except Exception as exc:                # pylint: disable=broad-except
+                        logger.warning("No booster exported for %s: %s", name, exc)
+                    entries[name] = {"kind": kind, "files": files, "sha256": _sha256(path),
+                                     "version": version, "published_at": time.time(),
+                                     "metrics": metrics.get(name, {})}
+
+                for name in sorted(os.listdir(base_dir)):
+                    kind = model_kind(name)
+                    if kind is None or name in entries:
+                        continue
+                    src = os.path.join(base_dir, name)
+                    files = [name]
+                    _link_or_copy(src, os.path.join(tmp, name))
+                    compiled = booster_path(src)
+                    if compiled:
+                        _link_or_copy(compiled, os.path.join(tmp, os.path.basename(compiled)))
+                        files.append(os.path.basename(compiled))
+                    entries[name] = base["models"].get(name) or {
+                        "kind": kind, "sha256": _sha256(src), "version": version,
+                        "published_at": time.time(), "metrics": {},
+                    }
+                    entries[name]["files"] = files
+
+                manifest = {"version": version, "previous": base_version, "created_at": time.time(),
+                            "note": note, "models": entries}
+                _write_json(os.path.join(tmp, MANIFEST), manifest)
+                os.rename(tmp, os.path.join(self.versions_dir, version))
+            except BaseException:
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+            _write_json(self.manifest_path, manifest)
+            self._prune(manifest)
+
+        logger.info("Published model version %s (%d new, %d carried over)",
+                    version, len(models), len(entries) - len(models))
+        return version
+
+    def rollback(self) -> str:
+        """Make the live version's predecessor live again; returns it"""
+        with self._publish_lock():
+            manifest = self.manifest()
+            previous = (manifest or {}).get("previous")
+            if not previous or not os.path.isdir(os.path.join(self.versions_dir, previous)):
+                raise ValueError("No previous model version to roll back to")
+            _write_json(self.manifest_path, self.version_manifest(previous))
+        logger.warning("Rolled model version back from %s to %s", manifest["version"], previous)
+        return previous
+
+    def _prune(self, manifest: Dict[str, Any]) -> None:
+        protected = {manifest["version"], manifest.get("previous")}
+        names = sorted((n for n in os.listdir(self.versions_dir) if not n.startswith(".")), reverse=True)
+        for name in names[self.keep:]:
+            if name not in protected:
+                shutil.rmtree(os.path.join(self.versions_dir, name), ignore_errors=True)
+
+
+# Global instance
+model_store = ModelStore()
+
+
+if __name__ == "__main__":
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else "versions"
+    if command == "publish":
+        print(model_store.publish(note="snapshot"))
+    elif command == "rollback":
+        print(model_store.rollback())
+    else:
+        print(json.dumps(model_store.versions(), indent=2))
@@ -9,7 +9,8 @@ Uses logs/trade_log.csv to replay closed trades and label each bar:
     1 = likely to hit TP
     0 = likely to hit SL
 
-Trains XAUUSD_M15_exit.pkl, etc.
+Trains XAUUSD_M15_exit.pkl (+ its XAUUSD_M15_exit.ubj booster), etc. and
+publishes them as one new model version (ml/model_store.py).
 
 Run:
     python -m ml.train_exit --tf M15
@@ -21,9 +22,9 @@ import os
 from pathlib import Path
 import pandas as pd
 import numpy as np
-import joblib
 from xgboost import XGBClassifier
 from chart_utils import fetch_candles
+from ml.model_store import model_store
 
 # -------------------------
 # Config
@@ -78,10 +79,15 @@ def extract_exit_training_rows(trade, candles, rr_hat: float) -> list[dict]:
 
     return rows
 
+def load_trades() -> pd.DataFrame:
+    """Closed trades from the trade log"""
+    trades = pd.read_csv(TRADE_LOG, parse_dates=["timestamp", "exit_time"])
+    return trades[trades["exit_time"].notna()]
+
 def train_symbol(symbol: str, tf: str):
+    """Fit one symbol's ExitNet; returns (model, metrics) or None"""
     logging.info("Training ExitNet for %s %s", symbol, tf)
-    trades = pd.read_csv(TRADE_LOG, parse_dates=["timestamp", "exit_time"])
-    trades = trades[(trades["symbol"] == symbol) & trades["exit_time"].notna()]
+    trades = load_trades()
 
     candles = fetch_candles(symbol, tf, years=3)
     if isinstance(candles, list):
@@ -89,7 +95,11 @@ def train_symbol(symbol: str, tf: str):
     if "time" in candles.columns:
         candles["time"] = pd.to_datetime(candles["time"])
         candles = candles.set_index("time")
+    return fit_exit(symbol, candles, trades)
 
+def fit_exit(symbol: str, candles: pd.DataFrame, trades: pd.DataFrame, n_jobs: int | None = None):
+    """Fit *symbol*'s ExitNet on already loaded candles / closed trades; returns (model, metrics) or None"""
+    trades = trades[trades["symbol"] == symbol]
     rows = []
     for _, t in trades.iterrows():
         rr_hat = 1.5  # default if not stored
@@ -97,7 +107,7 @@ def train_symbol(symbol: str, tf: str):
 
     if len(rows) < 100:
         logging.warning("Too few training rows for %s", symbol)
-        return
+        return None
 
     df = pd.DataFrame(rows).dropna()
     y = df.pop("label")
@@ -111,20 +121,27 @@ def train_symbol(symbol: str, tf: str):
         colsample_bytree=0.8,
         objective="binary:logistic",
         random_state=42,
+        n_jobs=n_jobs,
     )
     model.fit(X, y)
-
-    out_path = MODELS_DIR / f"{symbol}_{tf}_exit.pkl"
-    joblib.dump(model, out_path)
-    logging.info("Saved %s", out_path)
+    accuracy = float((model.predict(X) == y.values).mean())
+    return model, {"rows": int(len(X)), "hold_rate": round(float(y.mean()), 4),
+                   "train_accuracy": round(accuracy, 4)}
 
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--tf", required=True, help="Timeframe (M15, H1, etc.)")
     args = parser.parse_args()
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    models, metrics = {}, {}
     for symbol in ASSETS:
-        train_symbol(symbol, args.tf)
+        result = train_symbol(symbol, args.tf)
+        if result is not None:
+            name = f"{symbol}_{args.tf}_exit.pkl"
+            models[name], metrics[name] = result
+    if models:
+        version = model_store.publish(models, metrics, note=f"train_exit {args.tf}")
+        logging.info("Published %d ExitNet models as version %s", len(models), version)
 
 if __name__ == "__main__":
     main()
@@ -13,11 +13,12 @@ import os
 from pathlib import Path
 from typing import List
 
+import numpy as np
 import pandas as pd
 from xgboost import XGBClassifier
-from joblib import dump                  # ←───────────── NEW
 
 from config import ASSETS
+from ml.model_store import model_store
 
 # ──────────────────────────────────────────────────────────────
 #  Paths & logging
@@ -94,10 +95,17 @@ def run(tf: str = "M1") -> None:
     model.save_model(bin_path)
     logger.info("Saved XGB binary to %s", bin_path)
 
-    # 2) Joblib pickle that model_inference expects
-    pkl_path = MODELS_DIR / f"{tf}.pkl"          # "H1.pkl", "M1.pkl", etc.
-    dump(model, pkl_path)
-    logger.info("Saved joblib model to %s", pkl_path)
+    # 2) Pickle + booster that model_inference expects, published as a new version
+    proba = model.predict_proba(X)[:, 1].clip(1e-7, 1 - 1e-7)
+    metrics = {
+        "rows": int(len(X)),
+        "features": int(X.shape[1]),
+        "train_logloss": round(float(-np.mean(y * np.log(proba) + (1 - y) * np.log(1 - proba))), 4),
+        "train_accuracy": round(float(((proba >= 0.5) == y).mean()), 4),
+    }
+    name = f"{tf}.pkl"                           # "H1.pkl", "M1.pkl", etc.
+    version = model_store.publish({name: model}, {name: metrics}, note=f"train_models {tf}")
+    logger.info("Published %s as model version %s", name, version)
 
 
 # ──────────────────────────────────────────────────────────────
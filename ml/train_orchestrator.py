@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+GENESIS – weekly retrain orchestrator
+
+The weekly retrain used to run four subprocesses one after another
+(train_rr M15 / H1, train_exit M15 / H1).  Each one looped over the assets
+on its own, so every symbol/timeframe's candles were fetched from OANDA
+twice, the trade log was re-read per symbol, and the fits ran one at a
+time with XGBoost's default threading.
+
+This runs the same jobs as one pipeline:
+
+    1. load      candles for every (symbol, timeframe) fetched once,
+                 concurrently (I/O bound), and the trade log read once
+    2. fit       one task per (symbol, timeframe) fits the RR model and
+                 the ExitNet on that shared data; tasks run in parallel
+                 worker processes, each fit limited to its share of the
+                 cores (workers × threads ≤ cores, so fits never
+                 oversubscribe the machine)
+    3. publish   every model from the run in one model store version
+                 (ml/model_store.py) – one rollback undoes the whole run
+
+The report gives per-task load / fit times, the number of OANDA fetches
+saved and the speedup: estimated from the measured stages (each fetch
+counted once per trainer that used to repeat it, all stages serial), or
+measured with --baseline, which first runs the old sequential trainers
+in-process without publishing.
+
+    python -m ml.train_orchestrator [--workers N] [--threads T] [--baseline] [--symbols XAUUSD EURUSD]
+
+Environment:
+    ML_TRAIN_WORKERS   parallel fit processes (default: one per task, up to the core count)
+    ML_TRAIN_THREADS   XGBoost threads per fit (default: cores // workers)
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from ml import train_exit, train_rr
+from ml.model_store import ModelStore, model_store
+
+logger = logging.getLogger(__name__)
+
+RR_WINDOWS = {"M15": 60, "H1": 180}         # look-ahead per timeframe, as the old RETRAIN_CMDS
+EXIT_TIMEFRAMES = ("M15", "H1")
+FETCH_THREADS = 8
+
+
+def plan_split(tasks: int, workers: Optional[int] = None, threads: Optional[int] = None,
+               cores: Optional[int] = None) -> Tuple[int, int]:
+    """(worker processes, XGBoost threads per fit) for *tasks* fits on *cores*"""
+    cores = cores or os.cpu_count() or 1
+    if workers is None:
+        workers = int(os.environ.get("ML_TRAIN_WORKERS", 0)) or min(tasks, cores)
+    workers = max(1, min(workers, tasks)) if tasks else 1
+    if threads is None:
+        threads = int(os.environ.get("ML_TRAIN_THREADS", 0)) or max(1, cores // workers)
+    return workers, threads
+
+
+# ──────────────────────────────────────────────────────────────
+#  Stage 1 – load
+# ──────────────────────────────────────────────────────────────
+def _load_one(key: Tuple[str, str]) -> Tuple[Tuple[str, str], pd.DataFrame, float]:
+    start = time.perf_counter()
+    candles = train_rr.load_candles(*key)
+    return key, candles, time.perf_counter() - start
+
+
+def load_data(keys: Sequence[Tuple[str, str]]) -> Dict[Tuple[str, str], Tuple[pd.DataFrame, float]]:
+    """Candles for every (symbol, timeframe), each fetched once; values are (frame, seconds)"""
+    with ThreadPoolExecutor(max_workers=max(1, min(FETCH_THREADS, len(keys)))) as pool:
+        return {key: (candles, seconds) for key, candles, seconds in pool.map(_load_one, keys)}
+
+
+# ──────────────────────────────────────────────────────────────
+#  Stage 2 – fit
+# ──────────────────────────────────────────────────────────────
+def fit_task(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Fit the RR model and / or ExitNet of one (symbol, timeframe) on its shared data"""
+    symbol, tf, candles = task["symbol"], task["tf"], task["candles"]
+    result: Dict[str, Any] = {"symbol": symbol, "tf": tf, "models": {}, "metrics": {},
+                              "seconds": {}, "errors": []}
+    fits = []
+    if task.get("rr_window"):
+        fits.append(("rr", f"{symbol}_{tf}_rr.pkl",
+                     lambda: train_rr.fit_rr(candles, task["rr_window"], n_jobs=task["threads"])))
+    if task.get("trades") is not None:
+        fits.append(("exit", f"{symbol}_{tf}_exit.pkl",
+                     lambda: train_exit.fit_exit(symbol, candles, task["trades"], n_jobs=task["threads"])))
+
+    for kind, name, fit in fits:
+        start = time.perf_counter()
+        try:
+            fitted = fit()
+        except Exception as exc:                    # pylint: disable=broad-except
+            logger.error("%s fit failed for %s %s: %s", kind, symbol, tf, exc)
+            result["errors"].append(f"{kind} {symbol} {tf}: {exc}")
+            fitted = None
+        result["seconds"][kind] = round(time.perf_counter() - start, 3)
+        if fitted is not None:
+            model, metrics = fitted
+            result["models"][name] = model
+            result["metrics"][name] = {**metrics, "fit_seconds": result["seconds"][kind],
+                                       "threads": task["threads"]}
+    return result
+
+
+def _fit_all(tasks: List[Dict[str, Any]], workers: int) -> List[Dict[str, Any]]:
+    if workers <= 1 or len(tasks) < 2:
+        return [fit_task(task) for task in tasks]
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    ctx = multiprocessing.get_context(method)
+    if method == "forkserver":
+        ctx.set_forkserver_preload(["ml.train_rr", "ml.train_exit"])
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        return list(pool.map(fit_task, tasks))
+
+
+# ──────────────────────────────────────────────────────────────
+#  Pipeline
+# ──────────────────────────────────────────────────────────────
+def run(symbols: Optional[Sequence[str]] = None, workers: Optional[int] = None,
+        threads: Optional[int] = None, store: Optional[ModelStore] = None,
+        publish: bool = True) -> Dict[str, Any]:
+    """Load, fit in parallel and publish; returns the report"""
+    symbols = list(symbols or train_rr.ASSETS)
+    timeframes = list(dict.fromkeys([*RR_WINDOWS, *EXIT_TIMEFRAMES]))
+    keys = [(symbol, tf) for symbol in symbols for tf in timeframes]
+    errors: List[str] = []
+    start = time.perf_counter()
+
+    data = load_data(keys)
+    trades = None
+    try:
+        trades = train_exit.load_trades()
+    except Exception as exc:                        # pylint: disable=broad-except
+        logger.error("Could not read the trade log %s: %s", train_exit.TRADE_LOG, exc)
+        errors.append(f"trade log: {exc}")
+    load_wall = time.perf_counter() - start
+
+    workers, threads = plan_split(len(keys), workers, threads)
+    tasks = []
+    for symbol, tf in keys:
+        candles, _ = data[(symbol, tf)]
+        if candles.empty:
+            logger.warning("No candles for %s %s – skipping", symbol, tf)
+            continue
+        tasks.append({"symbol": symbol, "tf": tf, "candles": candles, "threads": threads,
+                      "rr_window": RR_WINDOWS.get(tf),
+                      "trades": trades if tf in EXIT_TIMEFRAMES else None})
+    fit_start = time.perf_counter()
+    results = _fit_all(tasks, workers)
+    fit_wall = time.perf_counter() - fit_start
+
+    models: Dict[str, Any] = {}
+    metrics: Dict[str, Dict[str, Any]] = {}
+    for result in results:
+        models.update(result["models"])
+        metrics.update(result["metrics"])
+        errors.extend(result["errors"])
+    version = None
+    if publish and models:
+        version = (store or model_store).publish(models, metrics, note="weekly retrain")
+    wall = time.perf_counter() - start
+
+    # The old run fetched each (symbol, tf) once per trainer that used it
+    uses = {key: (key[1] in RR_WINDOWS) + (key[1] in EXIT_TIMEFRAMES) for key in keys}
+    fit_seconds = sum(sum(r["seconds"].values()) for r in results)
+    sequential = sum(seconds * uses[key] for key, (_, seconds) in data.items()) + fit_seconds
+    return {
+        "symbols": symbols,
+        "timeframes": timeframes,
+        "workers": workers,
+        "threads_per_fit": threads,
+        "version": version,
+        "models": sorted(models),
+        "errors": errors,
+        "fetches": len(keys),
+        "fetches_saved": sum(uses.values()) - len(keys),
+        "load_seconds": round(load_wall, 3),
+        "fit_seconds": round(fit_wall, 3),
+        "wall_seconds": round(wall, 3),
+        "sequential_estimate_seconds": round(sequential, 3),
+        "estimated_speedup": round(sequential / wall, 2) if wall else None,
+        "tasks": [{"symbol": r["symbol"], "tf": r["tf"], "load": round(data[(r["symbol"], r["tf"])][1], 3),
+                   **r["seconds"]} for r in results],
+        "metrics": metrics,
+    }
+
+
+def run_baseline(symbols: Optional[Sequence[str]] = None) -> float:
+    """Wall time of the old weekly run – the four trainers in sequence, nothing published"""
+    symbols = list(symbols or train_rr.ASSETS)
+    start = time.perf_counter()
+    for tf, window in RR_WINDOWS.items():
+        for symbol in symbols:
+            train_rr.train_symbol(symbol, tf, window)
+    for tf in EXIT_TIMEFRAMES:
+        for symbol in symbols:
+            train_exit.train_symbol(symbol, tf)
+    return time.perf_counter() - start
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel RR + ExitNet retrain")
+    parser.add_argument("--symbols", nargs="*", help="default: all training assets")
+    parser.add_argument("--workers", type=int, help="parallel fit processes")
+    parser.add_argument("--threads", type=int, help="XGBoost threads per fit")
+    parser.add_argument("--baseline", action="store_true",
+                        help="also time the old sequential run for a measured speedup")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    baseline = run_baseline(args.symbols) if args.baseline else None
+    report = run(args.symbols, args.workers, args.threads)
+    if baseline is not None:
+        report["baseline_seconds"] = round(baseline, 3)
+        report["speedup"] = round(baseline / report["wall_seconds"], 2)
+    print(json.dumps({k: v for k, v in report.items() if k != "metrics"}, indent=2))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
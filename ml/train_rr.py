@@ -19,7 +19,8 @@ Usage
 -----
 $ python -m ml.train_rr --tf M5 --window 60
 
-• Outputs «ml/models/{symbol}_{tf}_rr.pkl»
+• Publishes «{symbol}_{tf}_rr.pkl» (+ its «…_rr.ubj» booster) for every
+  symbol as one new model version (ml/model_store.py)
 • Writes a CSV summary of feature importance per model.
 """
 from __future__ import annotations
@@ -30,12 +31,12 @@ import os
 from pathlib import Path
 from typing import List, Dict
 
-import joblib
 import numpy as np
 import pandas as pd
 from xgboost import XGBRegressor
 
 from chart_utils import fetch_candles, get_atr
+from ml.model_store import model_store
 
 # --------------------------------------------------
 # Config
@@ -84,7 +85,7 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
     atr14 = pd.Series(np.r_[np.nan, tr]).ewm(span=14, adjust=False).mean()
 
     feats = pd.DataFrame({
-        "atr":   atr14,
+        "atr":   atr14.to_numpy(),      # positional – the frame is time-indexed
         "vwap":  (high + low + close) / 3,
         "range": high - low,
         "session_hour": df.index.hour,
@@ -97,8 +98,8 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
 # -----------------------------------------------
 # Training loop
 # -----------------------------------------------
-def train_symbol(symbol: str, tf: str, window: int):
-    logging.info("Training RR model for %s %s", symbol, tf)
+def load_candles(symbol: str, tf: str) -> pd.DataFrame:
+    """Training history for *symbol* / *tf* as a time-indexed DataFrame"""
     candles = fetch_candles(symbol, tf, years=3) 
     if isinstance(candles, list):
         candles = pd.DataFrame(candles)# 3‑yr history
@@ -109,10 +110,20 @@ def train_symbol(symbol: str, tf: str, window: int):
         elif "time" in candles.columns:
             candles["time"] = pd.to_datetime(candles["time"])
             candles = candles.set_index("time")
+    return candles
+
+def train_symbol(symbol: str, tf: str, window: int):
+    """Fit one symbol's RR model; returns (model, metrics) or None"""
+    logging.info("Training RR model for %s %s", symbol, tf)
+    candles = load_candles(symbol, tf)
     if candles.empty:
         logging.warning("No candles for %s – skipping", symbol)
-        return
-    candles['side'] = np.where(candles['close'] >= candles['open'], 'buy', 'sell')
+        return None
+    return fit_rr(candles, window)
+
+def fit_rr(candles: pd.DataFrame, window: int, n_jobs: int | None = None):
+    """Fit an RR model on already loaded *candles* (left unmodified); returns (model, metrics)"""
+    candles = candles.assign(side=np.where(candles['close'] >= candles['open'], 'buy', 'sell'))
     y = label_best_rr(candles, look_ahead=window)
     X = build_features(candles)
 
@@ -123,15 +134,15 @@ def train_symbol(symbol: str, tf: str, window: int):
         subsample=0.8,
         colsample_bytree=0.8,
         objective='reg:squarederror',
-        random_state=42
+        random_state=42,
+        n_jobs=n_jobs,
     )
     mask = np.isfinite(y) & np.isfinite(X).all(axis=1)
     X = X[mask]
     y = y[mask]
     model.fit(X, y)
-    out_path = MODELS_DIR / f"{symbol}_{tf}_rr.pkl"
-    joblib.dump(model, out_path)
-    logging.info("Saved %s", out_path)
+    rmse = float(np.sqrt(np.mean((model.predict(X) - y) ** 2)))
+    return model, {"rows": int(len(X)), "window": window, "train_rmse": round(rmse, 4)}
 
 def main():
     parser = argparse.ArgumentParser()
@@ -141,8 +152,15 @@ def main():
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    models, metrics = {}, {}
     for sym in ASSETS:
-        train_symbol(sym, args.tf, args.window)
+        result = train_symbol(sym, args.tf, args.window)
+        if result is not None:
+            name = f"{sym}_{args.tf}_rr.pkl"
+            models[name], metrics[name] = result
+    if models:
+        version = model_store.publish(models, metrics, note=f"train_rr {args.tf}")
+        logging.info("Published %d RR models as version %s", len(models), version)
 
 if __name__ == '__main__':
     main()
@@ -6,40 +6,25 @@ Provides Discord webhook alerts for critical system issues
 import logging
 from app import app
 from monitoring.system_monitor import run_monitoring_checks
-from scheduler import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def add_monitoring_to_scheduler():
     """
-    Add the monitoring job to the existing scheduler
+    Run the monitoring job inside the dedicated scheduler process.
+
+    The scheduler is no longer started here (that created a second
+    scheduler next to the web process); this hosts it through
+    scheduler_runner, which takes the leader lock first.  When another
+    runner already holds the lock this process waits as a standby – set
+    SCHEDULER_MONITORING=1 on that runner instead.
     """
     try:
-        # Use the existing scheduler module
-        from scheduler import start_scheduler
-        scheduler = start_scheduler()
-        
-        # Add the monitoring job to run every 5 minutes
-        job = scheduler.add_job(
-            run_monitoring_checks,
-            CronTrigger(minute="*/5"),  # Run every 5 minutes
-            id="discord_monitor",
-            name="Monitor for critical system issues",
-            replace_existing=True,
-        )
-        
-        # Start the scheduler if not already running
-        if not scheduler.running:
-            scheduler.start()
-            
-        logger.info(f"Added system monitoring to scheduler: {job.name} (ID: {job.id})")
-        logger.info(f"Next run time: {job.next_run_time}")
-        return True
-        
+        from scheduler_runner import main as run_scheduler
+        return run_scheduler(["--monitoring"]) == 0
     except Exception as e:
-        logger.error(f"Failed to add monitoring job: {e}")
+        logger.error(f"Failed to run monitoring scheduler: {e}")
         return False
 
 def test_alerts():
@@ -82,7 +67,7 @@ def main():
     parser = argparse.ArgumentParser(description="Genesis Trading System Monitor")
     parser.add_argument("--test", action="store_true", help="Send a test alert and exit")
     parser.add_argument("--run", action="store_true", help="Run monitoring checks once and exit")
-    parser.add_argument("--add", action="store_true", help="Add monitoring to scheduler")
+    parser.add_argument("--add", action="store_true", help="Run the scheduler with the monitoring job")
     args = parser.parse_args()
     
     if args.test:
@@ -95,8 +80,8 @@ def main():
         # Default: run checks once and add to scheduler
         success = run_now()
         if success is not False:  # None or True means no explicit failure
+            logger.info("Monitoring will run every 5 minutes in the scheduler process")
             add_monitoring_to_scheduler()
-            logger.info("Monitoring is now active and will run every 5 minutes")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
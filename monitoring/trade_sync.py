@@ -13,6 +13,8 @@ from typing import Dict, List, Optional, Set
 
 from app import app, db, Trade, TradeStatus
 from mt5_ea_api import MetaTrader5API
+from performance_stats import performance_stats
+from exposure_book import exposure_book
 from monitoring.discord_alerts import send_discord_alert
 
 logger = logging.getLogger(__name__)
@@ -106,6 +108,7 @@ def synchronize_trades() -> Dict[str, int]:
                     context["last_update"] = datetime.now().isoformat()
                     context["closed_by"] = "trade_sync_monitor"
                     trade.context = context
+                    performance_stats.apply(trade)
                     
                     closed_tickets.append(trade.ticket)
                     stats["closed"] += 1
@@ -113,6 +116,7 @@ def synchronize_trades() -> Dict[str, int]:
             # Commit the changes
             if closed_tickets:
                 db.session.commit()
+                exposure_book.apply_many(t for t in db_open_trades if t.ticket in closed_tickets)
                 logger.info(f"Updated {len(closed_tickets)} trades to CLOSED status")
                 logger.info(f"Updated tickets: {closed_tickets}")
                 
@@ -19,6 +19,8 @@ from app import (
     Settings, SignalStatus
 )
 from config import MT5_ASSETS as DEFAULT_SYMBOLS
+from performance_stats import performance_stats
+from exposure_book import exposure_book, currency_legs
 from chart_utils import pip_tolerance, is_price_too_close, generate_chart
 from sqlalchemy import Text, cast
 from config import mt5_to_oanda
@@ -28,13 +30,18 @@ trade_logger = TradeLogger()
 # ─── 2. RISK-LIMIT CONSTANTS (Task #4) ──────────────────────
 MAX_TRADES_PER_SYMBOL   = 3       # live positions allowed
 MIN_FREE_MARGIN_RATIO   = 0.30    # 30 % of balance
+MAX_CURRENCY_LOTS       = float(os.environ.get("RISK_MAX_CURRENCY_LOTS", 0))   # net lots per currency leg, 0 = off
 # -----------------------------------------------------------
 
 
 # ─── 3. HELPER: _risk_guard() ───────────────────────────────
-def _risk_guard(symbol: str) -> tuple[bool, str]:
+def _risk_guard(symbol: str, side: "TradeSide | None" = None) -> tuple[bool, str]:
     """
     Returns (is_allowed, reason) for opening another position on `symbol`.
+
+    The per-symbol cap counts open trades in the DB: the exposure book of
+    this process can lag a trade another worker just recorded by up to
+    EXPOSURE_RESYNC_SECONDS.  Margin and currency legs come from the book.
     """
     # a) count open trades for this symbol
     open_trades = (
@@ -46,12 +53,24 @@ def _risk_guard(symbol: str) -> tuple[bool, str]:
         return False, f"{open_trades} open {symbol} trades (max {MAX_TRADES_PER_SYMBOL})"
 
     # b) margin buffer
-    balance     = Settings.get_value("mt5_account", "balance",     0.0) or 0.0
-    free_margin = Settings.get_value("mt5_account", "free_margin", 0.0) or 0.0
+    account     = exposure_book.account()
+    balance     = account.get("balance", 0.0)
+    free_margin = account.get("free_margin", 0.0)
     if balance and (free_margin / balance) < MIN_FREE_MARGIN_RATIO:
         pct = round(100 * free_margin / balance, 1)
         return False, f"Free-margin {pct}% < {int(100*MIN_FREE_MARGIN_RATIO)}%"
 
+    # c) net currency-leg exposure in the direction this trade would add to
+    legs = currency_legs(symbol)
+    if MAX_CURRENCY_LOTS and side is not None and legs:
+        sign = 1.0 if side == TradeSide.BUY else -1.0
+        exposure = exposure_book.currency_exposure()
+        for currency, direction in zip(legs, (sign, -sign)):
+            net = exposure.get(currency, 0.0) * direction
+            if net >= MAX_CURRENCY_LOTS:
+                word = "long" if direction > 0 else "short"
+                return False, f"Already {word} {net:.2f} lots {currency} (max {MAX_CURRENCY_LOTS:g})"
+
     return True, "pass"
 
 # Configure logging for this module
@@ -581,7 +600,9 @@ def get_signals():
         for signal in signals:
 
             # ‣ RISK-LIMIT GUARD  (max 3 trades / symbol  &  ≥30 % free-margin)
-            ok, reason = _risk_guard(signal.symbol)
+            action_name = getattr(signal.action, "name", str(signal.action))
+            side = TradeSide.SELL if "SELL" in action_name or "SHORT" in action_name else TradeSide.BUY
+            ok, reason = _risk_guard(signal.symbol, side)
             if not ok:
                 logger.info(f"Signal {signal.id} blocked: {reason}")
                 continue               # skip this signal entirely
@@ -803,6 +824,7 @@ def trade_report():
             
             db.session.add(trade)
             db.session.commit()
+            exposure_book.apply(trade)
 
             trade_logger.log_entry(trade) 
             logger.info(f"Trade recorded: Ticket {ticket}, Symbol {symbol}, Side {side}")
@@ -871,12 +893,14 @@ def update_trades():
                 context["closed_by"] = "sync_missing"
                 context["last_update"] = datetime.now().isoformat()
                 missing_trade.context = context
+                performance_stats.apply(missing_trade)
 
             if all_open_trades:
                 db.session.commit()
+                exposure_book.apply_many(all_open_trades)
                 logger.info(f"Closed {len(all_open_trades)} trades that are no longer in MT5")
 
-        new_objects, updated, created = [], 0, 0
+        new_objects, touched, updated, created = [], [], 0, 0
 
         # ──────────────────────────────────────────────────────────────
         # 3️⃣  Iterate incoming trades once
@@ -928,12 +952,16 @@ def update_trades():
             # Log exits only on the first transition to CLOSED
             if attrs["status"] == TradeStatus.CLOSED and (trade in new_objects or prev_status != TradeStatus.CLOSED):
                 trade_logger.log_exit(trade)
+            # Rolling stats: no-op unless the close, its P&L or close time changed
+            performance_stats.apply(trade)
+            touched.append(trade)
         # ──────────────────────────────────────────────────────────────
         # 4️⃣  Bulk insert + single commit
         # ──────────────────────────────────────────────────────────────
         if new_objects:
             db.session.bulk_save_objects(new_objects)
         db.session.commit()
+        exposure_book.apply_many(touched)
 
         logger.info(f"Trade update summary: {updated} updated, {created} created for account {account_id}")
 
@@ -983,6 +1011,7 @@ def update_closed_trades():
         }
 
         updated_count = 0
+        touched = []
 
         for ticket, info in closed_trades_blob.items():
             # Skip unwanted crypto symbols
@@ -1013,6 +1042,8 @@ def update_closed_trades():
                 context = {"src": "mt5_closed_import", 
                           "first_seen": datetime.utcnow().isoformat()}
                 new_trade.context = context
+                performance_stats.apply(new_trade)
+                touched.append(new_trade)
                 
                 db.session.add(new_trade)
                 updated_count += 1
@@ -1030,10 +1061,13 @@ def update_closed_trades():
                 context["last_update"] = datetime.utcnow().isoformat()
                 context["closed_by"] = "mt5_report"
                 trade.context = context
+                performance_stats.apply(trade)
+                touched.append(trade)
                 
                 updated_count += 1
         
         db.session.commit()
+        exposure_book.apply_many(touched)
         logger.info(f"MT5 update_closed_trades → updated: {updated_count}")
         
         return jsonify({
@@ -1334,8 +1368,8 @@ def signal_chart(signal_id):
             signal_action = signal.action.value if hasattr(signal.action, 'value') else str(signal.action)
             logger.info(f"Creating chart for signal {signal_id} with action {signal_action}")
             
-            # Use the modified chart_utils that passes signal action
-            from chart_generator_basic import ChartGenerator
+            # Render in the chart pool so the web worker isn't blocked by matplotlib
+            from chart_render_service import render_service
             from chart_utils import fetch_candles
             
             # Format symbol for OANDA
@@ -1378,9 +1412,6 @@ def signal_chart(signal_id):
             
             logger.info(f"Chart will be saved to: {filepath}")
             
-            # Create chart generator with signal action context
-            chart_gen = ChartGenerator(signal_action=signal_action)
-            
             entry_price = float(signal.entry) if signal.entry else candles[-1]['close']
             sl_price = float(signal.sl) if signal.sl else None
             tp_price = float(signal.tp) if signal.tp else None
@@ -1388,14 +1419,15 @@ def signal_chart(signal_id):
             logger.info(f"Chart params: symbol={oanda_symbol}, entry={entry_price}, SL={sl_price}, TP={tp_price}")
             
             # Generate the chart with appropriate signal styling
-            chart_path = chart_gen.create_chart(
+            chart_path = render_service.render_path(
                 candles=candles,
                 symbol=oanda_symbol,
                 timeframe="H1",
                 entry_point=(entry_time, entry_price),
                 stop_loss=sl_price,
                 take_profit=tp_price,
-                result=result
+                result=result,
+                signal_action=signal_action,
             )
             
             logger.info(f"Chart generated successfully at path: {chart_path}")
@@ -1473,6 +1505,8 @@ def account_status():
         if open_positions is not None:
             Settings.set_value('mt5_account', 'open_positions', open_positions)
         
+        exposure_book.update_account(balance=balance, free_margin=free_margin)
+
         # Store the last update time
         Settings.set_value('mt5_account', 'last_update', datetime.now().isoformat())
         # Store the account ID
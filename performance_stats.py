@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Rolling per-symbol performance statistics
+
+evaluate_performance_adjustment used to load every closed trade of a
+symbol / side over the last 90 days (plus an unbounded count) and recompute
+win rate and average profit in Python for every signal.  Closed trades are
+now folded into the symbol_performance table – one row per symbol, side and
+close day holding trade / win counts and P&L sums – at the moment they
+close (mt5_ea_api.update_trades / update_closed_trades, trade_sync).  Any
+window is then a single indexed range aggregate over at most `days` rows:
+
+    performance_stats.window("EURUSD", TradeSide.BUY, days=90)
+
+Updates are idempotent: the contribution a trade made (close day, win,
+P&L) is remembered in its context as "perf_stats", so re-reported closed
+trades are skipped and P&L or close-time corrections move only the delta.
+Trades closed without a close time are counted in the all-time totals but
+in no window (bucket 1970-01-01), as the old query did.
+
+Trades closed before the table existed are folded in by one backfill
+(rebuild()), run on the first lookup unless a marker row says it already
+happened – trades applied in the meantime are re-counted by it, not lost.
+
+    python performance_stats.py --rebuild   # backfill from the trades table
+    python performance_stats.py             # 90-day stats per symbol / side
+"""
+
+import sys
+import json
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, func
+
+from app import app, db, SymbolPerformance, Trade, TradeSide, TradeStatus
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_DAY = date(1970, 1, 1)
+CONTEXT_KEY = "perf_stats"
+BACKFILL_MARKER = "__backfilled__"     # symbol of the row recording that rebuild() ran
+
+
+def _contribution(trade: Trade) -> Optional[List[Any]]:
+    """[close day, win, pnl] this trade adds to the aggregates, None unless closed"""
+    if trade.status != TradeStatus.CLOSED:
+        return None
+    pnl = float(trade.pnl or 0.0)
+    bucket = trade.closed_at.date() if trade.closed_at else UNKNOWN_DAY
+    return [bucket.isoformat(), int(pnl > 0), pnl]
+
+
+class PerformanceStats:
+    """Maintains symbol_performance and answers windowed lookups from it"""
+
+    def __init__(self):
+        self._checked = False
+        self._lock = threading.Lock()
+
+    # ──────────────────────────────── updates ───────────────────────────────────
+    def apply(self, trade: Trade) -> bool:
+        """
+        Bring the aggregates in line with *trade*'s current state.  Call
+        after changing a trade's status / pnl / closed_at, before committing.
+        Returns True when the aggregates changed.
+        """
+        if trade.side is None or not trade.symbol:
+            return False
+        context = trade.context or {}
+        before = context.get(CONTEXT_KEY)
+        after = _contribution(trade)
+        if before == after:
+            return False
+
+        if before:
+            self._add(trade.symbol, trade.side, before, sign=-1)
+        if after:
+            self._add(trade.symbol, trade.side, after, sign=1)
+            context[CONTEXT_KEY] = after
+        else:
+            context.pop(CONTEXT_KEY, None)
+        trade.context = context
+        return True
+
+    @staticmethod
+    def _add(symbol: str, side: TradeSide, contribution: List[Any], sign: int) -> None:
+        bucket_iso, win, pnl = contribution
+        bucket = date.fromisoformat(bucket_iso)
+        deltas = {
+            "trades": sign,
+            "wins": sign * win,
+            "pnl_sum": sign * pnl,
+            "win_pnl_sum": sign * pnl if win else 0.0,
+            "loss_pnl_sum": 0.0 if win else sign * pnl,
+        }
+        # Increment in SQL so concurrent writers (web + sync monitor) don't lose updates
+        updated = (
+            db.session.query(SymbolPerformance)
+            .filter_by(symbol=symbol, side=side, bucket=bucket)
+            .update({getattr(SymbolPerformance, k): getattr(SymbolPerformance, k) + v for k, v in deltas.items()},
+                    synchronize_session=False)
+        )
+        if not updated:
+            db.session.add(SymbolPerformance(symbol=symbol, side=side, bucket=bucket, **deltas))
+            db.session.flush()
+
+    def rebuild(self) -> int:
+        """Recompute the table from the trades table (one full scan); returns closed trades folded in"""
+        with self._lock:
+            db.session.query(SymbolPerformance).delete(synchronize_session=False)
+            count = 0
+            for trade in Trade.query.filter(Trade.status == TradeStatus.CLOSED).all():
+                context = trade.context or {}
+                context.pop(CONTEXT_KEY, None)
+                trade.context = context
+                count += int(self.apply(trade))
+            db.session.add(SymbolPerformance(symbol=BACKFILL_MARKER, side=TradeSide.BUY, bucket=UNKNOWN_DAY))
+            db.session.commit()
+            self._checked = True
+        logger.info(f"Rebuilt symbol_performance from {count} closed trades")
+        return count
+
+    def ensure_built(self) -> None:
+        """Backfill once, unless the marker row shows the table was already built"""
+        if self._checked:
+            return
+        built = db.session.query(SymbolPerformance.id).filter_by(symbol=BACKFILL_MARKER).first() is not None
+        if not built:
+            logger.info("symbol_performance not backfilled yet; rebuilding from closed trades")
+            self.rebuild()
+        self._checked = True
+
+    # ──────────────────────────────── lookups ───────────────────────────────────
+    def windows(self, symbols: Iterable[str], days: int,
+                now: Optional[datetime] = None) -> Dict[Tuple[str, TradeSide], Dict[str, Any]]:
+        """{(symbol, side): stats} for several symbols in one aggregate query"""
+        self.ensure_built()
+        cutoff = ((now or datetime.now()) - timedelta(days=days)).date()
+        recent = SymbolPerformance.bucket >= cutoff
+
+        def in_window(column):
+            return func.coalesce(func.sum(case((recent, column), else_=0)), 0)
+
+        rows = (
+            db.session.query(
+                SymbolPerformance.symbol,
+                SymbolPerformance.side,
+                func.coalesce(func.sum(SymbolPerformance.trades), 0),
+                in_window(SymbolPerformance.trades),
+                in_window(SymbolPerformance.wins),
+                in_window(SymbolPerformance.pnl_sum),
+                in_window(SymbolPerformance.win_pnl_sum),
+                in_window(SymbolPerformance.loss_pnl_sum),
+            )
+            .filter(SymbolPerformance.symbol.in_(list(symbols)))
+            .group_by(SymbolPerformance.symbol, SymbolPerformance.side)
+            .all()
+        )
+        return {
+            (symbol, side): {
+                "total_trades_in_db": int(all_time),
+                "total_trades": int(trades),
+                "profitable_trades": int(wins),
+                "losing_trades": int(trades) - int(wins),
+                "total_profit": float(pnl),
+                "win_profit": float(win_pnl),
+                "loss_profit": float(loss_pnl),
+                "window_days": days,
+            }
+            for symbol, side, all_time, trades, wins, pnl, win_pnl, loss_pnl in rows
+        }
+
+    def window(self, symbol: str, side: TradeSide, days: int = 90,
+               now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Stats of one symbol / side over the last *days* days"""
+        return self.windows([symbol], days, now).get((symbol, side), empty_window(days))
+
+
+def empty_window(days: int) -> Dict[str, Any]:
+    return {"total_trades_in_db": 0, "total_trades": 0, "profitable_trades": 0, "losing_trades": 0,
+            "total_profit": 0.0, "win_profit": 0.0, "loss_profit": 0.0, "window_days": days}
+
+
+# Global instance
+performance_stats = PerformanceStats()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    with app.app_context():
+        if "--rebuild" in sys.argv:
+            print(json.dumps({"closed_trades": performance_stats.rebuild()}))
+        else:
+            symbols = [s for (s,) in db.session.query(SymbolPerformance.symbol).distinct() if s != BACKFILL_MARKER]
+            stats = performance_stats.windows(symbols, days=90)
+            print(json.dumps({f"{sym} {side.value}": v for (sym, side), v in sorted(stats.items(),
+                              key=lambda kv: (kv[0][0], kv[0][1].value))}, indent=2))
@@ -5,14 +5,14 @@ Breakeven + ExitNet early-exit + RR-based TP.
 import time
 import logging
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 import requests
 from datetime import datetime
 from os import getenv
 
 from ml.model_inference_rr import predict_rr
-from ml.exit_inference import predict_exit_prob
+from ml.exit_inference import predict_exit_probs
 
 logger = logging.getLogger(__name__)
 
@@ -76,8 +76,21 @@ class PositionManager:
         low: float,
         atr: float | None = None,
     ):
+        self.update_quotes({p.symbol: (price, high, low, atr) for p in self.positions})
+
+    def update_quotes(self, quotes: Dict[str, Tuple[float, float, float, Optional[float]]]):
+        """
+        One bar for every open position, each at its own symbol's
+        (price, high, low, atr) quote; positions without a quote are left
+        alone.  ExitNet scores all of them in one batch.
+        """
         eq = self.equity_curve[-1]
-        for p in list(self.positions):
+        hour = datetime.utcnow().hour
+        batch = []
+        for p in self.positions:
+            if p.symbol not in quotes:
+                continue
+            price, high, low, atr = quotes[p.symbol]
             # breakeven
             if not p.breakeven_moved and price - p.entry >= (p.entry - p.sl):
                 p.sl = p.entry
@@ -90,11 +103,14 @@ class PositionManager:
                 "bars_open":   p.bars_open,
                 "atr":         atr or abs(high - low),
                 "range":       abs(high - low),
-                "session_hour": datetime.utcnow().hour,
+                "session_hour": hour,
                 "entry_rr_hat": p.rr_hat,
                 "unrealised_rr": rr_live,
             }
-            p_hold = predict_exit_prob(p.symbol, p.context_tf, features)
+            batch.append((p, price, features))
+
+        p_holds = predict_exit_probs([(p.symbol, p.context_tf, f) for p, _, f in batch]) if batch else []
+        for (p, price, _), p_hold in zip(batch, p_holds):
             logger.debug("ExitNet %s p_hold=%.2f", p.symbol, p_hold)
 
             if p_hold < 0.35:
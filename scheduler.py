@@ -3,54 +3,30 @@ import os
 import sys
 import subprocess
 import logging
+import threading
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
 import pytz                                       # NEW
 import ml.train_models as train_models
 
-import capture_job
-from config import ASSETS              # 👈 unified list
+from capture_orchestrator import CAPTURE_JOB_ID, capture_orchestrator
 
 logger = logging.getLogger(__name__)
 
-# ────────────────────────────────────────────────────────────────
-#  Job wrappers – chart captures
-# ────────────────────────────────────────────────────────────────
-def capture_all_assets() -> None:
-    """Capture 15-minute charts (M15) for every configured asset."""
-    logger.info("Running M15 capture for %d assets", len(ASSETS))
-    for symbol in ASSETS:
-        try:
-            logger.info("Capturing %s (M15)", symbol)
-            capture_job.run(symbol, timeframe="M15")
-        except Exception as exc:
-            logger.error("Error capturing %s (M15): %s", symbol, exc)
-
-
-def capture_hourly_assets() -> None:
-    """Capture hourly charts (H1) for every configured asset."""
-    logger.info("Running H1 capture for %d assets", len(ASSETS))
-    for symbol in ASSETS:
-        try:
-            logger.info("Capturing %s (H1)", symbol)
-            capture_job.run(symbol, timeframe="H1")
-        except Exception as exc:
-            logger.error("Error capturing %s (H1): %s", symbol, exc)
-
-
 # ────────────────────────────────────────────────────────────────
 #  Weekly ML-retrain job
 # ────────────────────────────────────────────────────────────────
 PY = sys.executable  # full path to current interpreter
+# RR M15/H1 + ExitNet M15/H1 in one pipeline: candles fetched once per
+# symbol/timeframe, symbols fitted in parallel (see ml/train_orchestrator.py)
 RETRAIN_CMDS = [
-    [PY, "-m", "ml.train_rr",   "--tf", "M15", "--window", "60"],
-    [PY, "-m", "ml.train_rr",   "--tf", "H1",  "--window", "180"],
-    [PY, "-m", "ml.train_exit", "--tf", "M15"],
-    [PY, "-m", "ml.train_exit", "--tf", "H1"],
+    [PY, "-m", "ml.train_orchestrator"],
 ]
 
 _log_dir = Path(__file__).resolve().parent / "logs"
@@ -62,7 +38,7 @@ ml_logger.setLevel(logging.INFO)
 ml_logger.addHandler(logging.FileHandler(_retrain_log))
 
 def retrain_job() -> None:
-    """Run all four training commands; stop on first failure."""
+    """Run the training commands; stop on first failure."""
     ml_logger.info("=" * 60)
     ml_logger.info("Weekly retrain started")
     for cmd in RETRAIN_CMDS:
@@ -80,6 +56,23 @@ def retrain_job() -> None:
     ml_logger.info("Weekly retrain completed OK")
 
 
+# ────────────────────────────────────────────────────────────────
+#  Embedded Vision queue consumer
+# ────────────────────────────────────────────────────────────────
+_vision_consumer: Optional[threading.Thread] = None
+
+
+def stop_vision_consumer(timeout: float = 30.0) -> None:
+    """Stop the embedded Vision consumer started by start_scheduler() (after its current job)"""
+    global _vision_consumer
+    thread, _vision_consumer = _vision_consumer, None
+    if thread is None:
+        return
+    from vision_worker import stop_worker_thread
+    stop_worker_thread()
+    thread.join(timeout)
+
+
 # ────────────────────────────────────────────────────────────────
 #  Scheduler setup
 # ────────────────────────────────────────────────────────────────
@@ -87,14 +80,21 @@ def start_scheduler() -> BackgroundScheduler:
     """Create and start the background scheduler with cron jobs."""
     scheduler = BackgroundScheduler()
 
-    # Every 15 minutes at ss = 10  (00:10, 15:10, 30:10, 45:10)
+    # One merged capture per bar close: M15 every quarter, M15 + H1 on the
+    # hour, CAPTURE_SETTLE_SECONDS after the close.  A slow cycle never
+    # overlaps the next one and missed triggers collapse into one run.
     scheduler.add_job(
-        capture_all_assets,
-        CronTrigger(second=10, minute="*/15"),
-        id="capture_15m",
-        name="Capture all assets every 15 min (+10 s buffer)",
+        capture_orchestrator.run_cycle,
+        CronTrigger(**capture_orchestrator.cron_fields(), timezone=pytz.UTC),
+        id=CAPTURE_JOB_ID,
+        name=f"Capture {'+'.join(capture_orchestrator.timeframes)} at bar close",
         replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=60,
     )
+    scheduler.add_listener(capture_orchestrator.on_scheduler_event,
+                           EVENT_JOB_MAX_INSTANCES | EVENT_JOB_MISSED)
     
     # Add the trade exit monitor job to run every 15 minutes
     # Import here to avoid circular imports
@@ -106,17 +106,33 @@ def start_scheduler() -> BackgroundScheduler:
             id="exit_monitor",
             name="Monitor trades for exit signals every 15 minutes",
             replace_existing=True,
+            max_instances=1,
+            coalesce=True,
         )
         logger.info("Added exit monitor job to scheduler")
     except Exception as e:
         logger.error(f"Failed to add exit monitor job: {e}")
 
-    # Hourly at HH:00:10
+    # Rolling correlation matrix: pulls the new bar after each close (a no-op
+    # until then), so scoring lookups never wait on OANDA
+    from correlation_service import RETRY_SECONDS, correlation_service
+    scheduler.add_job(
+        correlation_service.maybe_refresh,
+        IntervalTrigger(seconds=RETRY_SECONDS),
+        id="correlation_refresh",
+        name="Refresh the rolling correlation matrix after each bar close",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Daily chart retention / archiving – 03:30 UTC
+    from chart_store import run_retention
     scheduler.add_job(
-        capture_hourly_assets,
-        CronTrigger(second=10, minute=0),
-        id="capture_1h",
-        name="Capture all assets hourly (+10 s buffer)",
+        run_retention,
+        CronTrigger(hour=3, minute=30, timezone=pytz.UTC),
+        id="chart_retention",
+        name="Prune and archive old chart images",
         replace_existing=True,
     )
 
@@ -130,7 +146,16 @@ def start_scheduler() -> BackgroundScheduler:
     )
 
     scheduler.start()
-    logger.info("Scheduler started (15-minute, hourly, weekly jobs)")
+    logger.info("Scheduler started (bar-close capture, exit monitor, daily, weekly jobs)")
+
+    # Capture jobs only enqueue; the Vision queue is drained by this embedded
+    # consumer, or by separate `python vision_worker.py` processes when
+    # VISION_WORKER_EMBEDDED=0
+    if os.environ.get("VISION_WORKER_EMBEDDED", "1") == "1":
+        # imported here so importing this module stays free of the app import chain
+        from vision_worker import start_worker_thread
+        global _vision_consumer
+        _vision_consumer = start_worker_thread()
     return scheduler
 
 
@@ -143,8 +168,8 @@ if __name__ == "__main__":
 
     try:
         # Manual smoke-test
-        logger.info("Running one immediate M15 capture")
-        capture_all_assets()
+        logger.info("Running one immediate capture cycle")
+        capture_orchestrator.run_cycle()
 
         # Keep the process alive so APScheduler’s background threads keep running
         while True:
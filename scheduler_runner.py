@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Dedicated scheduler / worker process
+
+The APScheduler jobs (bar-close capture, exit monitor, chart retention,
+weekly retrain) and the embedded Vision consumer used to be started from
+app.py at import time, i.e. inside every web worker.  Rendering and Vision
+calls then competed with request handling for the GIL, and a second
+gunicorn worker (or monitor.py) started a second, duplicate scheduler.
+
+They now run only in this process:
+
+    python scheduler_runner.py                # leader, or hot standby
+    python scheduler_runner.py --monitoring   # also run the Discord monitor
+
+Only one runner may host the jobs.  Each runner takes a leader lock before
+starting the scheduler; a runner that loses the race waits as a standby
+and takes over when the leader exits (the lock dies with its process, so a
+crashed leader never leaves a stale lock behind).  The leader re-checks
+its lock every SCHEDULER_LOCK_CHECK_SECONDS; when it is lost (e.g. the
+advisory-lock connection dropped, which releases the lock) the scheduler
+is shut down and the runner goes back to standby:
+
+    • file      – fcntl.flock on SCHEDULER_LOCK_FILE (one host)
+    • postgres  – session-level pg_try_advisory_lock on DATABASE_URL
+                  (several hosts sharing the database)
+
+Environment:
+    SCHEDULER_LOCK            file | postgres (default: postgres when
+                              DATABASE_URL is a PostgreSQL URL, else file)
+    SCHEDULER_LOCK_FILE       lock file path (default data/scheduler.lock)
+    SCHEDULER_LOCK_KEY        advisory lock key (default 4_361_727)
+    SCHEDULER_STANDBY_SECONDS how often a standby retries the lock (default 15)
+    SCHEDULER_LOCK_CHECK_SECONDS how often the leader verifies its lock (default 5)
+    SCHEDULER_MONITORING      1 = add the Discord monitor job (default 0)
+"""
+
+import os
+import sys
+import signal
+import logging
+import argparse
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:                # Windows – file lock unavailable
+    fcntl = None
+
+
+# ────────────────────────────────────────────────────────────────
+#  Leader lock
+# ────────────────────────────────────────────────────────────────
+class LeaderLock:
+    """Non-blocking, process-lifetime lock electing the one scheduler host"""
+
+    def __init__(self, backend: Optional[str] = None, path: Optional[str] = None,
+                 key: Optional[int] = None, database_url: Optional[str] = None):
+        self.database_url = database_url or os.environ.get("DATABASE_URL", "")
+        default_backend = "postgres" if self.database_url.startswith("postgres") else "file"
+        self.backend = backend or os.environ.get("SCHEDULER_LOCK", default_backend)
+        self.path = path or os.environ.get("SCHEDULER_LOCK_FILE", os.path.join("data", "scheduler.lock"))
+        self.key = int(os.environ.get("SCHEDULER_LOCK_KEY", 4_361_727)) if key is None else key
+        self._handle = None         # open lock file or DB connection while held
+
+    @property
+    def held(self) -> bool:
+        return self._handle is not None
+
+    def acquire(self) -> bool:
+        """Try once to become leader; True when the lock is (already) held"""
+        if self.held:
+            return True
+        try:
+            if self.backend == "postgres":
+                return self._acquire_postgres()
+            return self._acquire_file()
+        except Exception as e:
+            logger.error(f"Leader lock ({self.backend}) unavailable: {e}")
+            return False
+
+    def _acquire_file(self) -> bool:
+        if fcntl is None:
+            raise RuntimeError("fcntl not available; use SCHEDULER_LOCK=postgres")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        handle = open(self.path, "a+")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(f"{os.getpid()}\n")
+        handle.flush()
+        self._handle = handle
+        return True
+
+    def _acquire_postgres(self) -> bool:
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.pool import NullPool
+
+        engine = create_engine(self.database_url, poolclass=NullPool)
+        conn = engine.connect()
+        if conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar():
+            self._handle = conn
+            return True
+        conn.close()
+        engine.dispose()
+        return False
+
+    def alive(self) -> bool:
+        """True while the held lock is still ours; False (and dropped) once it is lost"""
+        if not self.held:
+            return False
+        if self.backend != "postgres":
+            return True             # flock lives as long as the open handle
+        try:
+            from sqlalchemy import text
+            self._handle.execute(text("SELECT 1")).scalar()
+            return True
+        except Exception as e:
+            logger.error(f"Leader lock connection lost: {e}")
+            handle, self._handle = self._handle, None
+            try:
+                handle.close()
+                handle.engine.dispose()
+            except Exception:
+                pass
+            return False
+
+    def release(self) -> None:
+        handle, self._handle = self._handle, None
+        if handle is None:
+            return
+        try:
+            if self.backend == "postgres":
+                from sqlalchemy import text
+                handle.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+                handle.close()
+                handle.engine.dispose()
+            else:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+                handle.close()
+        except Exception as e:
+            logger.warning(f"Error releasing leader lock: {e}")
+
+    def holder(self) -> Optional[str]:
+        """PID written by the current file-lock holder (informational)"""
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+
+# ────────────────────────────────────────────────────────────────
+#  Runner
+# ────────────────────────────────────────────────────────────────
+def add_monitoring_job(scheduler) -> None:
+    """Discord system monitor every 5 minutes (formerly added by monitor.py)"""
+    from apscheduler.triggers.cron import CronTrigger
+    from monitoring.system_monitor import run_monitoring_checks
+
+    scheduler.add_job(
+        run_monitoring_checks,
+        CronTrigger(minute="*/5"),
+        id="discord_monitor",
+        name="Monitor for critical system issues",
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+    logger.info("Added system monitoring job to scheduler")
+
+
+def run(lock: Optional[LeaderLock] = None, monitoring: Optional[bool] = None,
+        stop: Optional[threading.Event] = None, standby_seconds: Optional[float] = None,
+        check_seconds: Optional[float] = None) -> int:
+    """
+    Wait for leadership, then host the scheduler until *stop* is set.
+    Losing the lock stops the scheduler and returns to standby.
+    Returns 0 on a clean shutdown.
+    """
+    from scheduler import start_scheduler, stop_vision_consumer
+
+    lock = lock or LeaderLock()
+    stop = stop or threading.Event()
+    monitoring = os.environ.get("SCHEDULER_MONITORING", "0") == "1" if monitoring is None else monitoring
+    standby_seconds = (float(os.environ.get("SCHEDULER_STANDBY_SECONDS", 15))
+                       if standby_seconds is None else standby_seconds)
+    check_seconds = (float(os.environ.get("SCHEDULER_LOCK_CHECK_SECONDS", 5))
+                     if check_seconds is None else check_seconds)
+
+    warmed = False
+    while not stop.is_set():
+        announced = False
+        while not lock.acquire():
+            if not announced:
+                holder = lock.holder() if lock.backend == "file" else None
+                logger.info("Another scheduler holds the leader lock%s; standing by",
+                            f" (pid {holder})" if holder else "")
+                announced = True
+            if stop.wait(standby_seconds):
+                return 0
+
+        logger.info("Leader lock acquired (%s, pid %d); starting scheduler", lock.backend, os.getpid())
+        if not warmed:
+            try:
+                from ml.inference_service import inference_service
+                inference_service.warm()        # jobs never pay a model load
+            except Exception as e:
+                logger.error(f"Could not warm the ML model registry: {e}")
+            warmed = True
+
+        sched = None
+        try:
+            sched = start_scheduler()
+            if monitoring:
+                add_monitoring_job(sched)
+            while not stop.wait(check_seconds):
+                if not lock.alive():
+                    logger.error("Leader lock lost; stopping the scheduler and returning to standby")
+                    break
+        finally:
+            if sched is not None and sched.running:
+                sched.shutdown(wait=False)
+            stop_vision_consumer()
+            lock.release()
+            logger.info("Scheduler stopped; leader lock released")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genesis scheduler / background worker")
+    parser.add_argument("--monitoring", action="store_true", default=None,
+                        help="also run the Discord system monitor every 5 minutes")
+    parser.add_argument("--lock", choices=["file", "postgres"], help="leader lock backend")
+    args = parser.parse_args(argv)
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    return run(LeaderLock(backend=args.lock), monitoring=args.monitoring, stop=stop)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Signal-scoring latency metrics
+
+SignalScorer times each layer of every scoring run (exclusive wall time,
+so nested stages are not counted twice) and stores the breakdown on the
+signal as context["scoring"]["timings_ms"]:
+
+    atr          ATR fetch for the stop-loss sanity check
+    candles      technical frame load (OANDA fetch on a cache miss)
+    technical    indicator factor scoring
+    predict      ML probability (predict_one)
+    performance  symbol_performance lookup and adjustment
+    correlation  exposure book / correlation matrix scan
+    total        the whole run
+
+Each run is also recorded here, one row in a small SQLite database so the
+scheduler / Vision worker processes that score signals and the web process
+that serves /api/metrics/scoring share it, as vision_budget does.  stats()
+aggregates a window into per-stage counts, percentiles and cumulative
+latency histograms; prometheus() renders the same as text exposition for
+the dashboards.
+
+    python scoring_metrics.py      # last 24 h as JSON
+
+Environment:
+    SCORING_METRICS_DB              SQLite path (default data/scoring_metrics.sqlite)
+    SCORING_METRICS_RETENTION_DAYS  rows kept (default 7)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from sqlite_store import connect, percentile
+
+logger = logging.getLogger(__name__)
+
+STAGES = ("atr", "candles", "technical", "predict", "performance", "correlation", "total")
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+PRUNE_EVERY = 500           # inserts between retention sweeps
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS scoring_runs (
+    id        INTEGER PRIMARY KEY,
+    ts        REAL    NOT NULL,
+    symbol    TEXT,
+    decision  TEXT,
+    error     INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"{stage}_ms REAL" for stage in STAGES)}
+);
+CREATE INDEX IF NOT EXISTS ix_scoring_runs_ts ON scoring_runs (ts);
+"""
+
+
+def _histogram(values: List[float]) -> Dict[str, int]:
+    """Cumulative counts per upper bound in ms ("+Inf" = all)"""
+    values = sorted(values)
+    counts = {str(bound): bisect_left(values, bound + 1e-9) for bound in BUCKETS_MS}
+    counts["+Inf"] = len(values)
+    return counts
+
+
+class ScoringMetrics:
+    """Records per-stage scoring timings and aggregates them"""
+
+    def __init__(self, db_path: Optional[str] = None, retention_days: Optional[float] = None):
+        self.db_path = db_path or os.environ.get("SCORING_METRICS_DB", os.path.join("data", "scoring_metrics.sqlite"))
+        self.retention_days = (float(os.environ.get("SCORING_METRICS_RETENTION_DAYS", 7))
+                               if retention_days is None else retention_days)
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._inserts = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.db_path, _SCHEMA)
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return self._conn
+
+    def record(self, symbol: Optional[str], decision: Optional[str], timings_ms: Dict[str, float],
+               error: bool = False) -> None:
+        """Store one scoring run; never raises"""
+        columns = ", ".join(f"{stage}_ms" for stage in STAGES)
+        values = [timings_ms.get(stage) for stage in STAGES]
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        f"INSERT INTO scoring_runs (ts, symbol, decision, error, {columns}) "
+                        f"VALUES (?, ?, ?, ?, {', '.join('?' * len(STAGES))})",
+                        (time.time(), symbol, decision, int(error), *values),
+                    )
+                    self._inserts += 1
+                    if self._inserts % PRUNE_EVERY == 0:
+                        db.execute("DELETE FROM scoring_runs WHERE ts < ?",
+                                   (time.time() - self.retention_days * 86400,))
+        except sqlite3.Error as e:
+            logger.error(f"Could not record scoring timings: {e}")
+
+    def stats(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """Counters, percentiles and histograms (ms) of the runs since *since* (default 24 h)"""
+        since = time.time() - 86400 if since is None else since
+        with self._lock:
+            rows = self._db().execute("SELECT * FROM scoring_runs WHERE ts >= ?", (since,)).fetchall()
+
+        decisions: Dict[str, int] = {}
+        for row in rows:
+            decisions[row["decision"] or "none"] = decisions.get(row["decision"] or "none", 0) + 1
+        stages = {}
+        for stage in STAGES:
+            values = [row[f"{stage}_ms"] for row in rows if row[f"{stage}_ms"] is not None]
+            stages[stage] = {
+                "count": len(values),
+                "sum": round(sum(values), 3),
+                "p50": percentile(values, 0.5),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "max": percentile(values, 1.0),
+                "histogram": _histogram(values),
+            }
+        return {
+            "since": since,
+            "runs": len(rows),
+            "errors": sum(row["error"] for row in rows),
+            "decisions": decisions,
+            "stages": stages,
+        }
+
+    def prometheus(self, since: Optional[float] = None) -> str:
+        """
+        stats() in Prometheus text exposition format (seconds).  Values
+        cover the window, not the process lifetime, so they are exposed as
+        gauges (histogram_quantile() still works on the le buckets).
+        """
+        stats = self.stats(since)
+        lines = [
+            "# HELP genesis_scoring_stage_seconds Exclusive wall time per signal-scoring stage over the window",
+            "# TYPE genesis_scoring_stage_seconds gauge",
+        ]
+        for stage, data in stats["stages"].items():
+            for bound, count in data["histogram"].items():
+                le = bound if bound == "+Inf" else repr(int(bound) / 1000)
+                lines.append(f'genesis_scoring_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {count}')
+            lines.append(f'genesis_scoring_stage_seconds_sum{{stage="{stage}"}} {data["sum"] / 1000}')
+            lines.append(f'genesis_scoring_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+        lines += [
+            "# HELP genesis_scoring_decisions Scoring runs per decision",
+            "# TYPE genesis_scoring_decisions gauge",
+        ]
+        for decision, count in sorted(stats["decisions"].items()):
+            lines.append(f'genesis_scoring_decisions{{decision="{decision}"}} {count}')
+        lines += [
+            "# HELP genesis_scoring_errors Scoring runs that fell back after an error",
+            "# TYPE genesis_scoring_errors gauge",
+            f"genesis_scoring_errors {stats['errors']}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+# Global instance used by the signal scorer
+scoring_metrics = ScoringMetrics()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(scoring_metrics.stats(), indent=2))
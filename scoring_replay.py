@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+"""
+Offline replay of SignalScorer decisions
+
+Changes to config/signal_weights.json, the scorer thresholds or the ML blend
+could only be judged live.  This harness re-scores historical signals –
+the Signal rows whose context carries the "scoring" breakdown written by
+vision_worker – against point-in-time candles and reports how the
+decisions, stage latencies and throughput change:
+
+    python scoring_replay.py fetch --since 2025-05-01       # fill the candle cache (OANDA)
+    python scoring_replay.py run --since 2025-05-01 \\
+        --weights /tmp/weights.json --min-technical 0.55    # replay a variant
+    python scoring_replay.py coverage                       # what the cache holds
+
+Replays run offline: candles come from a local SQLite cache, and only bars
+that had closed when the signal was created are used, so the technical
+layer (indicators, factor weights, ML probability) sees what the live
+scorer saw.  The layers that depend on account state at the time are
+taken from the recorded breakdown: the performance adjustment factor and
+the open positions / base correlations of the correlation guard (with the
+current thresholds applied to them).  A signal the live scorer rejected
+before those layers ran has none recorded; it replays with a neutral
+adjustment and no open positions.
+
+Signals are split into per-symbol chunks and scored in parallel worker
+processes; the report gives decision transitions (recorded → replay), the
+changed signals, the P&L of the trades the variant would have skipped,
+per-stage timings and signals per second.
+
+Environment:
+    REPLAY_CANDLES_DB   candle cache SQLite path (default data/replay_candles.sqlite)
+    REPLAY_WORKERS      replay processes (default CPU count, 0 = in-process)
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import TIMEFRAME_SECONDS
+from chart_utils import atr_pips, fetch_candles
+from scoring_metrics import STAGES
+from signal_scoring import SignalScorer, _WeightCache
+from sqlite_store import connect, percentile
+from app import SignalAction, TradeSide
+
+logger = logging.getLogger(__name__)
+
+FRAME_BARS = 100            # candles in a technical frame (as SignalScorer._build_technical_frame)
+ATR_BARS = 15               # candles get_atr() asks for (lookback 14 + 1)
+OANDA_PAGE = 5000           # most candles OANDA returns per request
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS candles (
+    symbol     TEXT NOT NULL,
+    timeframe  TEXT NOT NULL,
+    time       REAL NOT NULL,           -- bar open, epoch seconds UTC
+    open       REAL NOT NULL,
+    high       REAL NOT NULL,
+    low        REAL NOT NULL,
+    close      REAL NOT NULL,
+    PRIMARY KEY (symbol, timeframe, time)
+) WITHOUT ROWID;
+"""
+
+
+def _key(symbol: str) -> str:
+    return (symbol or "").replace("_", "").upper()
+
+
+def _epoch(value) -> float:
+    """Epoch seconds of a datetime / ISO string (naive values are UTC)"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# ────────────────────────────────────────────────────────────────
+#  Point-in-time candle cache
+# ────────────────────────────────────────────────────────────────
+class CandleCache:
+    """Completed candles per symbol / timeframe, queried as of a moment"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get("REPLAY_CANDLES_DB", os.path.join("data", "replay_candles.sqlite"))
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def store(self, symbol: str, timeframe: str, candles: Iterable[Dict]) -> int:
+        rows = [
+            (_key(symbol), timeframe, _epoch(c.get("time", c.get("timestamp"))),
+             float(c["open"]), float(c["high"]), float(c["low"]), float(c["close"]))
+            for c in candles
+        ]
+        with self._lock:
+            db = self._db()
+            with db:
+                db.executemany("INSERT OR REPLACE INTO candles VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def window(self, symbol: str, timeframe: str, as_of: float, count: int) -> List[Dict]:
+        """The last *count* bars that had closed at *as_of*, oldest first"""
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT time, open, high, low, close FROM candles WHERE symbol = ? AND timeframe = ? "
+                "AND time <= ? ORDER BY time DESC LIMIT ?",
+                (_key(symbol), timeframe, as_of - TIMEFRAME_SECONDS[timeframe], count),
+            ).fetchall()
+        candles = []
+        for t, o, h, l, c in reversed(rows):
+            ts = datetime.fromtimestamp(t, tz=timezone.utc)
+            candles.append({"time": ts, "timestamp": ts, "open": o, "high": h, "low": l, "close": c})
+        return candles
+
+    def fetch(self, symbol: str, timeframe: str, start: float, end: float) -> int:
+        """Download completed OANDA candles covering [start, end]; returns candles stored"""
+        stored = 0
+        cursor = start
+        while cursor < end:
+            since = datetime.fromtimestamp(cursor, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            candles = fetch_candles(symbol, timeframe, count=OANDA_PAGE, **{"from": since})
+            if not candles:
+                break
+            stored += self.store(symbol, timeframe, candles)
+            last = _epoch(candles[-1].get("time", candles[-1].get("timestamp")))
+            if last < cursor:
+                break
+            cursor = last + TIMEFRAME_SECONDS[timeframe]
+            if len(candles) < OANDA_PAGE // 2:         # caught up with the present
+                break
+        return stored
+
+    def coverage(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT symbol, timeframe, COUNT(*), MIN(time), MAX(time) FROM candles "
+                "GROUP BY symbol, timeframe ORDER BY symbol, timeframe"
+            ).fetchall()
+        return [
+            {"symbol": s, "timeframe": tf, "candles": n,
+             "first": datetime.fromtimestamp(lo, tz=timezone.utc).isoformat(),
+             "last": datetime.fromtimestamp(hi, tz=timezone.utc).isoformat()}
+            for s, tf, n, lo, hi in rows
+        ]
+
+
+# ────────────────────────────────────────────────────────────────
+#  Historical signals
+# ────────────────────────────────────────────────────────────────
+def load_signals(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                 symbols: Optional[List[str]] = None, limit: Optional[int] = None
+                 ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Scored signals as plain dicts (picklable for the workers), oldest first,
+    plus counts of the rows that can't be replayed.
+    """
+    from app import app, Signal
+
+    skipped = {"unscored": 0, "merged": 0}
+    signals: List[Dict[str, Any]] = []
+    with app.app_context():
+        query = Signal.query
+        if since:
+            query = query.filter(Signal.created_at >= since)
+        if until:
+            query = query.filter(Signal.created_at < until)
+        if symbols:
+            query = query.filter(Signal.symbol.in_(symbols + [s.replace("_", "") for s in symbols]))
+        query = query.order_by(Signal.created_at, Signal.id)
+        if limit:
+            query = query.limit(limit)
+
+        for row in query.all():
+            context = row.context
+            scoring = context.get("scoring") or {}
+            if "decision" not in scoring or row.created_at is None:
+                skipped["unscored"] += 1
+                continue
+            if scoring["decision"] == "merged_into_existing":
+                skipped["merged"] += 1
+                continue
+            signals.append({
+                "id": row.id,
+                "symbol": row.symbol,
+                "action": row.action.name,
+                "entry": row.entry,
+                "sl": row.sl,
+                "tp": row.tp,
+                "confidence": row.confidence,
+                "created_at": _epoch(row.created_at),
+                "context": context,
+            })
+    return signals, skipped
+
+
+def fetch_for(signals: List[Dict[str, Any]], cache: CandleCache) -> Dict[str, int]:
+    """Fill *cache* with every frame / ATR window the *signals* need"""
+    spans: Dict[Tuple[str, str], List[float]] = {}
+    for s in signals:
+        for timeframe, bars in (("H1", FRAME_BARS), (s["context"].get("timeframe", "M15"), ATR_BARS)):
+            if timeframe not in TIMEFRAME_SECONDS:
+                continue
+            start = s["created_at"] - (bars + 2) * TIMEFRAME_SECONDS[timeframe] - 3 * 86400   # weekend gaps
+            span = spans.setdefault((_key(s["symbol"]), timeframe), [start, s["created_at"]])
+            span[0], span[1] = min(span[0], start), max(span[1], s["created_at"])
+
+    fetched = {}
+    for (symbol, timeframe), (start, end) in sorted(spans.items()):
+        fetched[f"{symbol} {timeframe}"] = cache.fetch(symbol, timeframe, start, end)
+        logger.info("Cached %d %s %s candles", fetched[f"{symbol} {timeframe}"], symbol, timeframe)
+    return fetched
+
+
+# ────────────────────────────────────────────────────────────────
+#  Replay scorer
+# ────────────────────────────────────────────────────────────────
+class ReplayScorer(SignalScorer):
+    """
+    SignalScorer whose market data comes from a CandleCache as of the
+    signal's creation and whose account-state layers replay the recorded
+    breakdown.  *variant* overrides the scoring configuration:
+
+        {"weights": "/path/weights.json", "min_confidence": 0.65,
+         "min_technical": 0.55, "max_correlation": 0.8, "ml_blend": 0.3}
+    """
+
+    def __init__(self, candles: CandleCache, variant: Optional[Dict[str, Any]] = None):
+        super().__init__()
+        self.metrics = None                             # replays don't feed the live latency metrics
+        self.candles = candles
+        self.variant = dict(variant or {})
+        if self.variant.get("weights"):
+            self.weights = _WeightCache(self.variant["weights"])
+        for option, attr in (("min_confidence", "min_confidence_threshold"), ("min_technical", "min_technical_score"),
+                             ("max_correlation", "max_correlation_threshold"), ("ml_blend", "ml_blend")):
+            if self.variant.get(option) is not None:
+                setattr(self, attr, float(self.variant[option]))
+        self._as_of = 0.0
+        self._recorded: Dict[str, Any] = {}
+        self._frames: Dict[Tuple[str, str, float], Tuple[Optional[pd.DataFrame], Optional[str]]] = {}
+
+    # ───────────────────────── point-in-time market data ─────────────────────────
+    def merge_or_update(self, signal) -> bool:
+        return True                                     # history is read-only
+
+    def _atr(self, symbol: str, timeframe: str) -> Optional[float]:
+        if timeframe not in TIMEFRAME_SECONDS:
+            return None
+        candles = self.candles.window(symbol, timeframe, self._as_of, ATR_BARS)
+        if len(candles) < ATR_BARS:
+            return None
+        return atr_pips(pd.DataFrame(candles), symbol, ATR_BARS - 1)
+
+    def load_technical_frame(self, symbol: str, timeframe: str = "H1"):
+        candles = self.candles.window(symbol, timeframe, self._as_of, FRAME_BARS)
+        if not candles:
+            return None, "no_candles"
+        key = (_key(symbol), timeframe, candles[-1]["time"].timestamp())
+        if key not in self._frames:
+            if len(self._frames) > 256:
+                self._frames.clear()
+            self._frames[key] = self.frame_from_candles(symbol, candles)
+        return self._frames[key]
+
+    # ───────────────────────── recorded account state ────────────────────────────
+    def evaluate_performance_adjustment(self, symbol, action, performance=None):
+        if "adjustment_factor" in self._recorded:
+            return self._recorded["adjustment_factor"], self._recorded.get("performance_details", {})
+        return 1.0, {"reason": "Not recorded; neutral adjustment"}
+
+    def evaluate_correlation(self, symbol, action, open_trades=None):
+        recorded = self._recorded.get("correlation_details") or {}
+        positions = [
+            SimpleNamespace(symbol=c["symbol"],
+                            side=TradeSide.BUY if c.get("side") == "BUY" else TradeSide.SELL,
+                            lot=abs(c.get("net_lots", 1.0)))
+            for c in recorded.get("correlations", [])
+        ]
+        return super().evaluate_correlation(symbol, action, positions)
+
+    def _correlation_row(self, symbol, others):
+        recorded = {c["symbol"]: c for c in (self._recorded.get("correlation_details") or {}).get("correlations", [])}
+        base = np.array([recorded[o]["base_correlation"] if o in recorded else self._prior_correlation(symbol, o)
+                         for o in others], dtype=float)
+        measured = np.array([recorded.get(o, {}).get("source") == "rolling" for o in others], dtype=bool)
+        return base, measured
+
+    # ──────────────────────────────── replay ─────────────────────────────────────
+    def replay(self, signal: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-score one load_signals() dict; returns recorded vs replayed decision and timings"""
+        self._as_of = signal["created_at"]
+        self._recorded = signal["context"].get("scoring") or {}
+        candidate = SimpleNamespace(
+            id=signal["id"], symbol=signal["symbol"], action=SignalAction[signal["action"]],
+            entry=signal["entry"], sl=signal["sl"], tp=signal["tp"], confidence=signal["confidence"],
+            context=signal["context"],
+        )
+        _, details = self._score_signal(candidate, {"atr": {}, "frames": {}, "performance": None})
+
+        return {
+            "signal_id": signal["id"],
+            "symbol": signal["symbol"],
+            "action": signal["action"],
+            "created_at": datetime.fromtimestamp(signal["created_at"], tz=timezone.utc).isoformat(),
+            "recorded": self._recorded.get("decision"),
+            "recorded_reason": self._recorded.get("reason"),
+            "recorded_technical_score": self._recorded.get("technical_score"),
+            "decision": details.get("decision"),
+            "reason": details.get("reason"),
+            "technical_score": details.get("technical_score"),
+            "timings_ms": details["timings_ms"],
+        }
+
+
+# ────────────────────────────────────────────────────────────────
+#  Parallel replay
+# ────────────────────────────────────────────────────────────────
+_worker_scorer: Optional[ReplayScorer] = None
+
+
+def _init_worker(candles_path: str, variant: Dict[str, Any]) -> None:
+    global _worker_scorer
+    logging.getLogger("signal_scoring").setLevel(logging.WARNING)     # per-signal INFO lines
+    _worker_scorer = ReplayScorer(CandleCache(candles_path), variant)
+
+
+def _replay_chunk(signals: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [_worker_scorer.replay(s) for s in signals]
+
+
+def _chunks(signals: List[Dict[str, Any]], parts: int) -> List[List[Dict[str, Any]]]:
+    """Contiguous chunks of the signals sorted by symbol and time (frame reuse per worker)"""
+    ordered = sorted(signals, key=lambda s: (_key(s["symbol"]), s["created_at"], s["id"]))
+    size = max(1, math.ceil(len(ordered) / max(1, parts)))
+    return [ordered[i:i + size] for i in range(0, len(ordered), size)]
+
+
+def run_replay(signals: List[Dict[str, Any]], variant: Optional[Dict[str, Any]] = None,
+               workers: Optional[int] = None, candles: Optional[CandleCache] = None) -> Dict[str, Any]:
+    """Replay *signals* under *variant*; returns the report (see summarize())"""
+    variant = dict(variant or {})
+    candles = candles or CandleCache()
+    workers = int(os.environ.get("REPLAY_WORKERS", os.cpu_count() or 1)) if workers is None else workers
+
+    start = time.perf_counter()
+    if workers <= 0 or len(signals) < 2:
+        scorer = ReplayScorer(candles, variant)
+        results = [scorer.replay(s) for s in signals]
+    else:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        ctx = multiprocessing.get_context(method)
+        if method == "forkserver":
+            ctx.set_forkserver_preload(["signal_scoring"])
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(candles.db_path, variant)) as pool:
+            results = [r for chunk in pool.map(_replay_chunk, _chunks(signals, workers * 4)) for r in chunk]
+    results.sort(key=lambda r: (r["created_at"], r["signal_id"]))
+    wall = time.perf_counter() - start
+    return summarize(results, wall, workers, variant)
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float, workers: int,
+              variant: Dict[str, Any]) -> Dict[str, Any]:
+    transitions: Dict[str, int] = defaultdict(int)
+    recorded: Dict[str, int] = defaultdict(int)
+    replayed: Dict[str, int] = defaultdict(int)
+    stage_values: Dict[str, List[float]] = defaultdict(list)
+    score_deltas: List[float] = []
+    for r in results:
+        transitions[f"{r['recorded']}->{r['decision']}"] += 1
+        recorded[r["recorded"]] += 1
+        replayed[r["decision"]] += 1
+        for stage, ms in r["timings_ms"].items():
+            stage_values[stage].append(ms)
+        if r["technical_score"] is not None and r["recorded_technical_score"] is not None:
+            score_deltas.append(r["technical_score"] - r["recorded_technical_score"])
+
+    scoring_seconds = sum(stage_values["total"]) / 1000
+    return {
+        "variant": variant,
+        "signals": len(results),
+        "workers": workers,
+        "wall_seconds": round(wall_seconds, 3),
+        "signals_per_second": round(len(results) / wall_seconds, 1) if wall_seconds else None,
+        "signals_per_second_per_worker": round(len(results) / scoring_seconds, 1) if scoring_seconds else None,
+        "decisions": {"recorded": dict(recorded), "replay": dict(replayed)},
+        "transitions": dict(sorted(transitions.items())),
+        "changed": [r for r in results if r["decision"] != r["recorded"]],
+        "technical_score_delta_mean": round(float(np.mean(score_deltas)), 4) if score_deltas else None,
+        "stage_timings_ms": {
+            stage: {
+                "count": len(stage_values[stage]),
+                "total": round(sum(stage_values[stage]), 3),
+                "p50": percentile(stage_values[stage], 0.5),
+                "p95": percentile(stage_values[stage], 0.95),
+                "max": percentile(stage_values[stage], 1.0),
+            }
+            for stage in STAGES if stage_values[stage]
+        },
+        "results": results,
+    }
+
+
+def outcome_impact(report: Dict[str, Any]) -> Dict[str, Any]:
+    """P&L of the trades behind signals whose decision the variant changes"""
+    from app import app, Trade, TradeStatus
+
+    changed = {r["signal_id"]: r for r in report["changed"]}
+    impact = {"skipped_trades": 0, "skipped_pnl": 0.0, "new_executions": 0}
+    if not changed:
+        return impact
+    with app.app_context():
+        trades = Trade.query.filter(Trade.signal_id.in_(list(changed)), Trade.status == TradeStatus.CLOSED).all()
+    for trade in trades:
+        if changed[trade.signal_id]["decision"] != "execute":
+            impact["skipped_trades"] += 1
+            impact["skipped_pnl"] += float(trade.pnl or 0.0)
+    impact["skipped_pnl"] = round(impact["skipped_pnl"], 2)
+    impact["new_executions"] = sum(1 for r in changed.values() if r["decision"] == "execute")
+    return impact
+
+
+# ────────────────────────────────────────────────────────────────
+#  CLI
+# ────────────────────────────────────────────────────────────────
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Replay SignalScorer decisions offline")
+    parser.add_argument("command", choices=["fetch", "run", "coverage"])
+    parser.add_argument("--since", help="first signal date (YYYY-MM-DD, default 30 days ago)")
+    parser.add_argument("--until", help="last signal date, exclusive (YYYY-MM-DD)")
+    parser.add_argument("--symbols", help="comma-separated symbols (default all)")
+    parser.add_argument("--limit", type=int, help="replay at most this many signals")
+    parser.add_argument("--workers", type=int, help="replay processes (0 = in-process)")
+    parser.add_argument("--weights", help="factor weights JSON (signal_weights.json format)")
+    parser.add_argument("--min-confidence", type=float, help="base minimum confidence threshold")
+    parser.add_argument("--min-technical", type=float, help="minimum technical score")
+    parser.add_argument("--max-correlation", type=float, help="maximum correlation with open positions")
+    parser.add_argument("--ml-blend", type=float, help="share of the ML probability in the technical score")
+    parser.add_argument("--show", type=int, default=50, help="changed signals listed in the report")
+    args = parser.parse_args(argv)
+
+    cache = CandleCache()
+    if args.command == "coverage":
+        print(json.dumps(cache.coverage(), indent=2))
+        return 0
+
+    since = datetime.fromisoformat(args.since) if args.since else datetime.utcnow() - timedelta(days=30)
+    until = datetime.fromisoformat(args.until) if args.until else None
+    symbols = [s.strip() for s in args.symbols.split(",")] if args.symbols else None
+    signals, skipped = load_signals(since, until, symbols, args.limit)
+
+    if args.command == "fetch":
+        print(json.dumps({"signals": len(signals), "candles": fetch_for(signals, cache)}, indent=2))
+        return 0
+
+    logging.getLogger("signal_scoring").setLevel(logging.WARNING)
+    variant = {
+        "weights": args.weights, "min_confidence": args.min_confidence, "min_technical": args.min_technical,
+        "max_correlation": args.max_correlation, "ml_blend": args.ml_blend,
+    }
+    report = run_replay(signals, {k: v for k, v in variant.items() if v is not None}, args.workers, cache)
+    report["skipped"] = skipped
+    report["outcomes"] = outcome_impact(report)
+    report["changed"] = report["changed"][:args.show]
+    del report["results"]
+    print(json.dumps(report, indent=2, default=str))
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Pluggable signal analyzers
+
+DirectVisionPipeline turns charts into trade ideas through an analyzer:
+
+    analyzer.analyze_charts("EUR_USD", {"M15": path, "H1": path})
+        → {"M15": {"action", "entry", "sl", "tp", "confidence", ...}, "H1": {}}
+
+An empty dict means "no trade idea" for that timeframe.  Two analyzers ship:
+
+    vision   OpenAI Vision on the chart images (registered by vision_worker)
+    rules    RuleBasedAnalyzer – deterministic EMA-stack / MACD / RSI / ATR
+             rules on the indicator frame signal_scorer already builds for
+             scoring, loaded for each chart's own timeframe.  Pure CPU, a
+             few milliseconds per chart; the frame comes from the
+             scorer's TTL cache, so the gate, scoring and the rules share
+             one OANDA fetch per symbol / timeframe.
+
+An analyzer that cannot produce an answer (transport error, bad
+credentials …) raises instead of returning {}, so the capture job is
+retried rather than acknowledged as "no trade idea".
+
+SIGNAL_ANALYZER picks the analyzer whose results are stored as Signals.
+Every analyzer listed in SIGNAL_SHADOW_ANALYZERS runs on the same charts
+in shadow mode: its result and latency are logged next to the primary's
+in a small SQLite table, never stored as a Signal.
+
+    python signal_analyzers.py          # shadow comparison summary
+
+Environment:
+    SIGNAL_ANALYZER             primary analyzer (default vision)
+    SIGNAL_SHADOW_ANALYZERS     comma-separated shadow analyzers (default none, e.g. "rules")
+    ANALYZER_SHADOW_DB          SQLite path (default data/analyzer_shadow.sqlite)
+    RULES_SL_ATR / RULES_RR     stop distance in ATRs / reward:risk (default 1.5 / 2.0)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+_LONG_ACTIONS = {"BUY_NOW", "ANTICIPATED_LONG"}
+_SHORT_ACTIONS = {"SELL_NOW", "ANTICIPATED_SHORT"}
+
+
+class SignalAnalyzer:
+    """Base class: turn one symbol's charts into {timeframe: signal dict}"""
+
+    name = "base"
+    source = "base"             # recorded as context["source"] on stored Signals
+
+    def analyze_charts(self, symbol: str, charts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        raise NotImplementedError
+
+
+# ──────────────────────────────────────────────────────────────
+#  Deterministic rule-based analyzer
+# ──────────────────────────────────────────────────────────────
+def _price_decimals(symbol: str) -> int:
+    symbol = symbol.replace("_", "").upper()
+    if symbol.startswith(("XAU", "XAG")):
+        return 2
+    return 3 if "JPY" in symbol else 5
+
+
+class RuleBasedAnalyzer(SignalAnalyzer):
+    """
+    Trend-following rules on the scoring indicator frame.
+
+    A side qualifies when the EMA stack (close / EMA20 / EMA50), MACD
+    momentum and RSI all agree.  Entry is at market when price is within
+    half an ATR of EMA20, otherwise an anticipated pull-back to EMA20.
+    SL = RULES_SL_ATR × ATR(14) beyond the entry, TP = RULES_RR × risk.
+    Confidence grows with the number of confirmations (full EMA200 stack,
+    fresh MACD cross, RSI in its sweet spot, rising histogram).
+    """
+
+    name = "rules"
+    source = "rule_based"
+
+    def __init__(self, frame_loader: Optional[Callable[[str, str], Tuple[Optional[pd.DataFrame], Any]]] = None,
+                 sl_atr: Optional[float] = None, reward_risk: Optional[float] = None):
+        self.frame_loader = frame_loader
+        self.sl_atr = float(os.environ.get("RULES_SL_ATR", 1.5)) if sl_atr is None else sl_atr
+        self.reward_risk = float(os.environ.get("RULES_RR", 2.0)) if reward_risk is None else reward_risk
+
+    def _load(self, symbol: str, timeframe: str) -> Optional[pd.DataFrame]:
+        loader = self.frame_loader
+        if loader is None:
+            from signal_scoring import signal_scorer
+            loader = signal_scorer.load_technical_frame
+        df, error = loader(symbol, timeframe)
+        if df is None:
+            # no candles is a failure, not "no setup" – the job is retried
+            raise RuntimeError(f"no indicator frame for {symbol} {timeframe}: {error}")
+        return df
+
+    def analyze_charts(self, symbol: str, charts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        return {timeframe: self.analyze_frame(symbol, self._load(symbol, timeframe)) for timeframe in charts}
+
+    @staticmethod
+    def _atr(df: pd.DataFrame, length: int = 14) -> float:
+        high, low, close = (df[c].to_numpy(dtype=float) for c in ("high", "low", "close"))
+        prev_close = np.roll(close, 1)
+        tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))[1:]
+        return float(tr[-length:].mean()) if len(tr) else 0.0
+
+    def analyze_frame(self, symbol: str, df: pd.DataFrame) -> Dict[str, Any]:
+        """Signal dict for the newest bar of *df* (columns as load_technical_frame), {} if no setup"""
+        if len(df) < 3:
+            return {}
+        latest, prev = df.iloc[-1], df.iloc[-2]
+        close, ema20, ema50, ema200 = (float(latest[c]) for c in ("close", "ema20", "ema50", "ema200"))
+        macd, signal, hist, rsi = (float(latest[c]) for c in ("macd", "signal", "histogram", "rsi"))
+        atr = self._atr(df)
+        if atr <= 0:
+            return {}
+
+        if close > ema20 > ema50 and macd > signal and 40 <= rsi <= 70:
+            side = 1
+            confirmations = [
+                ("ema200_stack", ema50 > ema200),
+                ("macd_cross", float(prev["macd"]) <= float(prev["signal"])),
+                ("rsi_sweet_spot", 45 <= rsi <= 65),
+                ("histogram_rising", hist > float(prev["histogram"])),
+            ]
+        elif close < ema20 < ema50 and macd < signal and 30 <= rsi <= 60:
+            side = -1
+            confirmations = [
+                ("ema200_stack", ema50 < ema200),
+                ("macd_cross", float(prev["macd"]) >= float(prev["signal"])),
+                ("rsi_sweet_spot", 35 <= rsi <= 55),
+                ("histogram_falling", hist < float(prev["histogram"])),
+            ]
+        else:
+            return {}
+
+        at_market = abs(close - ema20) <= 0.5 * atr
+        entry = close if at_market else ema20
+        risk = self.sl_atr * atr
+        decimals = _price_decimals(symbol)
+        if side > 0:
+            action = "BUY_NOW" if at_market else "ANTICIPATED_LONG"
+            sl, tp = entry - risk, entry + self.reward_risk * risk
+        else:
+            action = "SELL_NOW" if at_market else "ANTICIPATED_SHORT"
+            sl, tp = entry + risk, entry - self.reward_risk * risk
+
+        met = [name for name, ok in confirmations if ok]
+        return {
+            "action": action,
+            "entry": round(entry, decimals),
+            "sl": round(sl, decimals),
+            "tp": round(tp, decimals),
+            "confidence": round(0.55 + 0.08 * len(met), 2),
+            "source": self.source,
+            "reasons": met,
+        }
+
+
+# ──────────────────────────────────────────────────────────────
+#  Registry
+# ──────────────────────────────────────────────────────────────
+_REGISTRY: Dict[str, Callable[[], SignalAnalyzer]] = {"rules": RuleBasedAnalyzer}
+_INSTANCES: Dict[str, SignalAnalyzer] = {}
+_registry_lock = threading.Lock()
+
+
+def register_analyzer(name: str, factory: Callable[[], SignalAnalyzer]) -> None:
+    """Make an analyzer available under *name* (replaces an earlier registration)"""
+    with _registry_lock:
+        _REGISTRY[name] = factory
+        _INSTANCES.pop(name, None)
+
+
+def get_analyzer(name: str) -> SignalAnalyzer:
+    """The shared instance of analyzer *name*; KeyError when unknown"""
+    with _registry_lock:
+        if name not in _INSTANCES:
+            _INSTANCES[name] = _REGISTRY[name]()
+        return _INSTANCES[name]
+
+
+def primary_analyzer_name() -> str:
+    return os.environ.get("SIGNAL_ANALYZER", "vision")
+
+
+def shadow_analyzer_names() -> List[str]:
+    names = os.environ.get("SIGNAL_SHADOW_ANALYZERS", "")
+    return [n.strip() for n in names.split(",") if n.strip() and n.strip() != primary_analyzer_name()]
+
+
+# ──────────────────────────────────────────────────────────────
+#  Shadow comparison log
+# ──────────────────────────────────────────────────────────────
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shadow_runs (
+    id                INTEGER PRIMARY KEY,
+    ts                REAL    NOT NULL,
+    symbol            TEXT    NOT NULL,
+    timeframe         TEXT    NOT NULL,
+    primary_name      TEXT    NOT NULL,
+    primary_seconds   REAL    NOT NULL,
+    primary_result    TEXT    NOT NULL,
+    shadow_name       TEXT    NOT NULL,
+    shadow_seconds    REAL    NOT NULL,
+    shadow_result     TEXT    NOT NULL,
+    agreement         TEXT    NOT NULL      -- same_side | opposite | primary_only | shadow_only | both_none
+);
+CREATE INDEX IF NOT EXISTS ix_shadow_runs_ts ON shadow_runs (ts);
+"""
+
+
+def _side(result: Dict[str, Any]) -> int:
+    action = str((result or {}).get("action") or "").upper()
+    return 1 if action in _LONG_ACTIONS else -1 if action in _SHORT_ACTIONS else 0
+
+
+def compare_results(primary: Dict[str, Any], shadow: Dict[str, Any]) -> str:
+    p, s = _side(primary), _side(shadow)
+    if p and s:
+        return "same_side" if p == s else "opposite"
+    if p:
+        return "primary_only"
+    return "shadow_only" if s else "both_none"
+
+
+class ShadowLog:
+    """Stores primary vs shadow analyzer results and latencies"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.environ.get("ANALYZER_SHADOW_DB", os.path.join("data", "analyzer_shadow.sqlite"))
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    def record(self, symbol: str, timeframe: str, primary_name: str, primary_seconds: float,
+               primary_result: Dict[str, Any], shadow_name: str, shadow_seconds: float,
+               shadow_result: Dict[str, Any]) -> str:
+        agreement = compare_results(primary_result, shadow_result)
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        "INSERT INTO shadow_runs (ts, symbol, timeframe, primary_name, primary_seconds, "
+                        "primary_result, shadow_name, shadow_seconds, shadow_result, agreement) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (time.time(), symbol, timeframe, primary_name, primary_seconds,
+                         json.dumps(primary_result, default=str), shadow_name, shadow_seconds,
+                         json.dumps(shadow_result, default=str), agreement),
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Could not record shadow run for {symbol} {timeframe}: {e}")
+        return agreement
+
+    def stats(self, since: Optional[float] = None) -> Dict[str, Any]:
+        """Per shadow analyzer: runs, agreement counts and mean latency of both sides"""
+        since = 0.0 if since is None else since
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT shadow_name, primary_name, agreement, COUNT(*) AS n, "
+                "AVG(primary_seconds) AS primary_avg, AVG(shadow_seconds) AS shadow_avg "
+                "FROM shadow_runs WHERE ts >= ? GROUP BY shadow_name, primary_name, agreement",
+                (since,),
+            ).fetchall()
+        out: Dict[str, Any] = {}
+        for row in rows:
+            entry = out.setdefault(row["shadow_name"], {
+                "primary": row["primary_name"], "runs": 0, "agreement": {},
+                "primary_avg_seconds": 0.0, "shadow_avg_seconds": 0.0,
+            })
+            n = row["n"]
+            total = entry["runs"] + n
+            for key, avg in (("primary_avg_seconds", row["primary_avg"]), ("shadow_avg_seconds", row["shadow_avg"])):
+                entry[key] = round((entry[key] * entry["runs"] + avg * n) / total, 4)
+            entry["runs"] = total
+            entry["agreement"][row["agreement"]] = n
+        for entry in out.values():
+            both = entry["agreement"].get("same_side", 0) + entry["agreement"].get("opposite", 0)
+            entry["side_agreement_rate"] = round(entry["agreement"].get("same_side", 0) / both, 3) if both else None
+        return out
+
+
+# Global instance used by vision_worker
+shadow_log = ShadowLog()
+
+
+def run_analyzers(symbol: str, charts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyse *charts* with the primary analyzer and return its results.
+
+    Each shadow analyzer then runs on the same charts; its results are only
+    compared and logged.  Shadow failures never affect the primary result.
+    """
+    primary_name = primary_analyzer_name()
+    start = time.monotonic()
+    results = get_analyzer(primary_name).analyze_charts(symbol, charts)
+    primary_seconds = (time.monotonic() - start) / max(1, len(charts))
+    run_shadows(symbol, charts, primary_name, primary_seconds, results)
+    return results
+
+
+def run_shadows(symbol: str, charts: Dict[str, str], primary_name: str, primary_seconds: float,
+                results: Dict[str, Dict[str, Any]]) -> None:
+    """Run the shadow analyzers on *charts* and log them against the primary's *results*
+
+    For callers that obtained the primary results themselves (e.g. the
+    concurrent Vision sweep); *primary_seconds* is the latency per chart.
+    """
+    for shadow_name in shadow_analyzer_names():
+        try:
+            start = time.monotonic()
+            shadow = get_analyzer(shadow_name).analyze_charts(symbol, charts)
+            shadow_seconds = (time.monotonic() - start) / max(1, len(charts))
+            for timeframe in charts:
+                agreement = shadow_log.record(
+                    symbol, timeframe, primary_name, primary_seconds, results.get(timeframe) or {},
+                    shadow_name, shadow_seconds, shadow.get(timeframe) or {},
+                )
+                logger.info(
+                    "Shadow %s vs %s for %s %s: %s (%.1f ms vs %.1f ms)",
+                    shadow_name, primary_name, symbol, timeframe, agreement,
+                    shadow_seconds * 1000, primary_seconds * 1000,
+                )
+        except Exception as e:
+            logger.warning(f"Shadow analyzer {shadow_name} failed for {symbol}: {e}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(shadow_log.stats(), indent=2))
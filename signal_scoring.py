@@ -15,6 +15,8 @@ import os
 import json
 import time
 import logging
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple, Union
@@ -34,6 +36,9 @@ from app import (
     Log, LogLevel,
 )
 from chart_utils import fetch_candles, get_atr, price_to_pip_factor
+from correlation_service import correlation_service
+from exposure_book import exposure_book
+from scoring_metrics import scoring_metrics
 
 # --------------------------------------------------------------------------
 #  Configuration
@@ -48,15 +53,17 @@ logger = logging.getLogger(__name__)
 
 
 class _WeightCache:
-    def __init__(self):
+    def __init__(self, path: Path = CONFIG_PATH):
+        self.path     = Path(path)
         self._mtime   = 0
         self._weights = {}
+        self._default = 1.0
 
     def get(self) -> Dict[str, float]:
         try:
-            stat = CONFIG_PATH.stat()
+            stat = self.path.stat()
             if stat.st_mtime > self._mtime:
-                with open(CONFIG_PATH, "r") as f:
+                with open(self.path, "r") as f:
                     data = json.load(f)
                 self._weights = data.get("factors", {})
                 self._default = data.get("default_weight", 1.0)
@@ -72,6 +79,38 @@ class _WeightCache:
 
 weight_cache = _WeightCache()
 
+
+class _StageTimer:
+    """Exclusive wall time per stage of the scoring run on the current thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def begin(self) -> Dict[str, float]:
+        self._local.timings = {}
+        self._local.stack = []
+        return self._local.timings
+
+    def end(self) -> None:
+        self._local.timings = None
+
+    @contextmanager
+    def stage(self, name: str):
+        timings = getattr(self._local, "timings", None)
+        if timings is None:                          # not inside a scoring run (e.g. the gate)
+            yield
+            return
+        frame = [time.perf_counter(), 0.0]           # start, time spent in nested stages
+        self._local.stack.append(frame)
+        try:
+            yield
+        finally:
+            self._local.stack.pop()
+            elapsed = time.perf_counter() - frame[0]
+            timings[name] = timings.get(name, 0.0) + elapsed - frame[1]
+            if self._local.stack:
+                self._local.stack[-1][1] += elapsed
+
 class SignalScorer:
     """Signal scoring system to filter trading signals through multiple layers of validation"""
 
@@ -81,8 +120,13 @@ class SignalScorer:
         self.min_technical_score = 0.60      # Minimum technical score required
         self.max_correlation_threshold = 0.75 # Maximum correlation allowed between pairs
         self.evaluation_period_days = 90     # Days of history to analyze for performance adjustment (extended from 14)
+        self.ml_blend = 0.3                  # Share of the scaled ML probability in the technical score
+        self.weights = weight_cache          # Factor weights (config/signal_weights.json)
+        self.metrics = scoring_metrics       # Per-stage timings of every run (None = don't record)
+        self._timer = _StageTimer()
         
-        # Currency correlations - initial estimates, will be dynamically updated
+        # Currency correlations - priors used until the rolling matrix
+        # (correlation_service.py) has measured a pair
         self.pair_correlations = {
             'EURUSD': {
                 'GBPUSD': 0.85,  # EUR and GBP often move together against USD
@@ -123,6 +167,10 @@ class SignalScorer:
             #}
         }
 
+        # Indicator frames shared by the gate, the local analyzers and scoring
+        self.frame_ttl = float(os.environ.get("TECHNICAL_FRAME_TTL", 60))
+        self._frame_cache: Dict[Tuple[str, str], Tuple[float, pd.DataFrame]] = {}
+
         # Trade side mapping
         self.action_to_side = {
             SignalAction.BUY_NOW: TradeSide.BUY,
@@ -237,192 +285,266 @@ class SignalScorer:
         self,
         symbol: str,
         action: SignalAction,
-        entry_price: float | None
+        entry_price: float | None,
+        frame: Optional[Tuple[Optional[pd.DataFrame], Optional[str]]] = None
     ) -> Tuple[float, Dict]:
 
         """
         Evaluate technical conditions for a symbol / action.
 
+        *frame* is a preloaded load_technical_frame() result (score_batch).
+
         Returns:
             (technical_score, details_dict)
         """
         try:
-            # ── 1. Symbol format for OANDA ──────────────────────────────────
-            oanda_symbol = symbol
-            if '_' not in symbol:
-                oanda_symbol = re.sub(r'([A-Z]{3})([A-Z]{3})', r'\1_\2', symbol)
-
-            # ── 2. Fetch last 100 H1 candles ────────────────────────────────
-            candles = fetch_candles(oanda_symbol, timeframe="H1", count=100)
-            if not candles:
-                logger.warning(f"No candle data for {symbol}")
-                return 0.5, {"error": "no_candles"}
-
-            df = pd.DataFrame(
-                {
-                    "time":      c.get("time", c["timestamp"]),   # ← safe access
-                    "open":      c["open"],
-                    "high":      c["high"],
-                    "low":       c["low"],
-                    "close":     c["close"],
-                }
-                for c in candles
-            )
+            if frame is None:
+                with self._timer.stage("candles"):
+                    frame = self.load_technical_frame(symbol)
+            df, error = frame
+            if df is None:
+                return 0.5, {"error": error}
+            return self._score_technical_frame(df, symbol, action, entry_price)
+
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error("Technical eval error: %s", exc, exc_info=True)
+            return 0.5, {"error": str(exc)}
 
+    def load_technical_frame(self, symbol: str, timeframe: str = "H1") -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """
+        Last 100 *timeframe* candles with the scoring indicators, or (None, error_tag).
 
-            if df.empty:
-                logger.warning(f"Empty DataFrame for {symbol}")
-                return 0.5, {"error": "empty_df"}
-
-            df["time"] = pd.to_datetime(df["time"])
-            df.set_index("time", inplace=True)
-
-            # ── 3. Indicators ───────────────────────────────────────────────
-            df["rsi"]       = self._calculate_rsi(df["close"])
-            df["macd"], df["signal"], df["histogram"] = self._calculate_macd(df["close"])
-            df["ema20"]     = self._calculate_ema(df["close"], 20)
-            df["ema50"]     = self._calculate_ema(df["close"], 50)
-            df["ema200"]    = self._calculate_ema(df["close"], 200)
-
-            latest = df.iloc[-1]
-            prev   = df.iloc[-2] if len(df) > 1 else latest
-
-            # ── 4. Build factor-level scores (unchanged logic) ─────────────
-            scores: dict[str, float] = {}
-            details: dict[str, float | str | dict] = {
-                "current_price": float(latest["close"]),
-                "rsi":           float(latest["rsi"]),
-                "macd":          float(latest["macd"]),
-                "signal":        float(latest["signal"]),
-                "ema20":         float(latest["ema20"]),
-                "ema50":         float(latest["ema50"]),
-                "ema200":        float(latest["ema200"]),
+        Frames are cached for TECHNICAL_FRAME_TTL seconds, so the pre-Vision
+        gate, the local analyzers and should_execute_signal share one OANDA
+        fetch per symbol / timeframe.  Treat the returned frame as read-only.
+        """
+        key = (symbol.replace("_", "").upper(), timeframe)
+        cached = self._frame_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.frame_ttl:
+            return cached[1], None
+
+        df, error = self._build_technical_frame(symbol, timeframe)
+        if df is not None:
+            self._frame_cache[key] = (time.monotonic(), df)
+        return df, error
+
+    def _build_technical_frame(self, symbol: str, timeframe: str) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        # ── 1. Symbol format for OANDA ──────────────────────────────────
+        oanda_symbol = symbol
+        if '_' not in symbol:
+            oanda_symbol = re.sub(r'([A-Z]{3})([A-Z]{3})', r'\1_\2', symbol)
+
+        # ── 2. Fetch last 100 candles ───────────────────────────────────
+        candles = fetch_candles(oanda_symbol, timeframe=timeframe, count=100)
+        if not candles:
+            logger.warning(f"No candle data for {symbol}")
+            return None, "no_candles"
+        return self.frame_from_candles(symbol, candles)
+
+    def frame_from_candles(self, symbol: str, candles: List[Dict]) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """Indicator frame of *candles* (oldest first), or (None, error_tag)"""
+        df = pd.DataFrame(
+            {
+                "time":      c.get("time", c["timestamp"]),   # ← safe access
+                "open":      c["open"],
+                "high":      c["high"],
+                "low":       c["low"],
+                "close":     c["close"],
             }
+            for c in candles
+        )
+
+
+        if df.empty:
+            logger.warning(f"Empty DataFrame for {symbol}")
+            return None, "empty_df"
+
+        df["time"] = pd.to_datetime(df["time"])
+        df.set_index("time", inplace=True)
 
-            # 4-A. RSI
-            if action in (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG):
-                if latest["rsi"] < 30:
-                    scores["rsi"] = 1.0;  details["rsi_evaluation"] = "oversold"
-                elif 30 <= latest["rsi"] < 50:
-                    scores["rsi"] = 0.8;  details["rsi_evaluation"] = "rising_from_oversold"
-                elif 50 <= latest["rsi"] < 70:
-                    scores["rsi"] = 0.6;  details["rsi_evaluation"] = "neutral_to_bullish"
-                else:
-                    scores["rsi"] = 0.3;  details["rsi_evaluation"] = "overbought"
+        # ── 3. Indicators ───────────────────────────────────────────────
+        df["rsi"]       = self._calculate_rsi(df["close"])
+        df["macd"], df["signal"], df["histogram"] = self._calculate_macd(df["close"])
+        df["ema20"]     = self._calculate_ema(df["close"], 20)
+        df["ema50"]     = self._calculate_ema(df["close"], 50)
+        df["ema200"]    = self._calculate_ema(df["close"], 200)
+
+        return df, None
+
+    def _score_technical_frame(
+        self,
+        df: pd.DataFrame,
+        symbol: str,
+        action: SignalAction,
+        entry_price: float | None
+    ) -> Tuple[float, Dict]:
+        """Factor scores + weighted technical score for the newest row of *df*"""
+        latest = df.iloc[-1]
+        prev   = df.iloc[-2] if len(df) > 1 else latest
+
+        # ── 4. Build factor-level scores (unchanged logic) ─────────────
+        scores: dict[str, float] = {}
+        details: dict[str, float | str | dict] = {
+            "current_price": float(latest["close"]),
+            "rsi":           float(latest["rsi"]),
+            "macd":          float(latest["macd"]),
+            "signal":        float(latest["signal"]),
+            "ema20":         float(latest["ema20"]),
+            "ema50":         float(latest["ema50"]),
+            "ema200":        float(latest["ema200"]),
+        }
+
+        # 4-A. RSI
+        if action in (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG):
+            if latest["rsi"] < 30:
+                scores["rsi"] = 1.0;  details["rsi_evaluation"] = "oversold"
+            elif 30 <= latest["rsi"] < 50:
+                scores["rsi"] = 0.8;  details["rsi_evaluation"] = "rising_from_oversold"
+            elif 50 <= latest["rsi"] < 70:
+                scores["rsi"] = 0.6;  details["rsi_evaluation"] = "neutral_to_bullish"
             else:
-                if latest["rsi"] > 70:
-                    scores["rsi"] = 1.0;  details["rsi_evaluation"] = "overbought"
-                elif 50 < latest["rsi"] <= 70:
-                    scores["rsi"] = 0.8;  details["rsi_evaluation"] = "falling_from_overbought"
-                elif 30 < latest["rsi"] <= 50:
-                    scores["rsi"] = 0.6;  details["rsi_evaluation"] = "neutral_to_bearish"
-                else:
-                    scores["rsi"] = 0.3;  details["rsi_evaluation"] = "oversold"
-
-            # 4-B. MACD
-            macd_cross = prev["macd"] < prev["signal"] < latest["macd"] > latest["signal"]
-            macd_under = prev["macd"] > prev["signal"] > latest["macd"] < latest["signal"]
-
-            if action in (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG):
-                if macd_cross:
-                    scores["macd"] = 1.0; details["macd_evaluation"] = "bullish_crossover"
-                elif latest["macd"] > latest["signal"]:
-                    scores["macd"] = 0.8; details["macd_evaluation"] = "bullish_momentum"
-                elif latest["macd"] < 0 and latest["histogram"] > prev["histogram"]:
-                    scores["macd"] = 0.6; details["macd_evaluation"] = "improving_below_zero"
-                else:
-                    scores["macd"] = 0.4; details["macd_evaluation"] = "bearish_momentum"
+                scores["rsi"] = 0.3;  details["rsi_evaluation"] = "overbought"
+        else:
+            if latest["rsi"] > 70:
+                scores["rsi"] = 1.0;  details["rsi_evaluation"] = "overbought"
+            elif 50 < latest["rsi"] <= 70:
+                scores["rsi"] = 0.8;  details["rsi_evaluation"] = "falling_from_overbought"
+            elif 30 < latest["rsi"] <= 50:
+                scores["rsi"] = 0.6;  details["rsi_evaluation"] = "neutral_to_bearish"
             else:
-                if macd_under:
-                    scores["macd"] = 1.0; details["macd_evaluation"] = "bearish_crossover"
-                elif latest["macd"] < latest["signal"]:
-                    scores["macd"] = 0.8; details["macd_evaluation"] = "bearish_momentum"
-                elif latest["macd"] > 0 and latest["histogram"] < prev["histogram"]:
-                    scores["macd"] = 0.6; details["macd_evaluation"] = "deteriorating_above_zero"
-                else:
-                    scores["macd"] = 0.4; details["macd_evaluation"] = "bullish_momentum"
-
-            # 4-C. Trend (EMA stack)
-            if action in (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG):
-                if latest["close"] > latest["ema20"] > latest["ema50"] > latest["ema200"]:
-                    scores["trend"] = 1.0; details["trend_evaluation"] = "strong_uptrend"
-                elif latest["close"] > latest["ema20"] > latest["ema50"]:
-                    scores["trend"] = 0.8; details["trend_evaluation"] = "moderate_uptrend"
-                elif latest["close"] > latest["ema20"]:
-                    scores["trend"] = 0.6; details["trend_evaluation"] = "weak_uptrend"
-                else:
-                    scores["trend"] = 0.3; details["trend_evaluation"] = "downtrend"
+                scores["rsi"] = 0.3;  details["rsi_evaluation"] = "oversold"
+
+        # 4-B. MACD
+        macd_cross = prev["macd"] < prev["signal"] < latest["macd"] > latest["signal"]
+        macd_under = prev["macd"] > prev["signal"] > latest["macd"] < latest["signal"]
+
+        if action in (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG):
+            if macd_cross:
+                scores["macd"] = 1.0; details["macd_evaluation"] = "bullish_crossover"
+            elif latest["macd"] > latest["signal"]:
+                scores["macd"] = 0.8; details["macd_evaluation"] = "bullish_momentum"
+            elif latest["macd"] < 0 and latest["histogram"] > prev["histogram"]:
+                scores["macd"] = 0.6; details["macd_evaluation"] = "improving_below_zero"
             else:
-                if latest["close"] < latest["ema20"] < latest["ema50"] < latest["ema200"]:
-                    scores["trend"] = 1.0; details["trend_evaluation"] = "strong_downtrend"
-                elif latest["close"] < latest["ema20"] < latest["ema50"]:
-                    scores["trend"] = 0.8; details["trend_evaluation"] = "moderate_downtrend"
-                elif latest["close"] < latest["ema20"]:
-                    scores["trend"] = 0.6; details["trend_evaluation"] = "weak_downtrend"
-                else:
-                    scores["trend"] = 0.3; details["trend_evaluation"] = "uptrend"
-
-            # 4-D. Entry-price sanity check
-            if entry_price is not None:
-                diff = abs(entry_price - latest["close"]) / latest["close"]
-                if diff < 0.001:
-                    scores["entry_price"] = 1.0; details["entry_price_evaluation"] = "excellent"
-                elif diff < 0.005:
-                    scores["entry_price"] = 0.8; details["entry_price_evaluation"] = "good"
-                elif diff < 0.01:
-                    scores["entry_price"] = 0.6; details["entry_price_evaluation"] = "acceptable"
-                else:
-                    scores["entry_price"] = 0.2; details["entry_price_evaluation"] = "poor"
-
-            # ── 5. Weighted aggregation using the JSON table ────────────────
-            if not scores:
-                logger.warning(f"No tech scores for {symbol}")
-                return 0.5, {"error": "no_scores"}
-
-            # Pull live weights (falls back to 1.0 if key absent)
-            weights_live = {
-                k: weight_cache.weight(k if k != "entry_price" else "price_distance_to_ema20")
-                for k in scores
-            }
+                scores["macd"] = 0.4; details["macd_evaluation"] = "bearish_momentum"
+        else:
+            if macd_under:
+                scores["macd"] = 1.0; details["macd_evaluation"] = "bearish_crossover"
+            elif latest["macd"] < latest["signal"]:
+                scores["macd"] = 0.8; details["macd_evaluation"] = "bearish_momentum"
+            elif latest["macd"] > 0 and latest["histogram"] < prev["histogram"]:
+                scores["macd"] = 0.6; details["macd_evaluation"] = "deteriorating_above_zero"
+            else:
+                scores["macd"] = 0.4; details["macd_evaluation"] = "bullish_momentum"
+
+        # 4-C. Trend (EMA stack)
+        if action in (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG):
+            if latest["close"] > latest["ema20"] > latest["ema50"] > latest["ema200"]:
+                scores["trend"] = 1.0; details["trend_evaluation"] = "strong_uptrend"
+            elif latest["close"] > latest["ema20"] > latest["ema50"]:
+                scores["trend"] = 0.8; details["trend_evaluation"] = "moderate_uptrend"
+            elif latest["close"] > latest["ema20"]:
+                scores["trend"] = 0.6; details["trend_evaluation"] = "weak_uptrend"
+            else:
+                scores["trend"] = 0.3; details["trend_evaluation"] = "downtrend"
+        else:
+            if latest["close"] < latest["ema20"] < latest["ema50"] < latest["ema200"]:
+                scores["trend"] = 1.0; details["trend_evaluation"] = "strong_downtrend"
+            elif latest["close"] < latest["ema20"] < latest["ema50"]:
+                scores["trend"] = 0.8; details["trend_evaluation"] = "moderate_downtrend"
+            elif latest["close"] < latest["ema20"]:
+                scores["trend"] = 0.6; details["trend_evaluation"] = "weak_downtrend"
+            else:
+                scores["trend"] = 0.3; details["trend_evaluation"] = "uptrend"
+
+        # 4-D. Entry-price sanity check
+        if entry_price is not None:
+            diff = abs(entry_price - latest["close"]) / latest["close"]
+            if diff < 0.001:
+                scores["entry_price"] = 1.0; details["entry_price_evaluation"] = "excellent"
+            elif diff < 0.005:
+                scores["entry_price"] = 0.8; details["entry_price_evaluation"] = "good"
+            elif diff < 0.01:
+                scores["entry_price"] = 0.6; details["entry_price_evaluation"] = "acceptable"
+            else:
+                scores["entry_price"] = 0.2; details["entry_price_evaluation"] = "poor"
 
-            # Normalise so they sum to 1
-            total_w = sum(weights_live.values())
-            weights_norm = {k: v / total_w for k, v in weights_live.items()}
+        # ── 5. Weighted aggregation using the JSON table ────────────────
+        if not scores:
+            logger.warning(f"No tech scores for {symbol}")
+            return 0.5, {"error": "no_scores"}
 
-            technical_score = round(
-                sum(scores[k] * weights_norm[k] for k in scores), 4
-            )
+        # Pull live weights (falls back to 1.0 if key absent)
+        weights_live = {
+            k: self.weights.weight(k if k != "entry_price" else "price_distance_to_ema20")
+            for k in scores
+        }
+
+        # Normalise so they sum to 1
+        total_w = sum(weights_live.values())
+        weights_norm = {k: v / total_w for k, v in weights_live.items()}
 
-            from ml.model_inference import predict_one
-            latest_row = df.iloc[-1]                # last candle's feature row
+        technical_score = round(
+            sum(scores[k] * weights_norm[k] for k in scores), 4
+        )
+
+        from ml.model_inference import predict_one
+        latest_row = df.iloc[-1]                # last candle's feature row
+        with self._timer.stage("predict"):
             ml_prob = predict_one(symbol, "H1", latest_row)
 
-            # ------------------------------------------------------------------
-            # ML‑only composite: 70 % indicator score  +  30 % scaled ML probability
-            # ------------------------------------------------------------------
-            ml_prob_scaled = max(0.5, min(1.0, ml_prob * 4))  # 0.02→0.5, 0.25→1.0
-            technical_score = round(0.7 * technical_score + 0.3 * ml_prob_scaled, 4)
+        # ------------------------------------------------------------------
+        # ML‑only composite: 70 % indicator score  +  30 % scaled ML probability
+        # ------------------------------------------------------------------
+        ml_prob_scaled = max(0.5, min(1.0, ml_prob * 4))  # 0.02→0.5, 0.25→1.0
+        technical_score = round((1.0 - self.ml_blend) * technical_score + self.ml_blend * ml_prob_scaled, 4)
 
-            # Debug details
-            details["ml_prob"] = ml_prob
-            details["ml_prob_scaled"] = ml_prob_scaled
+        # Debug details
+        details["ml_prob"] = ml_prob
+        details["ml_prob_scaled"] = ml_prob_scaled
 
-            details["component_scores"] = scores
-            details["weights_used"]     = weights_norm
-            details["final_technical_score"] = technical_score
+        details["component_scores"] = scores
+        details["weights_used"]     = weights_norm
+        details["final_technical_score"] = technical_score
 
-            return technical_score, details
+        return technical_score, details
 
-        except Exception as exc:  # pylint: disable=broad-except
-            logger.error("Technical eval error: %s", exc, exc_info=True)
-            return 0.5, {"error": str(exc)}
+    def technical_ceiling(self, symbol: str, df: Optional[pd.DataFrame] = None) -> Dict[TradeSide, float]:
+        """
+        Best technical score each side could reach before the entry price is
+        known (the entry-price factor is scored as a perfect at-market entry).
+
+        Used by the pre-Vision gate: a side whose ceiling is below
+        min_technical_score will be rejected whatever the model proposes.
+        Returns {} when no candle data is available.
+        """
+        if df is None:
+            df, _ = self.load_technical_frame(symbol)
+            if df is None:
+                return {}
+        best_entry = float(df["close"].iloc[-1])
+        return {
+            TradeSide.BUY:  self._score_technical_frame(df, symbol, SignalAction.BUY_NOW, best_entry)[0],
+            TradeSide.SELL: self._score_technical_frame(df, symbol, SignalAction.SELL_NOW, best_entry)[0],
+        }
+
+    def _load_performance(self, db_symbols: List[str]) -> Dict[Tuple[str, TradeSide], Dict[str, Any]]:
+        """Evaluation-period stats of several symbols, one lookup in symbol_performance"""
+        from performance_stats import performance_stats
+        return performance_stats.windows(db_symbols, self.evaluation_period_days)
 
-    def evaluate_performance_adjustment(self, symbol: str, action: SignalAction) -> Tuple[float, Dict]:
+    def evaluate_performance_adjustment(
+        self,
+        symbol: str,
+        action: SignalAction,
+        performance: Optional[Dict[Tuple[str, TradeSide], Dict[str, Any]]] = None
+    ) -> Tuple[float, Dict]:
         """Evaluate past performance to adjust confidence threshold
 
         Args:
             symbol: Trading symbol
             action: Signal action
+            performance: Preloaded _load_performance() result (score_batch)
 
         Returns:
             Tuple of (adjustment_factor, details_dict)
@@ -436,47 +558,27 @@ class SignalScorer:
                 logger.warning(f"Unknown action type {action}, using default adjustment")
                 return 1.0, {"error": "Unknown action type"}
 
-            # Get performance data from recent trades
-            cutoff_date = datetime.now() - timedelta(days=self.evaluation_period_days)
-            
             # Convert XAU_USD format to XAUUSD for database queries
             db_symbol = self._normalize_symbol_for_db(symbol)
-            
-            logger.info(f"Looking for {symbol} (DB: {db_symbol}) {side.name} trades closed after {cutoff_date}")
 
-            # First check if we have any trades at all for this symbol
-            total_trades_count = Trade.query.filter(
-                Trade.symbol == db_symbol,
-                Trade.side == side,
-                Trade.status == TradeStatus.CLOSED
-            ).count()
+            # Rolling aggregates maintained as trades close (performance_stats.py)
+            if performance is None:
+                performance = self._load_performance([db_symbol])
+            stats = performance.get((db_symbol, side))
+            total_trades_count = stats["total_trades_in_db"] if stats else 0
+            total_trades = stats["total_trades"] if stats else 0
 
             logger.info(f"Found {total_trades_count} total {symbol} {side.name} trades in database")
+            logger.info(f"Found {total_trades} {symbol} {side.name} trades within the {self.evaluation_period_days}-day evaluation period")
 
-            # Now get the trades within our evaluation period
-            trades = Trade.query.filter(
-                Trade.symbol == db_symbol,
-                Trade.side == side,
-                Trade.status == TradeStatus.CLOSED,
-                Trade.closed_at >= cutoff_date
-            ).all()
-
-            trade_count = len(trades)
-            logger.info(f"Found {trade_count} {symbol} {side.name} trades within the {self.evaluation_period_days}-day evaluation period")
-
-            if not trades:
+            if total_trades == 0:
                 logger.info(f"No recent trade history for {symbol} {side.name}, using default adjustment")
                 return 1.0, {"reason": "No recent trade history", "total_trades_in_db": total_trades_count}
 
             # Calculate performance metrics
-            total_trades = len(trades)
-            profitable_trades = sum(1 for t in trades if t.pnl and t.pnl > 0)
-
-            if total_trades == 0:
-                return 1.0, {"reason": "No trades to analyze"}
-
+            profitable_trades = stats["profitable_trades"]
             win_rate = profitable_trades / total_trades
-            total_profit = sum(t.pnl if t.pnl else 0 for t in trades)
+            total_profit = stats["total_profit"]
             avg_profit = total_profit / total_trades
 
             details = {
@@ -521,12 +623,22 @@ class SignalScorer:
             logger.error(f"Error in performance evaluation: {str(e)}")
             return 1.0, {"error": str(e)}  # No adjustment on error
 
-    def evaluate_correlation(self, symbol: str, action: SignalAction) -> Tuple[bool, Dict]:
+    def evaluate_correlation(
+        self,
+        symbol: str,
+        action: SignalAction,
+        open_trades: Optional[List[Trade]] = None
+    ) -> Tuple[bool, Dict]:
         """Evaluate correlation with existing positions
 
+        Positions are netted per symbol (BUY +lots, SELL −lots) from the
+        in-memory exposure book, so a hedged symbol doesn't block and no
+        trades query is made.
+
         Args:
             symbol: Trading symbol
             action: Signal action
+            open_trades: Explicit open trades to check against instead of the book
 
         Returns:
             Tuple of (should_proceed, details_dict)
@@ -536,10 +648,19 @@ class SignalScorer:
             # Convert incoming symbol to database format (remove underscore)
             db_symbol = self._normalize_symbol_for_db(symbol)
             
-            # Get current open positions
-            open_trades = Trade.query.filter(Trade.status == TradeStatus.OPEN).all()
-
-            if not open_trades:
+            # Current open positions, netted per symbol
+            if open_trades is None:
+                net_positions = exposure_book.net_positions()
+                position_count = exposure_book.position_count()
+            else:
+                net_positions = {}
+                for trade in open_trades:
+                    lots = float(trade.lot or 0.0) * (1.0 if trade.side == TradeSide.BUY else -1.0)
+                    key = self._normalize_symbol_for_db(trade.symbol)
+                    net_positions[key] = net_positions.get(key, 0.0) + lots
+                position_count = len(open_trades)
+
+            if not position_count:
                 # No open trades, correlation check automatically passes
                 return True, {"reason": "No open trades"}
 
@@ -549,52 +670,41 @@ class SignalScorer:
                 logger.warning(f"Unknown action type {action}, allowing trade")
                 return True, {"error": "Unknown action type"}
 
-            # Check correlation with each open position
-            correlations = []
-            for trade in open_trades:
-                trade_symbol = trade.symbol
-                trade_side = trade.side
-
-                # Skip same symbol - handled by risk management
-                if trade_symbol == db_symbol:
-                    continue
-
-                # Convert both to non-underscore format for correlation lookup
-                corr_symbol = self._normalize_symbol_for_db(symbol) 
-                corr_trade_symbol = trade_symbol  # Already in DB format without underscore
-
-                # Get base correlation
-                if corr_trade_symbol in self.pair_correlations and corr_symbol in self.pair_correlations[corr_trade_symbol]:
-                    base_correlation = self.pair_correlations[corr_trade_symbol][corr_symbol]
-                elif corr_symbol in self.pair_correlations and corr_trade_symbol in self.pair_correlations[corr_symbol]:
-                    base_correlation = self.pair_correlations[corr_symbol][corr_trade_symbol]
-                else:
-                    # Unknown correlation, assume moderate
-                    base_correlation = 0.5
-
-                # Adjust for trade direction
-                # If same direction, correlation remains the same
-                # If opposite direction, invert correlation
-                effective_correlation = base_correlation
-                if trade_side != side:
-                    effective_correlation = -effective_correlation
-
-                correlations.append({
-                    "symbol": trade_symbol,
-                    "side": trade_side.name,
-                    "base_correlation": base_correlation,
-                    "effective_correlation": effective_correlation
-                })
-
-            # Check if any high correlations exist
-            high_correlations = [c for c in correlations if abs(c["effective_correlation"]) >= self.max_correlation_threshold]
+            # Rolling correlations with every other net position in one row
+            # lookup; unmeasured pairs fall back to the static priors
+            others = [(sym, lots) for sym, lots in net_positions.items()
+                      if sym != db_symbol and abs(lots) > 1e-9]      # same symbol: risk management
+            other_symbols = [sym for sym, _ in others]
+            base, measured = self._correlation_row(db_symbol, other_symbols)
+
+            # Same direction keeps the sign, opposite direction inverts it
+            lots = np.array([lots for _, lots in others])
+            candidate = 1.0 if side == TradeSide.BUY else -1.0
+            effective = base * np.sign(lots) * candidate
+            high = np.abs(effective) >= self.max_correlation_threshold
+
+            correlations = [
+                {
+                    "symbol": sym,
+                    "side": "BUY" if lots[i] > 0 else "SELL",
+                    "net_lots": round(float(lots[i]), 4),
+                    "base_correlation": round(float(base[i]), 4),
+                    "effective_correlation": round(float(effective[i]), 4),
+                    "source": "rolling" if measured[i] else "static",
+                }
+                for i, (sym, _) in enumerate(others)
+            ]
+            high_correlations = [c for c, flag in zip(correlations, high) if flag]
+            gross = np.abs(lots).sum()
+            weighted = float((effective * np.abs(lots)).sum() / gross) if gross else 0.0
 
             details = {
                 "proposed_trade": {
                     "symbol": symbol,
                     "side": side.name
                 },
-                "existing_positions": len(open_trades),
+                "existing_positions": position_count,
+                "lot_weighted_correlation": round(weighted, 4),
                 "correlations": correlations,
                 "high_correlations": high_correlations
             }
@@ -612,6 +722,22 @@ class SignalScorer:
             logger.error(f"Error in correlation evaluation: {str(e)}")
             return True, {"error": str(e)}  # Allow trade on error
 
+    def _correlation_row(self, symbol: str, others: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """(correlations, measured mask) of *symbol* with *others*, priors where unmeasured"""
+        base = correlation_service.row(symbol, others)
+        measured = ~np.isnan(base)
+        for i in np.flatnonzero(~measured):
+            base[i] = self._prior_correlation(symbol, others[i])
+        return base, measured
+
+    def _prior_correlation(self, symbol: str, other: str) -> float:
+        """Static estimate from pair_correlations (0.5 when unknown)"""
+        if other in self.pair_correlations and symbol in self.pair_correlations[other]:
+            return self.pair_correlations[other][symbol]
+        if symbol in self.pair_correlations and other in self.pair_correlations[symbol]:
+            return self.pair_correlations[symbol][other]
+        return 0.5
+
     def should_execute_signal(self, signal: Signal) -> Tuple[bool, Dict]:
 
         """Evaluate whether a signal should be executed based on all scoring layers
@@ -622,15 +748,65 @@ class SignalScorer:
         Returns:
             Tuple of (should_execute, details_dict)
         """
+        return self._score_signal(signal)
+
+    def score_batch(self, signals: List[Signal]) -> List[Tuple[bool, Dict]]:
+        """Score many candidate signals at once
+
+        Same decisions and breakdown dicts as should_execute_signal(), in
+        input order, but market data is fetched once per symbol / timeframe
+        and performance stats are loaded once for the whole batch (open
+        positions come from the in-memory exposure book): O(symbols) queries
+        and fetches instead of O(signals × layers).
+        """
+        batch: Dict[str, Any] = {"atr": {}, "frames": {}, "performance": None}
+        try:
+            db_symbols = sorted({self._normalize_symbol_for_db(s.symbol) for s in signals})
+            if db_symbols:
+                batch["performance"] = self._load_performance(db_symbols)
+        except Exception as e:
+            # Leave performance unset: each signal loads its own
+            logger.error(f"Error preloading batch scoring data: {str(e)}")
+        return [self._score_signal(signal, batch) for signal in signals]
+
+    def _atr(self, symbol: str, timeframe: str) -> Optional[float]:
+        """ATR-14 of *symbol* / *timeframe* in pips (None when unavailable)"""
+        return get_atr(symbol=symbol, timeframe=timeframe, lookback=14)
+
+    def _score_signal(self, signal: Signal, batch: Optional[Dict[str, Any]] = None) -> Tuple[bool, Dict]:
+        """
+        Scoring layers for one signal, reusing *batch* data when given.
+
+        The breakdown carries "timings_ms": exclusive milliseconds per stage
+        (atr, candles, technical, predict, performance, correlation) and the
+        total; each run is also recorded in scoring_metrics.
+        """
+        timings = self._timer.begin()
+        start = time.perf_counter()
+        try:
+            should_execute, details = self._score_layers(signal, batch)
+        finally:
+            self._timer.end()
+        details["timings_ms"] = {stage: round(seconds * 1000, 3) for stage, seconds in timings.items()}
+        details["timings_ms"]["total"] = round((time.perf_counter() - start) * 1000, 3)
+        if self.metrics is not None:
+            self.metrics.record(signal.symbol, details.get("decision"), details["timings_ms"],
+                                error="error" in details)
+        return should_execute, details
+
+    def _score_layers(self, signal: Signal, batch: Optional[Dict[str, Any]]) -> Tuple[bool, Dict]:
         try:
 
             # ── ATR sanity-check : reject SL < 0.3 × ATR ───────────────────
             sl_pips = abs(signal.entry - signal.sl) * price_to_pip_factor(signal.symbol)
-            atr = get_atr(
-                symbol     = signal.symbol,
-                timeframe  = signal.context.get("timeframe", "M15"),
-                lookback   = 14,
-            )
+            atr_key = (signal.symbol, signal.context.get("timeframe", "M15"))
+            if batch is not None and atr_key in batch["atr"]:
+                atr = batch["atr"][atr_key]
+            else:
+                with self._timer.stage("atr"):
+                    atr = self._atr(signal.symbol, atr_key[1])
+                if batch is not None:
+                    batch["atr"][atr_key] = atr
             if atr and sl_pips < 0.3 * atr:
                 return False, {
                     "decision": "reject",
@@ -646,11 +822,19 @@ class SignalScorer:
             result = {"signal_id": signal.id, "symbol": signal.symbol, "action": signal.action.name}
 
             # Step 1: Technical Filter Layer
-            technical_score, technical_details = self.evaluate_technical_conditions(
-                symbol=signal.symbol, 
-                action=signal.action,
-                entry_price=signal.entry
-            )
+            frame = None
+            if batch is not None:
+                if signal.symbol not in batch["frames"]:
+                    with self._timer.stage("candles"):
+                        batch["frames"][signal.symbol] = self.load_technical_frame(signal.symbol)
+                frame = batch["frames"][signal.symbol]
+            with self._timer.stage("technical"):
+                technical_score, technical_details = self.evaluate_technical_conditions(
+                    symbol=signal.symbol,
+                    action=signal.action,
+                    entry_price=signal.entry,
+                    frame=frame
+                )
             result["technical_score"] = technical_score
             result["technical_details"] = technical_details
 
@@ -660,10 +844,12 @@ class SignalScorer:
                 return False, result
 
             # Step 2: Performance-Based Adjustment
-            adjustment_factor, performance_details = self.evaluate_performance_adjustment(
-                symbol=signal.symbol,
-                action=signal.action
-            )
+            with self._timer.stage("performance"):
+                adjustment_factor, performance_details = self.evaluate_performance_adjustment(
+                    symbol=signal.symbol,
+                    action=signal.action,
+                    performance=batch and batch["performance"]
+                )
             result["adjustment_factor"] = adjustment_factor
             result["performance_details"] = performance_details
 
@@ -689,10 +875,11 @@ class SignalScorer:
                 return False, result
 
             # Step 3: Correlation Analysis
-            correlation_passed, correlation_details = self.evaluate_correlation(
-                symbol=signal.symbol,
-                action=signal.action
-            )
+            with self._timer.stage("correlation"):
+                correlation_passed, correlation_details = self.evaluate_correlation(
+                    symbol=signal.symbol,
+                    action=signal.action
+                )
             result["correlation_passed"] = correlation_passed
             result["correlation_details"] = correlation_details
 
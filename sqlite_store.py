@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the small SQLite side stores
+
+The job queue, chart index, capture-cycle log, Vision budget, analyzer
+shadow log and scoring metrics each keep their own database under data/.
+They all open it the same way, through connect():
+
+    from sqlite_store import connect, percentile
+
+    conn = connect("data/example.sqlite", _SCHEMA)
+    p95 = percentile([12.0, 15.5, 40.1], 0.95)
+"""
+
+import os
+import sqlite3
+from typing import Any, List, Optional
+
+
+def connect(db_path: str, schema: str, **kwargs: Any) -> sqlite3.Connection:
+    """Open *db_path* (creating its directory) in WAL mode with Row results and apply *schema*"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, **kwargs)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(schema)
+    return conn
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank *q* quantile of *values*, rounded to 3 places (None when empty)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(q * len(values)))], 3)
@@ -0,0 +1 @@
+python scheduler_runner.py
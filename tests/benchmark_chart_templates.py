@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: classic ChartGenerator path vs. the re-usable ChartTemplate path.
+
+Each mode runs in its own subprocess so peak RSS (ru_maxrss) is measured
+independently.  Charts are written to a temporary directory.
+
+Usage:
+    python tests/benchmark_chart_templates.py --renders 20 --candles 100
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def _run_mode(mode: str, renders: int, candles_count: int) -> dict:
+    """Render *renders* charts with one generator mode and return timings"""
+    logging.disable(logging.INFO)
+    from chart_generator_basic import ChartGenerator
+    from utils.candles import generate_sample_candles
+
+    candles = generate_sample_candles(days=max(1, candles_count // 24 + 1))[-candles_count:]
+    symbols = ["EUR_USD", "GBP_USD", "USD_JPY", "XAU_USD", "GBP_JPY"]
+
+    os.chdir(tempfile.mkdtemp(prefix="chart_bench_"))
+    gen = ChartGenerator(signal_action="BUY_NOW", use_template=(mode == "template"))
+
+    timings = []
+    for i in range(renders):
+        last = candles[-1]["close"]
+        start = time.perf_counter()
+        path = gen.create_chart(
+            candles=candles,
+            symbol=symbols[i % len(symbols)],
+            timeframe="H1" if i % 2 else "M15",
+            stop_loss=last - 0.003,
+            take_profit=last + 0.005,
+        )
+        timings.append(time.perf_counter() - start)
+        if not path:
+            raise RuntimeError(f"{mode} render {i} failed")
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        maxrss //= 1024
+
+    return {
+        "mode": mode,
+        "renders": renders,
+        "first_s": timings[0],
+        "mean_s": statistics.mean(timings),
+        "p50_s": statistics.median(timings),
+        "warm_mean_s": statistics.mean(timings[1:]) if renders > 1 else timings[0],
+        "peak_rss_mb": maxrss / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chart template benchmark")
+    parser.add_argument("--renders", type=int, default=20)
+    parser.add_argument("--candles", type=int, default=100)
+    parser.add_argument("--mode", choices=["classic", "template"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(_run_mode(args.mode, args.renders, args.candles)))
+        return
+
+    results = []
+    for mode in ("classic", "template"):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--mode", mode,
+             "--renders", str(args.renders), "--candles", str(args.candles)],
+            capture_output=True, text=True, check=True,
+        )
+        results.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    print(f"{'mode':<10} {'first':>8} {'mean':>8} {'p50':>8} {'warm':>8} {'peak RSS':>10}")
+    for r in results:
+        print(f"{r['mode']:<10} {r['first_s']:>7.3f}s {r['mean_s']:>7.3f}s "
+              f"{r['p50_s']:>7.3f}s {r['warm_mean_s']:>7.3f}s {r['peak_rss_mb']:>8.1f}MB")
+
+    classic, template = results
+    print(f"\nwarm speed-up: {classic['warm_mean_s'] / template['warm_mean_s']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
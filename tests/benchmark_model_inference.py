@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compare single-row ML inference latency across the serving paths.
+
+For each model it times one prediction, --rows times, through:
+
+    dataframe   pd.DataFrame([features])[feature_names] → predict_proba   (the old predict_one)
+    numpy       raw float32 row → the pickled sklearn wrapper
+    booster     raw float32 row → Booster.inplace_predict (compiled .ubj)
+    service     inference_service.predict_rows (dict → matrix → booster)
+
+and prints p50 / p99 in milliseconds.  Models without an exported booster
+are skipped for that column (python -m ml.inference_service export).
+
+Usage:
+    python tests/benchmark_model_inference.py --rows 2000 --models H1 EURUSD_H1_rr GBPUSD_H1_exit
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _latency(call, rows):
+    call()                                  # warm-up
+    samples = []
+    for _ in range(rows):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1000
+    return np.percentile(samples, 50), np.percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single-row ML inference latency")
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--models", nargs="*", default=["H1", "EURUSD_H1_rr", "GBPUSD_H1_exit"],
+                        help="registry keys: TF for prob models, SYMBOL_TF_rr / SYMBOL_TF_exit")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    warnings.filterwarnings("ignore")
+    import pandas as pd
+    from ml.inference_service import inference_service
+
+    inference_service.warm()
+    rng = np.random.default_rng(0)
+    print(f"{'model':<18} {'path':<10} {'p50 ms':>8} {'p99 ms':>8} {'vs df':>6}")
+
+    for name in args.models:
+        parts = name.split("_")
+        kind = parts[-1] if parts[-1] in ("rr", "exit") else "prob"
+        key = "_".join(parts[:-1]) if kind != "prob" else name
+        entry = inference_service.registry.get(kind, key)
+        if entry is None:
+            print(f"{name:<18} no model")
+            continue
+
+        row = rng.random(len(entry.columns)).astype(np.float32)
+        features = dict(zip(entry.columns, row.tolist()))
+        X = row.reshape(1, -1)
+        symbol, timeframe = (None, key) if kind == "prob" else key.split("_")
+        wrapper = entry.model.predict if kind == "rr" else entry.model.predict_proba
+
+        paths = [
+            ("dataframe", lambda: wrapper(pd.DataFrame([features])[list(entry.columns)])),
+            ("numpy", lambda: wrapper(X)),
+        ]
+        if entry.booster is not None:
+            paths.append(("booster", lambda: entry.booster.inplace_predict(X)))
+        paths.append(("service", lambda: inference_service.predict_rows(kind, [(symbol, timeframe, features)])))
+
+        baseline = None
+        for path, call in paths:
+            p50, p99 = _latency(call, args.rows)
+            baseline = baseline or p50
+            print(f"{name:<18} {path:<10} {p50:>8.3f} {p99:>8.3f} {baseline / p50:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
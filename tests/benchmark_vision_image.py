@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Report Vision payload sizes for different chart output profiles.
+
+Renders one synthetic chart, then encodes it with each profile and prints the
+byte size (and base64 size actually sent in the request).  The images are
+written to --out so legibility can be checked by eye.
+
+Usage:
+    python tests/benchmark_vision_image.py --out /tmp/vision_profiles
+"""
+
+import os
+import sys
+import time
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = [
+    ("png-1920-full", {"format": "png", "width": 0, "colors": 256}),
+    ("png-1280-64c", {"format": "png", "width": 1280, "colors": 64}),
+    ("png-1024-32c", {"format": "png", "width": 1024, "colors": 32}),
+    ("webp-1280-q80", {"format": "webp", "width": 1280, "quality": 80}),
+    ("jpeg-1280-q80", {"format": "jpeg", "width": 1280, "quality": 80}),
+    ("png-1280-price+rsi", {"format": "png", "width": 1280, "colors": 64, "panels": ["price", "rsi"]}),
+    ("webp-1024-price", {"format": "webp", "width": 1024, "quality": 75, "panels": ["price"]}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vision image profile sizes")
+    parser.add_argument("--out", default="vision_profiles")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    from chart_generator_basic import ChartGenerator
+    from utils.candles import generate_sample_candles
+
+    os.makedirs(args.out, exist_ok=True)
+    candles = generate_sample_candles(days=5)[-100:]
+    last = candles[-1]["close"]
+    gen = ChartGenerator(signal_action="BUY_NOW")
+
+    png_path = gen.create_chart(candles, "EUR_USD", "H1", stop_loss=last - 0.003, take_profit=last + 0.005)
+    baseline = os.path.getsize(png_path)
+    print(f"{'profile':<22} {'size':>10} {'base64':>10} {'dims':>11} {'vs file':>8} {'encode':>8}")
+    print(f"{'saved chart PNG':<22} {baseline / 1024:>8.1f}KB {baseline * 4 / 3 / 1024:>8.1f}KB")
+
+    for name, profile in PROFILES:
+        start = time.perf_counter()
+        data, meta = gen.create_vision_image(candles, "EUR_USD", "H1", stop_loss=last - 0.003,
+                                             take_profit=last + 0.005, profile=profile)
+        elapsed = time.perf_counter() - start
+        ext = meta["mime"].split("/")[1]
+        with open(os.path.join(args.out, f"{name}.{ext}"), "wb") as f:
+            f.write(data)
+        dims = f"{meta['width']}x{meta['height']}"
+        print(f"{name:<22} {len(data) / 1024:>8.1f}KB {len(data) * 4 / 3 / 1024:>8.1f}KB "
+              f"{dims:>11} {len(data) / baseline:>7.0%} {elapsed:>7.2f}s")
+
+    os.remove(png_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_scoring_metrics(tmp_path, monkeypatch):
+    """Per-stage scoring timings go to a throwaway database, never data/scoring_metrics.sqlite"""
+    import scoring_metrics
+
+    db_path = str(tmp_path / "scoring_metrics.sqlite")
+    metrics = scoring_metrics.ScoringMetrics(db_path)
+    monkeypatch.setenv("SCORING_METRICS_DB", db_path)
+    monkeypatch.setattr(scoring_metrics, "scoring_metrics", metrics)
+    if "signal_scoring" in sys.modules:            # importing it here would pull in app for every test
+        monkeypatch.setattr(sys.modules["signal_scoring"].signal_scorer, "metrics", metrics)
+    return metrics
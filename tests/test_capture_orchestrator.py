@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Tests for the bar-close capture orchestrator
+"""
+
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capture_job
+from capture_orchestrator import CAPTURE_JOB_ID, CaptureOrchestrator, bar_close, due_timeframes
+
+TOP_OF_HOUR = datetime(2025, 5, 7, 13, 0, 10, tzinfo=timezone.utc)
+QUARTER_PAST = datetime(2025, 5, 7, 13, 15, 12, tzinfo=timezone.utc)
+
+
+def _orchestrator(tmp_path, **kwargs):
+    kwargs.setdefault("timeframes", ["H1", "M15"])
+    kwargs.setdefault("settle_seconds", 10)
+    return CaptureOrchestrator(db_path=str(tmp_path / "cycles.sqlite"), **kwargs)
+
+
+def test_due_timeframes_merge_at_the_top_of_the_hour():
+    assert due_timeframes(bar_close(TOP_OF_HOUR, "M15"), ["H1", "M15"]) == ["M15", "H1"]
+    assert due_timeframes(bar_close(QUARTER_PAST, "M15"), ["H1", "M15"]) == ["M15"]
+    assert bar_close(QUARTER_PAST, "M15") == datetime(2025, 5, 7, 13, 15, tzinfo=timezone.utc)
+
+
+def test_cron_fields_follow_the_shortest_timeframe(tmp_path):
+    assert _orchestrator(tmp_path).cron_fields() == {"second": 10, "minute": "*/15"}
+    assert _orchestrator(tmp_path, timeframes=["H4", "H1"]).cron_fields() == {"second": 10, "minute": 0, "hour": "*/1"}
+
+
+def test_one_merged_job_per_symbol_with_lag_and_duration(tmp_path):
+    orch = _orchestrator(tmp_path)
+    with mock.patch("vision_budget.vision_budget.plan", return_value=["EUR_USD", "XAU_USD"]), \
+         mock.patch.object(capture_job, "run_charts", side_effect=[{}, {"error": "boom"}]) as run:
+        cycle = orch.run_cycle(now=TOP_OF_HOUR)
+
+    assert [c.args for c in run.call_args_list] == [("EUR_USD", ["M15", "H1"]), ("XAU_USD", ["M15", "H1"])]
+    assert cycle["status"] == "errors" and cycle["errors"] == 1 and cycle["symbols"] == 2
+    assert cycle["start_lag"] == 10.0 and cycle["duration"] >= 0
+    stats = orch.stats(since=0)
+    assert stats["by_status"] == {"errors": 1}
+    assert stats["start_lag_p50"] == 10.0 and stats["jitter_max"] == 0.0
+
+
+def test_overlapping_cycle_is_refused_and_recorded(tmp_path):
+    orch = _orchestrator(tmp_path)
+    entered, release = threading.Event(), threading.Event()
+
+    def slow(symbol, timeframes):
+        entered.set()
+        release.wait(5)
+        return {}
+
+    with mock.patch("vision_budget.vision_budget.plan", return_value=["EUR_USD"]), \
+         mock.patch.object(capture_job, "run_charts", side_effect=slow):
+        first = threading.Thread(target=orch.run_cycle, kwargs={"now": TOP_OF_HOUR})
+        first.start()
+        entered.wait(5)
+        assert orch.run_cycle(now=QUARTER_PAST) is None
+        release.set()
+        first.join()
+
+    assert orch.stats(since=0)["by_status"] == {"overlap": 1, "ok": 1}
+
+
+def test_scheduler_skips_are_recorded(tmp_path):
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+
+    orch = _orchestrator(tmp_path)
+    orch.on_scheduler_event(SimpleNamespace(code=EVENT_JOB_MAX_INSTANCES, job_id=CAPTURE_JOB_ID,
+                                            scheduled_run_times=[QUARTER_PAST]))
+    orch.on_scheduler_event(SimpleNamespace(code=EVENT_JOB_MISSED, job_id=CAPTURE_JOB_ID,
+                                            scheduled_run_time=TOP_OF_HOUR))
+    orch.on_scheduler_event(SimpleNamespace(code=EVENT_JOB_MISSED, job_id="exit_monitor",
+                                            scheduled_run_time=TOP_OF_HOUR))
+    recent = orch.recent()
+    assert [(r["status"], r["timeframes"]) for r in recent] == [("missed", "M15,H1"),
+                                                               ("skipped_max_instances", "M15")]
+
+
+def test_run_charts_enqueues_one_multi_chart_job():
+    queue = mock.Mock()
+    with mock.patch.object(capture_job, "get_quote", return_value={"bid": 1.1}), \
+         mock.patch.object(capture_job, "calculate_features", return_value={}), \
+         mock.patch.object(capture_job, "take_screenshot", side_effect=lambda s, tf: f"charts/EURUSD/{tf}.png"), \
+         mock.patch.object(capture_job, "get_job_queue", return_value=queue):
+        payload = capture_job.run_charts("EUR_USD", ["M15", "H1"])
+
+    assert payload["charts"] == {"M15": "charts/EURUSD/M15.png", "H1": "charts/EURUSD/H1.png"}
+    queue.enqueue.assert_called_once_with("vision_queue", payload)
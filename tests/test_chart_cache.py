@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Tests for the content-addressed chart cache
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_cache import ChartCache, chart_key
+
+
+def _candles(last_bar: datetime, n: int = 3):
+    return [{"time": last_bar - timedelta(hours=i), "close": 1.1} for i in reversed(range(n))]
+
+
+def test_key_depends_on_bar_and_annotations_only():
+    bar = datetime(2025, 5, 7, 9, 0, tzinfo=timezone.utc)
+    base = chart_key("EUR_USD", "H1", 100, bar, {"stop_loss": 1.1})
+
+    assert base == chart_key("EURUSD", "H1", 100, bar, {"stop_loss": 1.1, "result": None})
+    assert base != chart_key("EUR_USD", "H1", 100, bar + timedelta(hours=1), {"stop_loss": 1.1})
+    assert base != chart_key("EUR_USD", "H1", 100, bar, {"stop_loss": 1.2})
+
+
+def test_memory_eviction_spills_to_disk(tmp_path):
+    cache = ChartCache(max_memory_bytes=10, disk_dir=str(tmp_path))
+    cache.put("a", b"12345678")
+    cache.put("b", b"abcdefgh")          # evicts "a" to disk
+
+    assert os.path.exists(tmp_path / "a.png")
+    assert cache.get("a") == b"12345678"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("missing") is None
+
+
+def test_resolve_only_fetches_when_next_bar_is_due(tmp_path):
+    cache = ChartCache(disk_dir=str(tmp_path))
+    last_bar = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
+
+    with mock.patch("chart_utils.fetch_candles", return_value=_candles(last_bar)) as fetch:
+        first = cache.resolve("EUR_USD", "H1", 100, stop_loss=1.09)
+        second = cache.resolve("EUR_USD", "H1", 100, stop_loss=1.09)
+
+    assert fetch.call_count == 1
+    assert first["key"] == second["key"]
+    assert first["candles"] and second["candles"] is None
+    assert 0 < second["max_age"] <= 3600
+
+
+def test_oanda_error_payload_resolves_to_no_chart(tmp_path):
+    cache = ChartCache(disk_dir=str(tmp_path))
+
+    with mock.patch("chart_utils.fetch_candles", return_value=[{"error": "Missing API key"}]):
+        resolved = cache.resolve("EUR_USD", "H1", 100)
+
+    assert resolved["key"] is None and resolved["max_age"] == 0
+    assert cache.known_last_bar("EUR_USD", "H1") == (None, 0)
+    assert cache.load(resolved) == b""
+
+
+def test_stale_bar_is_rechecked_shortly(tmp_path):
+    cache = ChartCache(disk_dir=str(tmp_path))
+    weekend_bar = datetime(2025, 5, 2, 20, 0, tzinfo=timezone.utc)
+
+    cache.note_last_bar("EUR_USD", "H1", weekend_bar)
+    bar, max_age = cache.known_last_bar("EUR_USD", "H1")
+    assert bar == weekend_bar and max_age <= 60
+
+    _, max_age = cache.known_last_bar("EUR_USD", "H1", now=time.time() + 120)
+    assert max_age == 0
+
+
+def test_load_renders_once_then_serves_from_memory(tmp_path):
+    cache = ChartCache(disk_dir=str(tmp_path))
+    last_bar = datetime.now(timezone.utc) - timedelta(minutes=30)
+
+    with mock.patch("chart_utils.fetch_candles", return_value=_candles(last_bar)), \
+         mock.patch("chart_render_service.render_service.render_bytes", return_value=b"png") as render:
+        resolved = cache.resolve("XAU_USD", "M15", 50)
+        assert cache.load(resolved) == b"png"
+        assert cache.load(cache.resolve("XAU_USD", "M15", 50)) == b"png"
+
+    render.assert_called_once()
+    assert cache.stats()["hits"] == 1
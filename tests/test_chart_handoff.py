@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory chart handoff (renderer → Vision without disk)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chart_handoff import ChartArtifact, ChartHandoff
+from chart_render_service import ChartRenderService
+from utils.candles import generate_sample_candles
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def _artifact(path="static/charts/EURUSD/EURUSD_H1_20250507_130010.png", data=PNG_MAGIC + b"chart"):
+    return ChartArtifact("EUR_USD", "H1", path, data)
+
+
+def test_render_artifact_is_readable_before_it_is_written(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handoff = ChartHandoff()
+    service = ChartRenderService(workers=0)
+
+    with mock.patch("chart_handoff.chart_handoff", handoff), \
+         mock.patch.object(handoff, "persist_async") as persist:
+        artifact = service.render_artifact("EUR_USD", "H1", candles=generate_sample_candles(days=5)[-100:])
+
+    assert artifact.data.startswith(PNG_MAGIC) and artifact.candles == 100
+    assert artifact.vision_path.startswith("charts/EURUSD/EURUSD_H1_")
+    assert not os.path.exists(artifact.path)                     # nothing on disk yet
+    assert handoff.get(artifact.vision_path) == artifact.data    # any static/ variant
+    assert handoff.available(artifact.path)
+    persist.assert_called_once_with(artifact)
+
+
+def test_background_write_persists_and_indexes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    handoff = ChartHandoff()
+    artifact = _artifact()
+    store = mock.Mock()
+
+    with mock.patch("chart_store.chart_store", store):
+        handoff.attach_signal(artifact.path, 7)                  # no artifact yet: plain update
+        handoff.publish(artifact)
+        handoff.attach_signal(artifact.path, 42)                 # Signal stored before the write
+        handoff.flush(timeout=10)
+
+    assert (tmp_path / artifact.path).read_bytes() == artifact.data
+    assert artifact.persisted and handoff.stats()["writes"] == 1
+    store.record.assert_called_once_with(artifact.path, "EUR_USD", "H1", created_at=artifact.created_at)
+    store.attach_signal.assert_called_with(artifact.path, 42)
+
+
+def test_eviction_and_ttl():
+    handoff = ChartHandoff(max_items=2, ttl=60)
+    first, second, third = (_artifact(f"static/charts/X/{i}.png") for i in range(3))
+    for artifact in (first, second, third):
+        handoff.put(artifact)
+    assert handoff.get(first.path) is None
+    assert handoff.get(third.path) == third.data
+
+    third.created_at -= 120
+    assert handoff.get(third.path) is None
+
+
+def test_vision_reads_handoff_bytes_and_never_regenerates(tmp_path, monkeypatch):
+    import vision_worker
+
+    monkeypatch.chdir(tmp_path)
+    artifact = _artifact()
+    handoff = ChartHandoff()
+    handoff.put(artifact)
+
+    with mock.patch.object(vision_worker, "chart_handoff", handoff), \
+         mock.patch.object(vision_worker, "_vision_image_part", return_value={"type": "image_url"}) as part:
+        vision_worker.build_vision_request(artifact.vision_path)
+        part.assert_called_once_with(artifact.data)
+
+        with mock.patch("chart_utils.generate_chart_bytes") as regenerate, \
+             pytest.raises(FileNotFoundError):
+            vision_worker._load_chart_bytes("charts/EURUSD/missing.png")
+        regenerate.assert_not_called()
+
+
+def test_missing_chart_is_retried_while_it_may_still_be_written():
+    import vision_worker
+    from job_queue import PermanentJobError
+
+    payload = {"symbol": "EUR_USD", "timeframe": "H1", "image_s3": "charts/EURUSD/missing.png",
+               "ts": datetime.now().isoformat()}
+    with pytest.raises(RuntimeError, match="not persisted yet"):
+        vision_worker.handle_vision_job(payload)
+
+    payload["ts"] = (datetime.now() - timedelta(hours=1)).isoformat()
+    with pytest.raises(PermanentJobError):
+        vision_worker.handle_vision_job(payload)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the chart render service (process pool + in-process fallback)
+"""
+
+import os
+import sys
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from chart_render_service import ChartRenderService
+from utils.candles import generate_sample_candles
+
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+
+
+def test_pool_render_returns_png_bytes_and_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = ChartRenderService(workers=1, timeout=120)
+    try:
+        out = service.render(
+            "EUR_USD", "H1",
+            candles=generate_sample_candles(days=5)[-100:],
+            signal_action="BUY_NOW",
+            as_bytes=True,
+        )
+    finally:
+        service.shutdown()
+
+    assert out["candles"] == 100
+    assert out["bytes"].startswith(PNG_MAGIC)
+    assert os.path.exists(tmp_path / out["path"])
+
+
+def test_in_process_mode_fetches_candles_when_not_given(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    service = ChartRenderService(workers=0)
+
+    with mock.patch("chart_utils.fetch_candles", return_value=generate_sample_candles(days=3)) as fetch:
+        path = service.render_path("XAU_USD", "M15", count=50)
+
+    fetch.assert_called_once_with("XAU_USD", "M15", 50)
+    assert path.endswith(".png") and os.path.exists(tmp_path / path)
+
+
+def test_failed_render_returns_empty_result():
+    service = ChartRenderService(workers=0)
+
+    with mock.patch("chart_utils.fetch_candles", return_value=[]):
+        assert service.render_bytes("GBP_USD") == b""
+        assert service.render_path("GBP_USD") == ""
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the chart artifact store (index, latest lookup, retention)
+"""
+
+import os
+import sys
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_store import ChartStore
+
+DAY = 86400
+
+
+def _chart(charts_dir, name: str) -> str:
+    symbol = name.split("_")[0]
+    os.makedirs(os.path.join(charts_dir, symbol), exist_ok=True)
+    path = os.path.join(charts_dir, symbol, name)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG fake")
+    return path
+
+
+def _store(tmp_path) -> ChartStore:
+    return ChartStore(db_path=str(tmp_path / "index.sqlite"), charts_dir=str(tmp_path / "charts"))
+
+
+def test_latest_by_symbol_and_timeframe(tmp_path):
+    store = _store(tmp_path)
+    charts = str(tmp_path / "charts")
+    now = time.time()
+
+    store.record(_chart(charts, "EURUSD_M15_20250507_090000.png"), "EUR_USD", "M15", created_at=now - 60)
+    h1 = _chart(charts, "EURUSD_H1_20250507_090010.png")
+    store.record(h1, "EUR_USD", "H1", created_at=now)
+    m15 = _chart(charts, "EURUSD_M15_20250507_091500.png")
+    store.record(m15, "EURUSD", "M15", created_at=now - 30)
+
+    assert store.latest_path("EUR_USD") == h1
+    assert store.latest_path("EUR_USD", "M15") == m15
+    assert store.latest("GBP_USD") is None
+
+
+def test_backfill_indexes_existing_files_on_first_use(tmp_path):
+    charts = str(tmp_path / "charts")
+    _chart(charts, "XAUUSD_H1_20250506_100000.png")
+    newest = _chart(charts, "XAUUSD_H1_20250507_100000_win.png")
+
+    store = _store(tmp_path)
+    assert store.latest_path("XAU_USD", "H1") == newest
+    assert len(store.list("XAU_USD")) == 2
+
+
+def test_retention_deletes_old_and_excess_but_archives_signal_charts(tmp_path):
+    store = _store(tmp_path)
+    charts = str(tmp_path / "charts")
+    now = time.time()
+
+    old = _chart(charts, "GBPUSD_M15_20250101_000000.png")
+    store.record(old, "GBP_USD", "M15", created_at=now - 40 * DAY)
+    evidence = _chart(charts, "GBPUSD_M15_20250101_001500.png")
+    store.record(evidence, "GBP_USD", "M15", created_at=now - 40 * DAY, signal_id=7)
+    recent = []
+    for i in range(4):
+        path = _chart(charts, f"GBPUSD_M15_2025050{i + 1}_000000.png")
+        store.record(path, "GBP_USD", "M15", created_at=now - (4 - i) * 3600)
+        recent.append(path)
+
+    stats = store.apply_retention(max_age_days=30, keep_per_series=3, archive_after_days=0, now=now)
+
+    assert stats == {"deleted": 2, "archived": 1}
+    assert not os.path.exists(old) and not os.path.exists(recent[0]) and not os.path.exists(evidence)
+    assert all(os.path.exists(p) for p in recent[1:])
+
+    archived = [r for r in store.list("GBP_USD", limit=10) if r["archive"]]
+    assert archived[0]["signal_id"] == 7
+    with zipfile.ZipFile(archived[0]["archive"]) as zf:
+        assert os.path.basename(evidence) in zf.namelist()
+    assert store.latest_path("GBP_USD", "M15") == recent[-1]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for the rolling correlation service and its use in the correlation guard
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import SignalAction, TradeSide
+from correlation_service import CorrelationService
+from signal_scoring import signal_scorer
+
+ASSETS = ["EUR_USD", "GBP_USD", "USD_JPY", "XAU_USD"]
+
+
+def _closes(n=160, seed=7):
+    rng = np.random.default_rng(seed)
+    eur = rng.normal(0, 1e-3, n)
+    returns = {
+        "EUR_USD": eur,
+        "GBP_USD": 0.9 * eur + rng.normal(0, 3e-4, n),     # strongly correlated
+        "USD_JPY": -eur,                                    # perfect inverse
+        "XAU_USD": rng.normal(0, 1e-3, n),                  # independent
+    }
+    times = pd.date_range("2025-05-01", periods=n, freq="h")
+    return {a: pd.Series(np.exp(np.cumsum(r)), index=times) for a, r in returns.items()}
+
+
+class _Feed:
+    """Frame loader serving the first `upto` bars (last 100, like load_technical_frame)"""
+
+    def __init__(self, closes, upto):
+        self.closes, self.upto = closes, upto
+
+    def __call__(self, asset, timeframe):
+        return pd.DataFrame({"close": self.closes[asset].iloc[:self.upto].tail(100)}), None
+
+
+def _expected(closes, upto, window):
+    frame = pd.DataFrame({a.replace("_", ""): c.iloc[:upto] for a, c in closes.items()})
+    return np.corrcoef(np.log(frame).diff().dropna().tail(window).to_numpy().T)
+
+
+def test_matrix_matches_numpy_and_updates_incrementally():
+    closes = _closes()
+    feed = _Feed(closes, upto=100)
+    service = CorrelationService(symbols=ASSETS, window=48, min_bars=30, frame_loader=feed)
+
+    assert service.refresh() == 48
+    np.testing.assert_allclose(service._snapshot[1], _expected(closes, 100, 48), atol=1e-9)
+    assert service.correlation("EURUSD", "USD_JPY") == pytest.approx(-1.0)
+    assert abs(service.correlation("EUR_USD", "XAUUSD")) < 0.4
+
+    for upto in range(101, 161):                       # one bar close at a time, > window → exact resync
+        feed.upto = upto
+        assert service.refresh() == 1
+    np.testing.assert_allclose(service._snapshot[1], _expected(closes, 160, 48), atol=1e-9)
+
+    feed.upto = 160
+    assert service.refresh() == 0                      # no new bar
+
+
+def test_not_enough_history_or_unknown_symbols():
+    feed = _Feed(_closes(), upto=20)
+    service = CorrelationService(symbols=ASSETS, window=48, min_bars=30, frame_loader=feed)
+    service.refresh()
+    assert service.correlation("EURUSD", "GBPUSD") is None
+    assert np.isnan(service.row("EURUSD", ["GBPUSD", "NZDUSD"])).all()
+
+    feed.upto = 100
+    service.refresh()
+    row = service.row("EURUSD", ["GBPUSD", "NZDUSD", "USDJPY"])
+    assert row[0] > 0.9 and np.isnan(row[1]) and row[2] == pytest.approx(-1.0)
+
+
+def test_correlation_guard_uses_measured_correlations():
+    # GBP decorrelated from EUR: the static table (0.85) would block, the measured value does not
+    closes = _closes()
+    closes["GBP_USD"] = _closes(seed=11)["XAU_USD"]
+    service = CorrelationService(symbols=ASSETS, window=96, min_bars=30, frame_loader=_Feed(closes, 160))
+    service.refresh()
+    positions = [SimpleNamespace(symbol="GBPUSD", side=TradeSide.BUY, lot=0.2),
+                 SimpleNamespace(symbol="USDJPY", side=TradeSide.BUY, lot=0.1),
+                 SimpleNamespace(symbol="NZDUSD", side=TradeSide.SELL, lot=0.1)]
+
+    with mock.patch("signal_scoring.correlation_service", service):
+        passed, details = signal_scorer.evaluate_correlation("EUR_USD", SignalAction.BUY_NOW, open_trades=positions)
+
+    by_symbol = {c["symbol"]: c for c in details["correlations"]}
+    assert by_symbol["GBPUSD"]["source"] == "rolling" and abs(by_symbol["GBPUSD"]["base_correlation"]) < 0.4
+    assert by_symbol["USDJPY"]["effective_correlation"] == pytest.approx(-1.0)     # long EUR + long USD
+    assert by_symbol["NZDUSD"] == {"symbol": "NZDUSD", "side": "SELL", "net_lots": -0.1, "base_correlation": 0.5,
+                                   "effective_correlation": -0.5, "source": "static"}
+    assert not passed and [c["symbol"] for c in details["high_correlations"]] == ["USDJPY"]
+
+
+def test_lookups_never_fetch_and_refresh_runs_once_per_bar_close():
+    feed = mock.Mock(wraps=_Feed(_closes(), upto=100))
+    service = CorrelationService(symbols=ASSETS, window=48, min_bars=30, frame_loader=feed)
+
+    assert service.correlation("EURUSD", "GBPUSD") is None and np.isnan(service.row("EURUSD", ["GBPUSD"])).all()
+    feed.assert_not_called()                           # lookups only read the snapshot
+
+    assert service.maybe_refresh() == 48 and feed.call_count == len(ASSETS)
+    assert service.correlation("EURUSD", "USDJPY") == pytest.approx(-1.0)
+    assert service.maybe_refresh() == 0 and feed.call_count == len(ASSETS)     # next bar not closed yet
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory exposure book and the checks that read it
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, SignalAction, Trade, TradeSide, TradeStatus
+from exposure_book import ExposureBook, currency_legs
+
+
+def _trade(ticket, symbol, side, lot, status=TradeStatus.OPEN):
+    return SimpleNamespace(ticket=ticket, id=None, symbol=symbol, side=side, lot=lot, status=status)
+
+
+def _book(*trades):
+    book = ExposureBook(resync_seconds=3600)
+    book._loaded_at = float("inf")                  # no DB reload in these tests
+    book.apply_many(trades)
+    return book
+
+
+def test_currency_legs_net_out():
+    book = _book(_trade("1", "EURUSD", TradeSide.BUY, 1.0),
+                 _trade("2", "USD_JPY", TradeSide.BUY, 0.5),
+                 _trade("3", "XAUUSD.s", TradeSide.SELL, 0.2))
+
+    assert book.currency_exposure() == {"EUR": 1.0, "USD": -0.3, "JPY": -0.5, "XAU": -0.2}
+    assert book.currency_exposure(extra=("GBPUSD", -1.0))["USD"] == pytest.approx(0.7)
+    assert currency_legs("XAU_USD") == ("XAU", "USD") and currency_legs("US30") is None
+
+
+def test_events_upsert_hedge_and_close():
+    book = _book(_trade("1", "EURUSD", TradeSide.BUY, 0.3), _trade("2", "EURUSD", TradeSide.SELL, 0.1))
+    assert book.open_count("EUR_USD") == 2 and book.symbol_net("EURUSD") == pytest.approx(0.2)
+
+    book.apply(_trade("2", "EURUSD", TradeSide.SELL, 0.3))       # lot modified → replaced, not added
+    assert book.open_count("EURUSD") == 2 and book.symbol_net("EURUSD") == pytest.approx(0.0)
+    assert book.gross_lots() == {"EURUSD": pytest.approx(0.6)}
+
+    book.apply(_trade("1", "EURUSD", TradeSide.BUY, 0.3, status=TradeStatus.CLOSED))
+    book.apply(_trade("1", "EURUSD", TradeSide.BUY, 0.3, status=TradeStatus.CLOSED))   # re-reported close
+    assert book.open_count("EURUSD") == 1 and book.net_positions() == {"EURUSD": pytest.approx(-0.3)}
+
+
+def test_risk_guard_caps_symbols_from_the_db_and_reads_exposure_from_the_book():
+    import mt5_ea_api
+
+    book = _book(*[_trade(str(i), "GBPUSD", TradeSide.BUY, 1.0) for i in range(3)])
+    book.update_account(balance=10_000, free_margin=6_000)
+    with app.app_context():
+        # recorded by another worker: not in this process's book yet
+        db.session.add_all([Trade(ticket=f"cap{i}", symbol="CADCHF", side=TradeSide.BUY, lot=0.1,
+                                  status=TradeStatus.OPEN) for i in range(3)])
+        db.session.commit()
+        try:
+            with mock.patch.object(mt5_ea_api, "exposure_book", book), \
+                 mock.patch.object(mt5_ea_api, "MAX_CURRENCY_LOTS", 2.5):
+                assert mt5_ea_api._risk_guard("CADCHF") == (False, "3 open CADCHF trades (max 3)")
+                ok, reason = mt5_ea_api._risk_guard("EURUSD", TradeSide.SELL)       # adds long USD: fine
+                assert ok and reason == "pass"
+                ok, reason = mt5_ea_api._risk_guard("EURUSD", TradeSide.BUY)        # adds short USD: 3 lots already
+                assert not ok and reason == "Already short 3.00 lots USD (max 2.5)"
+
+                book.update_account(free_margin=2_000)
+                assert mt5_ea_api._risk_guard("EURUSD")[1] == "Free-margin 20.0% < 30%"
+        finally:
+            Trade.query.filter_by(symbol="CADCHF").delete()
+            db.session.commit()
+
+
+def test_correlation_guard_nets_hedged_positions():
+    from signal_scoring import signal_scorer
+
+    book = _book(_trade("1", "GBPUSD", TradeSide.BUY, 0.5), _trade("2", "GBPUSD", TradeSide.SELL, 0.5),
+                 _trade("3", "USDJPY", TradeSide.SELL, 0.2))
+    with mock.patch("signal_scoring.exposure_book", book), \
+         mock.patch("signal_scoring.correlation_service.row", side_effect=lambda s, o: [float("nan")] * len(o)):
+        passed, details = signal_scorer.evaluate_correlation("EURUSD", SignalAction.BUY_NOW)
+
+    assert passed and details["existing_positions"] == 3
+    assert [c["symbol"] for c in details["correlations"]] == ["USDJPY"]      # flat GBPUSD ignored
+    assert details["lot_weighted_correlation"] == pytest.approx(0.65)
+
+
+def test_book_follows_trade_report_and_closed_updates():
+    from exposure_book import exposure_book
+    from performance_stats import performance_stats
+
+    with app.app_context():
+        exposure_book.load()
+        client = app.test_client()
+        report = {"account_id": "t", "symbol": "AUDNZD", "action": "BUY_NOW", "status": "success",
+                  "ticket": "7701", "lot_size": 0.4, "signal_id": 1}
+        with mock.patch("mt5_ea_api.trade_logger"):
+            assert client.post("/mt5/trade_report", json=report).status_code == 200
+        assert exposure_book.symbol_net("AUDNZD") == pytest.approx(0.4)
+
+        closed = {"account_id": "t", "closed_trades": {"7701": {"symbol": "AUDNZD", "type": "BUY",
+                                                                "lot": 0.4, "profit": 1.0}}}
+        client.post("/mt5/update_trades/closed", json=closed)
+        assert exposure_book.open_count("AUDNZD") == 0
+
+        Trade.query.filter_by(symbol="AUDNZD").delete()
+        db.session.commit()
+        performance_stats.rebuild()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the batched ML inference service and its model registry
+"""
+
+import os
+import shutil
+import sys
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml import exit_inference, model_inference, model_inference_rr
+from ml.inference_service import InferenceService, ModelRegistry, MODELS_DIR
+from position_manager import Position, PositionManager
+
+PROB_COLUMNS = ("open", "high", "low", "close", "volume", "ema20", "ema50", "ema200",
+                "rsi", "macd", "macd_sig", "macd_hist")
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = InferenceService(ModelRegistry(MODELS_DIR))
+    service.warm()
+    return service
+
+
+def _rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 1.1 + rng.normal(0, 0.01, n)
+    return [{"open": c - 0.001, "high": c + 0.002, "low": c - 0.002, "close": c, "volume": 0.0,
+             "ema20": c, "ema50": c - 0.001, "ema200": c - 0.002, "rsi": 30 + 40 * rng.random(),
+             "macd": rng.normal(0, 1e-3), "signal": rng.normal(0, 1e-3), "histogram": rng.normal(0, 1e-4)}
+            for c in close]
+
+
+def test_registry_loads_every_model_once(service):
+    stats = service.registry.stats()
+    assert stats["kinds"]["prob"] == ["H1", "M1", "M15"]
+    assert "EURUSD_H1" in stats["kinds"]["rr"] and "XAUUSD_H1" in stats["kinds"]["exit"]
+    assert service.columns("prob", timeframe="H1") == PROB_COLUMNS
+    assert service.columns("rr", "EURUSD", "H1") == ("atr", "vwap", "range", "session_hour")
+
+    with mock.patch("ml.inference_service.joblib.load") as load:
+        service.predict_rows("prob", [(None, "H1", {"close": 1.1})] * 3)
+        service.predict_rows("exit", [("GBPUSD", "H1", {"atr": 0.001})])
+    load.assert_not_called()
+
+
+def test_batch_matches_per_row_dataframe_predictions(service):
+    rows = [model_inference._features(r) for r in _rows(20)]
+    entry = service.registry.get("prob", "H1")
+    expected = [entry.model.predict_proba(pd.DataFrame([r])[list(entry.columns)])[0][1] for r in rows]
+
+    batched = service.predict_rows("prob", [("EURUSD", "H1", r) for r in rows])
+    X = np.array([[r[c] for c in service.columns("prob", timeframe="H1")] for r in rows])
+
+    np.testing.assert_allclose(batched, expected, rtol=1e-6)
+    np.testing.assert_allclose(service.predict("prob", X, timeframe="H1"), expected, rtol=1e-6)
+
+
+def test_one_model_call_per_group_and_fallbacks(service):
+    requests = [("GBPUSD", "H1", {"bars_open": i, "atr": 0.001, "range": 0.002}) for i in range(5)]
+    requests += [("XAUUSD", "H1", {"bars_open": 3, "atr": 2.0, "range": 3.0}),
+                 ("EURUSD", "H1", {"bars_open": 1})]                            # no EURUSD exit model
+    entry = service.registry.get("exit", "GBPUSD_H1")
+    with mock.patch.object(entry.booster, "inplace_predict", wraps=entry.booster.inplace_predict) as call:
+        p_hold = service.predict_rows("exit", requests)
+
+    assert call.call_count == 1 and call.call_args[0][0].shape == (5, 6)
+    assert np.isnan(call.call_args[0][0][:, 3]).all()                           # missing features → NaN
+    assert p_hold[-1] == 0.5 and ((p_hold >= 0) & (p_hold <= 1)).all()
+
+    assert service.predict_rows("rr", [("NZDUSD", "H1", {})])[0] == 1.5
+    assert (service.predict_rows("rr", [("EURUSD", "H1", {"atr": 0.001, "vwap": 1.1, "range": 0.002,
+                                                          "session_hour": 9})]) >= 1.0).all()
+
+
+def test_compiled_booster_matches_the_pickle(tmp_path):
+    for name in ("M15.pkl", "USDJPY_H1_rr.pkl"):
+        shutil.copy(os.path.join(MODELS_DIR, name), tmp_path / name)
+    registry = ModelRegistry(str(tmp_path))
+    registry.load_all()
+    assert registry.stats()["compiled"] == 0
+    rows = [model_inference._features(r) for r in _rows(10, seed=3)]
+    rr_rows = [{"atr": 0.1 * i, "vwap": 150.0, "range": 0.2, "session_hour": i} for i in range(10)]
+    service = InferenceService(registry)
+    before = (service.predict_rows("prob", [(None, "M15", r) for r in rows]),
+              service.predict_rows("rr", [("USDJPY", "H1", r) for r in rr_rows]))
+
+    written = registry.export_boosters()
+    assert sorted(os.path.basename(p) for p in written) == ["M15.ubj", "USDJPY_H1_rr.ubj"]
+    assert registry.stats()["compiled"] == 2 and registry.export_boosters() == []
+    rr = registry.get("rr", "USDJPY_H1")
+    assert rr.booster.feature_names == ["atr", "vwap", "range", "session_hour"]   # names filled in on export
+
+    with mock.patch.object(registry.get("prob", "M15").model, "predict_proba") as wrapper:
+        after = (service.predict_rows("prob", [(None, "M15", r) for r in rows]),
+                 service.predict_rows("rr", [("USDJPY", "H1", r) for r in rr_rows]))
+    wrapper.assert_not_called()
+    np.testing.assert_allclose(after[0], before[0], rtol=1e-6)
+    np.testing.assert_allclose(after[1], before[1], rtol=1e-6)
+
+
+def test_public_helpers_route_through_the_service():
+    row = _rows(1)[0]
+    entry = model_inference.inference_service.registry.get("prob", "M15")
+    expected = entry.model.predict_proba(pd.DataFrame([model_inference._features(row)])[list(entry.columns)])[0][1]
+
+    assert model_inference.predict_one("EURUSD", "M15", pd.Series(row)) == pytest.approx(expected, rel=1e-6)
+    assert model_inference.predict_one("EURUSD", "H4", row) == 0.5
+    assert isinstance(model_inference._load("H4"), model_inference.DummyModel)
+    assert model_inference_rr.predict_rr("NZDUSD", "H1", {}) == 1.5
+    assert exit_inference.predict_exit_prob("EURUSD", "H1", {}) == 0.5
+
+
+def test_position_manager_scores_all_positions_in_one_batch():
+    pm = PositionManager()
+    for i, symbol in enumerate(("GBPUSD", "GBPUSD", "USDJPY")):
+        pm.positions.append(Position(symbol, "buy", 1.0, 0.99, 1.02, 1.0, 0.0, ticket=i, context_tf="H1"))
+    pm.positions[2].entry, pm.positions[2].sl, pm.positions[2].tp = 150.0, 149.0, 152.0
+    quotes = {"GBPUSD": (1.001, 1.002, 1.0, 0.001), "USDJPY": (150.1, 150.2, 150.0, 0.1)}
+
+    with mock.patch("position_manager.predict_exit_probs", return_value=np.array([0.9, 0.2, 0.9])) as batch, \
+         mock.patch.object(pm, "_send_close_ticket") as close:
+        pm.update_quotes(quotes)
+
+    assert batch.call_count == 1
+    requests = batch.call_args[0][0]
+    assert [r[0] for r in requests] == ["GBPUSD", "GBPUSD", "USDJPY"]
+    assert requests[2][2]["range"] == pytest.approx(0.2)                        # USDJPY priced at its own quote
+    close.assert_called_once()
+    assert [p.ticket for p in pm.positions] == [0, 2] and pm.positions[0].bars_open == 2
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable job queue and the Vision queue consumer
+"""
+
+import os
+import sys
+import time
+import threading
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from job_queue import VISION_QUEUE, RedisJobQueue, SQLiteJobQueue, connect_redis
+
+RESULT = {"action": "BUY_NOW", "entry": 1.1, "sl": 1.09, "tp": 1.12, "confidence": 0.8}
+
+
+def _queue(tmp_path, **kwargs):
+    kwargs.setdefault("visibility_timeout", 30)
+    kwargs.setdefault("max_attempts", 3)
+    kwargs.setdefault("retry_backoff", 0)
+    return SQLiteJobQueue(db_path=str(tmp_path / "jobs.sqlite"), **kwargs)
+
+
+def test_enqueue_reserve_ack(tmp_path):
+    q = _queue(tmp_path)
+    q.enqueue(VISION_QUEUE, {"id": "a", "symbol": "EUR_USD"})
+    q.enqueue(VISION_QUEUE, {"id": "a", "symbol": "EUR_USD"})         # idempotent
+    q.enqueue(VISION_QUEUE, {"id": "b", "symbol": "GBP_USD"})
+
+    job = q.reserve(VISION_QUEUE)
+    assert (job.id, job.attempts, job.payload["symbol"]) == ("a", 1, "EUR_USD")
+    assert q.stats(VISION_QUEUE) == {"ready": 1, "delayed": 0, "leased": 1, "dead": 0}
+
+    assert q.ack(job)
+    assert q.reserve(VISION_QUEUE).id == "b"
+    assert q.reserve(VISION_QUEUE) is None
+
+
+def test_expired_lease_is_redelivered_and_stale_ack_ignored(tmp_path):
+    q = _queue(tmp_path)
+    q.enqueue(VISION_QUEUE, {"id": "a"})
+    first = q.reserve(VISION_QUEUE, visibility_timeout=0.05)
+    assert q.reserve(VISION_QUEUE) is None          # invisible while leased
+
+    time.sleep(0.1)
+    second = q.reserve(VISION_QUEUE)
+    assert second.id == "a" and second.attempts == 2
+    assert not q.ack(first)                          # crashed worker came back too late
+    assert q.ack(second)
+
+
+def test_retry_backoff_then_dead_letter(tmp_path):
+    q = _queue(tmp_path, max_attempts=2, retry_backoff=60)
+    q.enqueue(VISION_QUEUE, {"id": "a"})
+
+    assert q.fail(q.reserve(VISION_QUEUE), "vision timeout") == "ready"
+    assert q.reserve(VISION_QUEUE) is None           # waiting out the backoff
+    assert q.stats(VISION_QUEUE)["delayed"] == 1
+
+    q.retry_backoff = 0
+    q._db().execute("UPDATE jobs SET available_at = 0")
+    assert q.fail(q.reserve(VISION_QUEUE), "vision timeout") == "dead"
+
+    dead = q.dead_letters(VISION_QUEUE)
+    assert [(d["id"], d["attempts"], d["last_error"]) for d in dead] == [("a", 2, "vision timeout")]
+    assert q.requeue_dead(VISION_QUEUE) == 1
+    assert q.reserve(VISION_QUEUE).attempts == 1
+
+
+def test_concurrent_workers_never_share_a_job(tmp_path):
+    q = _queue(tmp_path)
+    for i in range(60):
+        q.enqueue(VISION_QUEUE, {"id": str(i)})
+
+    seen, lock = [], threading.Lock()
+
+    def worker():
+        own = SQLiteJobQueue(db_path=q.db_path, visibility_timeout=30)    # separate connection
+        while (job := own.reserve(VISION_QUEUE)) is not None:
+            with lock:
+                seen.append(job.id)
+            own.ack(job)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(seen, key=int) == [str(i) for i in range(60)]
+
+
+def test_redis_backend_round_trip():
+    client = connect_redis()
+    if client is None:
+        pytest.skip("no Redis server reachable")
+    queue = f"test_queue_{os.getpid()}"
+    q = RedisJobQueue(client, visibility_timeout=30, max_attempts=2, retry_backoff=0)
+    try:
+        q.enqueue(queue, {"id": "a"})
+        job = q.reserve(queue)
+        assert q.fail(job, "boom") == "ready"
+        job = q.reserve(queue)
+        assert job.attempts == 2
+        assert q.fail(job, "boom") == "dead"
+        assert q.dead_letters(queue)[0]["id"] == "a"
+    finally:
+        client.delete(queue, *(f"{queue}:{k}" for k in ("processing", "leases", "delayed", "dead", "attempts")))
+
+
+def test_vision_consumer_acks_retries_and_dead_letters(tmp_path, monkeypatch):
+    import vision_worker
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static/charts/EURUSD")
+    chart = "charts/EURUSD/EURUSD_H1_20250507_130010.png"
+    open(f"static/{chart}", "wb").close()
+
+    q = _queue(tmp_path)
+    q.enqueue(VISION_QUEUE, {"id": "ok", "symbol": "EUR_USD", "timeframe": "H1", "image_s3": chart})
+    q.enqueue(VISION_QUEUE, {"id": "flaky", "symbol": "EUR_USD", "timeframe": "H1", "image_s3": chart})
+    q.enqueue(VISION_QUEUE, {"id": "gone", "symbol": "EUR_USD", "timeframe": "H1", "image_s3": "charts/x.png"})
+
+    results = iter([RESULT, RuntimeError("Vision API request timed out"), RESULT])
+
+    def analyze(symbol, charts):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return {"H1": result}
+
+    with mock.patch.object(vision_worker.vision_gate, "check", return_value=(True, {})), \
+         mock.patch.object(vision_worker, "analyze_charts_cached", side_effect=analyze), \
+         mock.patch.object(vision_worker.DirectVisionPipeline, "process_chart", return_value=True) as process:
+        assert vision_worker.process_vision_queue(q, until_empty=True) == 4
+
+    assert process.call_count == 2
+    process.assert_called_with("EUR_USD", f"static/{chart}", vision_result=RESULT)
+    assert q.stats(VISION_QUEUE) == {"ready": 0, "delayed": 0, "leased": 0, "dead": 1}
+    assert q.dead_letters(VISION_QUEUE)[0]["id"] == "gone"
+
+
+def test_no_setup_from_the_rules_analyzer_is_acked_not_retried(tmp_path, monkeypatch):
+    import vision_worker
+    from utils.candles import trend_frame
+    from signal_analyzers import get_analyzer
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SIGNAL_ANALYZER", "rules")
+    monkeypatch.delenv("SIGNAL_SHADOW_ANALYZERS", raising=False)
+    os.makedirs("static/charts/EURUSD")
+    chart = "charts/EURUSD/EURUSD_H1_20250507_130010.png"
+    open(f"static/{chart}", "wb").close()
+
+    q = _queue(tmp_path)
+    q.enqueue(VISION_QUEUE, {"id": "flat", "symbol": "EUR_USD", "timeframe": "H1", "image_s3": chart})
+    with mock.patch.object(vision_worker.vision_gate, "check", return_value=(True, {})), \
+         mock.patch.object(get_analyzer("rules"), "frame_loader", return_value=(trend_frame(0.0005, n=100), None)), \
+         mock.patch.object(vision_worker.DirectVisionPipeline, "process_chart") as process:
+        assert vision_worker.process_vision_queue(q, until_empty=True) == 1
+
+    process.assert_not_called()
+    assert q.stats(VISION_QUEUE) == {"ready": 0, "delayed": 0, "leased": 0, "dead": 0}
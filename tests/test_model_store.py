@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Tests for versioned model publishing, hot reload and rollback
+"""
+
+import json
+import os
+import shutil
+import sys
+from unittest import mock
+
+import joblib
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.inference_service import InferenceService, ModelRegistry, MODELS_DIR
+from ml.model_store import ModelStore
+
+ROW = {"open": 1.1, "high": 1.102, "low": 1.098, "close": 1.101, "volume": 0.0, "ema20": 1.1,
+       "ema50": 1.099, "ema200": 1.098, "rsi": 61.0, "macd": 4e-4, "macd_sig": 2e-4, "macd_hist": 2e-4}
+
+
+@pytest.fixture
+def root(tmp_path):
+    for name in ("H1.pkl", "H1.ubj", "GBPUSD_H1_exit.pkl"):
+        shutil.copy(os.path.join(MODELS_DIR, name), tmp_path / name)
+    return tmp_path
+
+
+def _h1(service):
+    return float(service.predict_rows("prob", [(None, "H1", ROW)])[0])
+
+
+def test_publish_snapshots_and_carries_models_over(root):
+    store = ModelStore(str(root))
+    first = store.publish(note="snapshot")
+    manifest = store.manifest()
+    assert manifest["version"] == first and manifest["previous"] is None
+    assert sorted(manifest["models"]) == ["GBPUSD_H1_exit.pkl", "H1.pkl"]
+    assert manifest["models"]["H1.pkl"]["files"] == ["H1.pkl", "H1.ubj"]
+
+    retrained = joblib.load(os.path.join(MODELS_DIR, "M15.pkl"))
+    second = store.publish({"H1.pkl": retrained}, {"H1.pkl": {"rows": 10, "train_logloss": 0.6}}, note="retrain")
+    manifest = store.manifest()
+    version_dir = root / "versions" / second
+    assert manifest["previous"] == first and manifest["note"] == "retrain"
+    assert manifest["models"]["H1.pkl"]["metrics"] == {"rows": 10, "train_logloss": 0.6}
+    assert manifest["models"]["H1.pkl"]["version"] == second
+    assert manifest["models"]["GBPUSD_H1_exit.pkl"]["version"] == first       # carried over unchanged
+    assert sorted(os.listdir(version_dir)) == ["GBPUSD_H1_exit.pkl", "H1.pkl", "H1.ubj", "manifest.json"]
+    assert json.loads((version_dir / "manifest.json").read_text()) == manifest
+    assert [v["version"] for v in store.versions()] == [second, first] and store.versions()[0]["live"]
+
+
+def test_running_registry_hot_swaps_and_rolls_back(root):
+    store = ModelStore(str(root))
+    first = store.publish()
+    service = InferenceService(ModelRegistry(str(root), check_seconds=0))
+    before = _h1(service)
+    assert service.registry.version == first
+
+    store.publish({"H1.pkl": joblib.load(os.path.join(MODELS_DIR, "M15.pkl"))})
+    after = _h1(service)                                       # no restart, no explicit reload
+    assert service.registry.version != first and after != pytest.approx(before)
+
+    assert store.rollback() == first
+    assert _h1(service) == pytest.approx(before) and service.registry.version == first
+    with pytest.raises(ValueError):
+        store.rollback()                                       # the snapshot has no predecessor
+
+
+def test_failed_publish_leaves_the_live_version_untouched(root):
+    store = ModelStore(str(root))
+    first = store.publish()
+    service = InferenceService(ModelRegistry(str(root), check_seconds=0))
+    before = _h1(service)
+
+    with mock.patch("ml.model_store.joblib.dump", side_effect=OSError("disk full")), pytest.raises(OSError):
+        store.publish({"H1.pkl": joblib.load(os.path.join(MODELS_DIR, "M15.pkl"))})
+
+    assert store.manifest()["version"] == first
+    assert os.listdir(root / "versions") == [first]            # temp directory cleaned up
+    assert _h1(service) == pytest.approx(before)
+
+
+def test_old_versions_are_pruned(root):
+    store = ModelStore(str(root), keep=2)
+    versions = [store.publish(note=str(i)) for i in range(4)]
+    assert sorted(os.listdir(root / "versions")) == sorted(versions[-2:])
+    assert store.rollback() == versions[-2]
+    assert np.isfinite(_h1(InferenceService(ModelRegistry(str(root)))))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the rolling per-symbol performance statistics
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, SignalAction, SymbolPerformance, Trade, TradeSide, TradeStatus
+from performance_stats import BACKFILL_MARKER, performance_stats
+from signal_scoring import signal_scorer
+
+NOW = datetime.now()
+SYMBOL = "NZDCAD"           # not used by any other test
+
+
+@pytest.fixture
+def ctx():
+    with app.app_context():
+        yield
+        db.session.rollback()
+        Trade.query.filter_by(symbol=SYMBOL).delete()
+        SymbolPerformance.query.filter_by(symbol=SYMBOL).delete()
+        db.session.commit()
+
+
+def _close(ticket, pnl, days_ago, side=TradeSide.BUY):
+    trade = Trade(ticket=ticket, symbol=SYMBOL, side=side, lot=0.1, pnl=pnl, status=TradeStatus.CLOSED,
+                  closed_at=NOW - timedelta(days=days_ago) if days_ago is not None else None)
+    db.session.add(trade)
+    performance_stats.apply(trade)
+    db.session.commit()
+    return trade
+
+
+def test_windows_come_from_daily_buckets(ctx):
+    for ticket, pnl, days in (("1", 10.0, 1), ("2", -4.0, 3), ("3", 6.0, 20), ("4", -2.0, 200), ("5", 1.0, None)):
+        _close(ticket, pnl, days)
+    _close("6", -1.0, 1, side=TradeSide.SELL)
+
+    week = performance_stats.window(SYMBOL, TradeSide.BUY, days=7)
+    assert (week["total_trades"], week["profitable_trades"], week["losing_trades"]) == (2, 1, 1)
+    assert (week["total_profit"], week["win_profit"], week["loss_profit"]) == (6.0, 10.0, -4.0)
+    assert week["total_trades_in_db"] == 5                    # undated close counts all-time only
+
+    quarter = performance_stats.window(SYMBOL, TradeSide.BUY, days=90)
+    assert (quarter["total_trades"], quarter["total_profit"]) == (3, 12.0)
+    assert performance_stats.window(SYMBOL, TradeSide.SELL, days=90)["total_trades"] == 1
+
+
+def test_apply_is_idempotent_and_tracks_corrections(ctx):
+    trade = _close("1", 10.0, 1)
+    assert not performance_stats.apply(trade)                 # re-reported close → no change
+
+    trade.pnl = -3.0                                          # broker P&L correction
+    assert performance_stats.apply(trade)
+    trade.closed_at = NOW - timedelta(days=40)                # close time fixed later
+    performance_stats.apply(trade)
+    db.session.commit()
+    assert performance_stats.window(SYMBOL, TradeSide.BUY, days=7)["total_trades"] == 0
+    stats = performance_stats.window(SYMBOL, TradeSide.BUY, days=90)
+    assert (stats["total_trades"], stats["profitable_trades"], stats["total_profit"]) == (1, 0, -3.0)
+
+    trade.status = TradeStatus.OPEN                           # reopened / wrongly closed
+    performance_stats.apply(trade)
+    db.session.commit()
+    assert performance_stats.window(SYMBOL, TradeSide.BUY)["total_trades_in_db"] == 0
+    assert "perf_stats" not in trade.context
+
+
+def test_rebuild_matches_incremental_updates(ctx):
+    for ticket, pnl, days in (("1", 10.0, 1), ("2", -4.0, 3), ("3", 6.0, 100)):
+        _close(ticket, pnl, days)
+    incremental = performance_stats.window(SYMBOL, TradeSide.BUY)
+    performance_stats.rebuild()
+    assert performance_stats.window(SYMBOL, TradeSide.BUY) == incremental
+
+
+def test_trade_closed_before_the_first_lookup_does_not_skip_the_backfill(ctx, monkeypatch):
+    SymbolPerformance.query.filter_by(symbol=BACKFILL_MARKER).delete()
+    db.session.add(Trade(ticket="old", symbol=SYMBOL, side=TradeSide.BUY, lot=0.1, pnl=4.0,
+                         status=TradeStatus.CLOSED, closed_at=NOW - timedelta(days=30)))   # pre-deploy history
+    db.session.commit()
+    monkeypatch.setattr(performance_stats, "_checked", False)
+
+    _close("new", -1.0, 1)                                    # reported before anything looked stats up
+    stats = performance_stats.window(SYMBOL, TradeSide.BUY, days=90)
+    assert (stats["total_trades"], stats["profitable_trades"], stats["total_profit"]) == (2, 1, 3.0)
+    assert SymbolPerformance.query.filter_by(symbol=BACKFILL_MARKER).count() == 1
+
+    monkeypatch.setattr(performance_stats, "_checked", False)   # another process: marker → no second rebuild
+    with mock.patch.object(performance_stats, "rebuild") as rebuild:
+        performance_stats.window(SYMBOL, TradeSide.BUY)
+    rebuild.assert_not_called()
+
+
+def test_closed_trade_report_updates_stats(ctx):
+    client = app.test_client()
+    body = {"account_id": "test", "closed_trades": {
+        "9001": {"symbol": SYMBOL, "type": "SELL", "lot": 0.1, "profit": 7.5,
+                 "closed_at": (NOW - timedelta(hours=2)).strftime("%Y.%m.%d %H:%M:%S")}}}
+    assert client.post("/mt5/update_trades/closed", json=body).get_json()["updated_count"] == 1
+    client.post("/mt5/update_trades/closed", json=body)        # duplicate report
+
+    stats = performance_stats.window(SYMBOL, TradeSide.SELL)
+    assert (stats["total_trades"], stats["profitable_trades"], stats["total_profit"]) == (1, 1, 7.5)
+
+
+def test_adjustment_is_one_lookup(ctx):
+    for ticket, pnl, days in (("1", 10.0, 1), ("2", 5.0, 2), ("3", -4.0, 3)):
+        _close(ticket, pnl, days)
+
+    with mock.patch.object(Trade, "query", new_callable=mock.PropertyMock) as trade_query:
+        factor, details = signal_scorer.evaluate_performance_adjustment(SYMBOL, SignalAction.BUY_NOW)
+    trade_query.assert_not_called()                           # no trade-table scan
+    assert details["total_trades"] == 3 and details["profitable_trades"] == 2
+    assert factor == pytest.approx(0.8) and details["evaluation"] == "good"
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the dedicated scheduler process and its leader lock
+"""
+
+import os
+import sys
+import threading
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scheduler
+import scheduler_runner
+from scheduler_runner import LeaderLock
+
+
+def test_file_lock_elects_a_single_leader(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    leader, standby = LeaderLock(backend="file", path=path), LeaderLock(backend="file", path=path)
+
+    assert leader.acquire() and leader.acquire()            # re-entrant for the holder
+    assert not standby.acquire()
+    assert standby.holder() == str(os.getpid())
+
+    leader.release()
+    assert standby.acquire()
+    standby.release()
+
+
+def test_standby_waits_without_starting_the_scheduler(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    leader = LeaderLock(backend="file", path=path)
+    assert leader.acquire()
+    stop = threading.Event()
+    stop.set()
+
+    with mock.patch.object(scheduler, "start_scheduler") as start:
+        assert scheduler_runner.run(LeaderLock(backend="file", path=path), stop=stop, standby_seconds=0) == 0
+    start.assert_not_called()
+    leader.release()
+
+
+def test_leader_hosts_the_scheduler_and_releases_on_stop(tmp_path):
+    lock = LeaderLock(backend="file", path=str(tmp_path / "scheduler.lock"))
+    stop = threading.Event()
+    sched = mock.Mock(running=True)
+
+    def start():
+        stop.set()
+        return sched
+
+    with mock.patch.object(scheduler, "start_scheduler", side_effect=start), \
+         mock.patch.object(scheduler_runner, "add_monitoring_job") as monitoring:
+        assert scheduler_runner.run(lock, monitoring=True, stop=stop) == 0
+
+    monitoring.assert_called_once_with(sched)
+    sched.shutdown.assert_called_once_with(wait=False)
+    assert not lock.held
+
+
+def test_importing_the_web_app_starts_no_scheduler():
+    import app as web
+
+    assert getattr(web.app, "_booted", False)
+    assert not hasattr(web.app, "scheduler")
+
+
+def test_lost_lock_stops_the_scheduler_and_returns_to_standby(tmp_path):
+    lock = LeaderLock(backend="file", path=str(tmp_path / "scheduler.lock"))
+    stop = threading.Event()
+    first, second = mock.Mock(running=True), mock.Mock(running=True)
+    schedulers = iter([first, second])
+
+    def start():
+        sched = next(schedulers)
+        if sched is second:
+            stop.set()                              # leader again: shut down cleanly
+        return sched
+
+    with mock.patch.object(scheduler, "start_scheduler", side_effect=start), \
+         mock.patch.object(lock, "alive", return_value=False) as alive:
+        assert scheduler_runner.run(lock, monitoring=False, stop=stop, standby_seconds=0, check_seconds=0) == 0
+
+    alive.assert_called_once()
+    first.shutdown.assert_called_once_with(wait=False)       # no second scheduler while the first runs
+    second.shutdown.assert_called_once_with(wait=False)
+    assert not lock.held
+
+
+def test_stopping_the_leader_stops_the_embedded_vision_consumer(tmp_path):
+    import vision_worker
+
+    lock = LeaderLock(backend="file", path=str(tmp_path / "scheduler.lock"))
+    stop = threading.Event()
+    consumed = threading.Event()
+
+    def consume(stop_event=None, **kwargs):
+        consumed.set()
+        stop_event.wait()
+
+    def start():
+        scheduler._vision_consumer = vision_worker.start_worker_thread()
+        stop.set()
+        return mock.Mock(running=True)
+
+    with mock.patch.object(vision_worker, "process_vision_queue", side_effect=consume), \
+         mock.patch.object(scheduler, "start_scheduler", side_effect=start):
+        assert scheduler_runner.run(lock, monitoring=False, stop=stop) == 0
+
+    assert consumed.is_set()
+    assert not any(t.name == "vision-worker" for t in threading.enumerate())
+    assert scheduler._vision_consumer is None
+
+
+def test_postgres_lock_reports_a_dropped_connection():
+    lock = LeaderLock(backend="postgres", database_url="postgresql://unused")
+    conn = mock.Mock()
+    lock._handle = conn
+    assert lock.alive()
+
+    conn.execute.side_effect = OSError("server closed the connection unexpectedly")
+    assert not lock.alive() and not lock.held
+    conn.close.assert_called_once()
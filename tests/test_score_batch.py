@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for SignalScorer.score_batch (shared data loads, same decisions)
+"""
+
+import os
+import sys
+import json
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db, Signal, SignalAction, SignalStatus, Trade, TradeSide, TradeStatus
+from exposure_book import exposure_book
+from performance_stats import performance_stats
+from signal_scoring import signal_scorer
+from utils.candles import trend_frame
+
+SYMBOLS = ("EURUSD", "GBPUSD")
+
+
+@pytest.fixture
+def trades():
+    with app.app_context():
+        now = datetime.now()
+        rows = [
+            Trade(symbol="EURUSD", side=TradeSide.BUY, lot=0.1, pnl=pnl, status=TradeStatus.CLOSED,
+                  closed_at=now - timedelta(days=days))
+            for pnl, days in ((12.0, 1), (8.0, 2), (-5.0, 3), (4.0, 200))
+        ] + [Trade(symbol="USDJPY", side=TradeSide.SELL, lot=0.1, status=TradeStatus.OPEN, opened_at=now)]
+        db.session.add_all(rows)
+        db.session.commit()
+        performance_stats.rebuild()
+        exposure_book.load()
+        yield rows
+        for row in rows:
+            db.session.delete(row)
+        db.session.commit()
+        performance_stats.rebuild()
+        exposure_book.load()
+
+
+def _signal(symbol, action, entry, sl, confidence, timeframe):
+    return Signal(symbol=symbol, action=action, entry=entry, sl=sl, tp=entry + 3 * (entry - sl),
+                  confidence=confidence, status=SignalStatus.PENDING.value,
+                  context_json=json.dumps({"timeframe": timeframe}))
+
+
+def test_batch_matches_single_scoring_with_shared_loads(trades):
+    frame = (trend_frame(0.0005), None)
+    with app.app_context():
+        signals = [
+            _signal("EURUSD", SignalAction.BUY_NOW, 1.15, 1.148, 0.9, "M15"),
+            _signal("EURUSD", SignalAction.ANTICIPATED_LONG, 1.149, 1.147, 0.5, "M15"),
+            _signal("GBPUSD", SignalAction.SELL_NOW, 1.30, 1.305, 0.9, "H1"),
+        ]
+        with mock.patch("signal_scoring.get_atr", return_value=10.0) as atr, \
+             mock.patch.object(signal_scorer, "load_technical_frame", return_value=frame) as frames, \
+             mock.patch("ml.model_inference.predict_one", return_value=0.2), \
+             mock.patch("signal_scoring.correlation_service.row", side_effect=lambda s, o: np.full(len(o), np.nan)):
+            single = [signal_scorer.should_execute_signal(s) for s in signals]
+            atr.reset_mock(), frames.reset_mock()
+            with mock.patch.object(signal_scorer, "_load_performance",
+                                   wraps=signal_scorer._load_performance) as performance:
+                batch = signal_scorer.score_batch(signals)
+
+    strip = lambda results: [(ok, {k: v for k, v in d.items() if k != "timings_ms"}) for ok, d in results]
+    assert strip(batch) == strip(single)
+    assert atr.call_count == 2 and frames.call_count == 2         # once per (symbol, timeframe) / symbol
+    performance.assert_called_once_with(list(SYMBOLS))
+
+    performance = batch[0][1]["performance_details"]
+    assert (performance["total_trades"], performance["profitable_trades"]) == (3, 2)
+    assert [d["decision"] for _, d in batch] == ["execute", "reject", "reject"]
+    assert batch[1][1]["reason"].startswith("Signal confidence 0.50 below adjusted threshold")
+    assert batch[2][1]["reason"].startswith("Technical score")
+    assert batch[0][1]["correlation_details"]["existing_positions"] == 1
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-stage scoring timers and the scoring metrics endpoint
+"""
+
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import scoring_metrics
+from app import app, Signal, SignalAction, SignalStatus
+from scoring_metrics import ScoringMetrics
+from signal_scoring import signal_scorer
+from utils.candles import trend_frame
+
+
+def _slow(seconds, value):
+    def call(*args, **kwargs):
+        time.sleep(seconds)
+        return value
+    return call
+
+
+def test_breakdown_carries_exclusive_stage_timings(tmp_path):
+    metrics = ScoringMetrics(str(tmp_path / "metrics.sqlite"))
+    signal = Signal(symbol="EURUSD", action=SignalAction.BUY_NOW, entry=1.15, sl=1.148, tp=1.156,
+                    confidence=0.9, status=SignalStatus.PENDING.value, context_json=json.dumps({"timeframe": "M15"}))
+    with app.app_context(), mock.patch.object(signal_scorer, "metrics", metrics), \
+         mock.patch("signal_scoring.get_atr", side_effect=_slow(0.02, 10.0)), \
+         mock.patch.object(signal_scorer, "load_technical_frame", side_effect=_slow(0.03, (trend_frame(0.0005), None))), \
+         mock.patch("ml.model_inference.predict_one", side_effect=_slow(0.04, 0.2)), \
+         mock.patch("signal_scoring.exposure_book.position_count", return_value=0):
+        ok, details = signal_scorer.should_execute_signal(signal)
+
+    timings = details["timings_ms"]
+    assert ok and details["decision"] == "execute"
+    assert set(timings) == {"atr", "candles", "technical", "predict", "performance", "correlation", "total"}
+    assert timings["atr"] >= 20 and timings["candles"] >= 30 and timings["predict"] >= 40
+    assert timings["technical"] < 20                             # nested candles / predict not counted twice
+    assert sum(v for k, v in timings.items() if k != "total") <= timings["total"]
+
+    stats = metrics.stats()
+    assert stats["runs"] == 1 and stats["decisions"] == {"execute": 1} and stats["errors"] == 0
+    assert stats["stages"]["predict"]["histogram"]["25"] == 0 and stats["stages"]["predict"]["histogram"]["+Inf"] == 1
+
+
+def test_stats_histograms_and_prometheus(tmp_path):
+    metrics = ScoringMetrics(str(tmp_path / "metrics.sqlite"))
+    for ms in (0.5, 3.0, 30.0, 400.0):
+        metrics.record("EURUSD", "reject", {"atr": ms, "total": ms * 2})
+    metrics.record("GBPUSD", "execute", {"total": 12000.0}, error=True)
+
+    stats = metrics.stats()
+    atr = stats["stages"]["atr"]
+    assert atr["count"] == 4 and atr["max"] == 400.0
+    assert (atr["histogram"]["1"], atr["histogram"]["5"], atr["histogram"]["50"], atr["histogram"]["+Inf"]) == (1, 2, 3, 4)
+    assert stats["stages"]["total"]["histogram"]["10000"] == 4 and stats["stages"]["predict"]["count"] == 0
+    assert stats["decisions"] == {"reject": 4, "execute": 1} and stats["errors"] == 1
+    assert metrics.stats(since=time.time() + 1)["runs"] == 0
+
+    text = metrics.prometheus()
+    assert 'genesis_scoring_stage_seconds_bucket{stage="atr",le="0.005"} 2' in text
+    assert 'genesis_scoring_stage_seconds_count{stage="total"} 5' in text
+    assert 'genesis_scoring_decisions{decision="reject"} 4' in text
+
+    with mock.patch.object(scoring_metrics, "scoring_metrics", metrics):
+        client = app.test_client()
+        body = client.get("/api/metrics/scoring?hours=1").get_json()
+        assert body["runs"] == 5 and body["stages"]["atr"]["p50"] == 30.0
+        response = client.get("/api/metrics/scoring?format=prometheus")
+        assert response.mimetype == "text/plain" and b"genesis_scoring_errors 1" in response.data
+        assert client.get("/api/metrics/scoring?hours=abc").status_code == 400
+        assert client.get("/api/metrics/scoring?hours=-1").status_code == 400
+
+
+def test_timers_are_idle_outside_a_scoring_run():
+    with mock.patch("ml.model_inference.predict_one", return_value=0.2):
+        ceiling = signal_scorer.technical_ceiling("EURUSD", trend_frame(0.0005))
+    assert set(ceiling) and getattr(signal_scorer._timer._local, "timings", None) is None
+    assert np.isfinite(list(ceiling.values())).all()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline SignalScorer replay harness
+"""
+
+import json
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from chart_utils import atr_pips
+from scoring_replay import CandleCache, ReplayScorer, run_replay
+from signal_scoring import signal_scorer
+from utils.candles import trend_candles
+
+BARS = 101
+AS_OF = pd.Timestamp("2025-05-01", tz="UTC").timestamp() + BARS * 3600     # just after the last bar closed
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CandleCache(str(tmp_path / "candles.sqlite"))
+    history = trend_candles(0.0005, BARS)
+    cache.store("EURUSD", "H1", history)
+    # later bars – not closed when the signal was created, must be ignored
+    future = pd.date_range("2025-05-05 05:00", periods=5, freq="h")
+    cache.store("EUR_USD", "H1", [{"timestamp": str(t), "open": 9.0, "high": 9.0, "low": 9.0, "close": 9.0}
+                                  for t in future])
+    return cache, history
+
+
+def _record(history, **signal):
+    """Score *signal* with the live scorer on *history*; returns the load_signals() dict"""
+    candidate = SimpleNamespace(id=signal.pop("id", 1), context={"timeframe": "H1"}, **signal)
+    atr = atr_pips(pd.DataFrame(history[-15:]), "EURUSD", 14)
+    signal_scorer._frame_cache.clear()
+    with app.app_context(), mock.patch("signal_scoring.fetch_candles", return_value=history[-100:]), \
+         mock.patch("signal_scoring.get_atr", return_value=atr), \
+         mock.patch("signal_scoring.exposure_book.position_count", return_value=1), \
+         mock.patch("signal_scoring.exposure_book.net_positions", return_value={"GBPUSD": 0.2}), \
+         mock.patch("signal_scoring.correlation_service.row", return_value=np.array([0.8])):
+        _, scoring = signal_scorer.should_execute_signal(candidate)
+    signal_scorer._frame_cache.clear()
+    json.dumps(scoring)                                   # stored as JSON in Signal.context
+    return {"id": candidate.id, "symbol": candidate.symbol, "action": candidate.action.name,
+            "entry": candidate.entry, "sl": candidate.sl, "tp": candidate.tp,
+            "confidence": candidate.confidence, "created_at": AS_OF,
+            "context": {"timeframe": "H1", "scoring": scoring}}
+
+
+def _signals(history):
+    from app import SignalAction
+
+    close = history[-1]["close"]
+    return [
+        _record(history, id=1, symbol="EURUSD", action=SignalAction.BUY_NOW, entry=close, sl=close - 0.004,
+                tp=close + 0.012, confidence=0.9),
+        _record(history, id=2, symbol="EURUSD", action=SignalAction.SELL_NOW, entry=close, sl=close + 0.004,
+                tp=close - 0.012, confidence=0.9),
+    ]
+
+
+def test_point_in_time_window(cache):
+    cache, history = cache
+    window = cache.window("EUR_USD", "H1", AS_OF, 100)
+    assert len(window) == 100 and window[-1]["close"] == pytest.approx(history[-1]["close"])
+    assert len(cache.window("EURUSD", "H1", AS_OF - 1, 100)) == 100
+    assert cache.window("EURUSD", "H1", AS_OF - 1, 1)[0]["close"] == pytest.approx(history[-2]["close"])
+    assert cache.coverage()[0]["candles"] == BARS + 5
+
+
+def test_replay_reproduces_recorded_decisions(cache):
+    cache, history = cache
+    signals = _signals(history)
+    assert signals[0]["context"]["scoring"]["correlation_details"]["passed"] is False
+
+    report = run_replay(signals, workers=0, candles=cache)
+
+    assert report["signals"] == 2 and report["changed"] == []
+    assert report["transitions"] == {"reject->reject": 2}
+    for result, signal in zip(report["results"], signals):
+        assert result["technical_score"] == signal["context"]["scoring"]["technical_score"]
+    stages = report["stage_timings_ms"]
+    assert stages["total"]["count"] == 2 and stages["candles"]["count"] == 2 and stages["correlation"]["count"] == 1
+    assert report["signals_per_second"] > 0
+
+
+def test_variant_thresholds_change_decisions(cache, tmp_path):
+    cache, history = cache
+    signals = _signals(history)
+
+    looser = run_replay(signals, {"max_correlation": 0.85}, workers=0, candles=cache)
+    assert looser["transitions"] == {"reject->execute": 1, "reject->reject": 1}
+    assert [r["signal_id"] for r in looser["changed"]] == [1]
+
+    weights = tmp_path / "weights.json"
+    weights.write_text(json.dumps({"version": "test", "default_weight": 1.0, "factors": {"trend": 50.0}}))
+    scorer = ReplayScorer(cache, {"weights": str(weights), "ml_blend": 0.0})
+    result = scorer.replay(signals[0])
+    assert result["technical_score"] > result["recorded_technical_score"]     # trend dominates, no ML drag
+
+
+def test_parallel_replay_matches_in_process(cache):
+    cache, history = cache
+    signals = _signals(history) * 3
+    for i, signal in enumerate(signals):
+        signals[i] = {**signal, "id": i + 1}
+
+    serial = run_replay(signals[::-1], {"max_correlation": 0.85}, workers=0, candles=cache)
+    parallel = run_replay(signals, {"max_correlation": 0.85}, workers=2, candles=cache)
+
+    assert [r["signal_id"] for r in serial["results"]] == list(range(1, 7))    # same order either way
+
+    strip = lambda report: [{k: v for k, v in r.items() if k != "timings_ms"} for r in report["results"]]
+    assert strip(parallel) == strip(serial)
+    assert parallel["workers"] == 2 and parallel["transitions"] == serial["transitions"]
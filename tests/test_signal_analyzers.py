@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable signal analyzers and shadow mode
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import signal_analyzers
+from signal_analyzers import RuleBasedAnalyzer, ShadowLog, SignalAnalyzer, compare_results
+from signal_scoring import signal_scorer
+
+from utils.candles import trend_candles, trend_frame
+
+
+def test_rules_follow_the_trend_deterministically():
+    analyzer = RuleBasedAnalyzer(sl_atr=1.5, reward_risk=2.0)
+
+    buy = analyzer.analyze_frame("EUR_USD", trend_frame(0.0005))
+    assert buy["action"] == "ANTICIPATED_LONG" and buy["source"] == "rule_based"
+    assert buy["sl"] < buy["entry"] < buy["tp"]
+    assert abs((buy["tp"] - buy["entry"]) - 2 * (buy["entry"] - buy["sl"])) < 1e-4
+    assert analyzer.analyze_frame("EUR_USD", trend_frame(0.0005)) == buy
+
+    sell = analyzer.analyze_frame("EUR_USD", trend_frame(-0.0005))
+    assert sell["action"] == "ANTICIPATED_SHORT"
+    assert sell["tp"] < sell["entry"] < sell["sl"]
+
+    # momentum against the trend on the last bar → no setup
+    assert analyzer.analyze_frame("EUR_USD", trend_frame(0.0005, n=100)) == {}
+
+
+def test_rules_load_each_charts_own_timeframe_once_from_a_cold_cache():
+    signal_scorer._frame_cache.clear()
+    with mock.patch("signal_scoring.fetch_candles", return_value=trend_candles(0.0005)) as fetch:
+        analyzer = RuleBasedAnalyzer()
+        analyzer.analyze_charts("EUR_USD", {"M15": "m15.png", "H1": "h1.png"})
+        start = time.perf_counter()
+        for _ in range(20):
+            result = analyzer.analyze_charts("EUR_USD", {"M15": "m15.png", "H1": "h1.png"})
+        per_call = (time.perf_counter() - start) / 20
+
+    assert sorted(call.kwargs["timeframe"] for call in fetch.call_args_list) == ["H1", "M15"]   # then cached
+    assert result["M15"]["action"] == "ANTICIPATED_LONG" and result["H1"] == result["M15"]
+    assert per_call < 0.05
+    signal_scorer._frame_cache.clear()
+
+
+def test_rules_raise_when_there_are_no_candles():
+    analyzer = RuleBasedAnalyzer(frame_loader=lambda symbol, tf: (None, "no_candles"))
+    with pytest.raises(RuntimeError):
+        analyzer.analyze_charts("EUR_USD", {"M15": "m15.png"})
+
+
+class _Fixed(SignalAnalyzer):
+    name = source = "fixed"
+
+    def __init__(self, result):
+        self.result = result
+
+    def analyze_charts(self, symbol, charts):
+        return {tf: dict(self.result) for tf in charts}
+
+
+def test_shadow_mode_logs_comparison_but_returns_primary(tmp_path, monkeypatch):
+    log = ShadowLog(db_path=str(tmp_path / "shadow.sqlite"))
+    primary = {"action": "BUY_NOW", "entry": 1.1, "sl": 1.09, "tp": 1.12, "confidence": 0.8}
+    signal_analyzers.register_analyzer("test_primary", lambda: _Fixed(primary))
+    signal_analyzers.register_analyzer("test_shadow", lambda: _Fixed({"action": "SELL_NOW"}))
+    signal_analyzers.register_analyzer("test_broken", lambda: None)        # shadow failure is ignored
+    monkeypatch.setenv("SIGNAL_ANALYZER", "test_primary")
+    monkeypatch.setenv("SIGNAL_SHADOW_ANALYZERS", "test_broken, test_shadow, test_primary")
+
+    with mock.patch.object(signal_analyzers, "shadow_log", log):
+        results = signal_analyzers.run_analyzers("EUR_USD", {"M15": "a.png", "H1": "b.png"})
+
+    assert results == {"M15": primary, "H1": primary}
+    stats = log.stats()
+    assert list(stats) == ["test_shadow"]
+    assert stats["test_shadow"]["runs"] == 2
+    assert stats["test_shadow"]["agreement"] == {"opposite": 2}
+    assert stats["test_shadow"]["side_agreement_rate"] == 0.0
+
+
+def test_compare_results():
+    assert compare_results({"action": "BUY_NOW"}, {"action": "ANTICIPATED_LONG"}) == "same_side"
+    assert compare_results({"action": "BUY_NOW"}, {}) == "primary_only"
+    assert compare_results({}, {"action": "SELL_NOW"}) == "shadow_only"
+    assert compare_results({}, {}) == "both_none"
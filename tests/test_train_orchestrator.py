@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel RR + ExitNet retrain orchestrator
+"""
+
+import os
+import sys
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.model_store import ModelStore
+from ml.train_orchestrator import plan_split, run
+
+SYMBOLS = ["EURUSD", "GBPUSD"]
+BARS = 400
+
+
+def _candles(symbol, tf):
+    rng = np.random.default_rng(len(symbol) + len(tf))
+    freq = "15min" if tf == "M15" else "h"
+    index = pd.date_range("2025-03-03", periods=BARS, freq=freq, tz="UTC", name="time")
+    close = 1.1 + np.cumsum(rng.normal(0, 5e-4, BARS))
+    return pd.DataFrame({"open": close - 2e-4, "high": close + 6e-4, "low": close - 6e-4, "close": close},
+                        index=index)
+
+
+@pytest.fixture
+def trade_log(tmp_path):
+    rows = []
+    for symbol in SYMBOLS:
+        for tf_minutes in (15, 60):
+            for i in range(20):
+                start = pd.Timestamp("2025-03-03 02:00") + pd.Timedelta(minutes=tf_minutes * (15 * i + 1))
+                stopped = i % 3 == 0                                        # SL above the market: hit at once
+                rows.append({"timestamp": start, "exit_time": start + pd.Timedelta(minutes=tf_minutes * 12),
+                             "symbol": symbol, "action": "BUY_NOW", "entry": 1.1,
+                             "sl": 5.0 if stopped else 0.6, "tp": 10.0 if stopped else 1.6})
+    path = tmp_path / "trade_log.csv"
+    pd.DataFrame(rows).to_csv(path, index=False)
+    return path
+
+
+def test_plan_split_never_oversubscribes():
+    assert plan_split(12, cores=8) == (8, 1)
+    assert plan_split(4, cores=16) == (4, 4)
+    assert plan_split(12, workers=2, cores=8) == (2, 4)
+    assert plan_split(3, workers=10, threads=2, cores=4) == (3, 2)
+    assert plan_split(0, cores=4) == (1, 4)
+
+
+def test_run_loads_each_dataset_once_and_publishes_one_version(tmp_path, trade_log):
+    store = ModelStore(str(tmp_path / "models"))
+    with mock.patch("ml.train_rr.load_candles", side_effect=_candles) as load, \
+         mock.patch("ml.train_exit.TRADE_LOG", trade_log), \
+         mock.patch("ml.train_exit.pd.read_csv", wraps=pd.read_csv) as read_csv:
+        report = run(SYMBOLS, workers=1, threads=1, store=store)
+
+    assert load.call_count == 4 and read_csv.call_count == 1          # (symbol, tf) and trade log once each
+    assert report["errors"] == [] and report["fetches"] == 4 and report["fetches_saved"] == 4
+    assert report["models"] == sorted(f"{s}_{tf}_{kind}.pkl" for s in SYMBOLS for tf in ("M15", "H1")
+                                      for kind in ("rr", "exit"))
+    assert report["estimated_speedup"] > 0 and len(report["tasks"]) == 4
+
+    manifest = store.manifest()
+    assert manifest["version"] == report["version"] and store.versions()[0]["note"] == "weekly retrain"
+    assert sorted(manifest["models"]) == report["models"]
+    rr = manifest["models"]["EURUSD_H1_rr.pkl"]["metrics"]
+    assert rr["window"] == 180 and rr["threads"] == 1 and rr["rows"] > 0 and "train_rmse" in rr
+    assert manifest["models"]["GBPUSD_M15_exit.pkl"]["metrics"]["rows"] >= 100
+
+
+def test_parallel_fits_match_serial(tmp_path, trade_log):
+    with mock.patch("ml.train_rr.load_candles", side_effect=_candles), \
+         mock.patch("ml.train_exit.TRADE_LOG", trade_log):
+        serial = run(SYMBOLS, workers=1, threads=1, publish=False)
+        parallel = run(SYMBOLS, workers=2, threads=1, publish=False)
+
+    assert parallel["workers"] == 2 and parallel["version"] is None
+    strip = lambda report: {name: {k: v for k, v in m.items() if k != "fit_seconds"}
+                            for name, m in report["metrics"].items()}
+    assert strip(parallel) == strip(serial)
+
+
+def test_failed_fits_are_reported_and_the_rest_published(tmp_path, trade_log):
+    store = ModelStore(str(tmp_path / "models"))
+    with mock.patch("ml.train_rr.load_candles", side_effect=_candles), \
+         mock.patch("ml.train_exit.TRADE_LOG", tmp_path / "missing.csv"):
+        report = run(["EURUSD"], workers=1, threads=1, store=store)
+
+    assert report["errors"] and report["errors"][0].startswith("trade log")
+    assert report["models"] == ["EURUSD_H1_rr.pkl", "EURUSD_M15_rr.pkl"]
+    assert sorted(store.manifest()["models"]) == report["models"]
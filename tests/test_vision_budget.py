@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the Vision call budget (accounting, limits, tight-budget priority)
+"""
+
+import os
+import sys
+import json
+import time
+from unittest import mock
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision_budget import VisionBudget, VisionBudgetExceeded
+
+ASSETS = ["EUR_USD", "GBP_USD", "USD_JPY", "XAU_USD", "GBP_JPY"]
+USAGE = {"prompt_tokens": 900, "completion_tokens": 100, "total_tokens": 1000}
+
+
+def _budget(tmp_path, **kwargs):
+    kwargs.setdefault("volatility_fn", lambda s: {"XAU_USD": 0.004, "GBP_JPY": 0.003}.get(s, 0.001))
+    kwargs.setdefault("exposure_fn", lambda: {"USDJPY": 2.0})
+    return VisionBudget(db_path=str(tmp_path / "budget.sqlite"), **kwargs)
+
+
+def test_records_latency_bytes_and_tokens(tmp_path):
+    budget = _budget(tmp_path)
+    budget.record(1.5, 2048, USAGE, symbol="EUR_USD", images=2)
+    budget.record(0.5, 1024, None, symbol="GBP_USD", ok=False)
+
+    hour = budget.usage("hour")
+    assert (hour["calls"], hour["tokens"], hour["payload_bytes"], hour["failed"]) == (2, 1000, 3072, 1)
+    assert hour["avg_latency"] == 1.0
+    assert budget.tokens_per_call() == 1000                  # failed calls don't skew the estimate
+    assert budget.usage("hour", now=time.time() + 7200)["calls"] == 0
+    assert budget.usage("day", now=time.time() + 7200)["calls"] == 2
+
+
+def test_hourly_and_daily_limits(tmp_path):
+    budget = _budget(tmp_path, hourly_calls=3, daily_tokens=2500)
+    assert budget.allow() == (True, {"calls_left": 1, "fraction_left": 1.0})    # 2500 / 1500 estimate
+
+    budget.record(1.0, 100, USAGE)
+    budget.record(1.0, 100, USAGE)
+    allowed, details = budget.allow()
+    assert not allowed and details["calls_left"] == 0 and budget.denied == 1
+
+    unlimited = _budget(tmp_path)
+    assert unlimited.allow()[0] and unlimited.plan(ASSETS) == ASSETS
+
+
+def test_plan_keeps_order_until_the_budget_is_tight(tmp_path):
+    budget = _budget(tmp_path, hourly_calls=20)
+    assert budget.plan(ASSETS) == ASSETS
+
+    for _ in range(17):
+        budget.record(1.0, 100, USAGE)
+    # 3 calls left for 5 assets: open exposure and volatility decide who gets them
+    assert budget.plan(ASSETS) == ["USD_JPY", "XAU_USD", "GBP_JPY"]
+    assert budget.priorities(ASSETS)["EUR_USD"] == budget.priorities(ASSETS)["GBP_USD"]
+
+
+def test_priority_inputs_failing_fall_back_to_configured_order(tmp_path):
+    def broken(*_):
+        raise RuntimeError("oanda down")
+
+    budget = _budget(tmp_path, hourly_calls=2, volatility_fn=broken, exposure_fn=broken)
+    assert budget.plan(ASSETS) == ASSETS[:2]
+
+
+def test_post_vision_records_usage_and_refuses_over_budget(tmp_path):
+    import vision_worker
+
+    budget = _budget(tmp_path, hourly_calls=1)
+    response = mock.Mock(**{"json.return_value": {"choices": [], "usage": USAGE}})
+    payload = {"messages": [{"role": "user", "content": [{"type": "image_url"}, {"type": "image_url"}]}]}
+
+    with mock.patch.object(vision_worker, "vision_budget", budget), \
+         mock.patch.object(vision_worker.requests, "post", return_value=response) as post:
+        vision_worker._post_vision(payload, symbol="EUR_USD")
+        with pytest.raises(VisionBudgetExceeded):
+            vision_worker._post_vision(payload, symbol="EUR_USD")
+
+    post.assert_called_once()
+    assert post.call_args.kwargs["data"] == json.dumps(payload).encode()
+    row = budget._db().execute("SELECT symbol, images, payload_bytes, total_tokens FROM vision_calls").fetchone()
+    assert tuple(row) == ("EUR_USD", 2, len(json.dumps(payload)), 1000)
+
+
+def test_exhausted_budget_drops_the_queue_job(tmp_path):
+    import vision_worker
+
+    chart = tmp_path / "EURUSD_H1_20250507_130010.png"
+    chart.write_bytes(b"png")
+    with mock.patch.object(vision_worker, "chart_handoff", mock.Mock(**{"available.return_value": True})), \
+         mock.patch.object(vision_worker, "gate_charts", return_value={"H1": str(chart)}), \
+         mock.patch.object(vision_worker, "analyze_charts_cached", side_effect=VisionBudgetExceeded("spent")):
+        assert vision_worker.handle_vision_job({"symbol": "EUR_USD", "image_s3": "x.png"}) is False
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the perceptual-hash Vision result cache
+"""
+
+import os
+import sys
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vision_worker
+from vision_worker import VisionResultCache, analyze_image_cached
+
+RESULT = {"action": "BUY_NOW", "entry": 1.1, "sl": 1.09, "tp": 1.12, "confidence": 0.8}
+
+
+def _chart(tmp_path, name, seed=0, noise=0):
+    rng = np.random.default_rng(seed)
+    px = rng.integers(0, 255, (96, 128), dtype=np.uint8)
+    if noise:
+        px[:noise] = 255 - px[:noise]
+    path = tmp_path / name
+    Image.fromarray(px).resize((512, 384)).save(path)
+    return str(path)
+
+
+def test_identical_chart_next_bar_hits(tmp_path):
+    cache = VisionResultCache(max_distance=12, ttl=3600, max_bars=1)
+    first = _chart(tmp_path, "EURUSD_H1_20250507_100010.png")
+    _, fp = cache.lookup("EUR_USD", first)
+    cache.store(fp, RESULT, seconds=12.0)
+
+    hit, _ = cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_110010.png"))
+    assert hit == RESULT
+    assert cache.stats()["hit_rate"] == 0.5
+    assert cache.stats()["seconds_saved"] == 12.0
+
+
+def test_misses_on_changed_chart_old_bar_or_other_bucket(tmp_path):
+    cache = VisionResultCache(max_distance=12, ttl=3600, max_bars=1)
+    _, fp = cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_100010.png"))
+    cache.store(fp, RESULT)
+
+    assert cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_110011.png", seed=1))[0] is None
+    assert cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_130010.png"))[0] is None
+    assert cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_M15_20250507_101510.png"))[0] is None
+    assert cache.lookup("GBP_USD", _chart(tmp_path, "GBPUSD_H1_20250507_110010.png"))[0] is None
+
+    with mock.patch.object(vision_worker, "VISION_PROMPT_VERSION", 99):
+        assert cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_110012.png"))[0] is None
+
+
+def test_ttl_expiry(tmp_path):
+    cache = VisionResultCache(max_distance=12, ttl=0, max_bars=1)
+    _, fp = cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_100010.png"))
+    cache.store(fp, RESULT)
+    assert cache.lookup("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_110010.png"))[0] is None
+
+
+def test_analyze_image_cached_skips_model_call(tmp_path):
+    cache = VisionResultCache(max_distance=12, ttl=3600, max_bars=1)
+    with mock.patch.object(vision_worker, "vision_cache", cache), \
+         mock.patch.object(vision_worker, "analyze_image", return_value=RESULT) as analyze:
+        assert analyze_image_cached("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_100010.png")) == RESULT
+        assert analyze_image_cached("EUR_USD", _chart(tmp_path, "EURUSD_H1_20250507_110010.png")) == RESULT
+
+    analyze.assert_called_once()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for the async Vision client against a local fake OpenAI endpoint
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import pytest
+from PIL import Image
+
+import vision_client
+import vision_worker
+from vision_budget import VisionBudget
+from vision_client import AsyncVisionClient, analyze_all
+
+FAKE_LATENCY = 0.3
+SIGNAL = {"action": "BUY_NOW", "entry": 1.1, "sl": 1.09, "tp": 1.12, "confidence": 0.8}
+
+
+@pytest.fixture(autouse=True)
+def budget(tmp_path, monkeypatch):
+    """Budget records go to tmp_path, not data/vision_budget.sqlite"""
+    budget = VisionBudget(db_path=str(tmp_path / "budget.sqlite"))
+    monkeypatch.setattr(vision_worker, "vision_budget", budget)
+    monkeypatch.setattr(vision_client, "vision_budget", budget)
+    return budget
+
+
+class _FakeOpenAI(BaseHTTPRequestHandler):
+    requests_seen = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests_seen.append((time.monotonic(), body["model"], self.headers.get("Authorization")))
+        time.sleep(FAKE_LATENCY)
+        data = json.dumps({"choices": [{"message": {"content": json.dumps(SIGNAL)}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _fake_server():
+    _FakeOpenAI.requests_seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeOpenAI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+def _charts(tmp_path, n):
+    charts = []
+    for i in range(n):
+        symbol = f"SYM{i}"
+        path = tmp_path / f"{symbol}_H1_20250507_090000.png"
+        Image.new("RGB", (64, 48), "white").save(path)
+        charts.append((symbol, str(path)))
+    return charts
+
+
+def test_sweep_runs_concurrently(tmp_path):
+    server, url = _fake_server()
+    try:
+        start = time.monotonic()
+        results = asyncio.run(analyze_all(_charts(tmp_path, 5), api_url=url, api_key="test",
+                                          concurrency=5, rate_per_minute=0))
+        elapsed = time.monotonic() - start
+    finally:
+        server.shutdown()
+
+    assert set(results) == {f"SYM{i}" for i in range(5)}
+    assert all(r == SIGNAL for r in results.values())
+    assert elapsed < 5 * FAKE_LATENCY * 0.6          # ≈ one call, not the sum of five
+    assert all(auth == "Bearer test" for _, _, auth in _FakeOpenAI.requests_seen)
+
+
+def test_rate_limit_spaces_request_starts(tmp_path):
+    server, url = _fake_server()
+
+    async def sweep():
+        async with AsyncVisionClient(api_url=url, api_key="test", concurrency=3,
+                                     rate_per_minute=300) as client:      # one start / 0.2 s
+            return [r async for r in client.analyze_many(_charts(tmp_path, 3))]
+
+    try:
+        results = asyncio.run(sweep())
+    finally:
+        server.shutdown()
+
+    assert len(results) == 3
+    starts = sorted(t for t, _, _ in _FakeOpenAI.requests_seen)
+    assert starts[-1] - starts[0] >= 0.35
+
+
+def test_connection_error_is_not_taken_for_an_empty_result(tmp_path):
+    results = asyncio.run(analyze_all(_charts(tmp_path, 1), api_url="http://127.0.0.1:9/v1/chat/completions",
+                                      api_key="test", rate_per_minute=0, timeout=2))
+    assert results == {}
+
+
+def test_failed_requests_are_yielded_as_exceptions(tmp_path):
+    statuses = iter([500, 200])
+
+    def handler(request):
+        return httpx.Response(next(statuses), json={"choices": [{"message": {"content": json.dumps(SIGNAL)}}]})
+
+    async def sweep():
+        async with AsyncVisionClient(api_key="test", rate_per_minute=0,
+                                     transport=httpx.MockTransport(handler)) as client:
+            return [result async for _, result, _ in client.analyze_many(_charts(tmp_path, 2))]
+
+    results = asyncio.run(sweep())
+    assert SIGNAL in results
+    assert sum(isinstance(r, RuntimeError) for r in results) == 1
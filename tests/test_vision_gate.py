@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Tests for the pre-Vision gate
+"""
+
+import os
+import sys
+from datetime import datetime, timezone
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vision_worker
+from app import SignalAction, TradeSide
+from vision_worker import PreVisionGate, fx_market_closed
+
+WEDNESDAY = datetime(2025, 5, 7, 13, 0, tzinfo=timezone.utc)     # NY_main
+SATURDAY = datetime(2025, 5, 10, 13, 0, tzinfo=timezone.utc)
+
+
+def _frame(n=100, price=1.1000, step=0.0005):
+    close = price + np.sin(np.arange(n) / 5) * step
+    df = pd.DataFrame({"open": close, "high": close + step, "low": close - step, "close": close},
+                      index=pd.date_range("2025-05-01", periods=n, freq="h"))
+    for col in ("rsi", "macd"):
+        df[col] = 50.0 if col == "rsi" else 0.0
+    return df
+
+
+def _patched(df=None, correlation=True, ceiling=0.9, live=()):
+    scorer = vision_worker.signal_scorer
+    frame = _frame() if df is None else df
+    return [
+        mock.patch.object(scorer, "evaluate_correlation", return_value=(correlation, {})),
+        mock.patch.object(scorer, "load_technical_frame", return_value=(frame, None)),
+        mock.patch.object(scorer, "technical_ceiling",
+                          return_value={TradeSide.BUY: ceiling, TradeSide.SELL: ceiling}),
+        mock.patch.object(PreVisionGate, "_live_entries", return_value=list(live)),
+    ]
+
+
+def _check(gate, patches, symbol="EUR_USD", now=WEDNESDAY):
+    for p in patches:
+        p.start()
+    try:
+        return gate.check(symbol, "H1", now=now)
+    finally:
+        mock.patch.stopall()
+
+
+def test_weekend_and_excluded_session_skip_without_market_data():
+    assert fx_market_closed(SATURDAY) and not fx_market_closed(WEDNESDAY)
+    gate = PreVisionGate(enabled=True, skip_sessions=["NY_main"])
+    patches = _patched()
+    proceed, details = _check(gate, patches, now=SATURDAY)
+    assert not proceed and details["reason"] == "market_closed"
+
+    proceed, details = _check(gate, _patched(), now=WEDNESDAY)
+    assert not proceed and details["reason"] == "session_NY_main"
+
+
+def test_tradable_chart_passes_with_snapshot():
+    gate = PreVisionGate(enabled=True, skip_sessions=[])
+    proceed, details = _check(gate, _patched())
+    assert proceed
+    assert details["decision"] == "analyse"
+    assert details["snapshot"]["atr_pips"] > 0
+    assert details["blocked"] == {}
+
+
+def test_correlation_blocks_both_sides():
+    gate = PreVisionGate(enabled=True, skip_sessions=[])
+    proceed, details = _check(gate, _patched(correlation=False))
+    assert not proceed and details["reason"] == "correlation"
+
+
+def test_technical_ceiling_and_atr_band():
+    gate = PreVisionGate(enabled=True, skip_sessions=[])
+    proceed, details = _check(gate, _patched(ceiling=0.4))
+    assert not proceed and details["reason"] == "technical"
+
+    gate = PreVisionGate(enabled=True, skip_sessions=[], min_atr_pips=50)
+    proceed, details = _check(gate, _patched())
+    assert not proceed and details["reason"] == "atr_too_low"
+
+
+def test_duplicates_must_cover_every_action_on_both_sides():
+    price = float(_frame()["close"].iloc[-1])
+    buys = [(SignalAction.BUY_NOW, price), (SignalAction.ANTICIPATED_LONG, price + 0.0001)]
+    sells = [(SignalAction.SELL_NOW, price), (SignalAction.ANTICIPATED_SHORT, price - 0.0001)]
+    gate = PreVisionGate(enabled=True, skip_sessions=[])
+
+    proceed, details = _check(gate, _patched(live=buys))
+    assert proceed and details["blocked"] == {"BUY": "duplicate"}
+
+    proceed, details = _check(gate, _patched(live=buys + sells[:1]))
+    assert proceed
+
+    proceed, details = _check(gate, _patched(live=buys + sells))
+    assert not proceed and details["reason"] == "duplicate"
+
+    far = [(a, p + 0.01) for a, p in buys + sells]
+    assert _check(gate, _patched(live=far))[0]
+
+    assert gate.stats()["by_reason"] == {"duplicate": 1}
+
+
+def test_gate_errors_let_the_chart_through():
+    gate = PreVisionGate(enabled=True, skip_sessions=[])
+    patches = [mock.patch.object(vision_worker.signal_scorer, "evaluate_correlation",
+                                 side_effect=RuntimeError("db down"))]
+    proceed, details = _check(gate, patches)
+    assert proceed and "error" in details
+
+
+def test_skipped_chart_never_reaches_vision(tmp_path):
+    chart = tmp_path / "EURUSD_H1_20250507_130010.png"
+    chart.write_bytes(b"png")
+    gate = mock.Mock(**{"check.return_value": (False, {"reason": "correlation"})})
+    with mock.patch.object(vision_worker, "vision_gate", gate), \
+         mock.patch.object(vision_worker, "analyze_image_cached") as analyze:
+        assert vision_worker.DirectVisionPipeline.process_chart("EUR_USD", str(chart)) is False
+    gate.check.assert_called_once_with("EUR_USD", "H1")
+    analyze.assert_not_called()
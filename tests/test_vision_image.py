@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact Vision image output profile
+"""
+
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from chart_generator_basic import ChartGenerator, encode_vision_image
+from utils.candles import generate_sample_candles
+
+
+def test_encode_downscales_and_sets_mime():
+    source = Image.new("RGB", (1920, 1440), "white")
+
+    for fmt, mime in (("png", "image/png"), ("webp", "image/webp"), ("jpeg", "image/jpeg")):
+        data, meta = encode_vision_image(source, {"format": fmt, "width": 960})
+        assert meta["mime"] == mime
+        assert (meta["width"], meta["height"]) == (960, 720)
+        assert meta["bytes"] == len(data)
+        assert Image.open(io.BytesIO(data)).size == (960, 720)
+
+
+def test_vision_image_is_smaller_than_saved_chart_and_crops_panels(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    candles = generate_sample_candles(days=5)[-100:]
+    gen = ChartGenerator(signal_action="BUY_NOW")
+
+    png_size = os.path.getsize(gen.create_chart(candles, "EUR_USD", "H1"))
+    full, full_meta = gen.create_vision_image(candles, "EUR_USD", "H1", profile={"format": "png", "width": 1280})
+    price, price_meta = gen.create_vision_image(candles, "EUR_USD", "H1",
+                                                profile={"format": "png", "width": 1280, "panels": ["price"]})
+
+    assert full and len(full) < png_size
+    assert full_meta["width"] == 1280
+    assert price_meta["panels"] == ["price"]
+    assert price_meta["height"] < full_meta["height"] / 2
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Tests for multi-chart (several timeframes, one request) Vision analysis
+"""
+
+import os
+import sys
+import json
+import asyncio
+from unittest import mock
+
+import httpx
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import vision_client
+import vision_worker
+from vision_budget import VisionBudget
+from vision_client import AsyncVisionClient
+from vision_worker import DirectVisionPipeline, analyze_image, parse_multi_vision_response
+
+M15 = {"action": "BUY_NOW", "entry": 1.1, "sl": 1.09, "tp": 1.12, "confidence": 0.8}
+H1 = {"action": "SELL_NOW", "entry": 1.1, "sl": 1.11, "tp": 1.08, "confidence": 0.75}
+
+
+@pytest.fixture(autouse=True)
+def budget(tmp_path, monkeypatch):
+    """Budget records go to tmp_path, not data/vision_budget.sqlite"""
+    budget = VisionBudget(db_path=str(tmp_path / "budget.sqlite"))
+    monkeypatch.setattr(vision_worker, "vision_budget", budget)
+    monkeypatch.setattr(vision_client, "vision_budget", budget)
+    return budget
+
+
+def _response(content):
+    return {"choices": [{"message": {"content": json.dumps(content)}}]}
+
+
+def _charts(tmp_path, timeframes=("H1", "M15")):
+    charts = {}
+    for tf in timeframes:
+        path = tmp_path / f"EURUSD_{tf}_20250507_130010.png"
+        Image.new("RGB", (64, 48), "white").save(path)
+        charts[tf] = str(path)
+    return charts
+
+
+def test_parse_keyed_and_wrapped_responses():
+    assert parse_multi_vision_response(_response({"M15": M15, "H1": H1}), ["M15", "H1"]) == {"M15": M15, "H1": H1}
+    assert parse_multi_vision_response(_response({"signals": {"H1": H1}}), ["M15", "H1"]) == {"M15": {}, "H1": H1}
+    assert parse_multi_vision_response(_response({"M15": {"action": "BUY_NOW"}}), ["M15"]) == {"M15": {}}
+    assert parse_multi_vision_response({"choices": []}, ["M15"]) == {"M15": {}}
+
+
+def test_analyze_image_sends_one_request_for_all_timeframes(tmp_path):
+    with mock.patch.object(vision_worker, "OPENAI_API_KEY", "test"), \
+         mock.patch.object(vision_worker, "_post_vision", return_value=_response({"M15": M15, "H1": H1})) as post:
+        results = analyze_image(_charts(tmp_path), symbol="EUR_USD")
+
+    assert results == {"M15": M15, "H1": H1}
+    post.assert_called_once()
+    payload = post.call_args[0][0]
+    content = payload["messages"][1]["content"]
+    assert [part["type"] for part in content].count("image_url") == 2
+    # ascending timeframe order, labelled so the model can key its answer
+    labels = [p["text"].split(":")[0] for p in content if p.get("text", "").startswith("Time-frame")]
+    assert labels == ["Time-frame M15", "Time-frame H1"]
+    assert "MULTI-CHART" in payload["messages"][0]["content"]
+
+
+def test_single_chart_mapping_uses_the_single_image_prompt(tmp_path):
+    with mock.patch.object(vision_worker, "OPENAI_API_KEY", "test"), \
+         mock.patch.object(vision_worker, "_post_vision", return_value=_response(M15)) as post:
+        assert analyze_image(_charts(tmp_path, ("M15",))) == {"M15": M15}
+    assert "MULTI-CHART" not in post.call_args[0][0]["messages"][0]["content"]
+
+
+def test_process_charts_stores_each_timeframe_through_process_chart(tmp_path):
+    charts = _charts(tmp_path)
+    cache = vision_worker.VisionResultCache(max_distance=12, ttl=3600, max_bars=1)
+    with mock.patch.object(vision_worker, "vision_cache", cache), \
+         mock.patch.object(vision_worker.vision_gate, "check", return_value=(True, {})), \
+         mock.patch.object(vision_worker, "analyze_image", return_value={"M15": M15, "H1": {}}) as analyze, \
+         mock.patch.object(DirectVisionPipeline, "process_chart", side_effect=lambda s, p, vision_result: bool(vision_result)) as process:
+        assert DirectVisionPipeline.process_charts("EUR_USD", charts) == {"H1": False, "M15": True}
+
+    analyze.assert_called_once_with(charts, symbol="EUR_USD")
+    process.assert_any_call("EUR_USD", charts["M15"], vision_result=M15)
+    assert process.call_count == 2
+
+
+def test_async_client_multi_chart_request(tmp_path):
+    seen = []
+
+    def handler(request):
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json=_response({"M15": M15, "H1": H1}))
+
+    async def run():
+        async with AsyncVisionClient(api_key="test", rate_per_minute=0,
+                                     transport=httpx.MockTransport(handler)) as client:
+            return [r async for r in client.analyze_many([("EUR_USD", _charts(tmp_path))])]
+
+    [(symbol, results, _)] = asyncio.run(run())
+    assert symbol == "EUR_USD" and results == {"M15": M15, "H1": H1}
+    assert len(seen) == 1
+
+
+def test_directory_sweep_uses_the_async_client_only_for_vision(tmp_path, monkeypatch):
+    charts = [("EUR_USD", _charts(tmp_path))]
+    monkeypatch.setenv("SIGNAL_ANALYZER", "rules")
+    with mock.patch("vision_client.AsyncVisionClient") as client, \
+         mock.patch.object(DirectVisionPipeline, "process_charts", return_value={"H1": False, "M15": False}) as process:
+        asyncio.run(vision_worker._process_charts_concurrently(DirectVisionPipeline(), charts))
+
+    client.assert_not_called()
+    process.assert_called_once_with("EUR_USD", charts[0][1])
+
+
+def test_directory_sweep_runs_shadows_on_the_vision_results(tmp_path, monkeypatch):
+    charts = [("EUR_USD", _charts(tmp_path))]
+    cache = vision_worker.VisionResultCache(max_distance=12, ttl=3600, max_bars=1)
+    monkeypatch.setenv("SIGNAL_ANALYZER", "vision")
+
+    async def analyze_many(to_send):
+        for symbol, _ in to_send:
+            yield symbol, {"M15": M15, "H1": H1}, 2.0
+
+    client = mock.MagicMock()
+    client.__aenter__.return_value.analyze_many = analyze_many
+    with mock.patch.object(vision_worker, "vision_cache", cache), \
+         mock.patch.object(vision_worker.vision_gate, "check", return_value=(True, {})), \
+         mock.patch("vision_client.AsyncVisionClient", return_value=client), \
+         mock.patch.object(DirectVisionPipeline, "process_chart", return_value=True), \
+         mock.patch.object(vision_worker, "run_shadows") as shadows:
+        asyncio.run(vision_worker._process_charts_concurrently(DirectVisionPipeline(), charts))
+
+    shadows.assert_called_once_with("EUR_USD", charts[0][1], "vision", 1.0, {"M15": M15, "H1": H1})
+
+
+def test_directory_sweep_leaves_failed_requests_uncached_for_the_next_sweep(tmp_path, monkeypatch):
+    charts = [("EUR_USD", _charts(tmp_path))]
+    cache = vision_worker.VisionResultCache(max_distance=12, ttl=3600, max_bars=1)
+    monkeypatch.setenv("SIGNAL_ANALYZER", "vision")
+
+    async def analyze_many(to_send):
+        for symbol, _ in to_send:
+            yield symbol, RuntimeError("Vision API request failed: 503"), 2.0
+
+    client = mock.MagicMock()
+    client.__aenter__.return_value.analyze_many = analyze_many
+    with mock.patch.object(vision_worker, "vision_cache", cache), \
+         mock.patch.object(vision_worker.vision_gate, "check", return_value=(True, {})), \
+         mock.patch("vision_client.AsyncVisionClient", return_value=client), \
+         mock.patch.object(DirectVisionPipeline, "process_chart") as process, \
+         mock.patch.object(vision_worker, "run_shadows") as shadows:
+        asyncio.run(vision_worker._process_charts_concurrently(DirectVisionPipeline(), charts))
+
+    process.assert_not_called()
+    shadows.assert_not_called()
+    assert cache.lookup("EUR_USD", charts[0][1]["H1"])[0] is None
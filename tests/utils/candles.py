@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Candle helpers shared by the tests and benchmarks
+
+    from utils.candles import generate_sample_candles, trend_candles, trend_frame
+"""
+
+import random
+from datetime import datetime, timedelta
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+
+def generate_sample_candles(days=50):
+    """Generate sample candle data in OANDA API format"""
+    candles = []
+    start_date = datetime.now() - timedelta(days=days)
+    
+    # Starting price
+    price = 1.1000  # EUR/USD like price
+    
+    for i in range(days * 24):  # Hourly candles
+        # Random price movement with slight upward bias
+        change = random.normalvariate(0.0001, 0.0005)  # Mean, std dev
+        price += change
+        
+        # Create hourly candle
+        candle_time = start_date + timedelta(hours=i)
+        open_price = price
+        close_price = price + random.normalvariate(0, 0.0003)
+        high_price = max(open_price, close_price) + abs(random.normalvariate(0, 0.0002))
+        low_price = min(open_price, close_price) - abs(random.normalvariate(0, 0.0002))
+        volume = random.randint(500, 1500)
+        
+        candle = {
+            'timestamp': candle_time.isoformat(),
+            'open': open_price,
+            'high': high_price,
+            'low': low_price,
+            'close': close_price,
+            'volume': volume
+        }
+        
+        candles.append(candle)
+    
+    return candles
+
+
+def trend_candles(step, n=101):
+    """Zig-zag trend: two steps forward, 1.5 back – RSI stays in the 40s/50s"""
+    moves = np.array([1.0, -0.9, 1.0, -0.6] * 30)[:n] * step
+    close = 1.1 + np.cumsum(moves)
+    times = pd.date_range("2025-05-01", periods=n, freq="h")
+    return [
+        {"timestamp": str(times[i]), "open": close[i] - moves[i], "close": close[i],
+         "high": max(close[i], close[i] - moves[i]) + 0.0002, "low": min(close[i], close[i] - moves[i]) - 0.0002}
+        for i in range(n)
+    ]
+
+
+def trend_frame(step, n=101):
+    """signal_scorer's indicator frame of trend_candles()"""
+    from signal_scoring import signal_scorer
+
+    with mock.patch("signal_scoring.fetch_candles", return_value=trend_candles(step, n)):
+        df, error = signal_scorer._build_technical_frame("EUR_USD", "H1")
+    assert error is None
+    return df
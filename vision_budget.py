@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Vision call budget
+
+Every request to the Vision API is recorded here with its latency, payload
+size and the token usage reported in the response, so each capture cycle's
+cost is visible.  The same log enforces rolling budgets:
+
+    • VISION_BUDGET_HOURLY_CALLS / VISION_BUDGET_DAILY_CALLS
+    • VISION_BUDGET_HOURLY_TOKENS / VISION_BUDGET_DAILY_TOKENS
+
+(0 = unlimited).  Before a capture cycle the scheduler asks plan() which
+assets to capture.  While the budget is comfortable that is simply ASSETS
+in its configured order; once it is tight (fewer affordable calls than
+assets, or less than VISION_BUDGET_TIGHT_FRACTION of any budget left) the
+assets are ranked by recent volatility and open exposure and only the
+affordable ones are captured.
+
+The log is a small SQLite database so the budget is shared by the
+scheduler and any separate vision worker processes.
+
+    from vision_budget import vision_budget
+
+    allowed, details = vision_budget.allow()
+    symbols = vision_budget.plan(ASSETS)
+
+Environment:
+    VISION_BUDGET_DB                 SQLite path (default data/vision_budget.sqlite)
+    VISION_BUDGET_TIGHT_FRACTION     share of a budget left that counts as tight (default 0.2)
+    VISION_TOKENS_PER_CALL           token estimate before any call was recorded (default 1500)
+    VISION_PRIORITY_VOLATILITY_WEIGHT / VISION_PRIORITY_EXPOSURE_WEIGHT   (default 0.5 / 0.5)
+"""
+
+import os
+import math
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from sqlite_store import connect
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = {"hour": 3600, "day": 86400}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS vision_calls (
+    id                 INTEGER PRIMARY KEY,
+    ts                 REAL    NOT NULL,
+    symbol             TEXT,
+    images             INTEGER NOT NULL DEFAULT 1,
+    latency            REAL    NOT NULL,
+    payload_bytes      INTEGER NOT NULL,
+    prompt_tokens      INTEGER NOT NULL DEFAULT 0,
+    completion_tokens  INTEGER NOT NULL DEFAULT 0,
+    total_tokens       INTEGER NOT NULL DEFAULT 0,
+    ok                 INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_vision_calls_ts ON vision_calls (ts);
+"""
+
+
+class VisionBudgetExceeded(Exception):
+    """Raised instead of sending a Vision request the budget cannot afford"""
+
+
+def _env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+# ──────────────────────────────────────────────────────────────
+#  Default priority inputs (only consulted when the budget is tight)
+# ──────────────────────────────────────────────────────────────
+def recent_volatility(symbol: str, timeframe: str = "H1", length: int = 14) -> float:
+    """ATR(length) of recent *timeframe* candles as a fraction of price (0 if unknown)"""
+    from chart_utils import fetch_candles
+
+    candles = fetch_candles(symbol, timeframe, length + 1)
+    if len(candles) < 2:
+        return 0.0
+    ranges = []
+    for prev, cur in zip(candles, candles[1:]):
+        high, low, prev_close = float(cur["high"]), float(cur["low"]), float(prev["close"])
+        ranges.append(max(high - low, abs(high - prev_close), abs(low - prev_close)))
+    close = float(candles[-1]["close"])
+    return (sum(ranges) / len(ranges)) / close if close else 0.0
+
+
+def open_exposure() -> Dict[str, float]:
+    """Open lots per symbol ("EURUSD" style keys) from the exposure book"""
+    from exposure_book import exposure_book
+    return exposure_book.gross_lots()
+
+
+class VisionBudget:
+    """Records Vision calls and decides how many more the budget allows"""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 hourly_calls: Optional[int] = None, daily_calls: Optional[int] = None,
+                 hourly_tokens: Optional[int] = None, daily_tokens: Optional[int] = None,
+                 tight_fraction: Optional[float] = None,
+                 volatility_fn: Optional[Callable[[str], float]] = None,
+                 exposure_fn: Optional[Callable[[], Dict[str, float]]] = None):
+        self.db_path = db_path or os.environ.get("VISION_BUDGET_DB", os.path.join("data", "vision_budget.sqlite"))
+        self.limits = {
+            ("hour", "calls"): _env_int("VISION_BUDGET_HOURLY_CALLS", 0) if hourly_calls is None else hourly_calls,
+            ("day", "calls"): _env_int("VISION_BUDGET_DAILY_CALLS", 0) if daily_calls is None else daily_calls,
+            ("hour", "tokens"): _env_int("VISION_BUDGET_HOURLY_TOKENS", 0) if hourly_tokens is None else hourly_tokens,
+            ("day", "tokens"): _env_int("VISION_BUDGET_DAILY_TOKENS", 0) if daily_tokens is None else daily_tokens,
+        }
+        self.tight_fraction = float(os.environ.get("VISION_BUDGET_TIGHT_FRACTION", 0.2)) if tight_fraction is None else tight_fraction
+        self.default_tokens_per_call = _env_int("VISION_TOKENS_PER_CALL", 1500)
+        self.volatility_weight = float(os.environ.get("VISION_PRIORITY_VOLATILITY_WEIGHT", 0.5))
+        self.exposure_weight = float(os.environ.get("VISION_PRIORITY_EXPOSURE_WEIGHT", 0.5))
+        self.volatility_fn = volatility_fn or recent_volatility
+        self.exposure_fn = exposure_fn or open_exposure
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.denied = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = connect(self.db_path, _SCHEMA)
+        return self._conn
+
+    # ───────────────────────────────── accounting ───────────────────────────────
+    def record(self, latency: float, payload_bytes: int, usage: Optional[Dict[str, Any]] = None,
+               symbol: Optional[str] = None, images: int = 1, ok: bool = True) -> None:
+        """Log one Vision request; *usage* is the response's "usage" object"""
+        usage = usage or {}
+        prompt = int(usage.get("prompt_tokens") or 0)
+        completion = int(usage.get("completion_tokens") or 0)
+        total = int(usage.get("total_tokens") or prompt + completion)
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        "INSERT INTO vision_calls (ts, symbol, images, latency, payload_bytes, "
+                        "prompt_tokens, completion_tokens, total_tokens, ok) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (time.time(), symbol, images, latency, payload_bytes, prompt, completion, total, int(ok)),
+                    )
+        except sqlite3.Error as e:
+            logger.error(f"Could not record Vision call for {symbol}: {e}")
+            return
+        logger.info(
+            "Vision call %s: %.2fs, %.1f KB, %d tokens (%d prompt / %d completion)",
+            symbol or "-", latency, payload_bytes / 1024, total, prompt, completion,
+        )
+
+    def usage(self, window: str = "hour", now: Optional[float] = None) -> Dict[str, Any]:
+        """Calls, tokens, payload bytes and latency over the rolling *window*"""
+        since = (time.time() if now is None else now) - WINDOWS[window]
+        with self._lock:
+            row = self._db().execute(
+                "SELECT COUNT(*) AS calls, COALESCE(SUM(total_tokens), 0) AS tokens, "
+                "COALESCE(SUM(prompt_tokens), 0) AS prompt_tokens, "
+                "COALESCE(SUM(completion_tokens), 0) AS completion_tokens, "
+                "COALESCE(SUM(payload_bytes), 0) AS payload_bytes, "
+                "COALESCE(SUM(latency), 0) AS seconds, COALESCE(SUM(1 - ok), 0) AS failed "
+                "FROM vision_calls WHERE ts >= ?",
+                (since,),
+            ).fetchone()
+        out = dict(row)
+        out["avg_latency"] = round(out["seconds"] / out["calls"], 3) if out["calls"] else 0.0
+        return out
+
+    def tokens_per_call(self) -> float:
+        """Average tokens of the last 50 successful calls (or the configured estimate)"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT AVG(total_tokens) AS avg FROM (SELECT total_tokens FROM vision_calls "
+                "WHERE ok = 1 AND total_tokens > 0 ORDER BY ts DESC LIMIT 50)"
+            ).fetchone()
+        return float(row["avg"] or self.default_tokens_per_call)
+
+    # ───────────────────────────────── budgeting ────────────────────────────────
+    def remaining(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Calls still affordable plus the smallest share of any budget left.
+
+        Returns {"calls": int | None (unlimited), "fraction": float, "windows": {...}}
+        """
+        per_call = self.tokens_per_call()
+        affordable: Optional[float] = None
+        fraction = 1.0
+        windows: Dict[str, Any] = {}
+        for window in WINDOWS:
+            used = self.usage(window, now)
+            windows[window] = used
+            for unit in ("calls", "tokens"):
+                limit = self.limits[(window, unit)]
+                if limit <= 0:
+                    continue
+                left = max(0, limit - used[unit])
+                calls = left if unit == "calls" else left / per_call
+                affordable = calls if affordable is None else min(affordable, calls)
+                fraction = min(fraction, left / limit)
+        return {
+            "calls": None if affordable is None else int(math.floor(affordable)),
+            "fraction": round(fraction, 4),
+            "windows": windows,
+        }
+
+    def allow(self, calls: int = 1) -> Tuple[bool, Dict[str, Any]]:
+        """(True, details) when *calls* more Vision requests fit every budget"""
+        left = self.remaining()
+        allowed = left["calls"] is None or left["calls"] >= calls
+        if not allowed:
+            self.denied += 1
+            logger.warning("Vision budget exhausted (%s calls left, need %d)", left["calls"], calls)
+        return allowed, {"calls_left": left["calls"], "fraction_left": left["fraction"]}
+
+    def priorities(self, symbols: Sequence[str]) -> Dict[str, float]:
+        """Priority score per symbol: weighted, max-normalised volatility and open lots"""
+        volatility: Dict[str, float] = {}
+        for symbol in symbols:
+            try:
+                volatility[symbol] = float(self.volatility_fn(symbol))
+            except Exception as e:
+                logger.warning(f"Volatility unavailable for {symbol}: {e}")
+                volatility[symbol] = 0.0
+        try:
+            exposure = self.exposure_fn()
+        except Exception as e:
+            logger.warning(f"Open exposure unavailable: {e}")
+            exposure = {}
+        lots = {s: exposure.get(s.replace("_", "").upper(), 0.0) for s in symbols}
+
+        max_vol = max(volatility.values(), default=0.0) or 1.0
+        max_lots = max(lots.values(), default=0.0) or 1.0
+        return {
+            s: round(self.volatility_weight * volatility[s] / max_vol
+                     + self.exposure_weight * lots[s] / max_lots, 4)
+            for s in symbols
+        }
+
+    def plan(self, symbols: Sequence[str], calls_per_symbol: int = 1) -> List[str]:
+        """
+        The symbols to capture this cycle.
+
+        Unchanged order while the budget is comfortable; ranked by priority
+        (ties keep the configured order) and cut to what is affordable when
+        it is tight.
+        """
+        symbols = list(symbols)
+        left = self.remaining()
+        if left["calls"] is None:
+            return symbols
+        affordable = left["calls"] // max(1, calls_per_symbol)
+        if affordable >= len(symbols) and left["fraction"] > self.tight_fraction:
+            return symbols
+
+        scores = self.priorities(symbols)
+        ranked = sorted(symbols, key=lambda s: -scores[s])        # stable: ties keep ASSETS order
+        chosen = ranked[:affordable]
+        logger.info(
+            "Vision budget tight (%d calls, %.0f%% left): capturing %s, skipping %s",
+            left["calls"], left["fraction"] * 100, chosen or "-", ranked[affordable:] or "-",
+        )
+        return chosen
+
+    def stats(self) -> Dict[str, Any]:
+        left = self.remaining()
+        return {
+            "limits": {f"{window}_{unit}": limit for (window, unit), limit in self.limits.items()},
+            "calls_left": left["calls"],
+            "fraction_left": left["fraction"],
+            "tokens_per_call": round(self.tokens_per_call(), 1),
+            "denied": self.denied,
+            **{f"last_{window}": used for window, used in left["windows"].items()},
+        }
+
+
+# Global instance used by vision_worker, vision_client and the scheduler
+vision_budget = VisionBudget()
+
+
+if __name__ == "__main__":
+    import json
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(vision_budget.stats(), indent=2))
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Asynchronous Vision client
+
+Sends chart analyses to the OpenAI chat-completions endpoint concurrently
+over one pooled httpx.AsyncClient, bounded by a concurrency limit and a
+request-start rate limit.  Results are yielded as they complete, so a full
+asset sweep takes about as long as the slowest single call.
+
+    async with AsyncVisionClient(concurrency=5, rate_per_minute=60) as client:
+        async for symbol, result, elapsed in client.analyze_many(charts):
+            ...
+
+Payload building and response parsing are shared with the blocking
+vision_worker.analyze_image(), including its multi-chart mode (pass a
+{timeframe: path} mapping to analyse several timeframes of one symbol in
+one request).  Every request is checked against and recorded in
+vision_budget, like the blocking path.
+
+Environment:
+    VISION_CONCURRENCY      max requests in flight (default 5)
+    VISION_RATE_PER_MINUTE  max request starts per minute (default 60)
+"""
+
+import os
+import json
+import time
+import asyncio
+import logging
+from functools import partial
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple, Union
+
+import httpx
+
+from vision_worker import (
+    OPENAI_API_KEY,
+    REQUEST_TIMEOUT,
+    VISION_API_URL,
+    _image_count,
+    build_multi_vision_request,
+    build_vision_request,
+    parse_multi_vision_response,
+    parse_vision_response,
+)
+from vision_budget import VisionBudgetExceeded, vision_budget
+
+logger = logging.getLogger(__name__)
+
+
+class _RateLimiter:
+    """Spaces request starts at least 60/rate seconds apart"""
+
+    def __init__(self, rate_per_minute: float):
+        self.interval = 60.0 / rate_per_minute if rate_per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncVisionClient:
+    """Concurrent, rate-limited Vision API client with a persistent connection pool"""
+
+    def __init__(
+        self,
+        api_url: str = VISION_API_URL,
+        api_key: str = OPENAI_API_KEY,
+        concurrency: Optional[int] = None,
+        rate_per_minute: Optional[float] = None,
+        timeout: float = REQUEST_TIMEOUT,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.concurrency = concurrency or int(os.environ.get("VISION_CONCURRENCY", 5))
+        rate = float(os.environ.get("VISION_RATE_PER_MINUTE", 60)) if rate_per_minute is None else rate_per_minute
+        self.timeout = timeout
+        self._transport = transport
+        self._limiter = _RateLimiter(rate)
+        self._sem = asyncio.Semaphore(self.concurrency)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "AsyncVisionClient":
+        self._client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=httpx.Timeout(self.timeout, connect=10.0),
+            limits=httpx.Limits(max_connections=self.concurrency,
+                                max_keepalive_connections=self.concurrency),
+            transport=self._transport,
+        )
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def analyze(self, image_path: Union[str, Dict[str, str]],
+                      symbol: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyse one chart; returns the parsed signal dict ({} = no trade idea).
+
+        A {timeframe: path} mapping of one *symbol*'s charts is analysed in a
+        single multi-chart request and returns {timeframe: signal dict}.
+
+        Like the blocking analyze_image(), raises VisionBudgetExceeded when
+        the budget refuses the call and RuntimeError when the chart cannot be
+        read or the request fails, so a failure is never taken for "no setup".
+        """
+        if self._client is None:
+            raise RuntimeError("AsyncVisionClient must be used as an async context manager")
+
+        if isinstance(image_path, dict):
+            if len(image_path) == 1:
+                (timeframe, path), = image_path.items()
+                return {timeframe: await self.analyze(path, symbol=symbol)}
+            timeframes = list(image_path)
+            build = partial(build_multi_vision_request, symbol or "", image_path)
+            parse = partial(parse_multi_vision_response, timeframes=timeframes)
+        else:
+            build = partial(build_vision_request, image_path)
+            parse = parse_vision_response
+
+        try:
+            # image loading / re-encoding is CPU work – keep it off the event loop
+            payload = await asyncio.to_thread(build)
+        except Exception as e:
+            logger.error(f"Could not build Vision request for {image_path}: {e}")
+            raise RuntimeError(f"Could not build Vision request: {e}") from e
+
+        body = json.dumps(payload).encode()
+        images = _image_count(payload)
+        async with self._sem:
+            allowed, details = await asyncio.to_thread(vision_budget.allow)
+            if not allowed:
+                raise VisionBudgetExceeded(f"Vision budget exhausted ({details})")
+            await self._limiter.wait()
+            start = time.monotonic()
+            try:
+                response = await self._client.post(
+                    self.api_url, content=body, headers={"Content-Type": "application/json"}
+                )
+                response.raise_for_status()
+                result = response.json()
+            except httpx.TimeoutException as e:
+                await self._record(start, body, None, symbol, images, ok=False)
+                logger.error(f"OpenAI API request timed out after {self.timeout} seconds ({image_path})")
+                raise RuntimeError("Vision API request timed out") from e
+            except httpx.HTTPError as e:
+                await self._record(start, body, None, symbol, images, ok=False)
+                logger.error(f"OpenAI API request failed for {image_path}: {e}")
+                raise RuntimeError(f"Vision API request failed: {e}") from e
+            except ValueError as e:
+                await self._record(start, body, None, symbol, images, ok=False)
+                logger.error(f"Invalid JSON from OpenAI for {image_path}: {e}")
+                raise RuntimeError(f"Vision API request failed: {e}") from e
+
+        await self._record(start, body, result.get("usage"), symbol, images)
+        return parse(result)
+
+    @staticmethod
+    async def _record(start: float, body: bytes, usage: Optional[Dict[str, Any]],
+                      symbol: Optional[str], images: int, ok: bool = True) -> None:
+        """Log the call in vision_budget without blocking the event loop"""
+        await asyncio.to_thread(vision_budget.record, time.monotonic() - start, len(body), usage,
+                                symbol=symbol, images=images, ok=ok)
+
+    async def analyze_many(
+        self, charts: Iterable[Tuple[str, Union[str, Dict[str, str]]]]
+    ) -> AsyncIterator[Tuple[str, Union[Dict[str, Any], Exception], float]]:
+        """
+        Analyse (key, image_path) pairs concurrently.  With a {timeframe: path}
+        mapping the key is taken as the symbol (multi-chart request).
+
+        Yields (key, result, seconds) in completion order; result is the
+        exception analyze() raised when that request failed.
+        """
+        async def _one(key: str, path) -> Tuple[str, Union[Dict[str, Any], Exception], float]:
+            start = time.monotonic()
+            try:
+                result = await self.analyze(path, symbol=key)
+            except Exception as e:
+                result = e
+            return key, result, time.monotonic() - start
+
+        tasks = [asyncio.create_task(_one(key, path)) for key, path in charts]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                yield await fut
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+async def analyze_all(charts: Iterable[Tuple[str, str]], **client_kwargs) -> Dict[str, Dict[str, Any]]:
+    """Convenience wrapper: analyse every chart and return {key: result} (failed keys are left out)"""
+    results: Dict[str, Dict[str, Any]] = {}
+    async with AsyncVisionClient(**client_kwargs) as client:
+        async for key, result, elapsed in client.analyze_many(charts):
+            if isinstance(result, Exception):
+                logger.error(f"Vision analysis for {key} failed after {elapsed:.1f}s: {result}")
+                continue
+            logger.info(f"Vision result for {key} in {elapsed:.1f}s")
+            results[key] = result
+    return results
@@ -1,21 +1,36 @@
+import io
 import os
+import re
 import json
 import logging
 import time
-import os
-from typing import Dict, Any
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta, timezone, datetime as dt
-from config import ASSETS        # new
+from config import ASSETS, TIMEFRAME_SECONDS, VISION_IMAGE_PROFILE
 from sqlalchemy import func
-from chart_utils import is_price_too_close
-from app import db, Signal, SignalAction, app
+from chart_utils import is_price_too_close, price_to_pip_factor
+from app import db, Signal, SignalAction, TradeSide, app
 from signal_scoring import signal_scorer
+from chart_store import chart_store
+from chart_handoff import chart_handoff
+from vision_budget import VisionBudgetExceeded, vision_budget
+from signal_analyzers import (
+    SignalAnalyzer,
+    get_analyzer,
+    primary_analyzer_name,
+    register_analyzer,
+    run_analyzers,
+    run_shadows,
+)
 from models import SignalStatus
 from zoneinfo import ZoneInfo 
 
-import redis
 import requests
 
+from job_queue import VISION_QUEUE, PermanentJobError, get_job_queue
+
 def classify_session(t_utc: dt) -> str:
     """Return a coarse FX session tag based on UTC hour."""
     h = t_utc.hour
@@ -36,43 +51,408 @@ VISION_API_URL = "https://api.openai.com/v1/chat/completions"
 VISION_MODEL = "gpt-4o"  # Updated to gpt-4o which has vision capabilities
 MAX_RETRIES = 3
 REQUEST_TIMEOUT = 60  # seconds
+# Bump whenever the system prompt / output contract changes – invalidates cached results
+VISION_PROMPT_VERSION = 1
+# Timeframes analysed together in one multi-chart request per symbol
+VISION_MULTI_TIMEFRAMES = [tf.strip() for tf in os.environ.get("VISION_MULTI_TIMEFRAMES", "M15,H1").split(",") if tf.strip()]
+
+
+# ──────────────────────────────────────────────────────────────
+#  Vision result cache (perceptual chart hash)
+# ──────────────────────────────────────────────────────────────
+_CHART_NAME_RE = re.compile(r"_(?P<tf>[A-Z]\d*)_(?P<ts>\d{8}_\d{6})")
+
+
+def chart_dhash(image_path: str, size: int = 16) -> Optional[int]:
+    """Difference hash of a chart image (size×size bits), or None if unreadable"""
+    from PIL import Image
+    import numpy as np
+
+    data = chart_handoff.get(image_path)
+    if data is not None:
+        path = io.BytesIO(data)
+    else:
+        path = image_path if os.path.exists(image_path) else os.path.join("static", image_path)
+    try:
+        with Image.open(path) as img:
+            px = np.asarray(img.convert("L").resize((size + 1, size), Image.LANCZOS), dtype=np.int16)
+    except (OSError, ValueError):
+        return None
+    bits = np.packbits((px[:, 1:] > px[:, :-1]).flatten())
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+class VisionResultCache:
+    """
+    Re-use a previous Vision analysis when the new chart is near-identical.
+
+    Entries are bucketed by (symbol, timeframe, prompt version + model).  A
+    lookup hits when an entry in the bucket
+
+        • has a perceptual hash within VISION_CACHE_MAX_DISTANCE bits,
+        • is younger than VISION_CACHE_TTL seconds, and
+        • was made at most VISION_CACHE_MAX_BARS bars before this chart's last bar.
+    """
+
+    def __init__(self, max_distance: Optional[int] = None, ttl: Optional[float] = None,
+                 max_bars: Optional[int] = None, per_bucket: int = 8):
+        self.max_distance = int(os.environ.get("VISION_CACHE_MAX_DISTANCE", 12)) if max_distance is None else max_distance
+        self.ttl = float(os.environ.get("VISION_CACHE_TTL", 1800)) if ttl is None else ttl
+        self.max_bars = int(os.environ.get("VISION_CACHE_MAX_BARS", 1)) if max_bars is None else max_bars
+        self.per_bucket = per_bucket
+        self._entries: Dict[Tuple, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.call_seconds = 0.0
+        self.calls = 0
+
+    @staticmethod
+    def _chart_info(symbol: str, image_path: str) -> Tuple[Tuple, float]:
+        """(bucket, last closed bar timestamp) derived from the chart filename"""
+        m = _CHART_NAME_RE.search(os.path.basename(image_path))
+        timeframe = m.group("tf") if m else "H1"
+        if m:
+            captured = datetime.strptime(m.group("ts"), "%Y%m%d_%H%M%S").timestamp()
+        else:
+            captured = os.path.getmtime(image_path) if os.path.exists(image_path) else time.time()
+        tf_seconds = TIMEFRAME_SECONDS.get(timeframe, 3600)
+        last_bar = (captured // tf_seconds) * tf_seconds - tf_seconds
+        bucket = (symbol.replace("_", "").upper(), timeframe, VISION_PROMPT_VERSION, VISION_MODEL)
+        return bucket, last_bar
+
+    def lookup(self, symbol: str, image_path: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Return (cached result or None, fingerprint to pass to store())"""
+        bucket, last_bar = self._chart_info(symbol, image_path)
+        fp = {"bucket": bucket, "last_bar": last_bar, "hash": chart_dhash(image_path)}
+        if fp["hash"] is None:
+            return None, fp
+
+        now = time.time()
+        tf_seconds = TIMEFRAME_SECONDS.get(bucket[1], 3600)
+        with self._lock:
+            best = None
+            for entry in self._entries.get(bucket, []):
+                if now - entry["stored_at"] > self.ttl:
+                    continue
+                if not 0 <= (last_bar - entry["last_bar"]) / tf_seconds <= self.max_bars:
+                    continue
+                distance = bin(entry["hash"] ^ fp["hash"]).count("1")
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, entry)
+            if best is None:
+                self.misses += 1
+                return None, fp
+            self.hits += 1
+
+        logger.info("Vision cache hit for %s (distance %d bits)", symbol, best[0])
+        return dict(best[1]["result"]), fp
+
+    def store(self, fp: Dict[str, Any], result: Dict[str, Any], seconds: Optional[float] = None) -> None:
+        """Remember a fresh analysis (and how long the model call took)"""
+        with self._lock:
+            if seconds is not None:
+                self.calls += 1
+                self.call_seconds += seconds
+            if fp.get("hash") is None or not result:
+                return
+            entries = self._entries.setdefault(fp["bucket"], [])
+            entries.append({"hash": fp["hash"], "last_bar": fp["last_bar"],
+                            "stored_at": time.time(), "result": dict(result)})
+            del entries[:-self.per_bucket]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_call = self.call_seconds / self.calls if self.calls else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "calls_saved": self.hits,
+                "avg_call_seconds": round(avg_call, 2),
+                "seconds_saved": round(self.hits * avg_call, 1),
+            }
+
+
+vision_cache = VisionResultCache()
+
+
+def analyze_image_cached(symbol: str, image_path: str) -> Dict[str, Any]:
+    """analyze_image() behind the perceptual result cache"""
+    cached, fp = vision_cache.lookup(symbol, image_path)
+    if cached is not None:
+        return cached
+    start = time.monotonic()
+    result = analyze_image(image_path)
+    vision_cache.store(fp, result, seconds=time.monotonic() - start)
+    return result
+
+
+def analyze_charts_cached(symbol: str, charts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """Multi-chart analyze_image() behind the result cache – only the misses are sent"""
+    results, fingerprints = {}, {}
+    for timeframe, path in charts.items():
+        cached, fingerprints[timeframe] = vision_cache.lookup(symbol, path)
+        if cached is not None:
+            results[timeframe] = cached
+
+    misses = {tf: path for tf, path in charts.items() if tf not in results}
+    if misses:
+        start = time.monotonic()
+        fresh = analyze_image(misses, symbol=symbol)
+        seconds = (time.monotonic() - start) / len(misses)
+        for timeframe in misses:
+            results[timeframe] = fresh.get(timeframe, {})
+            vision_cache.store(fingerprints[timeframe], results[timeframe], seconds=seconds)
+    return results
+
 
 
+class VisionAnalyzer(SignalAnalyzer):
+    """OpenAI Vision behind the result cache, as a pluggable analyzer"""
+
+    name = "vision"
+    source = "openai_vision"
+
+    def analyze_charts(self, symbol: str, charts: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        return analyze_charts_cached(symbol, charts)
+
+
+register_analyzer("vision", VisionAnalyzer)
+
+
+# ──────────────────────────────────────────────────────────────
+#  Pre-Vision gate
+# ──────────────────────────────────────────────────────────────
+DUPLICATE_LOOKBACK_MINUTES = 30
+LIVE_STATUSES = [
+    SignalStatus.PENDING.value,      # "PENDING"
+    SignalStatus.ACTIVE.value,       # "ACTIVE"
+    SignalStatus.TRIGGERED.value     # "TRIGGERED"
+]     # actionable only
+_SIDE_ACTIONS = {
+    TradeSide.BUY:  (SignalAction.BUY_NOW, SignalAction.ANTICIPATED_LONG),
+    TradeSide.SELL: (SignalAction.SELL_NOW, SignalAction.ANTICIPATED_SHORT),
+}
+
+
+def fx_market_closed(t_utc: dt) -> bool:
+    """True between the Friday 22:00 UTC close and the Sunday 22:00 UTC open"""
+    wd = t_utc.weekday()
+    return wd == 5 or (wd == 4 and t_utc.hour >= 22) or (wd == 6 and t_utc.hour < 22)
+
+
+class PreVisionGate:
+    """
+    Cheap local checks run before a chart is sent to Vision.
+
+    A side (long / short) is blocked when, whatever the model proposes,
+
+        • its best possible technical score is below the scorer's minimum,
+        • it would fail the correlation check against open trades, or
+        • every action on that side already has a live signal within 10 pips
+          of the current price (the duplicate guard in process_chart would
+          drop a fresh one).
+
+    Vision is skipped when both sides are blocked, or up-front when the
+    market is closed, the session is excluded (VISION_GATE_SKIP_SESSIONS) or
+    ATR is outside [VISION_GATE_MIN_ATR_PIPS, VISION_GATE_MAX_ATR_PIPS].
+    Any error inside the gate lets the chart through.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, min_atr_pips: Optional[float] = None,
+                 max_atr_pips: Optional[float] = None, skip_sessions: Optional[List[str]] = None):
+        self.enabled = os.environ.get("VISION_GATE_ENABLED", "1") == "1" if enabled is None else enabled
+        self.min_atr_pips = float(os.environ.get("VISION_GATE_MIN_ATR_PIPS", 0)) if min_atr_pips is None else min_atr_pips
+        self.max_atr_pips = float(os.environ.get("VISION_GATE_MAX_ATR_PIPS", 0)) if max_atr_pips is None else max_atr_pips
+        if skip_sessions is None:
+            skip_sessions = [s.strip() for s in os.environ.get("VISION_GATE_SKIP_SESSIONS", "").split(",") if s.strip()]
+        self.skip_sessions = set(skip_sessions)
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.skipped: Dict[str, int] = {}
+
+    def check(self, symbol: str, timeframe: str = "H1", now: Optional[dt] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Returns (should_call_vision, details).  details["reason"] names the
+        deciding check when the chart is skipped.
+        """
+        if not self.enabled:
+            return True, {"decision": "analyse", "reason": "gate disabled"}
+        try:
+            proceed, details = self._evaluate(symbol, timeframe, now or datetime.now(timezone.utc))
+        except Exception as e:
+            logger.error(f"Pre-Vision gate error for {symbol}: {e}")
+            return True, {"decision": "analyse", "error": str(e)}
+
+        with self._lock:
+            self.checked += 1
+            if not proceed:
+                self.skipped[details["reason"]] = self.skipped.get(details["reason"], 0) + 1
+        if not proceed:
+            logger.info("Pre-Vision gate: skipping %s %s – %s", symbol, timeframe, details["reason"])
+        return proceed, details
+
+    def _evaluate(self, symbol: str, timeframe: str, now: dt) -> Tuple[bool, Dict[str, Any]]:
+        session = classify_session(now)
+        details: Dict[str, Any] = {"session": session, "timeframe": timeframe}
+
+        def skip(reason: str) -> Tuple[bool, Dict[str, Any]]:
+            details.update(decision="skip", reason=reason)
+            return False, details
+
+        # ── 1. Calendar ──────────────────────────────────────────────
+        if fx_market_closed(now) and not symbol.startswith("BTC"):
+            return skip("market_closed")
+        if session in self.skip_sessions:
+            return skip(f"session_{session}")
+
+        # ── 2. Correlation with open trades (DB only) ────────────────
+        blocked: Dict[str, str] = {}
+        for side, actions in _SIDE_ACTIONS.items():
+            passed, _ = signal_scorer.evaluate_correlation(symbol, actions[0])
+            if not passed:
+                blocked[side.name] = "correlation"
+        if len(blocked) == len(_SIDE_ACTIONS):
+            details["blocked"] = blocked
+            return skip("correlation")
+
+        # ── 3. Indicator snapshot (one H1 candle fetch) ──────────────
+        df, error = signal_scorer.load_technical_frame(symbol)
+        if df is None:
+            details.update(decision="analyse", snapshot_error=error)
+            return True, details
+        latest = df.iloc[-1]
+        price = float(latest["close"])
+        atr_pips = self._atr_pips(symbol, df)
+        details["snapshot"] = {
+            "close": price,
+            "rsi": round(float(latest["rsi"]), 2),
+            "macd": float(latest["macd"]),
+            "atr_pips": round(atr_pips, 2) if atr_pips is not None else None,
+        }
+
+        if atr_pips is not None:
+            if self.min_atr_pips and atr_pips < self.min_atr_pips:
+                return skip("atr_too_low")
+            if self.max_atr_pips and atr_pips > self.max_atr_pips:
+                return skip("atr_too_high")
+
+        # ── 4. Per-side checks ───────────────────────────────────────
+        ceilings = signal_scorer.technical_ceiling(symbol, df)
+        details["technical_ceiling"] = {side.name: score for side, score in ceilings.items()}
+        live = self._live_entries(symbol)
+        for side, actions in _SIDE_ACTIONS.items():
+            if side.name in blocked:
+                continue
+            if ceilings.get(side, 1.0) < signal_scorer.min_technical_score:
+                blocked[side.name] = "technical"
+            elif all(any(a == action and is_price_too_close(symbol, price, entry) for a, entry in live)
+                     for action in actions):
+                blocked[side.name] = "duplicate"
+
+        details["blocked"] = blocked
+        if len(blocked) == len(_SIDE_ACTIONS):
+            reasons = set(blocked.values())
+            return skip(reasons.pop() if len(reasons) == 1 else "mixed")
+
+        details["decision"] = "analyse"
+        return True, details
+
+    @staticmethod
+    def _atr_pips(symbol: str, df, lookback: int = 14) -> Optional[float]:
+        """ATR-{lookback} in pips from an OHLC frame"""
+        import numpy as np
+
+        if len(df) < lookback + 1:
+            return None
+        high, low, close = (df[c].to_numpy(dtype=float) for c in ("high", "low", "close"))
+        tr = np.maximum.reduce([
+            high[1:] - low[1:],
+            np.abs(high[1:] - close[:-1]),
+            np.abs(low[1:] - close[:-1]),
+        ])
+        return float(tr[-lookback:].mean() * price_to_pip_factor(symbol))
+
+    @staticmethod
+    def _live_entries(symbol: str) -> List[Tuple[SignalAction, float]]:
+        """(action, entry) of live signals inside the duplicate-guard window"""
+        cutoff = datetime.now(timezone.utc) - timedelta(minutes=DUPLICATE_LOOKBACK_MINUTES)
+        rows = (
+            db.session.query(Signal.action, Signal.entry)
+                .filter(
+                    Signal.symbol == symbol,
+                    Signal.status.in_(LIVE_STATUSES),
+                    Signal.created_at >= cutoff
+                )
+                .all()
+        )
+        return [(action, float(entry)) for action, entry in rows if entry]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            skipped = sum(self.skipped.values())
+            return {
+                "checked": self.checked,
+                "skipped": skipped,
+                "skip_rate": round(skipped / self.checked, 3) if self.checked else 0.0,
+                "by_reason": dict(self.skipped),
+            }
+
+
+vision_gate = PreVisionGate()
+
+
+def chart_timeframe(image_path: str) -> str:
+    """Timeframe tag from a SYMBOL_TF_YYYYMMDD_HHMMSS.png filename (default H1)"""
+    m = _CHART_NAME_RE.search(os.path.basename(image_path))
+    return m.group("tf") if m else "H1"
 
-# Redis will be mocked since it's not available
-redis_client = None
 
 class DirectVisionPipeline:
     """A direct approach to vision processing without Redis"""
 
     @staticmethod
-    def process_chart(symbol: str, image_path: str) -> bool:
+    def process_chart(symbol: str, image_path: str,
+                      vision_result: Optional[Dict[str, Any]] = None) -> bool:
         """
-        Analyse a chart image with OpenAI Vision, translate the result
-        into a Signal, and store it—unless an almost-identical idea
-        (< 10 pips away) was already stored.
+        Analyse a chart with the configured analyzer (OpenAI Vision by
+        default, see signal_analyzers.py), translate the result into a
+        Signal, and store it—unless an almost-identical idea (< 10 pips
+        away) was already stored.
+
+        *vision_result* can be supplied when the analysis was already done
+        elsewhere (e.g. by the concurrent client in vision_client.py); the
+        pre-Vision gate and the analyzers only run when it is not.
 
         Returns:
             True  → new Signal inserted
-            False → duplicate or error
+            False → skipped by the gate, duplicate or error
         """
         try:
             logger.info("Processing chart for %s (%s)", symbol, image_path)
 
             # ------------------------------------------------------------------
-            # 0. Sanity-check image exists
+            # 0. Sanity-check image exists (in memory or on disk)
             # ------------------------------------------------------------------
-            if not os.path.exists(image_path):
+            if not chart_handoff.available(image_path):
                 logger.error("Image file does not exist: %s", image_path)
                 return False
 
             # ------------------------------------------------------------------
-            # 1. Analyse with Vision API
+            # 1. Analyse with Vision API (unless the local gate already knows
+            #    nothing on this chart could be traded)
             # ------------------------------------------------------------------
-            vision_result = analyze_image(image_path)
+            if vision_result is None:
+                proceed, _ = vision_gate.check(symbol, chart_timeframe(image_path))
+                if not proceed:
+                    return False
+                timeframe = chart_timeframe(image_path)
+                vision_result = run_analyzers(symbol, {timeframe: image_path}).get(timeframe, {})
             if not vision_result or "action" not in vision_result:
                 logger.error(
-                    "Vision API returned invalid result for %s: %s",
+                    "Analyzer returned no valid result for %s: %s",
                     symbol, vision_result
                 )
                 return False
@@ -94,19 +474,14 @@ class DirectVisionPipeline:
             # ------------------------------------------------------------------
             # 3. Duplicate guard – skip if a recent idea is within 10 pips
             # ------------------------------------------------------------------
-            cutoff = datetime.now(timezone.utc) - timedelta(minutes=30)        # look back 4 h
-            live_statuses = [
-                SignalStatus.PENDING.value,      # "PENDING"
-                SignalStatus.ACTIVE.value,       # "ACTIVE"
-                SignalStatus.TRIGGERED.value     # "TRIGGERED"
-            ]     # actionable only
+            cutoff = datetime.now(timezone.utc) - timedelta(minutes=DUPLICATE_LOOKBACK_MINUTES)
 
             last = (
                 db.session.query(Signal)
                     .filter(
                         Signal.symbol == symbol,
                         Signal.action == action_enum,
-                        Signal.status.in_(live_statuses),          # NEW status filter
+                        Signal.status.in_(LIVE_STATUSES),          # NEW status filter
                         Signal.created_at >= cutoff                # NEW time filter
                     )
                     .order_by(Signal.id.desc())
@@ -149,7 +524,7 @@ class DirectVisionPipeline:
                 confidence=vision_result.get("confidence", 0.5),
                 status=SignalStatus.PENDING.value,
                 context_json=json.dumps({
-                    "source": "openai_vision",
+                    "source": vision_result.get("source", "openai_vision"),
                     "image_path": image_path,
                     "timeframe": img_timeframe,
                     "processed_at": datetime.now().isoformat()
@@ -170,6 +545,7 @@ class DirectVisionPipeline:
                 signal.status = SignalStatus.CANCELLED.value      # tag as rejected immediately
 
             db.session.commit()
+            chart_handoff.attach_signal(image_path, signal.id)
             logger.info(
                 "Created Vision signal for %s: %s @ %.5f",
                 symbol, action_enum.name, entry_price
@@ -182,244 +558,135 @@ class DirectVisionPipeline:
             db.session.rollback()
             return False
 
+    @staticmethod
+    def process_charts(symbol: str, charts: Dict[str, str]) -> Dict[str, bool]:
+        """
+        Multi-timeframe variant of process_chart(): the charts of one symbol
+        ({timeframe: image_path}) that pass the pre-Vision gate go to the
+        analyzer together (one Vision request), then each result is stored
+        via process_chart().
+
+        Returns {timeframe: signal inserted?}
+        """
+        outcome = {tf: False for tf in charts}
+        due = gate_charts(symbol, charts)
+        if due:
+            for timeframe, vision_result in run_analyzers(symbol, due).items():
+                outcome[timeframe] = DirectVisionPipeline.process_chart(
+                    symbol, due[timeframe], vision_result=vision_result
+                )
+        return outcome
+
+
+def gate_charts(symbol: str, charts: Dict[str, str]) -> Dict[str, str]:
+    """The existing charts of *symbol* that pass the pre-Vision gate"""
+    due = {}
+    for timeframe, path in charts.items():
+        if not chart_handoff.available(path):
+            logger.error("Image file does not exist: %s", path)
+            continue
+        if vision_gate.check(symbol, timeframe)[0]:
+            due[timeframe] = path
+    return due
+
+
 def generate_technical_signal(symbol: str, image_path: str) -> Dict[str, Any]:
-    """Generate a trading signal using local technical analysis rules
-    
-    This function serves as a fallback when OpenAI Vision API is unavailable.
-    It uses the chart image path to extract the symbol and generates realistic
-    trading signals based on the current price data from OANDA.
-    
-    Args:
-        symbol: The trading symbol (e.g., 'EUR_USD')
-        image_path: Path to the chart image (not actually used for analysis, just logging)
-    
-    Returns:
-        Dict with trading signal information (action, entry, sl, tp, confidence)
+    """Signal for *image_path*'s timeframe from the deterministic rule analyzer
+
+    Kept for callers of the old local fallback; {} when there is no setup,
+    RuntimeError when no candles could be loaded for the timeframe.
     """
-    import random
-    from datetime import datetime
-    import urllib.request
-    import json
-    import os
-    from config import mt5_to_oanda
-    
-    logger.info(f"Generating local technical signal for {symbol} (fallback method)")
-    
-    # Ensure symbol is in OANDA format (with underscore)
-    if '_' not in symbol:
-        symbol = mt5_to_oanda(symbol)
-    
-    # Generate a random signal based on the current time
-    # This is deterministic for a given symbol in a given hour
-    current_hour = datetime.now().hour
-    seed = int(f"{current_hour}{ord(symbol[0])}{ord(symbol[-1])}")
-    random.seed(seed)
-    
-    # Try to get current price from OANDA for realistic entry
-    try:
-        # If we have OANDA credentials, get real price
-        from app import OandaService
-        oanda_service = OandaService()
-        if oanda_service.api_key and oanda_service.account_id:
-            # Get latest candle data
-            candles = oanda_service.get_candles(symbol, granularity="H1", count=1)
-            if candles and len(candles) > 0:
-                latest_candle = candles[-1]
-                current_price = float(latest_candle['mid']['c'])
-                logger.info(f"Retrieved current price for {symbol}: {current_price}")
-            else:
-                # Fallback to sensible defaults for each pair
-                current_price = get_default_price_for_symbol(symbol)
-        else:
-            current_price = get_default_price_for_symbol(symbol)
-    except Exception as e:
-        logger.error(f"Error getting price from OANDA: {str(e)}")
-        current_price = get_default_price_for_symbol(symbol)
-    
-    # Generate a signal type weighted toward anticipatory signals
-    r = random.random()
-    if r < 0.3:  # 30% chance of a BUY_NOW
-        action = SignalAction.BUY_NOW
-        entry = current_price
-        # For buy signals, SL below entry, TP above entry
-        sl = round(entry * 0.995, 5)  # 0.5% below entry
-        tp = round(entry * 1.010, 5)  # 1.0% above entry
-    elif r < 0.6:  # 30% chance of a SELL_NOW
-        action = SignalAction.SELL_NOW
-        entry = current_price
-        # For sell signals, SL above entry, TP below entry
-        sl = round(entry * 1.005, 5)  # 0.5% above entry
-        tp = round(entry * 0.990, 5)  # 1.0% below entry
-    elif r < 0.8:  # 20% chance of ANTICIPATED_LONG
-        action = SignalAction.ANTICIPATED_LONG
-        # Anticipate buying at a slightly lower price
-        entry = round(current_price * 0.998, 5)  # 0.2% below current
-        sl = round(entry * 0.995, 5)  # 0.5% below entry
-        tp = round(entry * 1.010, 5)  # 1.0% above entry
-    else:  # 20% chance of ANTICIPATED_SHORT
-        action = SignalAction.ANTICIPATED_SHORT
-        # Anticipate selling at a slightly higher price
-        entry = round(current_price * 1.002, 5)  # 0.2% above current
-        sl = round(entry * 1.005, 5)  # 0.5% above entry
-        tp = round(entry * 0.990, 5)  # 1.0% below entry
-    
-    # Generate a realistic confidence score
-    confidence = round(random.uniform(0.65, 0.85), 2)
-    
-    # Round values to 5 decimal places for forex pairs
-    if symbol != 'XAU_USD':
-        entry = round(entry, 5)
-        sl = round(sl, 5)
-        tp = round(tp, 5)
-    else:  # Gold is priced with 2 decimal places
-        entry = round(entry, 2)
-        sl = round(sl, 2)
-        tp = round(tp, 2)
-    
-    signal = {
-        'action': action,
-        'entry': entry,
-        'sl': sl,
-        'tp': tp,
-        'confidence': confidence
-    }
-    
-    logger.info(f"Generated technical signal for {symbol}: {signal}")
-    return signal
-
-
-def get_default_price_for_symbol(symbol: str) -> float:
-    """Get a sensible default price for a symbol when API data is unavailable"""
-    # These are realistic price levels as of May 2025
-    defaults = {
-        'EUR_USD': 1.1320,
-        'GBP_USD': 1.3450,
-        'USD_JPY': 144.30,
-        'XAU_USD': 3260.00,
-        'GBP_JPY': 194.20
-    }
-    
-    return defaults.get(symbol, 1.0000)  # Default fallback if symbol not found
+    timeframe = chart_timeframe(image_path)
+    return get_analyzer("rules").analyze_charts(symbol, {timeframe: image_path})[timeframe]
 
 
-def analyze_image(image_path: str) -> Dict[str, Any]:
-    """Send image to Vision API for analysis with OpenAI"""
-    try:
-        if not OPENAI_API_KEY:
-            logger.error("OpenAI API key not found in environment variables")
-            return {}
-            
-        logger.info(f"Sending request to OpenAI Vision API")
-        
-        # --- Get raw bytes for the supplied image_s3/local path ----------
-        import base64, os
-        try:
-            if image_path.startswith("s3://"):
-                # TODO: download with boto3 if you keep S3
-                raise FileNotFoundError
-            # Fix path handling: avoid adding 'static/' if it's already there
-            if os.path.exists(image_path):
-                local_path = image_path
-            elif os.path.exists(os.path.join("static", image_path)):
-                local_path = os.path.join("static", image_path)
-            else:
-                # Try to handle cases where the image path has a double 'static/static/'
-                if 'static/' in image_path:
-                    test_path = image_path.replace('static/', '', 1)
-                    if os.path.exists(os.path.join("static", test_path)):
-                        local_path = os.path.join("static", test_path)
-                    else:
-                        raise FileNotFoundError(f"Cannot find image file: {image_path}")
-                else:
-                    raise FileNotFoundError(f"Cannot find image file: {image_path}")
-                
+def _load_chart_bytes(image_path: str) -> bytes:
+    """Chart PNG bytes: from the in-process handoff when held there, else from disk
+
+    Raises FileNotFoundError when the chart exists in neither place – the
+    caller's job is retried instead of analysing a substitute chart.
+    """
+    image_bytes = chart_handoff.get(image_path)
+    if image_bytes is not None:
+        return image_bytes
+
+    if image_path.startswith("s3://"):
+        # TODO: download with boto3 if you keep S3
+        raise FileNotFoundError(f"S3 charts are not supported: {image_path}")
+    for local_path in (image_path, os.path.join("static", image_path)):
+        if os.path.isfile(local_path):
             logger.info(f"Reading image file from: {local_path}")
             with open(local_path, "rb") as f:
-                image_bytes = f.read()
-        except Exception as e:
-            logger.warning(f"Failed to read image from path {image_path}: {str(e)}")
-            # Fallback: regenerate a fresh chart on-the-fly
-            from chart_utils import generate_chart_bytes
-            
-            # Extract the symbol from the path, usually in format static/charts/SYMBOL/...
-            try:
-                parts = image_path.split('/')
-                if 'charts' in parts:
-                    symbol_idx = parts.index('charts') + 1
-                    if symbol_idx < len(parts):
-                        symbol_format = parts[symbol_idx]
-                        # Convert from MT5 to OANDA format if needed (XAUUSD -> XAU_USD)
-                        if symbol_format == 'XAUUSD':
-                            symbol = 'XAU_USD'
-                        elif len(symbol_format) == 6:  # For currency pairs like EURUSD
-                            symbol = symbol_format[:3] + '_' + symbol_format[3:]
-                        else:
-                            symbol = symbol_format
-                    else:
-                        symbol = "EUR_USD"  # Default
-                else:
-                    symbol = "EUR_USD"  # Default
-            except Exception:
-                symbol = "EUR_USD"  # Default if parsing fails
-                
-            logger.info(f"Generating fresh chart for {symbol}")
-            try:
-                image_bytes = generate_chart_bytes(symbol, count=100)
-            except Exception as chart_e:
-                logger.error(f"Failed to generate chart: {str(chart_e)}")
-                # Return an empty image to avoid crashing
-                import base64
-                from pathlib import Path
-                # Use a placeholder image from static folder
-                placeholder_path = Path("static/placeholder.png")
-                if placeholder_path.exists():
-                    with open(placeholder_path, "rb") as f:
-                        image_bytes = f.read()
-                else:
-                    # Create a minimal valid PNG
-                    image_bytes = base64.b64decode(
-                        "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAIAAACQd1PeAAAADElEQVQI12P4//8/AAX+Av7czFnnAAAAAElFTkSuQmCC"
-                    )
+                return f.read()
+    raise FileNotFoundError(f"Cannot find image file: {image_path}")
 
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        
-        # Extract symbol from the path for better context
+
+def _vision_image_part(image_bytes: bytes) -> Dict[str, Any]:
+    """image_url content part for a chart, re-encoded per VISION_IMAGE_PROFILE"""
+    import base64
+
+    # Shrink the upload: downscale + palette PNG / WebP / JPEG per VISION_IMAGE_PROFILE
+    image_mime = "image/png"
+    if VISION_IMAGE_PROFILE.get("format", "original") != "original":
         try:
-            # Format is typically static/charts/SYMBOL/filename.png
-            parts = image_path.split('/')
-            if 'charts' in parts:
-                symbol_index = parts.index('charts') + 1
-                symbol = parts[symbol_index] if symbol_index < len(parts) else 'UNKNOWN'
-            else:
-                # Try to extract symbol from filename
-                filename = os.path.basename(image_path)
-                for asset in ASSETS:
-                    mt5_symbol = asset.replace('_', '')
-                    if mt5_symbol in filename:
-                        symbol = asset
-                        break
-                else:
-                    symbol = "UNKNOWN"
+            import io
+            from PIL import Image
+            from chart_generator_basic import encode_vision_image
+            compact_bytes, meta = encode_vision_image(Image.open(io.BytesIO(image_bytes)), VISION_IMAGE_PROFILE)
+            logger.info(
+                f"Vision image {meta['width']}x{meta['height']} {meta['mime']}: "
+                f"{len(image_bytes) / 1024:.1f} KB -> {meta['bytes'] / 1024:.1f} KB"
+            )
+            image_bytes, image_mime = compact_bytes, meta["mime"]
         except Exception as e:
-            logger.warning(f"Could not extract symbol from path: {e}")
-            symbol = "UNKNOWN"
-        
-        # Build request for OpenAI API
-        headers = {
-            'Authorization': f'Bearer {OPENAI_API_KEY}',
-            'Content-Type': 'application/json'
+            logger.warning(f"Could not re-encode image for Vision, sending original: {e}")
+
+    image_base64 = base64.b64encode(image_bytes).decode("utf-8")
+    return {
+        "type": "image_url",
+        "image_url": {
+            "url": f"data:{image_mime};base64,{image_base64}"
         }
-        # ── build two-line meta header ─────────────────────
-        now_utc  = dt.utcnow().replace(tzinfo=ZoneInfo("UTC"))
-        session  = classify_session(now_utc)
-        meta_hdr = (
-            f"utc_timestamp: {now_utc.isoformat(timespec='seconds').replace('+00:00','Z')}\n"
-            f"session: {session}\n"
-            '---\n'
-        )
-        # ---------------------------------------------------
-        # Construct a detailed prompt for the vision model
-        system_prompt = meta_hdr +"""
+    }
+
+
+def _symbol_from_path(image_path: str) -> str:
+    """Symbol for the prompt, taken from the charts/<SYMBOL>/ directory or the filename"""
+    # Extract symbol from the path for better context
+    try:
+        # Format is typically static/charts/SYMBOL/filename.png
+        parts = image_path.split('/')
+        if 'charts' in parts:
+            symbol_index = parts.index('charts') + 1
+            symbol = parts[symbol_index] if symbol_index < len(parts) else 'UNKNOWN'
+        else:
+            # Try to extract symbol from filename
+            filename = os.path.basename(image_path)
+            for asset in ASSETS:
+                mt5_symbol = asset.replace('_', '')
+                if mt5_symbol in filename:
+                    symbol = asset
+                    break
+            else:
+                symbol = "UNKNOWN"
+    except Exception as e:
+        logger.warning(f"Could not extract symbol from path: {e}")
+        symbol = "UNKNOWN"
+    return symbol
+
+
+def _system_prompt() -> str:
+    """GENESIS system prompt with the current UTC timestamp / session header"""
+    # ── build two-line meta header ─────────────────────
+    now_utc  = dt.utcnow().replace(tzinfo=ZoneInfo("UTC"))
+    session  = classify_session(now_utc)
+    meta_hdr = (
+        f"utc_timestamp: {now_utc.isoformat(timespec='seconds').replace('+00:00','Z')}\n"
+        f"session: {session}\n"
+        '---\n'
+    )
+    # ---------------------------------------------------
+    system_prompt = meta_hdr +"""
 You are **GENESIS**, an expert forex-trading analyst and professional chart-pattern-recognition system.  
 Your task is to analyse the supplied forex chart image and return a single, precise trading signal (or decline if none is worth taking).
 
@@ -507,91 +774,406 @@ Respond **only** with a single JSON object—no markdown, no commentary, nothing
   "confidence":  <float>
 }
 """
+    return system_prompt
 
+
+def build_vision_request(image_path: str) -> Dict[str, Any]:
+    """Load the chart image and build the chat-completions payload
+
+    Shared by the blocking analyze_image() and the async client in vision_client.py.
+    """
+    image_part = _vision_image_part(_load_chart_bytes(image_path))
+    symbol = _symbol_from_path(image_path)
+    system_prompt = _system_prompt()
+
+    # Construct payload with the image
+    payload = {
+        "model": VISION_MODEL,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": f"Analyze this {symbol} forex chart and identify the most promising trading opportunity if one exists. Assess the current trend, support/resistance levels, and indicator readings (EMA 20/50, RSI, MACD, ATR). Identify any high-probability chart patterns or setups. Provide precise entry, stop loss and take profit levels based on the visible price action. If using fractional pips, round to standard 5-digit price format."
+                    },
+                    image_part
+                ]
+            }
+        ],
+        "response_format": {"type": "json_object"}
+    }
+    return payload
+
+
+_MULTI_CHART_PROMPT = """
+
+────────────────────────────────────────
+➕ MULTI-CHART REQUESTS
+When the user message contains several charts of the same symbol (one per time-frame), analyse each
+chart on its own merits – using the higher time-frames as context for the lower ones – and give one
+signal per time-frame.  This replaces the single-object response format above: respond **only** with
+one JSON object keyed by the time-frame labels given in the user message, e.g.
+
+```json
+{
+  "M15": {"action": "...", "entry": <float>, "sl": <float>, "tp": <float>, "confidence": <float>},
+  "H1":  {"action": "...", "entry": <float>, "sl": <float>, "tp": <float>, "confidence": <float>}
+}
+```
+Every listed time-frame must appear exactly once.
+"""
+
+
+def _timeframe_order(timeframe: str) -> int:
+    return TIMEFRAME_SECONDS.get(timeframe, 3600)
+
+
+def build_multi_vision_request(symbol: str, charts: Dict[str, str]) -> Dict[str, Any]:
+    """One chat-completions payload for several timeframes of *symbol*
+
+    *charts* maps timeframe → image path.  The system prompt is sent once;
+    the charts follow in ascending timeframe order, each preceded by a
+    label the model echoes back as the JSON key.
+    """
+    timeframes = sorted(charts, key=_timeframe_order)
+    content: List[Dict[str, Any]] = [{
+        "type": "text",
+        "text": f"Analyze these {symbol} forex charts ({', '.join(timeframes)}) and identify the most promising trading opportunity on each time-frame if one exists. Assess the current trend, support/resistance levels, and indicator readings (EMA 20/50, RSI, MACD, ATR). Identify any high-probability chart patterns or setups. Provide precise entry, stop loss and take profit levels based on the visible price action. If using fractional pips, round to standard 5-digit price format."
+    }]
+    for timeframe in timeframes:
+        content.append({"type": "text", "text": f"Time-frame {timeframe}: {os.path.basename(charts[timeframe])}"})
+        content.append(_vision_image_part(_load_chart_bytes(charts[timeframe])))
+
+    return {
+        "model": VISION_MODEL,
+        "messages": [
+            {"role": "system", "content": _system_prompt() + _MULTI_CHART_PROMPT},
+            {"role": "user", "content": content},
+        ],
+        "response_format": {"type": "json_object"}
+    }
+
+
+_REQUIRED_FIELDS = ['action', 'entry', 'sl', 'tp', 'confidence']
+
+
+def parse_multi_vision_response(result: Dict[str, Any], timeframes: List[str]) -> Dict[str, Dict[str, Any]]:
+    """{timeframe: signal dict} from a multi-chart response; {} for missing / invalid entries"""
+    signals: Dict[str, Dict[str, Any]] = {tf: {} for tf in timeframes}
+    try:
+        content = json.loads(result['choices'][0]['message']['content'])
+    except (KeyError, IndexError, TypeError, json.JSONDecodeError):
+        logger.error(f"Unexpected multi-chart response format from OpenAI: {result}")
+        return signals
+
+    by_tf = content.get("signals", content) if isinstance(content, dict) else {}
+    for timeframe in timeframes:
+        entry = by_tf.get(timeframe)
+        if isinstance(entry, dict) and all(field in entry for field in _REQUIRED_FIELDS):
+            signals[timeframe] = entry
+        else:
+            logger.error(f"Missing or invalid {timeframe} signal in multi-chart response: {entry}")
+    logger.info(f"Successfully analyzed {len(timeframes)} charts: {signals}")
+    return signals
+
+
+def parse_vision_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract and validate the trading-signal JSON from a chat-completions response"""
+    if 'choices' in result and len(result['choices']) > 0:
+        content = result['choices'][0]['message']['content']
         
-        # Construct payload with the image
-        payload = {
-            "model": VISION_MODEL,
-            "messages": [
-                {
-                    "role": "system",
-                    "content": system_prompt
-                },
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"Analyze this {symbol} forex chart and identify the most promising trading opportunity if one exists. Assess the current trend, support/resistance levels, and indicator readings (EMA 20/50, RSI, MACD, ATR). Identify any high-probability chart patterns or setups. Provide precise entry, stop loss and take profit levels based on the visible price action. If using fractional pips, round to standard 5-digit price format."
-                        },
-                        {
-                            "type": "image_url",
-                            "image_url": {
-                                "url": f"data:image/png;base64,{image_base64}"
-                            }
-                        }
-                    ]
-                }
-            ],
-            "response_format": {"type": "json_object"}
-        }
-        
-        # Send to OpenAI Vision API with a timeout
-        logger.info(f"Sending request to OpenAI Vision API using model: {VISION_MODEL}")
+        # Extract JSON from the response
+        import json
         try:
-            response = requests.post(VISION_API_URL, headers=headers, json=payload, timeout=REQUEST_TIMEOUT)
-            response.raise_for_status()
-        except requests.exceptions.Timeout:
-            logger.error(f"OpenAI API request timed out after {REQUEST_TIMEOUT} seconds")
-            raise Exception("Vision API request timed out")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"OpenAI API request failed: {e}")
-            raise Exception(f"Vision API request failed: {e}")
-        
-        # Parse the response
+            trading_signal = json.loads(content)
+            # Validate required fields
+            required_fields = ['action', 'entry', 'sl', 'tp', 'confidence']
+            if all(field in trading_signal for field in required_fields):
+                logger.info(f"Successfully analyzed chart: {trading_signal}")
+                return trading_signal
+            else:
+                logger.error(f"Missing required fields in response: {content}")
+        except json.JSONDecodeError:
+            logger.error(f"Could not parse JSON from response: {content}")
+    
+    logger.error(f"Unexpected response format from OpenAI: {result}")
+    return {}
+
+
+def _image_count(payload: Dict[str, Any]) -> int:
+    """Number of image parts in a chat-completions payload"""
+    return sum(
+        1
+        for message in payload.get("messages", [])
+        if isinstance(message.get("content"), list)
+        for part in message["content"]
+        if part.get("type") == "image_url"
+    )
+
+
+def _post_vision(payload: Dict[str, Any], symbol: Optional[str] = None) -> Dict[str, Any]:
+    """POST a chat-completions payload; returns the decoded response body
+
+    The call is checked against and recorded in vision_budget (latency,
+    payload bytes, token usage).  Raises VisionBudgetExceeded without
+    sending anything when the budget is spent.
+    """
+    allowed, details = vision_budget.allow()
+    if not allowed:
+        raise VisionBudgetExceeded(f"Vision budget exhausted ({details})")
+
+    # Build request for OpenAI API
+    headers = {
+        'Authorization': f'Bearer {OPENAI_API_KEY}',
+        'Content-Type': 'application/json'
+    }
+    body = json.dumps(payload).encode()
+    
+    # Send to OpenAI Vision API with a timeout
+    logger.info(f"Sending request to OpenAI Vision API using model: {VISION_MODEL}")
+    start = time.monotonic()
+    try:
+        response = requests.post(VISION_API_URL, headers=headers, data=body, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
         result = response.json()
-        if 'choices' in result and len(result['choices']) > 0:
-            content = result['choices'][0]['message']['content']
+    except requests.exceptions.Timeout:
+        vision_budget.record(time.monotonic() - start, len(body), symbol=symbol,
+                             images=_image_count(payload), ok=False)
+        logger.error(f"OpenAI API request timed out after {REQUEST_TIMEOUT} seconds")
+        raise Exception("Vision API request timed out")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        vision_budget.record(time.monotonic() - start, len(body), symbol=symbol,
+                             images=_image_count(payload), ok=False)
+        logger.error(f"OpenAI API request failed: {e}")
+        raise Exception(f"Vision API request failed: {e}")
+    vision_budget.record(time.monotonic() - start, len(body), result.get("usage"),
+                         symbol=symbol, images=_image_count(payload))
+    return result
+
+
+def analyze_image(image_path: Union[str, Dict[str, str]], symbol: Optional[str] = None) -> Dict[str, Any]:
+    """Send image to Vision API for analysis with OpenAI
+
+    Multi-chart mode: pass a {timeframe: path} mapping of charts for one
+    *symbol* to analyse them in a single request.  The result is then
+    {timeframe: signal dict}, with {} for timeframes that produced no
+    valid signal.
+
+    Raises VisionBudgetExceeded when vision_budget does not allow the call,
+    and RuntimeError / the underlying exception when the chart cannot be
+    read or the request fails – {} only ever means "no trade idea".
+    """
+    multi = isinstance(image_path, dict)
+    try:
+        if not OPENAI_API_KEY:
+            raise RuntimeError("OpenAI API key not found in environment variables")
             
-            # Extract JSON from the response
-            import json
-            try:
-                trading_signal = json.loads(content)
-                # Validate required fields
-                required_fields = ['action', 'entry', 'sl', 'tp', 'confidence']
-                if all(field in trading_signal for field in required_fields):
-                    logger.info(f"Successfully analyzed chart: {trading_signal}")
-                    return trading_signal
-                else:
-                    logger.error(f"Missing required fields in response: {content}")
-            except json.JSONDecodeError:
-                logger.error(f"Could not parse JSON from response: {content}")
-        
-        logger.error(f"Unexpected response format from OpenAI: {result}")
-        return {}
+        logger.info(f"Sending request to OpenAI Vision API")
+        if not multi:
+            symbol = symbol or _symbol_from_path(image_path)
+            return parse_vision_response(_post_vision(build_vision_request(image_path), symbol=symbol))
+
+        if len(image_path) == 1:
+            (timeframe, path), = image_path.items()
+            return {timeframe: analyze_image(path, symbol=symbol)}
+        symbol = symbol or _symbol_from_path(next(iter(image_path.values())))
+        payload = build_multi_vision_request(symbol, image_path)
+        return parse_multi_vision_response(_post_vision(payload, symbol=symbol), list(image_path))
 
+    except VisionBudgetExceeded:
+        raise
     except Exception as e:
         logger.error(f"Error analyzing image {image_path}: {str(e)}")
-        return {}
+        raise
+
+
+# Seconds a queued chart may still be in flight to disk before "missing" is final
+CHART_PERSIST_GRACE = float(os.environ.get("CHART_PERSIST_GRACE", 120))
+
+
+def _job_age(payload: Dict[str, Any]) -> float:
+    """Seconds since the capture job was created (inf when unknown)"""
+    try:
+        return (datetime.now() - datetime.fromisoformat(payload["ts"])).total_seconds()
+    except (KeyError, TypeError, ValueError):
+        return float("inf")
+
+
+def handle_vision_job(payload: Dict[str, Any]) -> bool:
+    """
+    Process one capture job from the vision queue.
+
+    A job carries either one chart ("timeframe" + "image_s3") or several
+    timeframes of one symbol ("charts": {timeframe: image_s3}), which are
+    analysed in a single Vision request.
+
+    Charts are read from the in-process handoff when the capture ran in this
+    process, otherwise from static/.  Raises PermanentJobError when the
+    charts are missing (no point retrying) and RuntimeError when a fresh
+    chart is still being written; a failing analyzer (Vision transport
+    error …) raises too, so the job is retried.  An empty result is the
+    analyzer's "no trade idea" and the job is done.
+    Returns True when a Signal was stored.
+    """
+    symbol = payload["symbol"]
+    charts = payload.get("charts") or {payload.get("timeframe") or "H1": payload.get("image_s3", "")}
+    paths = {tf: f"static/{image_s3}" for tf, image_s3 in charts.items()
+             if image_s3 and chart_handoff.available(f"static/{image_s3}")}
+    if not paths:
+        missing = ', '.join(charts.values()) or '-'
+        if _job_age(payload) < CHART_PERSIST_GRACE:
+            # rendered in another process and its background write has not landed yet
+            raise RuntimeError(f"chart not persisted yet: {missing}")
+        raise PermanentJobError(f"chart not found: {missing}")
+
+    with app.app_context():
+        due = gate_charts(symbol, paths)
+        if not due:
+            return False
+
+        try:
+            results = run_analyzers(symbol, due)
+        except VisionBudgetExceeded as e:
+            # a chart analysed after the budget resets would be stale – drop it
+            logger.warning(f"Skipping Vision for {symbol} ({', '.join(due)}): {e}")
+            return False
+        if not any(results.values()):
+            logger.info(f"No trade idea for {symbol} ({', '.join(due)})")
+            return False
+        stored = [
+            DirectVisionPipeline.process_chart(symbol, due[tf], vision_result=result)
+            for tf, result in results.items() if result
+        ]
+        return any(stored)
+
+
+def process_vision_queue(queue=None, until_empty: bool = False,
+                         stop_event: Optional[threading.Event] = None,
+                         idle_sleep: Optional[float] = None) -> int:
+    """
+    Consume capture jobs from the vision queue (SQLite or Redis backend).
 
+    Runs until *stop_event* is set, or – with *until_empty* – until no job
+    is due.  Returns the number of jobs handled.
+    """
+    queue = queue or get_job_queue()
+    idle_sleep = float(os.environ.get("VISION_WORKER_IDLE_SLEEP", 2)) if idle_sleep is None else idle_sleep
+    handled = 0
+    while not (stop_event and stop_event.is_set()):
+        job = queue.reserve(VISION_QUEUE)
+        if job is None:
+            if until_empty:
+                break
+            if stop_event:
+                stop_event.wait(idle_sleep)
+            else:
+                time.sleep(idle_sleep)
+            continue
+
+        logger.info(f"Vision job {job.id} for {job.payload.get('symbol')} (attempt {job.attempts})")
+        try:
+            handle_vision_job(job.payload)
+            queue.ack(job)
+        except PermanentJobError as e:
+            queue.fail(job, str(e), retry=False)
+        except Exception as e:
+            logger.exception(f"Vision job {job.id} failed: {e}")
+            queue.fail(job, str(e))
+        handled += 1
+    return handled
+
+
+_worker_stop = threading.Event()
+
+
+def start_worker_thread() -> threading.Thread:
+    """Run the queue consumer in a daemon thread of the current process"""
+    _worker_stop.clear()
+    thread = threading.Thread(target=process_vision_queue, kwargs={"stop_event": _worker_stop},
+                              name="vision-worker", daemon=True)
+    thread.start()
+    logger.info("Vision queue consumer thread started")
+    return thread
 
-def process_vision_queue():
-    """Process items from the Redis 'vision_queue' and push to 'signal_queue'."""
-    if not redis_client:
-        logger.error("Redis client not available, cannot process vision queue")
+
+def stop_worker_thread() -> None:
+    """Ask the consumer thread to exit once its current job is done"""
+    _worker_stop.set()
+
+
+async def _process_charts_concurrently(pipeline: DirectVisionPipeline,
+                                       charts: List[Tuple[str, Dict[str, str]]]) -> None:
+    """Run Vision for every symbol at once (one request per symbol), storing signals as results arrive
+
+    Only when Vision is the primary analyzer; any other analyzer runs per
+    symbol through pipeline.process_charts() (gate, analyzers, shadows).
+    A failed request is logged and not cached, so the next sweep retries it.
+    """
+    if primary_analyzer_name() != "vision":
+        for symbol, by_tf in charts:
+            outcome = pipeline.process_charts(symbol, by_tf)
+            logger.info(f"{primary_analyzer_name()} analysis for {symbol}: {outcome}")
+        logger.info(f"Pre-Vision gate: {vision_gate.stats()}")
         return
 
-    # This is just a placeholder function since we're not using Redis
-    # The actual processing happens in DirectVisionPipeline
-    logger.info("Redis not available, using DirectVisionPipeline instead")
-    time.sleep(5)  # Sleep to avoid CPU spinning
-    return
+    from vision_client import AsyncVisionClient
+    
+    # Charts that cannot produce a tradable signal never reach the model;
+    # near-identical charts re-use their previous analysis without a call
+    fingerprints, to_send, sent, analysed = {}, [], {}, {}
+    for symbol, by_tf in charts:
+        due = gate_charts(symbol, by_tf)
+        analysed[symbol] = (due, {}, 0.0)
+        misses = {}
+        for timeframe, path in due.items():
+            cached, fingerprints[(symbol, timeframe)] = vision_cache.lookup(symbol, path)
+            if cached is not None:
+                analysed[symbol][1][timeframe] = cached
+                pipeline.process_chart(symbol, path, vision_result=cached)
+            else:
+                misses[timeframe] = path
+        if misses:
+            sent[symbol] = misses
+            to_send.append((symbol, misses))
+    
+    async with AsyncVisionClient() as client:
+        async for symbol, results, elapsed in client.analyze_many(to_send):
+            due, symbol_results, _ = analysed[symbol]
+            if isinstance(results, Exception):
+                # nothing cached or stored, so the next sweep asks again
+                logger.error(f"Vision analysis for {symbol} ({', '.join(sent[symbol])}) failed: {results}")
+                analysed[symbol] = ({tf: path for tf, path in due.items() if tf not in sent[symbol]},
+                                    symbol_results, 0.0)
+                continue
+            logger.info(f"Vision analysis for {symbol} ({', '.join(sent[symbol])}) finished in {elapsed:.1f}s")
+            analysed[symbol] = (due, symbol_results, elapsed / len(sent[symbol]))
+            for timeframe, path in sent[symbol].items():
+                vision_result = results.get(timeframe, {})
+                symbol_results[timeframe] = vision_result
+                vision_cache.store(fingerprints[(symbol, timeframe)], vision_result,
+                                   seconds=elapsed / len(sent[symbol]))
+                if pipeline.process_chart(symbol, path, vision_result=vision_result):
+                    logger.info(f"Successfully processed {timeframe} chart for {symbol}")
+                else:
+                    logger.error(f"Failed to process {timeframe} chart for {symbol}")
+    
+    # Shadow analyzers see the same charts as in the queue path
+    for symbol, (due, symbol_results, seconds) in analysed.items():
+        if due:
+            run_shadows(symbol, due, "vision", seconds, symbol_results)
+    
+    logger.info(f"Vision cache: {vision_cache.stats()}")
+    logger.info(f"Pre-Vision gate: {vision_gate.stats()}")
 
 
 def process_charts_directory():
     """Process all charts in static/charts directory"""
     import os
-    import glob
     import time
     from datetime import datetime
     
@@ -625,32 +1207,29 @@ def process_charts_directory():
                     # Wait a bit to not overwhelm the API
                     time.sleep(1)
             
-            # Process the charts
-            pipeline = DirectVisionPipeline()
+            # Collect the latest chart per symbol and multi-chart timeframe
+            charts = []
             for symbol in symbols:
-                # Look for the most recent chart for this symbol
                 mt5_symbol = symbol.replace('_', '')
                 chart_dir = f"{charts_dir}/{mt5_symbol}"
                 
-                # Get all PNG files in the directory, sorted by modification time (newest first)
-                chart_files = glob.glob(f"{chart_dir}/*.png")
-                if not chart_files:
-                    logger.warning(f"No chart files found in {chart_dir}")
-                    continue
-                    
-                chart_files.sort(key=os.path.getmtime, reverse=True)
-                latest_chart = chart_files[0]
-                
-                logger.info(f"Processing latest chart for {symbol}: {latest_chart}")
-                success = pipeline.process_chart(symbol, latest_chart)
+                # Newest indexed charts for this symbol (primary-key lookups in the chart store)
+                by_tf = {tf: chart_store.latest_path(symbol, tf) for tf in VISION_MULTI_TIMEFRAMES}
+                by_tf = {tf: path for tf, path in by_tf.items() if path}
+                if not by_tf:
+                    latest_chart = chart_store.latest_path(symbol)
+                    if not latest_chart:
+                        logger.warning(f"No indexed chart files found for {symbol} in {chart_dir}")
+                        continue
+                    by_tf = {chart_timeframe(latest_chart): latest_chart}
                 
-                if success:
-                    logger.info(f"Successfully processed chart for {symbol}")
-                else:
-                    logger.error(f"Failed to process chart for {symbol}")
-                    
-                # Wait a bit to not overwhelm the OpenAI API
-                time.sleep(1)
+                logger.info(f"Queueing latest charts for {symbol}: {by_tf}")
+                charts.append((symbol, by_tf))
+            
+            # Analyse all of them concurrently; rate limiting is done by the client
+            start = time.monotonic()
+            asyncio.run(_process_charts_concurrently(DirectVisionPipeline(), charts))
+            logger.info(f"Processed charts for {len(charts)} symbols in {time.monotonic() - start:.1f}s")
                     
     except Exception as e:
         logger.error(f"Error in process_charts_directory: {str(e)}")
@@ -658,6 +1237,15 @@ def process_charts_directory():
         logger.error(traceback.format_exc())
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Vision worker")
+    parser.add_argument("--sweep", action="store_true",
+                        help="analyse the latest chart of every asset once instead of consuming the queue")
+    parser.add_argument("--drain", action="store_true",
+                        help="exit when no job is due instead of waiting for more")
+    args = parser.parse_args()
+
     # Setup more verbose logging
     logging.basicConfig(
         level=logging.DEBUG,
@@ -671,11 +1259,17 @@ if __name__ == "__main__":
     else:
         logger.info("OpenAI API key found.")
     
-    # Since Redis is not available, use direct processing
-    logger.info("Redis not available, using direct chart processing instead")
-    
-    # Import datetime here for use in the log
-    from datetime import datetime
-    
-    # Process all charts in the directory
-    process_charts_directory()
+    if args.sweep:
+        # Process all charts in the directory
+        process_charts_directory()
+    else:
+        # Scoring reads the correlation matrix; this process keeps its own copy fresh
+        from correlation_service import correlation_service
+        threading.Thread(target=correlation_service.run_refresher, name="correlation-refresh",
+                         daemon=True).start()
+        logger.info(f"Consuming {VISION_QUEUE}")
+        try:
+            handled = process_vision_queue(until_empty=args.drain)
+            logger.info(f"Vision worker handled {handled} job(s)")
+        except KeyboardInterrupt:
+            logger.info("Vision worker stopped")